@@ -65,7 +65,8 @@ class Model(object):
         self.exog = self.data.exog
         self.endog = self.data.endog
         self._data_attr = []
-        self._data_attr.extend(['exog', 'endog', 'data.exog', 'data.endog'])
+        self._data_attr.extend(['exog', 'endog', 'data.exog', 'data.endog',
+                                '_group_codes_cache'])
         if 'formula' not in kwargs:  # won't be able to unpickle without these
             self._data_attr.extend(['data.orig_endog', 'data.orig_exog'])
         # store keys for extras if we need to recreate model instance
@@ -143,11 +143,45 @@ def _get_margeff_exog(exog, at, atexog, ind):
         exog[0,~ind] = 1
     return exog
 
+def _predict_replaced(model, params, exog, col_idx, col_values):
+    """
+    Predictions with each column in col_idx replaced by col_values
+
+    Each column is replaced separately and all replacements are evaluated at
+    once through the linear predictor, so no modified copies of exog are
+    needed. The replaced column is in axis 1 of the returned array.
+    """
+    params = params[:exog.shape[1]]
+    linpred = np.dot(exog, params)
+    delta = col_values - exog[:, col_idx]
+    if params.ndim == 1:
+        linpred = linpred[:, None] + delta * params[col_idx]
+    else: # multi-equation, params is K x (J-1)
+        linpred = linpred[:, None, :] + delta[:, :, None] * params[col_idx]
+    return model._predict_index(linpred)
+
 def _get_count_effects(effects, exog, count_ind, method, model, params):
     """
     If there's a count variable, the predicted difference is taken by
     subtracting one and adding one to exog then averaging the difference
     """
+    if not hasattr(model, '_predict_index'):
+        return _get_count_effects_loop(effects, exog, count_ind, method,
+                                       model, params)
+    count_vals = exog[:, count_ind]
+    effect0 = _predict_replaced(model, params, exog, count_ind,
+                                count_vals - 1)
+    effect1 = _predict_replaced(model, params, exog, count_ind,
+                                count_vals + 1)
+    #NOTE: done by analogy with dummy effects but untested bc
+    # stata doesn't handle both count and eydx anywhere
+    if 'ey' in method:
+        effect0 = np.log(effect0)
+        effect1 = np.log(effect1)
+    effects[:, count_ind] = (effect1 - effect0) / 2
+    return effects
+
+def _get_count_effects_loop(effects, exog, count_ind, method, model, params):
     # this is the index for the effect and the index for count col in exog
     for i in count_ind:
         exog0 = exog.copy()
@@ -155,8 +189,6 @@ def _get_count_effects(effects, exog, count_ind, method, model, params):
         effect0 = model.predict(params, exog0)
         exog0[:, i] += 2
         effect1 = model.predict(params, exog0)
-        #NOTE: done by analogy with dummy effects but untested bc
-        # stata doesn't handle both count and eydx anywhere
         if 'ey' in method:
             effect0 = np.log(effect0)
             effect1 = np.log(effect1)
@@ -168,12 +200,24 @@ def _get_dummy_effects(effects, exog, dummy_ind, method, model, params):
     If there's a dummy variable, the predicted difference is taken at
     0 and 1
     """
+    if not hasattr(model, '_predict_index'):
+        return _get_dummy_effects_loop(effects, exog, dummy_ind, method,
+                                       model, params)
+    zeros = np.zeros((exog.shape[0], len(dummy_ind)))
+    effect0 = _predict_replaced(model, params, exog, dummy_ind, zeros)
+    effect1 = _predict_replaced(model, params, exog, dummy_ind, zeros + 1)
+    if 'ey' in method:
+        effect0 = np.log(effect0)
+        effect1 = np.log(effect1)
+    effects[:, dummy_ind] = effect1 - effect0
+    return effects
+
+def _get_dummy_effects_loop(effects, exog, dummy_ind, method, model, params):
     # this is the index for the effect and the index for dummy col in exog
     for i in dummy_ind:
-        exog0 = exog.copy() # only copy once, can we avoid a copy?
+        exog0 = exog.copy()
         exog0[:,i] = 0
         effect0 = model.predict(params, exog0)
-        #fittedvalues0 = np.dot(exog0,params)
         exog0[:,i] = 1
         effect1 = model.predict(params, exog0)
         if 'ey' in method:
@@ -191,6 +235,79 @@ def _effects_at(effects, at):
         effects = effects[0,:]
     return effects
 
+def _margeff_jacobian_index(params, exog, transform, cdf, pdf, dpdf):
+    """
+    Analytic Jacobian of the marginal effects for single index models.
+
+    Parameters
+    ----------
+    params : ndarray
+        The parameters of the index, of length k_vars.
+    exog : ndarray
+        nobs x k_vars exogenous variables at which the marginal effects are
+        evaluated.
+    transform : str
+        One of 'dydx', 'eyex', 'dyex', 'eydx'.
+    cdf, pdf, dpdf : ndarray
+        The prediction F, and its first and second derivative with respect
+        to the linear predictor evaluated at dot(exog, params).
+
+    Returns
+    -------
+    jac : ndarray
+        The k_vars x k_vars Jacobian d margeff / d params averaged over the
+        rows of exog.
+
+    Notes
+    -----
+    The marginal effects are ``g(XB) * params[j] * s[j]`` where g is f or
+    f / F for the 'ey' transforms and s[j] is X[j] for the 'ex' transforms
+    and one otherwise, so that
+
+    d margeff[j] / d params[l] = g'(XB) * X[l] * params[j] * s[j] +
+                                 g(XB) * s[j] * 1[j == l]
+    """
+    nobs = exog.shape[0]
+    if 'ey' in transform:
+        g = pdf / cdf
+        dg = dpdf / cdf - g**2
+    else:
+        g = pdf
+        dg = dpdf
+    if 'ex' in transform:
+        jac = np.dot(exog.T, dg[:, None] * exog) / nobs
+        diag = np.dot(g, exog) / nobs
+    else:
+        jac = np.tile(np.dot(dg, exog) / nobs, (len(params), 1))
+        diag = np.repeat(g.mean(), len(params))
+    jac *= params[:, None]
+    jac[np.diag_indices_from(jac)] += diag
+    return jac
+
+def _derivative_predict_replaced(model, params, exog, col_idx, col_values,
+                                 method):
+    """
+    Averaged [d F / d params] with each column in col_idx replaced by
+    col_values, see `_derivative_predict`.
+
+    Returns an array of shape len(col_idx) x k_vars, or None if the model
+    does not provide the derivatives of its index function.
+    """
+    try:
+        linpred = np.dot(exog, params)
+        delta = col_values - exog[:, col_idx]
+        linpred = linpred[:, None] + delta * params[col_idx]
+        dF = model._index_derivatives(linpred)[0]
+    except (AttributeError, NotImplementedError):
+        return None
+    if 'ey' in method:
+        dF = dF / model._predict_index(linpred)
+    nobs = exog.shape[0]
+    dfdb = np.dot(dF.T, exog) / nobs
+    # the replaced column itself
+    dfdb[np.arange(len(col_idx)), col_idx] = (dF * col_values).mean(0)
+    return dfdb
+
 def _margeff_cov_params_dummy(model, cov_margins, params, exog, dummy_ind,
         method, J):
     """
@@ -206,6 +323,16 @@ def _margeff_cov_params_dummy(model, cov_margins, params, exog, dummy_ind,
 
     Where F is the default prediction of the model.
     """
+    if J == 1 and len(params) == exog.shape[1]:
+        zeros = np.zeros((exog.shape[0], len(dummy_ind)))
+        dfdb0 = _derivative_predict_replaced(model, params, exog, dummy_ind,
+                                             zeros, method)
+        dfdb1 = _derivative_predict_replaced(model, params, exog, dummy_ind,
+                                             zeros + 1, method)
+        if dfdb0 is not None:
+            cov_margins[dummy_ind, :] = dfdb1 - dfdb0
+            return cov_margins
+
     for i in dummy_ind:
         exog0 = exog.copy()
         exog1 = exog.copy()
@@ -238,6 +365,16 @@ def _margeff_cov_params_count(model, cov_margins, params, exog, count_ind,
 
     where F is the default prediction for the model.
     """
+    if J == 1 and len(params) == exog.shape[1]:
+        count_vals = exog[:, count_ind]
+        dfdb0 = _derivative_predict_replaced(model, params, exog, count_ind,
+                                             count_vals - 1, method)
+        dfdb1 = _derivative_predict_replaced(model, params, exog, count_ind,
+                                             count_vals + 1, method)
+        if dfdb0 is not None:
+            cov_margins[count_ind, :] = (dfdb1 - dfdb0) / 2
+            return cov_margins
+
     for i in count_ind:
         exog0 = exog.copy()
         exog0[:,i] -= 1
@@ -288,7 +425,8 @@ def margeff_cov_params(model, params, exog, cov_params, at, derivative,
         respect to the exogenous variables evaluated at exog. Expected to be
         called derivative(params, exog). This will be numerically
         differentiated. Otherwise, it can be the Jacobian of the marginal
-        effects with respect to the parameters.
+        effects of the continuous regressors with respect to the parameters,
+        averaged over exog for 'overall'.
     dummy_ind : array-like
         Indices of the columns of exog that contain dummy variables
     count_ind : array-like
@@ -303,11 +441,13 @@ def margeff_cov_params(model, params, exog, cov_params, at, derivative,
     where V is the parameter variance-covariance.
 
     The outer Jacobians are computed via numerical differentiation if
-    derivative is a function.
+    derivative is a function. The rows for discrete regressors in dummy_ind
+    and count_ind are replaced by the Jacobian of the discrete changes in
+    both cases.
     """
+    params = params.ravel('F')  # for Multinomial
     if callable(derivative):
         from statsmodels.tools.numdiff import approx_fprime_cs
-        params = params.ravel('F')  # for Multinomial
         try:
             jacobian_mat = approx_fprime_cs(params, derivative,
                                             args=(exog,method))
@@ -319,14 +459,15 @@ def margeff_cov_params(model, params, exog, cov_params, at, derivative,
             jacobian_mat = np.mean(jacobian_mat, axis=1)
         else:
             jacobian_mat = jacobian_mat.squeeze()  # exog was 2d row vector
-        if dummy_ind is not None:
-            jacobian_mat = _margeff_cov_params_dummy(model, jacobian_mat,
-                                params, exog, dummy_ind, method, J)
-        if count_ind is not None:
-            jacobian_mat = _margeff_cov_params_count(model, jacobian_mat,
-                                params, exog, count_ind, method, J)
     else:
-        jacobian_mat = derivative
+        jacobian_mat = np.array(derivative, dtype=float)
+
+    if dummy_ind is not None:
+        jacobian_mat = _margeff_cov_params_dummy(model, jacobian_mat,
+                            params, exog, dummy_ind, method, J)
+    if count_ind is not None:
+        jacobian_mat = _margeff_cov_params_count(model, jacobian_mat,
+                            params, exog, count_ind, method, J)
 
     #NOTE: this won't go through for at == 'all'
     return np.dot(np.dot(jacobian_mat, cov_params), jacobian_mat.T)
@@ -659,7 +800,9 @@ class DiscreteMargins(object):
         method = method.lower()
         at = at.lower()
         _check_margeff_args(at, method)
-        self.margeff_options = dict(method=method, at=at)
+        self.margeff_options = dict(method=method, at=at, dummy=bool(dummy),
+                                    count=bool(count))
+        self._atexog = atexog
         results = self.results
         model = results.model
         params = results.params
@@ -699,9 +842,15 @@ class DiscreteMargins(object):
                 self.margeff = effects[:, effects_idx]
         else:
             # Set standard error of the marginal effects by Delta method.
+            # Use the analytic Jacobian if the model provides it.
+            try:
+                derivative = model._derivative_exog_params(params, exog,
+                                                           method)
+            except (AttributeError, NotImplementedError):
+                derivative = model._derivative_exog
             margeff_cov, margeff_se = margeff_cov_with_se(model, params, exog,
                                                 results.cov_params(), at,
-                                                model._derivative_exog,
+                                                derivative,
                                                 dummy_idx, count_idx,
                                                 method, J)
 
@@ -449,6 +449,41 @@ class BinaryModel(DiscreteModel):
         return L1BinaryResultsWrapper(discretefit)
     fit_regularized.__doc__ = DiscreteModel.fit_regularized.__doc__
 
+    def _predict_index(self, linpred):
+        """
+        Predicted probabilities as a function of the linear predictor.
+
+        `linpred` can have any shape. Used to evaluate the marginal effects
+        of all discrete regressors at once.
+        """
+        return self.cdf(linpred)
+
+    def _index_derivatives(self, linpred):
+        """
+        First and second derivative of `_predict_index` at `linpred`.
+
+        Used for the analytic Jacobian of the marginal effects. Subclasses
+        that do not implement it fall back to numerical differentiation.
+        """
+        raise NotImplementedError
+
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        Jacobian of the marginal effects of the continuous regressors with
+        respect to params, averaged over the rows of `exog`.
+
+        Returns an array of shape k_vars x k_params. Raises
+        NotImplementedError if the model does not provide the analytic
+        derivatives of its index function.
+        """
+        from statsmodels.discrete.discrete_margins import (
+                _margeff_jacobian_index)
+        linpred = np.dot(exog, params)
+        cdf = self._predict_index(linpred)
+        pdf, dpdf = self._index_derivatives(linpred)
+        return _margeff_jacobian_index(params, exog, transform, cdf, pdf,
+                                       dpdf)
+
     def _derivative_predict(self, params, exog=None, transform='dydx'):
         """
         For computing marginal effects standard errors.
@@ -610,6 +645,77 @@ class MultinomialModel(BinaryModel):
     fit_regularized.__doc__ = DiscreteModel.fit_regularized.__doc__
 
 
+    def _predict_index(self, linpred):
+        """
+        Predicted probabilities as a function of the linear predictor.
+
+        `linpred` has the J-1 equations in the last axis, any leading
+        axes are preserved. The result has J columns in the last axis.
+        """
+        shape = linpred.shape
+        prob = self.cdf(linpred.reshape(-1, shape[-1]))
+        return prob.reshape(shape[:-1] + (shape[-1] + 1,))
+
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        Jacobian of the marginal effects of the continuous regressors with
+        respect to params, averaged over the rows of `exog`.
+
+        Rows are ordered as the flattened marginal effects returned by
+        `_derivative_exog` and columns as ``params.ravel('F')``, so the
+        result has shape (K*J) x (K*(J-1)).
+
+        Notes
+        -----
+        The marginal effect of variable j on the probability of choice k is
+        ``P[k] * (params[j, k] - sum_m P[m] * params[j, m])``, and the
+        derivatives with respect to the params follow from
+        ``dP[k] / dparams[l, c] = P[k] * (1[k == c] - P[c]) * x[l]``.
+        """
+        J = int(self.J)
+        K = int(self.K)
+        if params.ndim == 1:
+            params = params.reshape(K, J-1, order='F')
+        nobs = exog.shape[0]
+        zeroparams = np.c_[np.zeros(K), params]
+        prob = self._predict_index(np.dot(exog, params))
+        # dev[i, j, k] = params[j, k] - sum_m prob[i, m] * params[j, m]
+        dev = zeroparams[None, :, :] - np.dot(prob, zeroparams.T)[:, :, None]
+        if 'ex' in transform:
+            scale = exog
+        else:
+            scale = np.ones_like(exog)
+        is_ey = 'ey' in transform
+        if is_ey:
+            weight = np.ones_like(prob)
+        else:
+            weight = prob
+        prob_c = prob[:, 1:]
+        # own and cross terms of dP / dparams, only without 'ey'
+        jac = np.zeros((K, J, K, J-1))
+        if not is_ey:
+            margeff = scale[:, :, None] * prob[:, None, :] * dev
+            own = np.tensordot(margeff, exog, axes=(0, 0))
+            for c in range(1, J):
+                jac[:, c, :, c-1] += own[:, c, :]
+            jac -= np.tensordot(margeff, prob_c[:, None, :] *
+                                exog[:, :, None], axes=(0, 0))
+
+        # derivatives of dev, dev[i, j, k] depends on params[j, k] directly
+        sw = scale[:, :, None] * weight[:, None, :]
+        direct = sw.sum(0)
+        for c in range(1, J):
+            jac[np.arange(K), c, np.arange(K), c-1] += direct[:, c]
+        for j in range(K):
+            jac[j] -= np.tensordot(sw[:, j, :], exog[:, :, None] *
+                                   (prob_c * dev[:, j, 1:])[:, None, :],
+                                   axes=(0, 0))
+        cross = np.tensordot(sw, prob_c, axes=(0, 0))
+        jac[np.arange(K), :, np.arange(K), :] -= cross
+
+        jac /= nobs
+        return jac.reshape(K * J, K * (J-1), order='F')
+
     def _derivative_predict(self, params, exog=None, transform='dydx'):
         """
         For computing marginal effects standard errors.
@@ -763,6 +869,41 @@ class CountModel(DiscreteModel):
         else:
             return np.dot(exog, params[:exog.shape[1]]) + exposure + offset
 
+    def _predict_index(self, linpred):
+        """
+        Predicted mean as a function of the linear predictor.
+
+        Offset and exposure are not included, as in `predict` when exog is
+        given. `linpred` can have any shape.
+        """
+        return np.exp(linpred)
+
+    def _index_derivatives(self, linpred):
+        """
+        First and second derivative of `_predict_index` at `linpred`.
+        """
+        mu = np.exp(linpred)
+        return mu, mu
+
+    def _derivative_exog_params(self, params, exog, transform='dydx'):
+        """
+        Jacobian of the marginal effects of the continuous regressors with
+        respect to params, averaged over the rows of `exog`.
+
+        Returns an array of shape k_vars x k_params. Raises
+        NotImplementedError for models with extra parameters, e.g. the
+        dispersion parameter of NegativeBinomial.
+        """
+        if len(params) != exog.shape[1]:
+            raise NotImplementedError
+        from statsmodels.discrete.discrete_margins import (
+                _margeff_jacobian_index)
+        linpred = np.dot(exog, params)
+        mu = self._predict_index(linpred)
+        pdf, dpdf = self._index_derivatives(linpred)
+        return _margeff_jacobian_index(params, exog, transform, mu, pdf,
+                                       dpdf)
+
     def _derivative_predict(self, params, exog=None, transform='dydx'):
         """
         For computing marginal effects standard errors.
@@ -1237,6 +1378,14 @@ class Logit(BinaryModel):
         X = np.asarray(X)
         return np.exp(-X)/(1+np.exp(-X))**2
 
+    def _index_derivatives(self, linpred):
+        """
+        The logistic pdf and its derivative at `linpred`.
+        """
+        cdf = self.cdf(linpred)
+        pdf = cdf * (1 - cdf)
+        return pdf, pdf * (1 - 2 * cdf)
+
     def loglike(self, params):
         """
         Log-likelihood of logit model.
@@ -1438,6 +1587,13 @@ class Probit(BinaryModel):
         X = np.asarray(X)
         return stats.norm._pdf(X)
 
+    def _index_derivatives(self, linpred):
+        """
+        The normal pdf and its derivative at `linpred`.
+        """
+        pdf = self.pdf(linpred)
+        return pdf, -linpred * pdf
+
 
     def loglike(self, params):
         """
@@ -2499,9 +2655,28 @@ class DiscreteResults(base.LikelihoodModelResults):
         -----
         When using after Poisson, returns the expected number of events
         per period, assuming that the model is loglinear.
+
+        If `atexog` is None, the marginal effects are cached by `at`,
+        `method`, `dummy` and `count`, and repeated calls with the same
+        options return the same instance.
         """
         from statsmodels.discrete.discrete_margins import DiscreteMargins
-        return DiscreteMargins(self, (at, method, atexog, dummy, count))
+        if atexog is not None:
+            return DiscreteMargins(self, (at, method, atexog, dummy, count))
+
+        options = dict(method=method.lower(), at=at.lower(),
+                       dummy=bool(dummy), count=bool(count))
+        key = (options['at'], options['method'], options['dummy'],
+               options['count'])
+        cache = self.__dict__.setdefault('_margeff_cache', {})
+        margins = cache.get(key)
+        # the instance can be changed by calling its get_margeff method
+        if (margins is None or margins.margeff_options != options or
+                margins._atexog is not None):
+            margins = DiscreteMargins(self, (at, method, atexog, dummy,
+                                             count))
+            cache[key] = margins
+        return margins
 
     def summary(self, yname=None, xname=None, title=None, alpha=.05,
                 yname_list=None):
@@ -1433,6 +1433,52 @@ def test_binary_pred_table_zeros():
     assert_equal(res.pred_table(), expected)
 
 
+def test_margeff_analytic_jacobian():
+    from statsmodels.tools.numdiff import approx_fprime
+    np.random.seed(987125)
+    nobs = 200
+    exog = np.column_stack((np.ones(nobs), np.exp(np.random.randn(nobs)),
+                            np.random.uniform(0.5, 1.5, size=nobs)))
+    y_bin = (np.random.uniform(size=nobs) < 0.4).astype(float)
+    y_count = np.random.poisson(2, size=nobs)
+    y_multi = np.random.randint(0, 4, size=nobs)
+
+    cases = [(Logit(y_bin, exog), ['dydx', 'eyex', 'dyex', 'eydx']),
+             (Probit(y_bin, exog), ['dydx', 'eyex', 'dyex', 'eydx']),
+             (Poisson(y_count, exog), ['dydx', 'eyex', 'dyex', 'eydx']),
+             (MNLogit(y_multi, exog), ['dydx', 'eydx'])]
+    for mod, methods in cases:
+        params = mod.fit(disp=0).params
+        for method in methods:
+            jac = mod._derivative_exog_params(params, exog, method)
+            jac_num = approx_fprime(params.ravel('F'), mod._derivative_exog,
+                                    args=(exog, method), centered=True)
+            assert_allclose(jac, jac_num.mean(1), rtol=1e-6, atol=1e-8)
+
+
+def test_margeff_cache():
+    data = sm.datasets.spector.load()
+    data.exog = sm.add_constant(data.exog, prepend=False)
+    res = Logit(data.endog, data.exog).fit(disp=0)
+
+    me = res.get_margeff(dummy=True)
+    assert_(res.get_margeff(dummy=True) is me)
+    me_mean = res.get_margeff(at='mean', dummy=True)
+    assert_(me_mean is not me)
+    assert_(res.get_margeff(at='MEAN', dummy=1) is me_mean)
+
+    # atexog is not cached
+    atexog = {0: 3.}
+    assert_(res.get_margeff(atexog=atexog) is not res.get_margeff())
+
+    # changing the options of a cached instance invalidates it
+    me_dydx = res.get_margeff()
+    me_dydx.get_margeff(method='eydx')
+    me_dydx2 = res.get_margeff()
+    assert_(me_dydx2 is not me_dydx)
+    assert_equal(me_dydx2.margeff_options['method'], 'dydx')
+
+
 if __name__ == "__main__":
     import nose
     nose.runmodule(argv=[__file__, '-vvs', '-x', '--pdb'],
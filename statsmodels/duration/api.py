@@ -1,3 +1,3 @@
 from .hazard_regression import PHReg
-from .survfunc import (SurvfuncRight, survdiff,
+from .survfunc import (SurvfuncRight, survdiff, SurvivalTable,
                        CumIncidenceRight)
@@ -1,3 +1,4 @@
+import os
 import numpy as np
 from statsmodels.base import model
 import statsmodels.base.model as base
@@ -137,12 +138,10 @@ class PHSurvivalTime(object):
                              "after event or censoring times")
 
         # Get the row indices for the cases in each stratum
-        stu = np.unique(strata)
-        #sth = {x: [] for x in stu} # needs >=2.7
-        sth = dict([(x, []) for x in stu])
-        for i,k in enumerate(strata):
-            sth[k].append(i)
-        stratum_rows = [np.asarray(sth[k], dtype=np.int32) for k in stu]
+        stu, strata_ix = np.unique(strata, return_inverse=True)
+        ii = np.argsort(strata_ix, kind='mergesort')
+        splits = np.cumsum(np.bincount(strata_ix))[:-1]
+        stratum_rows = [ix.astype(np.int32) for ix in np.split(ii, splits)]
         stratum_names = stu
 
         # Remove strata with no events
@@ -155,108 +154,416 @@ class PHSurvivalTime(object):
         nstrat = len(stratum_rows)
         self.nstrat = nstrat
 
-        # Remove subjects whose entry time occurs after the last event
-        # in their stratum.
         for stx,ix in enumerate(stratum_rows):
-            last_failure = max(time[ix][status[ix] == 1])
+            failure_times = time[ix][status[ix] == 1]
 
-            # Stata uses < here, R uses <=
-            ii = [i for i,t in enumerate(entry[ix]) if
-                  t <= last_failure]
-            stratum_rows[stx] = stratum_rows[stx][ii]
+            # Remove subjects whose entry time occurs after the last
+            # event in their stratum (Stata uses < here, R uses <=), and
+            # subjects who are censored before the first event in
+            # their stratum.
+            ii = ((entry[ix] <= failure_times.max()) &
+                  (time[ix] >= failure_times.min()))
+            ix = ix[ii]
 
-        # Remove subjects who are censored before the first event in
-        # their stratum.
-        for stx,ix in enumerate(stratum_rows):
-            first_failure = min(time[ix][status[ix] == 1])
-
-            ii = [i for i,t in enumerate(time[ix]) if
-                  t >= first_failure]
-            stratum_rows[stx] = stratum_rows[stx][ii]
-
-        # Order by time within each stratum
-        for stx,ix in enumerate(stratum_rows):
+            # Order by time within each stratum
             ii = np.argsort(time[ix])
-            stratum_rows[stx] = stratum_rows[stx][ii]
-
-        if offset is not None:
-            self.offset_s = []
-            for stx in range(nstrat):
-                self.offset_s.append(offset[stratum_rows[stx]])
-        else:
-            self.offset_s = None
+            stratum_rows[stx] = ix[ii]
 
         # Number of informative subjects
         self.n_obs = sum([len(ix) for ix in stratum_rows])
 
-        # Split everything by stratum
-        self.time_s = []
-        self.exog_s = []
-        self.status_s = []
-        self.entry_s = []
-        for ix in stratum_rows:
-            self.time_s.append(time[ix])
-            self.exog_s.append(exog[ix,:])
-            self.status_s.append(status[ix])
-            self.entry_s.append(entry[ix])
-
         self.stratum_rows = stratum_rows
         self.stratum_names = stratum_names
 
+        # The data of all strata are held in single arrays, ordered by
+        # stratum and by time within stratum.  Stratum stx occupies
+        # positions row_ptr[stx]:row_ptr[stx+1].  The per-stratum
+        # attributes below are lists of views into these arrays.
+        if nstrat > 0:
+            rows = np.concatenate(stratum_rows)
+        else:
+            rows = np.zeros(0, dtype=np.int32)
+        self.row_ptr = np.r_[0, np.cumsum([len(ix) for ix in
+                                           stratum_rows])].astype(np.int64)
+        self.exog = exog[rows, :]
+        self.time = time[rows]
+        self.status = status[rows]
+        self.entry = entry[rows]
+        if offset is not None:
+            self.offset = offset[rows]
+        else:
+            self.offset = None
+
         # Precalculate some indices needed to fit Cox models.
         # Distinct failure times within a stratum are always taken to
         # be sorted in ascending order.
         #
-        # ufailt_ix[stx][k] is a list of indices for subjects who fail
-        # at the k^th sorted unique failure time in stratum stx
+        # fail_ix contains the indices (relative to the start of the
+        # stratum) of all subjects who fail, ordered by stratum and
+        # time, and fail_group contains the position of their failure
+        # time among the unique failure times of the stratum.  The
+        # failures of stratum stx are at fail_ptr[stx]:fail_ptr[stx+1].
         #
-        # risk_enter[stx][k] is a list of indices for subjects who
-        # enter the risk set at the k^th sorted unique failure time in
-        # stratum stx
+        # ufailt contains the unique failure times of all strata, those
+        # of stratum stx are at ufailt_ptr[stx]:ufailt_ptr[stx+1].
         #
-        # risk_exit[stx][k] is a list of indices for subjects who exit
-        # the risk set at the k^th sorted unique failure time in
-        # stratum stx
-        self.ufailt_ix, self.risk_enter, self.risk_exit, self.ufailt =\
-            [], [], [], []
-
-        for stx in range(self.nstrat):
+        # risk_first and risk_last contain for each subject the
+        # positions among the unique failure times of the stratum of
+        # the first and last failure times at which the subject is in
+        # the risk set.  Subjects with risk_first > risk_last are never
+        # at risk.
+        fail_ix, fail_group, ufailt = [], [], []
+        risk_first, risk_last = [], []
+        for stx in range(nstrat):
+            i0, i1 = self.row_ptr[stx], self.row_ptr[stx+1]
 
             # All failure times
-            ift = np.flatnonzero(self.status_s[stx] == 1)
-            ft = self.time_s[stx][ift]
+            ift = np.flatnonzero(self.status[i0:i1] == 1)
+            ft = self.time[i0:i1][ift]
 
             # Unique failure times
             uft = np.unique(ft)
-            nuft = len(uft)
 
-            # Indices of cases that fail at each unique failure time
-            #uft_map = {x:i for i,x in enumerate(uft)} # requires >=2.7
-            uft_map = dict([(x, i) for i,x in enumerate(uft)]) # 2.6
-            uft_ix = [[] for k in range(nuft)]
-            for ix,ti in zip(ift,ft):
-                uft_ix[uft_map[ti]].append(ix)
+            # Cases (failed or censored) enter the risk set at the
+            # last failure time not after their time, and exit the
+            # risk set at the first failure time not before their
+            # entry time.
+            ufailt.append(uft)
+            fail_ix.append(ift)
+            fail_group.append(np.searchsorted(uft, ft))
+            risk_last.append(np.searchsorted(uft, self.time[i0:i1],
+                                             "right") - 1)
+            risk_first.append(np.searchsorted(uft, self.entry[i0:i1]))
+
+        def concat(x, dtype):
+            if len(x) == 0:
+                return np.zeros(0, dtype=dtype)
+            return np.concatenate(x).astype(dtype)
+
+        self.fail_ptr = np.r_[0, np.cumsum([len(x) for x in
+                                            fail_ix])].astype(np.int64)
+        self.ufailt_ptr = np.r_[0, np.cumsum([len(x) for x in
+                                              ufailt])].astype(np.int64)
+        self._ufailt = concat(ufailt, np.float64)
+        self._fail_ix = concat(fail_ix, np.int32)
+        self._fail_group = concat(fail_group, np.int32)
+        self._risk_first = concat(risk_first, np.int32)
+        self._risk_last = concat(risk_last, np.int32)
+
+        def split(x, ptr):
+            return [x[ptr[stx]:ptr[stx+1]] for stx in range(nstrat)]
+
+        # Split everything by stratum
+        self.time_s = split(self.time, self.row_ptr)
+        self.exog_s = split(self.exog, self.row_ptr)
+        self.status_s = split(self.status, self.row_ptr)
+        self.entry_s = split(self.entry, self.row_ptr)
+        if offset is not None:
+            self.offset_s = split(self.offset, self.row_ptr)
+        else:
+            self.offset_s = None
+        self.ufailt = split(self._ufailt, self.ufailt_ptr)
+        self.fail_ix = split(self._fail_ix, self.fail_ptr)
+        self.fail_group = split(self._fail_group, self.fail_ptr)
+        self.risk_first = split(self._risk_first, self.row_ptr)
+        self.risk_last = split(self._risk_last, self.row_ptr)
+
+    # The index lists below are constructed from the compact arrays
+    # when first requested.
+
+    @cache_readonly
+    def ufailt_ix(self):
+        """
+        ufailt_ix[stx][k] is an array of indices for subjects who fail
+        at the k^th sorted unique failure time in stratum stx
+        """
+        return [_split_by_group(self.fail_ix[stx], self.fail_group[stx],
+                                len(self.ufailt[stx]))
+                for stx in range(self.nstrat)]
+
+    @cache_readonly
+    def risk_enter(self):
+        """
+        risk_enter[stx][k] is an array of indices for subjects who
+        enter the risk set at the k^th sorted unique failure time in
+        stratum stx
+        """
+        rslt = []
+        for stx in range(self.nstrat):
+            risk_last = self.risk_last[stx]
+            ii = np.flatnonzero(risk_last >= 0)
+            rslt.append(_split_by_group(ii, risk_last[ii],
+                                        len(self.ufailt[stx])))
+        return rslt
+
+    @cache_readonly
+    def risk_exit(self):
+        """
+        risk_exit[stx][k] is an array of indices for subjects who exit
+        the risk set at the k^th sorted unique failure time in stratum
+        stx
+        """
+        rslt = []
+        for stx in range(self.nstrat):
+            risk_first = self.risk_first[stx]
+            ii = np.arange(len(risk_first))
+            rslt.append(_split_by_group(ii, risk_first,
+                                        len(self.ufailt[stx])))
+        return rslt
+
 
-            # Indices of cases (failed or censored) that enter the
-            # risk set at each unique failure time.
-            risk_enter1 = [[] for k in range(nuft)]
-            for i,t in enumerate(self.time_s[stx]):
-                ix = np.searchsorted(uft, t, "right") - 1
-                if ix >= 0:
-                    risk_enter1[ix].append(i)
+def _split_by_group(ix, group, ngroup):
+    """
+    Split the index array `ix` into a list of `ngroup` arrays
+    according to the group labels in `group`.
+    """
+    ii = np.argsort(group, kind='mergesort')
+    splits = np.cumsum(np.bincount(group, minlength=ngroup))[:-1]
+    return [x.astype(np.int32) for x in np.split(ix[ii], splits)]
 
-            # Indices of cases (failed or censored) that exit the
-            # risk set at each unique failure time.
-            risk_exit1 = [[] for k in range(nuft)]
-            for i,t in enumerate(self.entry_s[stx]):
-                ix = np.searchsorted(uft, t)
-                risk_exit1[ix].append(i)
 
-            self.ufailt.append(uft)
-            self.ufailt_ix.append([np.asarray(x, dtype=np.int32) for x in uft_ix])
-            self.risk_enter.append([np.asarray(x, dtype=np.int32) for x in risk_enter1])
-            self.risk_exit.append([np.asarray(x, dtype=np.int32) for x in risk_exit1])
+def _risk_set_sums(x, risk_first, risk_last, nuft):
+    """
+    Sum `x` over the risk set at each unique failure time.
 
+    Parameters
+    ----------
+    x : ndarray
+        1d or 2d array with one row per subject
+    risk_first : ndarray
+        The position of the first failure time at which each subject
+        is at risk
+    risk_last : ndarray
+        The position of the last failure time at which each subject
+        is at risk
+    nuft : int
+        The number of unique failure times
+
+    Returns
+    -------
+    An array with `nuft` rows, row i contains the sum over all
+    subjects whose risk interval contains the i^th failure time.
+
+    Notes
+    -----
+    The sums are obtained from reverse cumulative sums of the totals
+    of subjects entering and exiting the risk set at each failure
+    time.
+    """
+    ii = risk_last >= 0
+    enter = _group_sums(x[ii], risk_last[ii], nuft)
+    exit = _group_sums(x, risk_first, nuft + 1)
+    enter = np.cumsum(enter[::-1], axis=0)[::-1]
+    exit = np.cumsum(exit[::-1], axis=0)[::-1]
+    return enter - exit[1:]
+
+
+def _group_sums(x, group, ngroup):
+    """
+    Sum the rows of `x` within groups given by integer labels.
+    """
+    if x.ndim == 1:
+        return np.bincount(group, weights=x, minlength=ngroup)[:ngroup]
+    rslt = [np.bincount(group, weights=x[:, j], minlength=ngroup)[:ngroup]
+            for j in range(x.shape[1])]
+    return np.column_stack(rslt) if rslt else np.zeros((ngroup, 0))
+
+
+def _interval_sums(x, risk_first, risk_last):
+    """
+    Sum `x` over the failure times in each subject's risk interval.
+
+    `x` has one row per unique failure time, the result has one row
+    per subject (zero for subjects that are never at risk).
+    """
+    cx = np.concatenate((np.zeros((1,) + x.shape[1:]),
+                         np.cumsum(x, axis=0)))
+    ii = np.clip(risk_last + 1, 0, None)
+    rslt = cx[ii] - cx[risk_first]
+    rslt[risk_first > risk_last] = 0
+    return rslt
+
+
+def _efron_weights(fail_group, nuft):
+    """
+    Returns the Efron tie weights j / m for each case that fails,
+    where m is the number of cases failing at the same time and j is
+    the rank (starting at zero) of the case among them.
+
+    `fail_group` must be sorted.
+    """
+    m = np.bincount(fail_group, minlength=nuft)
+    start = np.cumsum(m) - m
+    rank = np.arange(len(fail_group)) - start[fail_group]
+    return rank / m[fail_group].astype(np.float64)
+
+
+def _stratum_linpred(params, exog, offset):
+    """
+    Returns the linear predictor shifted to have maximum zero, and
+    its exponential.
+    """
+    linpred = np.dot(exog, params)
+    if offset is not None:
+        linpred += offset
+    linpred -= linpred.max()
+    return linpred, np.exp(linpred)
+
+
+# The functions below return the contribution of a single stratum to
+# the log partial likelihood and its derivatives.  They are module
+# level functions so that they can be evaluated in worker processes.
+
+def _breslow_loglike(params, exog, offset, risk_first, risk_last,
+                     fail_ix, fail_group, nuft):
+
+    linpred, e_linpred = _stratum_linpred(params, exog, offset)
+
+    # Sums over the risk set at each unique failure time.
+    xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+
+    # Account for all cases that fail at each time.
+    like = linpred[fail_ix].sum()
+    like -= np.log(xp0)[fail_group].sum()
+
+    return like
+
+
+def _efron_loglike(params, exog, offset, risk_first, risk_last,
+                   fail_ix, fail_group, nuft):
+
+    linpred, e_linpred = _stratum_linpred(params, exog, offset)
+
+    # Sums over the risk set, and over the cases that fail, at each
+    # unique failure time.
+    xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+    xp0f = _group_sums(e_linpred[fail_ix], fail_group, nuft)
+
+    # Account for all cases that fail at each time.
+    like = linpred[fail_ix].sum()
+
+    J = _efron_weights(fail_group, nuft)
+    like -= np.log(xp0[fail_group] - J*xp0f[fail_group]).sum()
+
+    return like
+
+
+def _breslow_gradient(params, exog, offset, risk_first, risk_last,
+                      fail_ix, fail_group, nuft):
+
+    linpred, e_linpred = _stratum_linpred(params, exog, offset)
+
+    # Sums over the risk set at each unique failure time.
+    xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+    xp1 = _risk_set_sums(e_linpred[:, None] * exog, risk_first,
+                         risk_last, nuft)
+
+    # Account for all cases that fail at each time.
+    m = np.bincount(fail_group, minlength=nuft)
+    grad = exog[fail_ix, :].sum(0)
+    grad -= np.dot(m / xp0, xp1)
+
+    return grad
+
+
+def _efron_gradient(params, exog, offset, risk_first, risk_last,
+                    fail_ix, fail_group, nuft):
+
+    linpred, e_linpred = _stratum_linpred(params, exog, offset)
+
+    # Sums over the risk set, and over the cases that fail, at each
+    # unique failure time.
+    elx = e_linpred[:, None] * exog
+    xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+    xp1 = _risk_set_sums(elx, risk_first, risk_last, nuft)
+    xp0f = _group_sums(e_linpred[fail_ix], fail_group, nuft)
+    xp1f = _group_sums(elx[fail_ix], fail_group, nuft)
+
+    # Consider all cases that fail at each time.
+    grad = exog[fail_ix, :].sum(0)
+
+    J = _efron_weights(fail_group, nuft)
+    numer = xp1[fail_group] - J[:, None] * xp1f[fail_group]
+    denom = xp0[fail_group] - J * xp0f[fail_group]
+    grad -= (numer / denom[:, None]).sum(0)
+
+    return grad
+
+
+def _breslow_hessian(params, exog, offset, risk_first, risk_last,
+                     fail_ix, fail_group, nuft):
+
+    linpred, e_linpred = _stratum_linpred(params, exog, offset)
+
+    # Sums over the risk set at each unique failure time.
+    xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+    xp1 = _risk_set_sums(e_linpred[:, None] * exog, risk_first,
+                         risk_last, nuft)
+
+    # The second moment sums over the risk sets, weighted by m / xp0,
+    # are accumulated per subject over its risk interval.
+    m = np.bincount(fail_group, minlength=nuft)
+    wt = e_linpred * _interval_sums(m / xp0, risk_first, risk_last)
+    hess = np.dot(exog.T, wt[:, None] * exog)
+    hess -= np.dot(xp1.T, (m / xp0**2)[:, None] * xp1)
+
+    return -hess
+
+
+def _efron_hessian(params, exog, offset, risk_first, risk_last,
+                   fail_ix, fail_group, nuft):
+
+    linpred, e_linpred = _stratum_linpred(params, exog, offset)
+
+    # Sums over the risk set, and over the cases that fail, at each
+    # unique failure time.
+    elx = e_linpred[:, None] * exog
+    xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+    xp1 = _risk_set_sums(elx, risk_first, risk_last, nuft)
+    xp0f = _group_sums(e_linpred[fail_ix], fail_group, nuft)
+    xp1f = _group_sums(elx[fail_ix], fail_group, nuft)
+
+    # Account for all cases that fail at each time.
+    J = _efron_weights(fail_group, nuft)
+    c0 = xp0[fail_group] - J*xp0f[fail_group]
+
+    # Second moment sums over the risk sets weighted by sum(1 / c0),
+    # and over the failing cases weighted by sum(J / c0).
+    wt = _interval_sums(_group_sums(1 / c0, fail_group, nuft),
+                        risk_first, risk_last)
+    hess = np.dot(exog.T, (e_linpred * wt)[:, None] * exog)
+    wt = _group_sums(J / c0, fail_group, nuft)[fail_group]
+    exog_f = exog[fail_ix, :]
+    hess -= np.dot(exog_f.T, (e_linpred[fail_ix] * wt)[:, None] * exog_f)
+
+    mat = (xp1[fail_group] - J[:, None] * xp1f[fail_group])
+    mat /= c0[:, None]
+    hess -= np.dot(mat.T, mat)
+
+    return -hess
+
+
+def _strata_sum(func, params, data, start, stop):
+    """
+    Sum the values of `func` over the strata start, ..., stop - 1.
+
+    `data` contains the compact arrays of a PHSurvivalTime instance,
+    see PHReg._strata_data.
+    """
+    (exog, offset, risk_first, risk_last, fail_ix, fail_group,
+     row_ptr, fail_ptr, ufailt_ptr) = data
+
+    rslt = 0.
+    for stx in range(start, stop):
+        i0, i1 = row_ptr[stx], row_ptr[stx+1]
+        f0, f1 = fail_ptr[stx], fail_ptr[stx+1]
+        offset_s = None if offset is None else offset[i0:i1]
+        nuft = ufailt_ptr[stx+1] - ufailt_ptr[stx]
+        rslt = rslt + func(params, exog[i0:i1], offset_s,
+                           risk_first[i0:i1], risk_last[i0:i1],
+                           fail_ix[f0:f1], fail_group[f0:f1], nuft)
+
+    return rslt
 
 
 class PHReg(model.LikelihoodModel):
@@ -287,6 +594,11 @@ class PHReg(model.LikelihoodModel):
         Array of offset values
     missing : string
         The method used to handle missing data
+    n_jobs : int
+        The number of worker processes used to evaluate the log
+        likelihood and its derivatives for stratified models.  If 1
+        (the default), the strata are evaluated serially.  -1 uses
+        all cores.  Requires joblib.
 
     Notes
     -----
@@ -296,11 +608,18 @@ class PHReg(model.LikelihoodModel):
 
     `endog`, `event`, `strata`, `entry`, and the first dimension
     of `exog` all must have the same length
+
+    With `n_jobs` different from 1, the strata are split into blocks
+    with similar numbers of cases, one per worker.  At each
+    evaluation the data are written to memory mapped files in a
+    temporary folder that are shared by the workers instead of being
+    copied to each of them, the folder is removed afterwards.  This
+    pays off for models with many large strata.
     """
 
     def __init__(self, endog, exog, status=None, entry=None,
                  strata=None, offset=None, ties='breslow',
-                 missing='drop', **kwargs):
+                 missing='drop', n_jobs=1, **kwargs):
 
         # Default is no censoring
         if status is None:
@@ -341,6 +660,8 @@ class PHReg(model.LikelihoodModel):
                              "`breslow`")
 
         self.ties = ties
+        self.n_jobs = n_jobs
+        self._init_keys.extend(["ties", "n_jobs"])
 
     @classmethod
     def from_formula(cls, formula, data, status=None, entry=None,
@@ -564,41 +885,7 @@ class PHReg(model.LikelihoodModel):
         times.
         """
 
-        surv = self.surv
-
-        like = 0.
-
-        # Loop over strata
-        for stx in range(surv.nstrat):
-
-            uft_ix = surv.ufailt_ix[stx]
-            exog_s = surv.exog_s[stx]
-            nuft = len(uft_ix)
-
-            linpred = np.dot(exog_s, params)
-            if surv.offset_s is not None:
-                linpred += surv.offset_s[stx]
-            linpred -= linpred.max()
-            e_linpred = np.exp(linpred)
-
-            xp0 = 0.
-
-            # Iterate backward through the unique failure times.
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                xp0 += e_linpred[ix].sum()
-
-                # Account for all cases that fail at this point.
-                ix = uft_ix[i]
-                like += (linpred[ix] - np.log(xp0)).sum()
-
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                xp0 -= e_linpred[ix].sum()
-
-        return like
+        return self._sum_over_strata(_breslow_loglike, params)
 
     def efron_loglike(self, params):
         """
@@ -607,46 +894,7 @@ class PHReg(model.LikelihoodModel):
         times.
         """
 
-        surv = self.surv
-
-        like = 0.
-
-        # Loop over strata
-        for stx in range(surv.nstrat):
-
-            # exog and linear predictor for this stratum
-            exog_s = surv.exog_s[stx]
-            linpred = np.dot(exog_s, params)
-            if surv.offset_s is not None:
-                linpred += surv.offset_s[stx]
-            linpred -= linpred.max()
-            e_linpred = np.exp(linpred)
-
-            xp0 = 0.
-
-            # Iterate backward through the unique failure times.
-            uft_ix = surv.ufailt_ix[stx]
-            nuft = len(uft_ix)
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                xp0 += e_linpred[ix].sum()
-                xp0f = e_linpred[uft_ix[i]].sum()
-
-                # Account for all cases that fail at this point.
-                ix = uft_ix[i]
-                like += linpred[ix].sum()
-
-                m = len(ix)
-                J = np.arange(m, dtype=np.float64) / m
-                like -= np.log(xp0 - J*xp0f).sum()
-
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                xp0 -= e_linpred[ix].sum()
-
-        return like
+        return self._sum_over_strata(_efron_loglike, params)
 
     def breslow_gradient(self, params):
         """
@@ -654,52 +902,7 @@ class PHReg(model.LikelihoodModel):
         Breslow method to handle tied times.
         """
 
-        surv = self.surv
-
-        grad = 0.
-
-        # Loop over strata
-        for stx in range(surv.nstrat):
-
-            # Indices of subjects in the stratum
-            strat_ix = surv.stratum_rows[stx]
-
-            # Unique failure times in the stratum
-            uft_ix = surv.ufailt_ix[stx]
-            nuft = len(uft_ix)
-
-            # exog and linear predictor for the stratum
-            exog_s = surv.exog_s[stx]
-            linpred = np.dot(exog_s, params)
-            if surv.offset_s is not None:
-                linpred += surv.offset_s[stx]
-            linpred -= linpred.max()
-            e_linpred = np.exp(linpred)
-
-            xp0, xp1 = 0., 0.
-
-            # Iterate backward through the unique failure times.
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                if len(ix) > 0:
-                    v = exog_s[ix,:]
-                    xp0 += e_linpred[ix].sum()
-                    xp1 += (e_linpred[ix][:,None] * v).sum(0)
-
-                # Account for all cases that fail at this point.
-                ix = uft_ix[i]
-                grad += (exog_s[ix,:] - xp1 / xp0).sum(0)
-
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                if len(ix) > 0:
-                    v = exog_s[ix,:]
-                    xp0 -= e_linpred[ix].sum()
-                    xp1 -= (e_linpred[ix][:,None] * v).sum(0)
-
-        return grad
+        return self._sum_over_strata(_breslow_gradient, params)
 
     def efron_gradient(self, params):
         """
@@ -707,62 +910,7 @@ class PHReg(model.LikelihoodModel):
         at `params`, using the Efron method to handle tied times.
         """
 
-        surv = self.surv
-
-        grad = 0.
-
-        # Loop over strata
-        for stx in range(surv.nstrat):
-
-            # Indices of cases in the stratum
-            strat_ix = surv.stratum_rows[stx]
-
-            # exog and linear predictor of the stratum
-            exog_s = surv.exog_s[stx]
-            linpred = np.dot(exog_s, params)
-            if surv.offset_s is not None:
-                linpred += surv.offset_s[stx]
-            linpred -= linpred.max()
-            e_linpred = np.exp(linpred)
-
-            xp0, xp1 = 0., 0.
-
-            # Iterate backward through the unique failure times.
-            uft_ix = surv.ufailt_ix[stx]
-            nuft = len(uft_ix)
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                if len(ix) > 0:
-                    v = exog_s[ix,:]
-                    xp0 += e_linpred[ix].sum()
-                    xp1 += (e_linpred[ix][:,None] * v).sum(0)
-                ixf = uft_ix[i]
-                if len(ixf) > 0:
-                    v = exog_s[ixf,:]
-                    xp0f = e_linpred[ixf].sum()
-                    xp1f = (e_linpred[ixf][:,None] * v).sum(0)
-
-                    # Consider all cases that fail at this point.
-                    grad += v.sum(0)
-
-                    m = len(ixf)
-                    J = np.arange(m, dtype=np.float64) / m
-                    numer = xp1 - np.outer(J, xp1f)
-                    denom = xp0 - np.outer(J, xp0f)
-                    ratio = numer / denom
-                    rsum = ratio.sum(0)
-                    grad -= rsum
-
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                if len(ix) > 0:
-                    v = exog_s[ix,:]
-                    xp0 -= e_linpred[ix].sum()
-                    xp1 -= (e_linpred[ix][:,None] * v).sum(0)
-
-        return grad
+        return self._sum_over_strata(_efron_gradient, params)
 
     def breslow_hessian(self, params):
         """
@@ -770,51 +918,7 @@ class PHReg(model.LikelihoodModel):
         `params`, using the Breslow method to handle tied times.
         """
 
-        surv = self.surv
-
-        hess = 0.
-
-        # Loop over strata
-        for stx in range(surv.nstrat):
-
-            uft_ix = surv.ufailt_ix[stx]
-            nuft = len(uft_ix)
-
-            exog_s = surv.exog_s[stx]
-
-            linpred = np.dot(exog_s, params)
-            if surv.offset_s is not None:
-                linpred += surv.offset_s[stx]
-            linpred -= linpred.max()
-            e_linpred = np.exp(linpred)
-
-            xp0, xp1, xp2 = 0., 0., 0.
-
-            # Iterate backward through the unique failure times.
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                if len(ix) > 0:
-                    xp0 += e_linpred[ix].sum()
-                    v = exog_s[ix,:]
-                    xp1 += (e_linpred[ix][:,None] * v).sum(0)
-                    elx = e_linpred[ix]
-                    xp2 += np.einsum("ij,ik,i->jk", v, v, elx)
-
-                # Account for all cases that fail at this point.
-                m = len(uft_ix[i])
-                hess += m*(xp2 / xp0  - np.outer(xp1, xp1) / xp0**2)
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_exit[stx][i]
-                if len(ix) > 0:
-                    xp0 -= e_linpred[ix].sum()
-                    v = exog_s[ix,:]
-                    xp1 -= (e_linpred[ix][:,None] * v).sum(0)
-                    elx = e_linpred[ix]
-                    xp2 -= np.einsum("ij,ik,i->jk", v, v, elx)
-        return -hess
+        return self._sum_over_strata(_breslow_hessian, params)
 
     def efron_hessian(self, params):
         """
@@ -823,64 +927,83 @@ class PHReg(model.LikelihoodModel):
         times.
         """
 
+        return self._sum_over_strata(_efron_hessian, params)
+
+    def _strata_data(self, folder=None):
+        """
+        Returns the compact per-stratum arrays used by the likelihood
+        functions.
+
+        If `folder` is given, the large arrays are written to files in
+        it and returned as read-only memory maps, so that they are
+        passed to worker processes by reference instead of being copied
+        to each task.  The caller removes the folder.
+        """
+
         surv = self.surv
+        data = [surv.exog, surv.offset, surv._risk_first,
+                surv._risk_last, surv._fail_ix, surv._fail_group]
 
-        hess = 0.
+        if folder is not None:
+            try:
+                from joblib import dump, load
+            except ImportError:
+                from sklearn.externals.joblib import dump, load
+            for j, x in enumerate(data):
+                if x is not None:
+                    fname = os.path.join(folder, "data_%d.mmap" % j)
+                    dump(x, fname)
+                    data[j] = load(fname, mmap_mode="r")
 
-        # Loop over strata
-        for stx in range(surv.nstrat):
+        return data + [surv.row_ptr, surv.fail_ptr, surv.ufailt_ptr]
 
-            exog_s = surv.exog_s[stx]
+    def _sum_over_strata(self, func, params):
+        """
+        Sum the per-stratum values of `func` at `params`.
 
-            linpred = np.dot(exog_s, params)
-            if surv.offset_s is not None:
-                linpred += surv.offset_s[stx]
-            linpred -= linpred.max()
-            e_linpred = np.exp(linpred)
+        If `n_jobs` is not 1 and there are several strata, blocks of
+        strata with similar numbers of cases are evaluated in parallel.
+        """
 
-            xp0, xp1, xp2 = 0., 0., 0.
-
-            # Iterate backward through the unique failure times.
-            uft_ix = surv.ufailt_ix[stx]
-            nuft = len(uft_ix)
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                if len(ix) > 0:
-                    xp0 += e_linpred[ix].sum()
-                    v = exog_s[ix,:]
-                    xp1 += (e_linpred[ix][:,None] * v).sum(0)
-                    elx = e_linpred[ix]
-                    xp2 += np.einsum("ij,ik,i->jk", v, v, elx)
-
-                ixf = uft_ix[i]
-                if len(ixf) > 0:
-                    v = exog_s[ixf,:]
-                    xp0f = e_linpred[ixf].sum()
-                    xp1f = (e_linpred[ixf][:,None] * v).sum(0)
-                    elx = e_linpred[ixf]
-                    xp2f = np.einsum("ij,ik,i->jk", v, v, elx)
-
-                # Account for all cases that fail at this point.
-                m = len(uft_ix[i])
-                J = np.arange(m, dtype=np.float64) / m
-                c0 = xp0 - J*xp0f
-                hess += xp2 * np.sum(1 / c0)
-                hess -= xp2f * np.sum(J / c0)
-                mat = (xp1[None, :] - np.outer(J, xp1f)) / c0[:, None]
-                hess -= np.einsum("ij,ik->jk", mat, mat)
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_exit[stx][i]
-                if len(ix) > 0:
-                    xp0 -= e_linpred[ix].sum()
-                    v = exog_s[ix,:]
-                    xp1 -= (e_linpred[ix][:,None] * v).sum(0)
-                    elx = e_linpred[ix]
-                    xp2 -= np.einsum("ij,ik,i->jk", v, v, elx)
-
-        return -hess
+        surv = self.surv
+        nstrat = surv.nstrat
+        n_jobs = self.n_jobs
+
+        if n_jobs == 1 or nstrat < 2:
+            return _strata_sum(func, params, self._strata_data(), 0,
+                               nstrat)
+
+        from statsmodels.tools.parallel import parallel_func
+        parallel, p_func, n_jobs = parallel_func(_strata_sum, n_jobs,
+                                                 verbose=0)
+        if n_jobs == 1:
+            # joblib is not available
+            return _strata_sum(func, params, self._strata_data(), 0,
+                               nstrat)
+        # Split the strata into blocks of similar size
+        nblock = min(n_jobs, nstrat)
+        bounds = np.linspace(0, surv.row_ptr[-1], nblock + 1)
+        bounds = np.searchsorted(surv.row_ptr, bounds)
+        bounds[0], bounds[-1] = 0, nstrat
+        bounds = np.unique(bounds)
+
+        import shutil
+        import tempfile
+        folder = tempfile.mkdtemp(prefix="statsmodels_phreg_")
+        try:
+            try:
+                data = self._strata_data(folder)
+            except ImportError:
+                # the memory maps need joblib's dump and load
+                return _strata_sum(func, params, self._strata_data(), 0,
+                                   nstrat)
+            rslt = parallel(p_func(func, params, data, bounds[k],
+                                   bounds[k+1])
+                            for k in range(len(bounds) - 1))
+        finally:
+            shutil.rmtree(folder, True)
+
+        return sum(rslt)
 
     def robust_covariance(self, params):
         """
@@ -963,51 +1086,40 @@ class PHReg(model.LikelihoodModel):
         # Loop over strata
         for stx in range(surv.nstrat):
 
-            uft_ix = surv.ufailt_ix[stx]
+            uft = surv.ufailt[stx]
             exog_s = surv.exog_s[stx]
-            nuft = len(uft_ix)
+            fail_ix = surv.fail_ix[stx]
+            fail_group = surv.fail_group[stx]
+            nuft = len(uft)
             strat_ix = surv.stratum_rows[stx]
 
-            xp0 = 0.
-
             linpred = np.dot(exog_s, params)
             if surv.offset_s is not None:
                 linpred += surv.offset_s[stx]
             linpred -= linpred.max()
             e_linpred = np.exp(linpred)
 
-            at_risk_ix = set([])
+            risk_first = surv.risk_first[stx]
+            risk_last = surv.risk_last[stx]
+            xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
 
-            # Iterate backward through the unique failure times.
-            for i in range(nuft)[::-1]:
+            # The increments in the cumulative hazard
+            dchaz = np.bincount(fail_group, minlength=nuft) / xp0
 
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                at_risk_ix |= set(ix)
-                xp0 += e_linpred[ix].sum()
+            # The leverages times the martingale residual increments,
+            # summed over the failure times at which each case is at
+            # risk.
+            chaz = _interval_sums(dchaz, risk_first, risk_last)
+            chaz_avg = _interval_sums(dchaz[:, None] * w_avg[stx],
+                                      risk_first, risk_last)
+            resid = -e_linpred[:, None] * (exog_s * chaz[:, None] -
+                                           chaz_avg)
+            resid[fail_ix, :] += exog_s[fail_ix, :] - w_avg[stx][fail_group]
 
-                atr_ix = list(at_risk_ix)
-                leverage = exog_s[atr_ix, :] - w_avg[stx][i, :]
-
-                # Event indicators
-                d = np.zeros(exog_s.shape[0])
-                d[uft_ix[i]] = 1
-
-                # The increment in the cumulative hazard
-                dchaz = len(uft_ix[i]) / xp0
-
-                # Piece of the martingale residual
-                mrp = d[atr_ix] - e_linpred[atr_ix] * dchaz
-
-                # Update the score residuals
-                ii = strat_ix[atr_ix]
-                score_resid[ii,:] += leverage * mrp[:, None]
-                mask[ii] = 1
-
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                at_risk_ix -= set(ix)
-                xp0 -= e_linpred[ix].sum()
+            # Update the score residuals
+            ii = risk_first <= risk_last
+            score_resid[strat_ix[ii], :] = resid[ii, :]
+            mask[strat_ix[ii]] = 1
 
         jj = np.flatnonzero(mask == 0)
         if len(jj) > 0:
@@ -1041,17 +1153,13 @@ class PHReg(model.LikelihoodModel):
         surv = self.surv
 
         averages = []
-        xp0, xp1 = 0., 0.
 
         # Loop over strata
         for stx in range(surv.nstrat):
 
-            uft_ix = surv.ufailt_ix[stx]
+            uft = surv.ufailt[stx]
             exog_s = surv.exog_s[stx]
-            nuft = len(uft_ix)
-
-            average_s = np.zeros((len(uft_ix), exog_s.shape[1]),
-                                  dtype=np.float64)
+            nuft = len(uft)
 
             linpred = np.dot(exog_s, params)
             if surv.offset_s is not None:
@@ -1059,22 +1167,14 @@ class PHReg(model.LikelihoodModel):
             linpred -= linpred.max()
             e_linpred = np.exp(linpred)
 
-            # Iterate backward through the unique failure times.
-            for i in range(nuft)[::-1]:
+            # Sums over the risk set at each unique failure time.
+            risk_first = surv.risk_first[stx]
+            risk_last = surv.risk_last[stx]
+            xp0 = _risk_set_sums(e_linpred, risk_first, risk_last, nuft)
+            xp1 = _risk_set_sums(e_linpred[:, None] * exog_s, risk_first,
+                                 risk_last, nuft)
 
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                xp0 += e_linpred[ix].sum()
-                xp1 += np.dot(e_linpred[ix], exog_s[ix, :])
-
-                average_s[i, :] = xp1 / xp0
-
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                xp0 -= e_linpred[ix].sum()
-                xp1 -= np.dot(e_linpred[ix], exog_s[ix, :])
-
-            averages.append(average_s)
+            averages.append(xp1 / xp0[:, None])
 
         return averages
 
@@ -1109,32 +1209,20 @@ class PHReg(model.LikelihoodModel):
         for stx in range(surv.nstrat):
 
             uft = surv.ufailt[stx]
-            uft_ix = surv.ufailt_ix[stx]
             exog_s = surv.exog_s[stx]
-            nuft = len(uft_ix)
+            nuft = len(uft)
 
             linpred = np.dot(exog_s, params)
             if surv.offset_s is not None:
                 linpred += surv.offset_s[stx]
             e_linpred = np.exp(linpred)
 
-            xp0 = 0.
-            h0 = np.zeros(nuft, dtype=np.float64)
-
-            # Iterate backward through the unique failure times.
-            for i in range(nuft)[::-1]:
-
-                # Update for new cases entering the risk set.
-                ix = surv.risk_enter[stx][i]
-                xp0 += e_linpred[ix].sum()
-
-                # Account for all cases that fail at this point.
-                ix = uft_ix[i]
-                h0[i] = len(ix) / xp0
+            # Sums over the risk set at each unique failure time.
+            xp0 = _risk_set_sums(e_linpred, surv.risk_first[stx],
+                                 surv.risk_last[stx], nuft)
 
-                # Update for cases leaving the risk set.
-                ix = surv.risk_exit[stx][i]
-                xp0 -= e_linpred[ix].sum()
+            # Account for all cases that fail at each time.
+            h0 = np.bincount(surv.fail_group[stx], minlength=nuft) / xp0
 
             cumhaz = np.cumsum(h0) - h0
             current_strata_surv = np.exp(-cumhaz)
@@ -50,17 +50,37 @@ def _calc_survfunc_right(time, status, weights=None, entry=None, compress=True,
         n = n[ii]
         utime = utime[ii]
 
-    # The survival function probabilities.
+    if not retall:
+        sp = _survfunc_prob(d, n)
+        return sp, utime, rtime, n, d
+
+    sp, se = _survfunc_prob_se(d, n, weights is not None)
+
+    return sp, se, utime, rtime, n, d
+
+
+def _survfunc_prob(d, n):
+    """
+    Product limit estimate from event counts `d` and risk set sizes `n`.
+    """
+
     sp = 1 - d / n.astype(np.float64)
     sp = np.log(sp)
     sp = np.cumsum(sp)
     sp = np.exp(sp)
 
-    if not retall:
-        return sp, utime, rtime, n, d
+    return sp
 
-    # Standard errors
-    if weights is None:
+
+def _survfunc_prob_se(d, n, weighted):
+    """
+    Product limit estimate and its standard error from event counts
+    `d` and risk set sizes `n`.
+    """
+
+    sp = _survfunc_prob(d, n)
+
+    if not weighted:
         # Greenwood's formula
         se = d / (n * (n - d)).astype(np.float64)
         se = np.cumsum(se)
@@ -72,7 +92,7 @@ def _calc_survfunc_right(time, status, weights=None, entry=None, compress=True,
         se = np.cumsum(se)
         se = np.sqrt(se)
 
-    return sp, se, utime, rtime, n, d
+    return sp, se
 
 
 def _calc_incidence_right(time, status, weights=None):
@@ -586,6 +606,14 @@ def _survdiff(time, status, group, weight_type, gr, entry=None,
 
         nrisk.append(nr)
 
+    return _survdiff_stat(obsv, nrisk, weight_type, **kwargs)
+
+
+def _survdiff_stat(obsv, nrisk, weight_type, **kwargs):
+    # Weighted observed minus expected events in the first group and
+    # its variance, from per-group event counts and risk set sizes at
+    # a common set of time points.
+
     obs = sum(obsv)
     nrisk_tot = sum(nrisk)
 
@@ -633,6 +661,310 @@ def _survdiff(time, status, group, weight_type, gr, entry=None,
     return obs, var
 
 
+def _table_merge(times, counts):
+    # Combine (possibly repeated) time values and their counts into a
+    # table indexed by the sorted distinct time values.
+    utime, rtime = np.unique(times, return_inverse=True)
+    ml = len(utime)
+    counts = [np.bincount(rtime, weights=c, minlength=ml) for c in counts]
+    return utime, counts
+
+
+class SurvivalTable(object):
+    """
+    Mergeable summary of right censored and left truncated survival
+    data.
+
+    The table holds the number of events, censorings and entries at
+    each distinct time value, separately for each combination of group
+    and stratum label.  It can be built incrementally from chunks of
+    data using `update`, and tables built from separate partitions of
+    the data can be combined using `merge`.  Once built, the table
+    provides the same survival function estimates as `SurvfuncRight`
+    and the same tests as `survdiff`, without retaining the individual
+    observations.
+
+    Parameters
+    ----------
+    bins : array-like, optional
+        Increasing bin edges.  If provided, each event, censoring or
+        entry time is replaced by the smallest bin edge that is greater
+        than or equal to it, so the table size is bounded by the
+        number of bins.  The resulting estimates are those of the data
+        rounded up to the bin edges.  All times must be less than or
+        equal to the last bin edge.
+
+    Attributes
+    ----------
+    weighted : bool
+        True if frequency weights were provided in any update, in
+        which case survival function standard errors are calculated
+        using Tsiatis' formula.
+
+    Examples
+    --------
+    >>> st = SurvivalTable()
+    >>> for df in chunks:
+    ...     st.update(df.time, df.status, group=df.sex)
+    >>> sf = st.survfunc(group="F")
+    >>> chisq, pvalue = st.survdiff()
+    """
+
+    def __init__(self, bins=None):
+
+        if bins is not None:
+            bins = np.asarray(bins, dtype=np.float64)
+            if bins.ndim != 1 or np.any(np.diff(bins) <= 0):
+                raise ValueError("bins must be a strictly increasing "
+                                 "1-dimensional array")
+        self.bins = bins
+        self.weighted = False
+
+        # Maps (stratum, group) to (times, [events, censored, entries])
+        self._tables = {}
+
+    def _discretize(self, x):
+
+        if self.bins is None:
+            return x
+        ii = np.searchsorted(self.bins, x, side='left')
+        if np.any(ii == len(self.bins)):
+            raise ValueError("times must not exceed the last bin edge")
+        return self.bins[ii]
+
+    def _add(self, key, times, counts):
+
+        if key in self._tables:
+            times0, counts0 = self._tables[key]
+            times = np.concatenate((times0, times))
+            counts = [np.concatenate(x) for x in zip(counts0, counts)]
+        self._tables[key] = _table_merge(times, counts)
+
+    def update(self, time, status, entry=None, group=None, strata=None,
+               freq_weights=None):
+        """
+        Add a chunk of observations to the table.
+
+        Parameters
+        ----------
+        time : array-like
+            An array of times (censoring times or event times)
+        status : array-like
+            Status at the event time, status==1 is the 'event' and
+            status==0 indicates censoring.
+        entry : array-like, optional
+            Entry times for handling left truncation (the subject is
+            not in the risk set on or before the entry time)
+        group : array-like, optional
+            Group labels
+        strata : array-like, optional
+            Stratum labels
+        freq_weights : array-like, optional
+            Frequency weights
+
+        Returns
+        -------
+        self
+        """
+
+        time = np.asarray(time, dtype=np.float64)
+        status = np.asarray(status, dtype=np.float64)
+        if entry is not None:
+            entry = np.asarray(entry, dtype=np.float64)
+        if freq_weights is not None:
+            freq_weights = np.asarray(freq_weights, dtype=np.float64)
+            self.weighted = True
+        _checkargs(time, status, entry, freq_weights)
+
+        n = len(time)
+        group = np.zeros(n) if group is None else np.asarray(group)
+        strata = np.zeros(n) if strata is None else np.asarray(strata)
+        if len(group) != n or len(strata) != n:
+            raise ValueError("group, strata and time must have the "
+                             "same length")
+        wts = np.ones(n) if freq_weights is None else freq_weights
+
+        time = self._discretize(time)
+        if entry is None:
+            # Subjects without an entry time are at risk from the start.
+            entry = -np.inf * np.ones(n)
+        else:
+            entry = self._discretize(entry)
+
+        ugroup, igroup = np.unique(group, return_inverse=True)
+        ustrata, istrata = np.unique(strata, return_inverse=True)
+        code = istrata * len(ugroup) + igroup
+        for c in np.unique(code):
+            ii = np.flatnonzero(code == c)
+            key = (ustrata[c // len(ugroup)], ugroup[c % len(ugroup)])
+            w = wts[ii]
+            d = status[ii] * w
+            zero = np.zeros(len(ii))
+            times = np.concatenate((time[ii], entry[ii]))
+            counts = [np.concatenate((d, zero)),
+                      np.concatenate((w - d, zero)),
+                      np.concatenate((zero, w))]
+            self._add(key, times, counts)
+
+        return self
+
+    def merge(self, other):
+        """
+        Add the contents of another table to this table.
+
+        Parameters
+        ----------
+        other : SurvivalTable
+            A table built from a separate set of observations, using
+            the same bins as this table.
+
+        Returns
+        -------
+        self
+        """
+
+        if ((self.bins is None) != (other.bins is None) or
+                (self.bins is not None and
+                 not np.array_equal(self.bins, other.bins))):
+            raise ValueError("tables with different bins can not be merged")
+
+        for key, (times, counts) in other._tables.items():
+            self._add(key, times, counts)
+        self.weighted = self.weighted or other.weighted
+
+        return self
+
+    @property
+    def groups(self):
+        """
+        The distinct group labels in the table.
+        """
+        return sorted(set(k[1] for k in self._tables))
+
+    @property
+    def strata(self):
+        """
+        The distinct stratum labels in the table.
+        """
+        return sorted(set(k[0] for k in self._tables))
+
+    def _select(self, group=None, stratum=None):
+        # Pool the tables matching the given group and stratum.
+
+        times, counts = [], []
+        for (st, g), (t, c) in self._tables.items():
+            if group is not None and g != group:
+                continue
+            if stratum is not None and st != stratum:
+                continue
+            times.append(t)
+            counts.append(c)
+        if len(times) == 0:
+            raise ValueError("no observations for the given group/stratum")
+
+        return _table_merge(np.concatenate(times),
+                            [np.concatenate(x) for x in zip(*counts)])
+
+    def survfunc(self, group=None, stratum=None, title=None):
+        """
+        Estimate the survival function from the table.
+
+        Parameters
+        ----------
+        group : optional
+            If provided, only observations in this group are used,
+            otherwise all groups are pooled.
+        stratum : optional
+            If provided, only observations in this stratum are used,
+            otherwise all strata are pooled.
+        title : string
+            Optional title used for plots and summary output.
+
+        Returns
+        -------
+        A SurvfuncRight instance.  The `time` and `status` attributes
+        hold the distinct event and censoring times rather than the
+        individual observations.
+        """
+
+        utime, (d, c, e) = self._select(group, stratum)
+        n = _risk_set_size(d + c, e)
+
+        sf = SurvfuncRight.__new__(SurvfuncRight)
+        ii = np.flatnonzero(d > 0)
+        jj = np.flatnonzero(c > 0)
+        sf.time = np.concatenate((utime[ii], utime[jj]))
+        sf.status = np.concatenate((np.ones(len(ii)), np.zeros(len(jj))))
+        sf.surv_prob, sf.surv_prob_se = _survfunc_prob_se(d[ii], n[ii],
+                                                          self.weighted)
+        sf.surv_times = utime[ii]
+        sf.n_risk = n[ii]
+        sf.n_events = d[ii]
+        sf.title = "" if not title else title
+
+        return sf
+
+    def survdiff(self, weight_type=None, **kwargs):
+        """
+        Test for the equality of the survival distributions of the two
+        groups in the table.
+
+        The test is stratified if the table contains more than one
+        stratum.  See `survdiff` for the available weight types.
+
+        Returns
+        --------
+        chisq : The chi-square (1 degree of freedom) distributed test
+                statistic value
+        pvalue : The p-value for the chi^2 test
+        """
+
+        gr = self.groups
+        if len(gr) != 2:
+            raise ValueError("logrank only supports two groups")
+
+        obs, var = 0., 0.
+        for st in self.strata:
+            tables = [self._tables.get((st, g)) for g in gr]
+            utime = np.unique(np.concatenate([t[0] for t in tables
+                                              if t is not None]))
+            ml = len(utime)
+            obsv, nrisk = [], []
+            for tab in tables:
+                d, x, e = np.zeros(ml), np.zeros(ml), np.zeros(ml)
+                if tab is not None:
+                    t, (d0, c0, e0) = tab
+                    jj = np.searchsorted(utime, t)
+                    d[jj] = d0
+                    x[jj] = d0 + c0
+                    e[jj] = e0
+                obsv.append(d)
+                nrisk.append(_risk_set_size(x, e))
+            # Drop the time point representing subjects at risk from
+            # the start.
+            ii = np.flatnonzero(np.isfinite(utime))
+            obsv = [x[ii] for x in obsv]
+            nrisk = [x[ii] for x in nrisk]
+            obs1, var1 = _survdiff_stat(obsv, nrisk, weight_type, **kwargs)
+            obs += obs1
+            var += var1
+
+        zstat = obs / np.sqrt(var)
+
+        # The chi^2 test statistic and p-value.
+        chisq = zstat**2
+        pvalue = 1 - chi2.cdf(chisq, 1)
+
+        return chisq, pvalue
+
+
+def _risk_set_size(exits, entries):
+    # Size of the risk set just prior to each time point, from the
+    # number of subjects leaving and entering the risk set at each
+    # time point.
+    return (np.cumsum(entries) - entries) - (np.cumsum(exits) - exits)
+
+
 def plot_survfunc(survfuncs, ax=None):
     """
     Plot one or more survivor functions.
@@ -371,6 +371,117 @@ class TestPHReg(object):
         sample = dist.rvs()
 
 
+    def test_ties_entry_strata(self):
+
+        # Compare to a direct calculation that loops over the failure
+        # times, with many ties, left truncation and strata.
+        np.random.seed(3423)
+        n = 200
+        exog = np.random.normal(size=(n, 2))
+        time = np.ceil(5 * np.random.exponential(size=n))
+        status = np.random.randint(0, 2, n)
+        entry = np.floor(time * np.random.uniform(0, 0.8, size=n))
+        strata = np.random.randint(0, 3, n)
+        params = np.r_[0.3, -0.2]
+
+        def loglike(ties):
+            like = 0.
+            linpred = np.dot(exog, params)
+            for st in np.unique(strata):
+                ii = strata == st
+                lp, ti, en = linpred[ii], time[ii], entry[ii]
+                fail = status[ii] == 1
+                for t in np.unique(ti[fail]):
+                    risk = (ti >= t) & (en <= t)
+                    tied = fail & (ti == t)
+                    m = tied.sum()
+                    like += lp[tied].sum()
+                    xp0 = np.exp(lp[risk]).sum()
+                    if ties == "breslow":
+                        like -= m * np.log(xp0)
+                    else:
+                        xp0f = np.exp(lp[tied]).sum()
+                        J = np.arange(m) / float(m)
+                        like -= np.log(xp0 - J * xp0f).sum()
+            return like
+
+        from statsmodels.tools.numdiff import approx_fprime
+        for ties in "breslow", "efron":
+            model = PHReg(time, exog, status, entry=entry, strata=strata,
+                          ties=ties)
+            assert_allclose(model.loglike(params), loglike(ties),
+                            rtol=1e-10)
+            score = approx_fprime(params, model.loglike, centered=True)
+            assert_allclose(model.score(params), score, rtol=1e-6)
+            hess = approx_fprime(params, model.score, centered=True)
+            assert_allclose(model.hessian(params), hess, rtol=1e-6)
+
+    def test_parallel_strata(self):
+
+        try:
+            import joblib
+        except ImportError:
+            from nose import SkipTest
+            raise SkipTest("joblib not available")
+
+        np.random.seed(5432)
+        n = 600
+        exog = np.random.normal(size=(n, 3))
+        time = np.ceil(10 * np.random.exponential(size=n))
+        status = np.random.randint(0, 2, n)
+        strata = np.random.randint(0, 7, n)
+        offset = np.random.normal(size=n) / 10
+        params = np.r_[0.1, -0.2, 0.3]
+
+        for ties in "breslow", "efron":
+            model1 = PHReg(time, exog, status, strata=strata,
+                           offset=offset, ties=ties)
+            model2 = PHReg(time, exog, status, strata=strata,
+                           offset=offset, ties=ties, n_jobs=2)
+            assert_allclose(model2.loglike(params), model1.loglike(params),
+                            rtol=1e-12)
+            assert_allclose(model2.score(params), model1.score(params),
+                            rtol=1e-12)
+            assert_allclose(model2.hessian(params), model1.hessian(params),
+                            rtol=1e-12)
+
+        # the memory mapped files are removed after each evaluation
+        import glob
+        import tempfile
+        pattern = os.path.join(tempfile.gettempdir(), "statsmodels_phreg_*")
+        assert_equal(glob.glob(pattern), [])
+
+    def test_risk_set_indices(self):
+
+        np.random.seed(5432)
+        n = 200
+        exog = np.random.normal(size=(n, 2))
+        time = np.ceil(10 * np.random.exponential(size=n))
+        entry = np.floor(time * np.random.uniform(size=n))
+        status = np.random.randint(0, 2, n)
+        strata = np.random.randint(0, 3, n)
+        surv = PHReg(time, exog, status, entry=entry, strata=strata).surv
+
+        # the index lists are built once
+        assert_(surv.ufailt_ix is surv.ufailt_ix)
+        assert_(surv.risk_enter is surv.risk_enter)
+        assert_(surv.risk_exit is surv.risk_exit)
+
+        for stx in range(surv.nstrat):
+            time_s, entry_s = surv.time_s[stx], surv.entry_s[stx]
+            status_s = surv.status_s[stx]
+            for k, t in enumerate(surv.ufailt[stx]):
+                ix = np.flatnonzero((time_s == t) & (status_s == 1))
+                assert_equal(np.sort(surv.ufailt_ix[stx][k]), ix)
+                # last failure time not after time, first not before entry
+                uft = surv.ufailt[stx]
+                last = np.searchsorted(uft, time_s, "right") - 1
+                first = np.searchsorted(uft, entry_s)
+                assert_equal(np.sort(surv.risk_enter[stx][k]),
+                             np.flatnonzero(last == k))
+                assert_equal(np.sort(surv.risk_exit[stx][k]),
+                             np.flatnonzero(first == k))
+
     def test_fit_regularized(self):
 
         # Data set sizes
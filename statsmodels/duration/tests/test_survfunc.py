@@ -1,8 +1,8 @@
 import numpy as np
 from statsmodels.duration.survfunc import (
     SurvfuncRight, survdiff, plot_survfunc,
-    CumIncidenceRight)
-from numpy.testing import assert_allclose
+    CumIncidenceRight, SurvivalTable)
+from numpy.testing import assert_allclose, assert_raises
 from numpy.testing import dec
 import pandas as pd
 import os
@@ -446,3 +446,78 @@ def test_survdiff_entry_3():
     z, p = survdiff(ti, st, gr, entry=entry)
     assert_allclose(z, 6.75082959)
     assert_allclose(p, 0.00937041)
+
+
+def test_survival_table():
+    # Tables built from chunks of the data and merged agree with the
+    # estimates from the full data.
+
+    df = bmt[bmt.Group != "ALL"].copy()
+    df["strata"] = np.arange(df.shape[0]) % 5
+    chunks = np.array_split(np.arange(df.shape[0]), 4)
+
+    def build(entry=None, strata=None, weights=None):
+        tables = []
+        for ii in chunks:
+            st = SurvivalTable()
+            st.update(df["T"].values[ii], df.Status.values[ii],
+                      group=df.Group.values[ii],
+                      entry=None if entry is None else entry[ii],
+                      strata=None if strata is None else strata[ii],
+                      freq_weights=None if weights is None else weights[ii])
+            tables.append(st)
+        for st in tables[1:]:
+            tables[0].merge(st)
+        return tables[0]
+
+    st = build()
+    for g in df.Group.unique():
+        ii = (df.Group == g).values
+        sf0 = SurvfuncRight(df["T"].values[ii], df.Status.values[ii])
+        sf1 = st.survfunc(group=g)
+        for a in "surv_prob", "surv_prob_se", "surv_times", "n_risk", \
+                "n_events":
+            assert_allclose(getattr(sf0, a), getattr(sf1, a))
+        assert_allclose(sf0.quantile(0.25), sf1.quantile(0.25))
+        assert_allclose(sf0.quantile_ci(0.25), sf1.quantile_ci(0.25))
+
+    for kw in {}, {"weight_type": "gb"}, {"weight_type": "fh", "fh_p": 1}:
+        assert_allclose(survdiff(df["T"], df.Status, df.Group, **kw),
+                        st.survdiff(**kw))
+        st1 = build(strata=df.strata.values)
+        assert_allclose(survdiff(df["T"], df.Status, df.Group,
+                                 strata=df.strata, **kw),
+                        st1.survdiff(**kw))
+
+    # Left truncation
+    entry = np.floor(df["T"].values / 2.)
+    st = build(entry=entry)
+    assert_allclose(survdiff(df["T"], df.Status, df.Group, entry=entry),
+                    st.survdiff())
+    sf0 = SurvfuncRight(df["T"].values, df.Status.values, entry=entry)
+    sf1 = st.survfunc()
+    assert_allclose(sf0.surv_prob, sf1.surv_prob)
+    assert_allclose(sf0.n_risk, sf1.n_risk)
+
+    # Frequency weights
+    w = 1 + np.arange(df.shape[0]) % 3
+    st = build(weights=w)
+    sf0 = SurvfuncRight(df["T"].values, df.Status.values, freq_weights=w)
+    sf1 = st.survfunc()
+    assert_allclose(sf0.surv_prob, sf1.surv_prob)
+    assert_allclose(sf0.surv_prob_se, sf1.surv_prob_se)
+
+
+def test_survival_table_bins():
+
+    df = bmt[bmt.Group == "ALL"]
+    bins = np.arange(0, 3000, 100.)
+    st = SurvivalTable(bins=bins)
+    st.update(df["T"], df.Status)
+    tb = bins[np.searchsorted(bins, df["T"].values)]
+    sf0 = SurvfuncRight(tb, df.Status.values)
+    sf1 = st.survfunc()
+    assert_allclose(sf0.surv_prob, sf1.surv_prob)
+    assert_allclose(sf0.surv_times, sf1.surv_times)
+
+    assert_raises(ValueError, st.merge, SurvivalTable())
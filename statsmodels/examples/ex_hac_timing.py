@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""Timing of the kernel weighted lagged sums in HAC covariances
+
+The loop over lags costs nlags matrix products of the (nobs, k_vars) score
+matrix, the FFT convolution used by `S_hac_simple` for many lags has a cost
+that does not depend on the number of lags. The loop is only timed for the
+smaller numbers of lags.
+"""
+
+from __future__ import print_function
+import time
+import numpy as np
+import statsmodels.stats.sandwich_covariance as sw
+
+nobs, k_vars = 1000000, 50
+np.random.seed(987125)
+x = np.random.randn(nobs, k_vars)
+x[1:] += 0.5 * x[:-1]
+
+
+def S_hac_loop(x, weights):
+    S = weights[0] * np.dot(x.T, x)
+    for lag in range(1, len(weights)):
+        s = np.dot(x[lag:].T, x[:-lag])
+        S += weights[lag] * (s + s.T)
+    return S
+
+
+print('nobs = %d, k_vars = %d' % (nobs, k_vars))
+print('%8s %12s %12s %12s' % ('nlags', 'fft', 'loop', 'max rel diff'))
+for nlags in [5, 20, 100, 1000, 10000]:
+    weights = sw.weights_bartlett(nlags)
+    t0 = time.time()
+    S = sw._lagged_sums_fft(x, weights)
+    t_fft = time.time() - t0
+    if nlags <= 20:
+        t0 = time.time()
+        S_loop = S_hac_loop(x, weights)
+        t_loop = time.time() - t0
+        diff = np.max(np.abs(S - S_loop)) / np.max(np.abs(S_loop))
+    else:
+        t_loop = diff = np.nan
+    print('%8d %12.2f %12.2f %12.2g' % (nlags, t_fft, t_loop, diff))
+
+# quadratic spectral kernel with automatic bandwidth uses all nobs - 1 lags
+t0 = time.time()
+bw = sw.bandwidth_newey_west(x, kernel='qs')
+S = sw.S_hac_simple(x, nlags='auto', weights_func='qs')
+print('\nquadratic spectral, bandwidth %.2f, all lags: %.2f seconds' %
+      (bw, time.time() - t0))
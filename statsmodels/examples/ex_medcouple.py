@@ -0,0 +1,40 @@
+# -*- coding: utf-8 -*-
+"""Timing of the medcouple with and without the kernel matrix
+
+The direct implementation, `_medcouple_1d`, creates the kernel matrix with
+about N**2 / 4 elements, `medcouple` selects its median without creating it.
+The last sample sizes are only run with `medcouple`.
+"""
+
+from __future__ import print_function
+import time
+import numpy as np
+from statsmodels.stats.stattools import medcouple, _medcouple_1d
+
+np.random.seed(987125)
+
+print('%8s %12s %12s %12s' % ('nobs', 'medcouple', 'naive', 'mc'))
+for nobs in [100, 1000, 5000, 10000, 100000, 1000000]:
+    x = np.random.lognormal(size=nobs)
+    t0 = time.time()
+    mc = medcouple(x)
+    t_fast = time.time() - t0
+    if nobs <= 10000:
+        t0 = time.time()
+        mc_naive = _medcouple_1d(x)
+        t_naive = time.time() - t0
+        assert np.allclose(mc, mc_naive, rtol=1e-13)
+    else:
+        t_naive = np.nan
+    print('%8d %12.4f %12.4f %12.6f' % (nobs, t_fast, t_naive, mc))
+
+# many series along an axis are handled together
+x = np.random.lognormal(size=(1000, 500))
+t0 = time.time()
+mc = medcouple(x, axis=0)
+t_fast = time.time() - t0
+t0 = time.time()
+mc_naive = np.apply_along_axis(_medcouple_1d, 0, x)
+t_naive = time.time() - t0
+print('\n1000 x 500, axis=0: medcouple %.4f, naive %.4f, max abs diff %g' %
+      (t_fast, t_naive, np.abs(mc - mc_naive).max()))
@@ -1412,6 +1412,23 @@ class GLMResults(base.LikelihoodModelResults):
     get_prediction.__doc__ = pred.get_prediction_glm.__doc__
 
 
+    def get_influence(self):
+        """
+        get an instance of GLMInfluence with influence and outlier measures
+
+        Returns
+        -------
+        infl : GLMInfluence instance
+            the instance has methods to calculate the main influence and
+            outlier measures for the GLM
+
+        See also
+        --------
+        statsmodels.stats.outliers_influence.GLMInfluence
+        """
+        from statsmodels.stats.outliers_influence import GLMInfluence
+        return GLMInfluence(self)
+
     def remove_data(self):
         #GLM has alias/reference in result instance
         self._data_attr.extend([i for i in self.model._data_attr
@@ -115,6 +115,10 @@ Opening Windows into the Black Box', Journal of Statistical Software,
 2009.
 """
 
+import copy
+import time
+from functools import partial
+
 import pandas as pd
 import numpy as np
 import patsy
@@ -139,6 +143,20 @@ _mice_data_example_2 = """
             j += 1"""
 
 
+def _default_value(value):
+    # Picklable default factory for defaultdict
+    return value
+
+
+def _is_stateful(design_info):
+    # True if the design uses stateful transforms such as center(x),
+    # whose state depends on the data the design was built from.
+    for factor_info in design_info.factor_infos.values():
+        if factor_info.state.get("transforms"):
+            return True
+    return False
+
+
 class PatsyFormula(object):
     """
     A simple wrapper for a string to be interpreted as a Patsy formula.
@@ -167,6 +185,13 @@ class MICEData(object):
         MICEData object is passed as the sole argument to
         `history_callback`.
 
+    Attributes
+    ----------
+    timings : dict-like
+        Cumulative wall-clock time in seconds spent building design
+        matrices ('design'), fitting and perturbing the imputation
+        models ('perturb'), and imputing values ('impute').
+
     Examples
     --------
     Draw 20 imputations from a data set called `data` and save them in
@@ -191,6 +216,12 @@ class MICEData(object):
 
     `history_callback` can be implemented to have side effects such as
     saving the current imputed data set to disk.
+
+    The Patsy design information of each imputation formula is
+    retained after the first update, so later updates only evaluate
+    the formula terms on the current data.  Formulas using stateful
+    transforms (e.g. `center`) are rebuilt from scratch on every
+    update.
     """ % {'_mice_data_example_1': _mice_data_example_1,
            '_mice_data_example_2': _mice_data_example_2}
 
@@ -210,8 +241,15 @@ class MICEData(object):
 
         # Assign the same perturbation method for all variables.
         # Can be overriden when calling 'set_imputer'.
-        self.perturbation_method = defaultdict(lambda :
-                                               perturbation_method)
+        self.perturbation_method = defaultdict(partial(_default_value,
+                                                       perturbation_method))
+
+        # Patsy design information for the imputation formulas, and
+        # design matrices built for the current data in `update`.
+        self._design_info = {}
+        self._design_cache = None
+
+        self.timings = defaultdict(float)
 
         # Map from variable name to indices of observed/missing
         # values.
@@ -231,8 +269,8 @@ class MICEData(object):
 
         # Map from variable names to init/fit args of the conditional
         # models.
-        self.init_kwds = defaultdict(lambda : dict())
-        self.fit_kwds = defaultdict(lambda : dict())
+        self.init_kwds = defaultdict(dict)
+        self.fit_kwds = defaultdict(dict)
 
         # Map from variable names to the model class.
         self.model_class = {}
@@ -419,6 +457,39 @@ class MICEData(object):
             self.history.append(hv)
 
 
+    def _dmatrices(self, formula, lhs=True):
+        """
+        Evaluate a formula on the current data.
+
+        The design information is retained for reuse in later calls,
+        and within a call to `update` the design matrices themselves
+        are reused since the data do not change.
+        """
+
+        if self._design_cache is not None and formula in self._design_cache:
+            return self._design_cache[formula]
+
+        t0 = time.time()
+        design_info = self._design_info.get(formula)
+        if design_info is not None:
+            mats = patsy.build_design_matrices(design_info, self.data)
+        else:
+            if lhs:
+                mats = patsy.dmatrices(formula, self.data)
+            else:
+                mats = [patsy.dmatrix(formula, self.data)]
+            design_info = [x.design_info for x in mats]
+            if not any(_is_stateful(x) for x in design_info):
+                self._design_info[formula] = design_info
+        mats = [np.asarray(x) for x in mats]
+        self.timings["design"] += time.time() - t0
+
+        if self._design_cache is not None:
+            self._design_cache[formula] = mats
+
+        return mats
+
+
     def get_split_data(self, vname):
         """
         Return endog and exog for imputation of a given variable.
@@ -447,17 +518,16 @@ class MICEData(object):
         """
 
         formula = self.conditional_formula[vname]
-        endog, exog = patsy.dmatrices(formula, self.data,
-                                      return_type="dataframe")
+        endog, exog = self._dmatrices(formula)
 
         # Rows with observed endog
         ixo = self.ix_obs[vname]
-        endog_obs = np.asarray(endog.iloc[ixo])
-        exog_obs = np.asarray(exog.iloc[ixo, :])
+        endog_obs = endog[ixo]
+        exog_obs = exog[ixo, :]
 
         # Rows with missing endog
         ixm = self.ix_miss[vname]
-        exog_miss = np.asarray(exog.iloc[ixm, :])
+        exog_miss = exog[ixm, :]
 
         predict_obs_kwds = {}
         if vname in self.predict_kwds:
@@ -477,9 +547,8 @@ class MICEData(object):
         for k in kwds:
             v = kwds[k]
             if isinstance(v, PatsyFormula):
-                mat = patsy.dmatrix(v.formula, self.data,
-                                    return_type="dataframe")
-                mat = np.asarray(mat)[ix, :]
+                mat = self._dmatrices(v.formula, lhs=False)[0]
+                mat = mat[ix, :]
                 if mat.shape[1] == 1:
                     mat = mat[:, 0]
                 kwds[k] = mat
@@ -520,11 +589,10 @@ class MICEData(object):
         ix = self.ix_obs[vname]
 
         formula = self.conditional_formula[vname]
-        endog, exog = patsy.dmatrices(formula, self.data,
-                                      return_type="dataframe")
+        endog, exog = self._dmatrices(formula)
 
-        endog = np.asarray(endog.iloc[ix, 0])
-        exog = np.asarray(exog.iloc[ix, :])
+        endog = endog[ix, 0]
+        exog = exog[ix, :]
 
         init_kwds = self._process_kwds(self.init_kwds[vname], ix)
         fit_kwds = self._process_kwds(self.fit_kwds[vname], ix)
@@ -1001,8 +1069,21 @@ class MICEData(object):
             The name of the variable to be updated.
         """
 
-        self.perturb_params(vname)
-        self.impute(vname)
+        # The data do not change until the imputed values are
+        # stored, so the design matrices are built only once.
+        self._design_cache = {}
+        try:
+            t0 = time.time()
+            d0 = self.timings["design"]
+            self.perturb_params(vname)
+            t1 = time.time()
+            d1 = self.timings["design"]
+            self.timings["perturb"] += t1 - t0 - (d1 - d0)
+            self.impute(vname)
+            t2 = time.time()
+            self.timings["impute"] += t2 - t1 - (self.timings["design"] - d1)
+        finally:
+            self._design_cache = None
 
 
     # work-around for inconsistent predict return values
@@ -1143,6 +1224,14 @@ class MICE(object):
         Dictionary of keyword arguments passed to the fit method
         of the analysis model.
 
+    Attributes
+    ----------
+    timings : dict-like
+        Cumulative wall-clock time in seconds spent updating the
+        imputations ('imputation') and fitting the analysis model
+        ('analysis').  The phases of the imputation step are further
+        broken down in `data.timings`.
+
     Examples
     --------
     Run all MICE steps and obtain results:
@@ -1167,6 +1256,8 @@ class MICE(object):
         self.init_kwds = init_kwds if init_kwds is not None else {}
         self.fit_kwds = fit_kwds if fit_kwds is not None else {}
 
+        self.timings = defaultdict(float)
+
 
     def next_sample(self):
         """
@@ -1195,7 +1286,10 @@ class MICE(object):
         """
 
         # Impute missing values
+        t0 = time.time()
         self.data.update_all(self.n_skip + 1)
+        t1 = time.time()
+        self.timings["imputation"] += t1 - t0
         start_params = None
         if len(self.results_list) > 0:
             start_params = self.results_list[-1].params
@@ -1206,11 +1300,12 @@ class MICE(object):
                                               **self.init_kwds)
         self.fit_kwds.update({"start_params": start_params})
         result = model.fit(**self.fit_kwds)
+        self.timings["analysis"] += time.time() - t1
 
         return result
 
 
-    def fit(self, n_burnin=10, n_imputations=10):
+    def fit(self, n_burnin=10, n_imputations=10, n_chains=None, n_jobs=1):
         """
         Fit a model using MICE.
 
@@ -1220,14 +1315,61 @@ class MICE(object):
             The number of burn-in cycles to skip.
         n_imputations : int
             The number of data sets to impute
-        """
+        n_chains : int
+            The number of independent imputation chains.  The imputed
+            data sets are divided evenly among the chains, and each
+            chain runs its own burn-in.  Defaults to `n_jobs`, after
+            negative values are resolved to the number of CPUs.
+        n_jobs : int
+            The number of processes used to run the chains.  Requires
+            joblib if different from 1.  Negative values count from the
+            number of CPUs as in joblib, -1 uses all CPUs.
 
-        # Run without fitting the analysis model
-        self.data.update_all(n_burnin)
+        Notes
+        -----
+        With a single chain the imputations are drawn from the chain
+        held in `data`, which is advanced in place.  With multiple
+        chains, each chain runs on a copy of `data` seeded from the
+        global numpy random number generator, so the results are
+        reproducible and do not depend on `n_jobs`, but `data` itself
+        is not updated.  If `n_jobs` is not 1, then the chains run on
+        copies of `data` also if there is only one chain.  `data` must
+        then be picklable (e.g. `history_callback` can not be a lambda).
+        """
 
-        for j in range(n_imputations):
-            result = self.next_sample()
-            self.results_list.append(result)
+        use_chains = n_jobs != 1
+        if n_jobs < 0:
+            n_jobs = max(_cpu_count() + 1 + n_jobs, 1)
+        if n_chains is None:
+            n_chains = max(n_jobs, 1)
+        use_chains = use_chains or n_chains > 1
+
+        if not use_chains:
+            # Run without fitting the analysis model
+            t0 = time.time()
+            self.data.update_all(n_burnin)
+            self.timings["imputation"] += time.time() - t0
+
+            for j in range(n_imputations):
+                result = self.next_sample()
+                self.results_list.append(result)
+        else:
+            from statsmodels.tools.parallel import parallel_func
+
+            sizes = [len(x) for x in
+                     np.array_split(np.arange(n_imputations), n_chains)]
+            seeds = np.random.randint(0, 2**31 - 1, n_chains)
+            parallel, p_func, n_jobs = parallel_func(_mice_chain, n_jobs,
+                                                     verbose=0)
+            chains = parallel(p_func(self, n_burnin, m, seed)
+                              for m, seed in zip(sizes, seeds) if m > 0)
+            for results_list, timings, data_timings in chains:
+                self.results_list.extend(results_list)
+                for k, v in timings.items():
+                    self.timings[k] += v
+                for k, v in data_timings.items():
+                    self.data.timings[k] += v
+            result = self.results_list[-1]
 
         self.endog_names = result.model.endog_names
         self.exog_names = result.model.exog_names
@@ -1287,6 +1429,39 @@ class MICE(object):
         return results
 
 
+def _cpu_count():
+    try:
+        from joblib import cpu_count
+    except ImportError:
+        from multiprocessing import cpu_count
+    return cpu_count()
+
+
+def _mice_chain(mice, n_burnin, n_imputations, seed):
+    # Run an independent imputation chain on a copy of `mice`,
+    # returning the fitted analysis models and the timings.
+
+    mice = copy.copy(mice)
+    mice.data = copy.deepcopy(mice.data)
+    mice.fit_kwds = mice.fit_kwds.copy()
+    mice.results_list = []
+    mice.timings = defaultdict(float)
+    mice.data.timings = defaultdict(float)
+
+    state = np.random.get_state()
+    np.random.seed(seed)
+    try:
+        t0 = time.time()
+        mice.data.update_all(n_burnin)
+        mice.timings["imputation"] += time.time() - t0
+        for j in range(n_imputations):
+            mice.results_list.append(mice.next_sample())
+    finally:
+        np.random.set_state(state)
+
+    return mice.results_list, mice.timings, mice.data.timings
+
+
 class MICEResults(LikelihoodModelResults):
 
     def __init__(self, model, params, normalized_cov_params):
@@ -320,6 +320,46 @@ class TestMICE(object):
             assert(isinstance(x.family, sm.families.Binomial))
 
 
+    def test_MICE_chains(self):
+
+        df = gendat()
+        params = []
+        for n_jobs in 1, 2:
+            np.random.seed(3421)
+            imp_data = mice.MICEData(df)
+            mi = mice.MICE("y ~ x1 + x2 + x1:x2", sm.OLS, imp_data)
+            result = mi.fit(2, 5, n_chains=2, n_jobs=n_jobs)
+            assert_equal(len(mi.results_list), 5)
+            params.append(result.params)
+            for k in "imputation", "analysis":
+                assert(mi.timings[k] > 0)
+            for k in "design", "perturb", "impute":
+                assert(imp_data.timings[k] > 0)
+
+        # Chains are seeded independently of the number of processes
+        assert_allclose(params[0], params[1])
+
+        # n_jobs=-1 uses one chain per CPU on copies of the data, also if
+        # there is a single CPU
+        n_cpu = mice._cpu_count()
+        np.random.seed(3421)
+        imp_data = mice.MICEData(df)
+        data0 = imp_data.data.copy()
+        mi = mice.MICE("y ~ x1 + x2 + x1:x2", sm.OLS, imp_data)
+        result = mi.fit(2, 5, n_jobs=-1)
+        assert_equal(len(mi.results_list), 5)
+        assert_equal(imp_data.data.values, data0.values)
+
+        np.random.seed(3421)
+        imp_data = mice.MICEData(df)
+        mi = mice.MICE("y ~ x1 + x2 + x1:x2", sm.OLS, imp_data)
+        if n_cpu > 1:
+            result1 = mi.fit(2, 5, n_chains=n_cpu)
+        else:
+            result1 = mi.fit(2, 5, n_chains=1, n_jobs=2)
+        assert_allclose(result.params, result1.params)
+
+
     def test_combine(self):
 
         np.random.seed(3897)
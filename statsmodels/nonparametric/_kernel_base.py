@@ -3,10 +3,9 @@ Module containing the base object for multivariate kernel density and
 regression, plus some utilities.
 """
 from statsmodels.compat.python import range, string_types
-import copy
 
 import numpy as np
-from scipy import optimize
+from scipy import optimize, special
 from scipy.stats.mstats import mquantiles
 
 try:
@@ -32,6 +31,10 @@ kernel_func = dict(wangryzin=kernels.wang_ryzin,
                    d_gaussian=kernels.d_gaussian)
 
 
+# Default number of kernel values held in memory at once by `gpke_batch`.
+_BLOCK_ELEMENTS = 2**20
+
+
 def _compute_min_std_IQR(data):
     """Compute minimum of std and IQR for each variable."""
     s1 = np.std(data, axis=0)
@@ -46,16 +49,19 @@ def _compute_subset(class_type, data, bw, co, do, n_cvars, ix_ord,
                     ix_unord, n_sub, class_vars, randomize, bound):
     """"Compute bw on subset of data.
 
-    Called from ``GenericKDE._compute_efficient_*``.
+    Called from ``GenericKDE._compute_efficient_*``.  In the `randomize`
+    case `bound` is the seed of the random subset.
 
     Notes
     -----
     Needs to be outside the class in order for joblib to be able to pickle it.
+    `data` can be a read-only memory map shared with the other workers, so
+    it is not changed in place.
 
     """
     if randomize:
-        np.random.shuffle(data)
-        sub_data = data[:n_sub, :]
+        ind = np.random.RandomState(bound).permutation(data.shape[0])[:n_sub]
+        sub_data = data[ind, :]
     else:
         sub_data = data[bound[0]:bound[1], :]
 
@@ -97,6 +103,14 @@ def _compute_subset(class_type, data, bw, co, do, n_cvars, ix_ord,
     return sample_scale_sub, bw_sub
 
 
+def _compute_subsets(class_type, data, bw, co, do, n_cvars, ix_ord,
+                     ix_unord, n_sub, class_vars, randomize, bounds):
+    """Compute bw on several subsets of data, one task of a worker."""
+    return [_compute_subset(class_type, data, bw, co, do, n_cvars, ix_ord,
+                            ix_unord, n_sub, class_vars, randomize, bound)
+            for bound in bounds]
+
+
 class GenericKDE (object):
     """
     Base class for density estimation and regression KDE classes.
@@ -184,7 +198,7 @@ class GenericKDE (object):
 
         nobs = self.nobs
         n_sub = self.n_sub
-        data = copy.deepcopy(self.data)
+        data = self.data
         n_cvars = self.data_type.count('c')
         co = 4  # 2*order of continuous kernel
         do = 4  # 2*order of discrete kernel
@@ -192,8 +206,9 @@ class GenericKDE (object):
 
         # Define bounds for slicing the data
         if self.randomize:
-            # randomize chooses blocks of size n_sub, independent of nobs
-            bounds = [None] * self.n_res
+            # randomize chooses blocks of size n_sub, independent of nobs,
+            # each drawn with its own seed
+            bounds = list(np.random.randint(0, 2**31 - 1, size=self.n_res))
         else:
             bounds = [(i * n_sub, (i+1) * n_sub) for i in range(nobs // n_sub)]
             if nobs % n_sub > 0:
@@ -204,20 +219,29 @@ class GenericKDE (object):
         only_bw = np.empty((n_blocks, self.k_vars))
 
         class_type, class_vars = self._get_class_vars_type()
-        if has_joblib:
-            # `res` is a list of tuples (sample_scale_sub, bw_sub)
-            res = joblib.Parallel(n_jobs=self.n_jobs) \
-                (joblib.delayed(_compute_subset) \
-                (class_type, data, bw, co, do, n_cvars, ix_ord, ix_unord, \
-                n_sub, class_vars, self.randomize, bounds[i]) \
-                for i in range(n_blocks))
+        args = (class_type, data, bw, co, do, n_cvars, ix_ord, ix_unord,
+                n_sub, class_vars, self.randomize)
+        # `res` is a list of tuples (sample_scale_sub, bw_sub)
+        if has_joblib and self.n_jobs != 1:
+            # Each task handles `blocks_per_task` blocks.  joblib passes
+            # `data` to the workers as a read-only memory map if it is larger
+            # than `max_nbytes`, and its default backend keeps the workers
+            # alive between calls.
+            n_jobs = self.n_jobs
+            if n_jobs < 0:
+                n_jobs = max(joblib.cpu_count() + 1 + n_jobs, 1)
+            per_task = self.blocks_per_task
+            if per_task is None:
+                per_task = max(1, -(-n_blocks // (4 * n_jobs)))
+            tasks = [bounds[i:i + per_task]
+                     for i in range(0, n_blocks, per_task)]
+            res = joblib.Parallel(n_jobs=self.n_jobs,
+                                  max_nbytes=self.max_nbytes) \
+                (joblib.delayed(_compute_subsets)(*(args + (task,)))
+                 for task in tasks)
+            res = [res_i for task_res in res for res_i in task_res]
         else:
-            res = []
-            for i in range(n_blocks):
-                res.append(_compute_subset(class_type, data, bw, co, do,
-                                           n_cvars, ix_ord, ix_unord, n_sub,
-                                           class_vars, self.randomize,
-                                           bounds[i]))
+            res = _compute_subsets(*(args + (bounds,)))
 
         for i in range(n_blocks):
             sample_scale[i, :] = res[i][0]
@@ -245,6 +269,11 @@ class GenericKDE (object):
         self.efficient = defaults.efficient
         self.return_only_bw = defaults.return_only_bw
         self.n_jobs = defaults.n_jobs
+        self.block_size = defaults.block_size
+        self.n_threads = defaults.n_threads
+        self.rtol = defaults.rtol
+        self.blocks_per_task = defaults.blocks_per_task
+        self.max_nbytes = defaults.max_nbytes
 
     def _normal_reference(self):
         """
@@ -375,6 +404,29 @@ class EstimatorSettings(object):
         ``n_cores`` the number of available CPU cores.
         See the `joblib documentation
         <https://pythonhosted.org/joblib/parallel.html>`_ for more details.
+        ``n_jobs=1`` runs in the calling process.
+    blocks_per_task : int, optional
+        The number of sub-samples handled by one parallel task in the
+        efficient bandwidth estimation.  Default is None, meaning about four
+        tasks per job.
+    max_nbytes : int or str, optional
+        Data larger than this is passed to the parallel jobs as a shared,
+        read-only memory map instead of a copy per task, see
+        ``joblib.Parallel``.  Default is '1M'; None disables memory mapping.
+    block_size : int, optional
+        The number of evaluation points processed at once when evaluating
+        the estimated functions (e.g. `pdf` and `cdf`).  Default is None,
+        meaning that blocks hold about 2**20 kernel values.
+    n_threads : int, optional
+        The number of threads used to process the blocks of evaluation
+        points.  Default is 1.
+    rtol : float, optional
+        Relative error tolerance of the kernel sums, between 0 and 1.  If
+        given, sums of Gaussian kernels are computed with a k-d tree of the
+        training data, ignoring observations whose total contribution is
+        below `rtol` times the sum.  For weighted sums with signed weights,
+        as in `KernelReg`, the error is relative to the kernel sum of the
+        absolute weights.  Default is None, meaning exact sums.
 
     Examples
     --------
@@ -383,7 +435,9 @@ class EstimatorSettings(object):
 
     """
     def __init__(self, efficient=False, randomize=False, n_res=25, n_sub=50,
-                 return_median=True, return_only_bw=False, n_jobs=-1):
+                 return_median=True, return_only_bw=False, n_jobs=-1,
+                 block_size=None, n_threads=1, rtol=None,
+                 blocks_per_task=None, max_nbytes='1M'):
         self.efficient = efficient
         self.randomize = randomize
         self.n_res = n_res
@@ -391,6 +445,11 @@ class EstimatorSettings(object):
         self.return_median = return_median
         self.return_only_bw = return_only_bw  # TODO: remove this?
         self.n_jobs = n_jobs
+        self.block_size = block_size
+        self.n_threads = n_threads
+        self.rtol = rtol
+        self.blocks_per_task = blocks_per_task
+        self.max_nbytes = max_nbytes
 
 
 class LeaveOneOut(object):
@@ -516,3 +575,536 @@ def gpke(bw, data, data_predict, var_type, ckertype='gaussian',
         return dens.sum(axis=0)
     else:
         return dens
+
+
+def _kd_leaves(data, leaf_size):
+    """
+    Partition the rows of `data` into leaves of a k-d tree.
+
+    The rows are recursively split at the median of the variable with the
+    largest range.  Returns the order of the rows that makes each leaf a
+    contiguous range, and the starts of the leaves.
+    """
+    nobs = data.shape[0]
+    order = np.arange(nobs)
+    starts = []
+    stack = [(0, nobs)]
+    while stack:
+        start, stop = stack.pop()
+        if stop - start <= leaf_size:
+            starts.append(start)
+            continue
+        idx = order[start:stop]
+        pts = data[idx]
+        dim = np.argmax(pts.max(0) - pts.min(0))
+        mid = (stop - start) // 2
+        order[start:stop] = idx[np.argpartition(pts[:, dim], mid)]
+        stack.append((start + mid, stop))
+        stack.append((start, start + mid))
+    return order, np.sort(starts)
+
+
+class _TreeKernelSum(object):
+    """
+    Kernel sums over training data using k-d trees, with error control.
+
+    Parameters
+    ----------
+    data : 2-D ndarray
+        The training data divided by the bandwidths, shape (nobs, k).
+    rtol : float
+        Relative error tolerance of the Gaussian kernel sums, required to
+        be in the open interval (0, 1) for the Gaussian kernel.
+    kernel : callable, optional
+        A univariate kernel with support ``[-support, support]``, applied
+        to each variable of the scaled differences ``data[j] - x[i]``.  The
+        product kernel is the product over the variables.  If None
+        (default), the unnormalized Gaussian kernel ``exp(-0.5 * |u|**2)``
+        is used.
+    support : float, optional
+        The half-width of the support of `kernel`.
+    groups : 1-D ndarray of int, optional
+        Group (e.g. cell of discrete variables) of each training observation.
+    leaf_size : int, optional
+        The number of observations in the leaves of the trees.
+
+    Notes
+    -----
+    The training data and each block of evaluation points are partitioned
+    into the leaves of k-d trees.  For each leaf of evaluation points, the
+    kernels are evaluated for all training observations in the leaves whose
+    bounding box is within a cutoff radius of the bounding box of the
+    evaluation leaf, and all other training leaves are skipped.  The cost
+    therefore grows with the number of close pairs of leaves instead of
+    the product of the sample sizes.
+
+    Compact kernels are summed exactly.  For the Gaussian kernel the
+    skipped contribution of a training leaf to a weighted sum of a point is
+    at most ``exp(-d**2 / 2)`` times the sum of the absolute weights in the
+    leaf, where ``d`` is the distance between the point and the bounding
+    box of the leaf.  If, for any column of the weights, the sum of these
+    bounds is larger than `rtol` times the sum of the kernels times the
+    absolute weights over the close leaves, the skipped leaves are
+    evaluated exactly for that point.  The absolute error of each sum is
+    thus at most `rtol` times the kernel sum of the absolute weights, which
+    is the relative error for non-negative weights.
+    """
+
+    def __init__(self, data, rtol=None, kernel=None, support=1., groups=None,
+                 leaf_size=64):
+        data = np.asarray(data, dtype=np.float64)
+        nobs = data.shape[0]
+        order, starts = _kd_leaves(data, leaf_size)
+        self.order = order
+        self.position = np.empty(nobs, dtype=np.intp)
+        self.position[order] = np.arange(nobs)
+        self.data = data[order]
+        self.starts = starts
+        self.stops = np.r_[starts[1:], nobs]
+        self.lo = np.minimum.reduceat(self.data, starts, axis=0)
+        self.hi = np.maximum.reduceat(self.data, starts, axis=0)
+        self.leaf_size = leaf_size
+        self.rtol = rtol
+        self.kernel = kernel
+        if kernel is None:
+            if rtol is None or not 0 < rtol < 1:
+                raise ValueError("rtol must be larger than 0 and smaller "
+                                 "than 1, got %s" % rtol)
+            self.radius = np.sqrt(-2 * np.log(rtol))
+        else:
+            self.radius = support
+
+        groups = (np.zeros(nobs, dtype=np.intp) if groups is None
+                  else np.asarray(groups)[order])
+        self.groups = groups
+        self.n_groups = groups.max() + 1 if nobs > 0 else 1
+        # Index of the leaf and group of each training observation
+        leaf = np.repeat(np.arange(len(starts)), self.stops - starts)
+        self.leaf_group = leaf * self.n_groups + groups
+
+    def _leaf_mass(self, wabs):
+        # Sums of the absolute weights of each group in each leaf, shape
+        # (n_leaves, n_groups, n_cols)
+        n_leaves = len(self.starts)
+        size = n_leaves * self.n_groups
+        mass = [np.bincount(self.leaf_group, wabs[:, c], minlength=size)
+                for c in range(wabs.shape[1])]
+        return np.column_stack(mass).reshape(n_leaves, self.n_groups, -1)
+
+    def _gaps(self, lo, hi):
+        # Per variable distances between a box and the leaf boxes
+        return np.maximum(np.maximum(lo - self.hi, self.lo - hi), 0)
+
+    def _kernel_sums(self, x, rows, wmat, group_weights, exclude):
+        # Exact sums over the training observations `rows` (sorted)
+        res = 0
+        chunk = max(1, _BLOCK_ELEMENTS // max(len(x), 1))
+        for start in range(0, len(rows), chunk):
+            sub = rows[start:start + chunk]
+            data = self.data[sub]
+            kval = None
+            for k in range(x.shape[1]):
+                u = np.subtract.outer(data[:, k], x[:, k]).T
+                if self.kernel is None:
+                    u *= u
+                    kv = u
+                else:
+                    kv = self.kernel(u)
+                    kv[np.abs(u) > self.radius] = 0
+                if kval is None:
+                    kval = kv
+                elif self.kernel is None:
+                    kval += kv
+                else:
+                    kval *= kv
+            if self.kernel is None:
+                kval *= -0.5
+                np.exp(kval, out=kval)
+            if group_weights is not None:
+                kval *= group_weights[:, self.groups[sub]]
+            if exclude is not None:
+                pos = np.searchsorted(sub, exclude)
+                pos = np.minimum(pos, len(sub) - 1)
+                hit = np.flatnonzero(sub[pos] == exclude)
+                kval[hit, pos[hit]] = 0
+            res = res + np.dot(kval, wmat[sub])
+        return res
+
+    def sums(self, x, weights=None, group_weights=None, exclude=None):
+        """
+        Kernel sums for the rows of `x`.
+
+        Parameters
+        ----------
+        x : 2-D ndarray
+            The evaluation points divided by the bandwidths, shape (m, k).
+        weights : ndarray, optional
+            Weights of the training observations, shape (nobs,) or
+            (nobs, p).  The kernel values are summed if not given.
+        group_weights : 2-D ndarray, optional
+            Non-negative factors of the kernel values, shape (m, n_groups),
+            for each evaluation point and group.
+        exclude : 1-D ndarray of int, optional
+            Index of a training observation left out of the sum of each
+            evaluation point.
+
+        Returns
+        -------
+        res : ndarray
+            The kernel sums, shape (m,) or (m, p).
+        """
+        x = np.asarray(x, dtype=np.float64)
+        m = x.shape[0]
+        nobs = self.data.shape[0]
+        if weights is None:
+            wmat = np.ones((nobs, 1))
+        else:
+            weights = np.asarray(weights, dtype=np.float64)
+            wmat = weights.reshape(nobs, -1)[self.order]
+        n_cols = wmat.shape[1]
+        gaussian = self.kernel is None
+        if gaussian:
+            # The error of each column is bounded by the kernel sums of its
+            # absolute weights, appended as extra columns if any are signed
+            wabs = np.abs(wmat)
+            signed = (wmat < 0).any()
+            if signed:
+                wmat = np.column_stack((wmat, wabs))
+            leaf_mass = self._leaf_mass(wabs)
+        if exclude is not None:
+            exclude = self.position[exclude]
+
+        res = np.empty((m, n_cols))
+        x_order, x_starts = _kd_leaves(x, self.leaf_size)
+        x_stops = np.r_[x_starts[1:], m]
+        leaf_idx = np.arange(len(self.starts))
+        for start, stop in zip(x_starts, x_stops):
+            pts = x_order[start:stop]
+            xq = x[pts]
+            gw = None if group_weights is None else group_weights[pts]
+            exc = None if exclude is None else exclude[pts]
+
+            gaps = self._gaps(xq.min(0), xq.max(0))
+            if gaussian:
+                close = (gaps**2).sum(1) <= self.radius**2
+            else:
+                close = gaps.max(1) <= self.radius
+            near = leaf_idx[close]
+            rows = np.concatenate([np.arange(self.starts[l], self.stops[l])
+                                   for l in near] or
+                                  [np.zeros(0, dtype=np.intp)])
+            part = self._kernel_sums(xq, rows, wmat, gw, exc)
+            if np.isscalar(part):
+                part = np.zeros((len(pts), wmat.shape[1]))
+
+            if gaussian:
+                # Bound on the contributions of the skipped leaves
+                far = leaf_idx[~close]
+                if len(far) > 0:
+                    dist2 = np.zeros((len(pts), len(far)))
+                    for k in range(x.shape[1]):
+                        gap = np.maximum(np.maximum(
+                            xq[:, k, None] - self.hi[far, k],
+                            self.lo[far, k] - xq[:, k, None]), 0)
+                        dist2 += gap * gap
+                    kbound = np.exp(-0.5 * dist2)
+                    if gw is None:
+                        bound = np.dot(kbound, leaf_mass[far].sum(1))
+                    else:
+                        # far_mass[p, f, c] = sum_g gw[p, g] mass[f, g, c]
+                        far_mass = np.dot(gw, leaf_mass[far].transpose(
+                            1, 0, 2).reshape(self.n_groups, -1))
+                        far_mass = far_mass.reshape(len(pts), len(far), -1)
+                        bound = (kbound[:, :, None] * far_mass).sum(1)
+                    ref = part[:, n_cols:] if signed else part
+                    fail = np.flatnonzero(
+                        (bound > self.rtol * ref).any(1))
+                    if len(fail) > 0:
+                        rows = np.concatenate(
+                            [np.arange(self.starts[l], self.stops[l])
+                             for l in far])
+                        part[fail] += self._kernel_sums(
+                            xq[fail], rows, wmat,
+                            None if gw is None else gw[fail],
+                            None if exc is None else exc[fail])
+                part = part[:, :n_cols]
+            res[pts] = part
+
+        if weights is None or weights.ndim == 1:
+            res = res[:, 0]
+        return res
+
+
+class _ProductKernel(object):
+    """
+    Generalized product kernel between evaluation points and fixed
+    training data, evaluated for blocks of evaluation points.
+
+    The training observations are sorted by the distinct combinations
+    (cells) of their discrete variables, `order` gives the sort order.
+    Discrete kernels are only evaluated once per cell, and Gaussian
+    kernels of the continuous variables are combined into a single
+    exponential.  All kernel values are divided by the product of the
+    continuous bandwidths, as in `gpke`.
+
+    If `rtol` is given, sums of Gaussian (and Gaussian convolution) kernels
+    are computed with `_TreeKernelSum` to that relative tolerance.
+    """
+
+    def __init__(self, bw, data, var_type, ckertype='gaussian',
+                 okertype='wangryzin', ukertype='aitchisonaitken', rtol=None):
+        data = np.asarray(data)
+        bw = np.asarray(bw, dtype=np.float64)
+        nobs = data.shape[0]
+        kertypes = dict(c=ckertype, o=okertype, u=ukertype)
+        self.funcs = [kernel_func[kertypes[vtype]] for vtype in var_type]
+        self.ix_cont = [ii for ii, v in enumerate(var_type) if v == 'c']
+        self.ix_disc = [ii for ii, v in enumerate(var_type) if v != 'c']
+        self.bw = bw
+        self.nobs = nobs
+        self.scale = 1. / np.prod(bw[self.ix_cont])
+
+        if len(self.ix_disc) > 0:
+            data_disc = data[:, self.ix_disc]
+            order = np.lexsort(data_disc.T[::-1])
+            data_disc = data_disc[order]
+            new_cell = np.ones(nobs, dtype=bool)
+            new_cell[1:] = np.any(data_disc[1:] != data_disc[:-1], axis=1)
+            self.cell_start = np.flatnonzero(new_cell)
+            self.cells = data_disc[self.cell_start]
+            self.cell_count = np.diff(np.r_[self.cell_start, nobs])
+            self.cell_id = np.cumsum(new_cell) - 1
+        else:
+            order = np.arange(nobs)
+        self.order = order
+        # Position of each training observation in the sorted order
+        self.position = np.empty(nobs, dtype=np.intp)
+        self.position[order] = np.arange(nobs)
+
+        # Gaussian kernels (and the Gaussian convolution kernel) are
+        # exp(-0.5 * (d / s)**2) / sqrt(2 pi) with s = h or s = sqrt(2) h,
+        # the Gaussian cdf kernel is 0.5 h (1 + erf(d / (sqrt(2) h))).
+        ncont = len(self.ix_cont)
+        self.ctype = None
+        if ncont > 0 and ckertype in ('gaussian', 'gauss_convolution',
+                                      'gaussian_cdf'):
+            self.ctype = ckertype
+        bwc = bw[self.ix_cont]
+        if self.ctype == 'gaussian':
+            self.cscale = bwc
+            self.scale /= np.sqrt(2 * np.pi)**ncont
+        elif self.ctype == 'gauss_convolution':
+            self.cscale = bwc * np.sqrt(2)
+            self.scale /= np.sqrt(4 * np.pi)**ncont
+        elif self.ctype == 'gaussian_cdf':
+            self.cscale = bwc * np.sqrt(2)
+            self.scale *= np.prod(0.5 * bwc)
+        else:
+            self.cscale = np.ones(ncont)
+        self.data_cont = data[order][:, self.ix_cont] / self.cscale
+
+        self.tree = None
+        if rtol is not None and self.ctype in ('gaussian',
+                                               'gauss_convolution'):
+            groups = self.cell_id if len(self.ix_disc) > 0 else None
+            self.tree = _TreeKernelSum(self.data_cont, rtol, groups=groups)
+
+    def _cont(self, x):
+        # Product of the continuous kernels, shape (m, nobs), sorted order
+        kcont = None
+        for j, ii in enumerate(self.ix_cont):
+            if self.ctype in ('gaussian', 'gauss_convolution'):
+                kval = np.subtract.outer(x[:, ii] / self.cscale[j],
+                                         self.data_cont[:, j])
+                kval *= kval
+            elif self.ctype == 'gaussian_cdf':
+                kval = np.subtract.outer(x[:, ii] / self.cscale[j],
+                                         self.data_cont[:, j])
+                special.erf(kval, out=kval)
+                kval += 1
+            else:
+                kval = self.funcs[ii](self.bw[ii],
+                                      self.data_cont[None, :, j],
+                                      x[:, ii][:, None])
+            if kcont is None:
+                kcont = kval
+            elif self.ctype in ('gaussian', 'gauss_convolution'):
+                kcont += kval
+            else:
+                kcont *= kval
+        if kcont is not None and self.ctype in ('gaussian',
+                                                'gauss_convolution'):
+            kcont *= -0.5
+            np.exp(kcont, out=kcont)
+        return kcont
+
+    def _disc(self, x):
+        # Product of the discrete kernels, shape (m, n_cells)
+        kdisc = None
+        for j, ii in enumerate(self.ix_disc):
+            kval = self.funcs[ii](self.bw[ii], self.cells[None, :, j],
+                                  x[:, ii][:, None])
+            kdisc = kval if kdisc is None else kdisc * kval
+        return kdisc
+
+    def matrix(self, x, loo_rows=None):
+        """
+        Kernel values between the rows of `x` and all training
+        observations, shape (m, nobs), columns in sorted order.
+
+        If `loo_rows` is given, the kernel value between ``x[r]`` and
+        training observation ``loo_rows[r]`` is set to zero.
+        """
+        kmat = self._cont(x)
+        if len(self.ix_disc) > 0:
+            kdisc = self._disc(x)[:, self.cell_id]
+            kmat = kdisc if kmat is None else kmat * kdisc
+        kmat *= self.scale
+        if loo_rows is not None:
+            kmat[np.arange(len(x)), self.position[loo_rows]] = 0
+        return kmat
+
+    def block_size(self, x, block_size=None):
+        """
+        The number of rows of `x` evaluated at once.
+        """
+        if block_size is not None:
+            return block_size
+        if self.tree is not None:
+            # Memory use is bounded per leaf of points by the tree
+            return 64 * self.tree.leaf_size
+        return _default_block_size(self.nobs)
+
+    def _tree_sums(self, x, weights=None, loo_rows=None):
+        kdisc = self._disc(x) if len(self.ix_disc) > 0 else None
+        exclude = None if loo_rows is None else self.position[loo_rows]
+        res = self.tree.sums(x[:, self.ix_cont] / self.cscale, weights,
+                             kdisc, exclude)
+        return res * self.scale
+
+    def weighted_sums(self, x, weights, loo_rows=None):
+        """
+        Sums of the kernel values times `weights` (in sorted order, shape
+        (nobs,) or (nobs, p)) over the training observations.
+        """
+        if self.tree is not None:
+            return self._tree_sums(x, weights, loo_rows)
+        return np.dot(self.matrix(x, loo_rows), weights)
+
+    def sums(self, x, loo_rows=None):
+        """
+        Sums of the kernel values over the training observations for each
+        row of `x`, optionally leaving out observation ``loo_rows[r]``
+        for row ``r``.
+        """
+        if self.tree is not None:
+            return self._tree_sums(x, loo_rows=loo_rows)
+        kcont = self._cont(x)
+        if loo_rows is not None and kcont is not None:
+            kcont[np.arange(len(x)), self.position[loo_rows]] = 0
+
+        if len(self.ix_disc) == 0:
+            return kcont.sum(axis=1) * self.scale
+
+        kdisc = self._disc(x)
+        if kcont is None:
+            res = np.dot(kdisc, self.cell_count)
+            if loo_rows is not None:
+                own = self.cell_id[self.position[loo_rows]]
+                res -= kdisc[np.arange(len(x)), own]
+            return res * self.scale
+        kcont = np.add.reduceat(kcont, self.cell_start, axis=1)
+        return (kcont * kdisc).sum(axis=1) * self.scale
+
+
+def _map_blocks(func, n, block_size, n_threads=1):
+    """
+    Apply ``func(start, stop)`` to consecutive blocks of ``range(n)`` and
+    concatenate the results along the first axis.
+    """
+    starts = range(0, n, block_size)
+    blocks = [(start, min(start + block_size, n)) for start in starts]
+    if n_threads > 1 and len(blocks) > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(n_threads)
+        try:
+            res = pool.map(lambda b: func(*b), blocks)
+        finally:
+            pool.close()
+    else:
+        res = [func(*b) for b in blocks]
+
+    if len(res) == 0:
+        return np.zeros(0)
+    return np.concatenate(res)
+
+
+def _default_block_size(nobs, block_size=None):
+    if block_size is None:
+        block_size = max(1, _BLOCK_ELEMENTS // max(nobs, 1))
+    return block_size
+
+
+def gpke_batch(bw, data, data_predict, var_type, ckertype='gaussian',
+               okertype='wangryzin', ukertype='aitchisonaitken',
+               block_size=None, n_threads=1, leave_one_out=False,
+               rtol=None):
+    """
+    Returns the non-normalized Generalized Product Kernel Estimator at
+    several evaluation points.
+
+    Parameters
+    ----------
+    bw: 1-D ndarray
+        The user-specified bandwidth parameters.
+    data: 2-D ndarray
+        The training data, shape (nobs, k_vars).
+    data_predict: 2-D ndarray
+        The evaluation points, shape (n_predict, k_vars).
+    var_type: str
+        The variable type (continuous, ordered, unordered).
+    ckertype: str, optional
+        The kernel used for the continuous variables.
+    okertype: str, optional
+        The kernel used for the ordered discrete variables.
+    ukertype: str, optional
+        The kernel used for the unordered discrete variables.
+    block_size : int, optional
+        The number of evaluation points processed at once.  Defaults to
+        blocks holding about 2**20 kernel values.
+    n_threads : int, optional
+        The number of threads used to process the blocks.
+    leave_one_out : bool, optional
+        If True, `data_predict` must be the training data, and the i-th
+        training observation is left out of the sum for the i-th point.
+    rtol : float, optional
+        Relative error tolerance.  If given, sums of Gaussian kernels are
+        approximated using a k-d tree, see `_TreeKernelSum`.  Other kernels
+        are always summed exactly.
+
+    Returns
+    -------
+    dens: 1-D ndarray
+        ``dens[i]`` is ``gpke(bw, data, data_predict[i, :], var_type)``.
+
+    Notes
+    -----
+    The kernels are evaluated for all pairs of evaluation points in a block
+    and training observations at once.  The training observations are
+    grouped by the distinct combinations (cells) of their discrete
+    variables, so that the discrete kernels are only evaluated once per
+    cell and multiply the within-cell sums of the continuous kernels.
+
+    With `leave_one_out`, the number of levels of unordered variables is
+    always that of the full training data.
+    """
+    data_predict = np.asarray(data_predict)
+    kern = _ProductKernel(bw, data, var_type, ckertype, okertype, ukertype,
+                          rtol=rtol)
+
+    def _block(start, stop):
+        loo_rows = np.arange(start, stop) if leave_one_out else None
+        return kern.sums(data_predict[start:stop], loo_rows)
+
+    return _map_blocks(_block, data_predict.shape[0],
+                       kern.block_size(data_predict, block_size), n_threads)
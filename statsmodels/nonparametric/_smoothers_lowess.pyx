@@ -16,11 +16,11 @@ Scatterplots". Journal of the American Statistical Association 74 (368): 829-836
 
 cimport numpy as np
 import numpy as np
-from cpython cimport bool
 cimport cython
+from libc.math cimport fabs, NAN
 
 # there's no fmax in math.h with windows SDK apparently
-cdef inline double fmax(double x, double y): return x if x >= y else y
+cdef inline double fmax(double x, double y) nogil: return x if x >= y else y
 
 DTYPE = np.double
 ctypedef np.double_t DTYPE_t
@@ -29,8 +29,9 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
            np.ndarray[DTYPE_t, ndim = 1] exog,
            double frac = 2.0 / 3.0,
            Py_ssize_t it = 3,
-           double delta = 0.0):
-    '''lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0)
+           double delta = 0.0,
+           np.ndarray[DTYPE_t, ndim = 1] xvals = None):
+    '''lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, xvals=None)
     LOWESS (Locally Weighted Scatterplot Smoothing)
 
     A lowess function that outs smoothed estimates of endog
@@ -51,13 +52,18 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
     delta: float
         Distance within which to use linear-interpolation
         instead of weighted regression.
+    xvals: 1-D numpy array, optional
+        Increasing values at which to evaluate the fit. Each value
+        gets its own local regression with the neighborhood and robustness
+        weights of the final iteration.
 
     Returns
     -------
     out: numpy array
         A numpy array with two columns. The first column
         is the sorted x values and the second column the
-        associated estimated y-values.
+        associated estimated y-values.  If `xvals` is given, the 1-D array
+        of estimates at `xvals` instead.
 
     Notes
     -----
@@ -127,17 +133,11 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
 
     '''
     cdef:
-        Py_ssize_t n
-        int k
-        Py_ssize_t robiter, i, left_end, right_end
-        int last_fit_i,
-        np.ndarray[DTYPE_t, ndim = 1] x, y
-        np.ndarray[DTYPE_t, ndim = 1] y_fit
-        np.ndarray[DTYPE_t, ndim = 1] weights
-        np.ndarray[DTYPE_t, ndim = 1] resid_weights
-
-    y = endog   # now just alias
-    x = exog
+        Py_ssize_t n, k, robiter
+        double[::1] x, y, y_fit, weights, resid_weights, x_eval, y_eval
+
+    x = np.ascontiguousarray(exog)
+    y = np.ascontiguousarray(endog)
 
     n = x.shape[0]
 
@@ -152,240 +152,271 @@ def lowess(np.ndarray[DTYPE_t, ndim = 1] endog,
     if k > n:
         k = n
 
+    # work arrays, only the current neighborhood of `weights` is used
     y_fit = np.zeros(n, dtype = DTYPE)
+    weights = np.zeros(n, dtype = DTYPE)
     resid_weights = np.zeros(n, dtype = DTYPE)
 
     it += 1 # Add one to it for initial run.
-    for robiter in xrange(it):
-        i = 0
-        last_fit_i = -1
-        left_end = 0
-        right_end = k
-        y_fit = np.zeros(n, dtype = DTYPE)
-
-        # 'do' Fit y[i]'s 'until' the end of the regression
-        while True:
-            # Re-initialize the weights for each point x[i].
-            weights = np.zeros(n, dtype = DTYPE)
-
-            # Describe the neighborhood around the current x[i].
-            left_end, right_end, radius = update_neighborhood(x, i, n,
-                                                              left_end,
-                                                              right_end)
-
-            # Calculate the weights for the regression in this neighborhood.
-            # Determine if at least some weights are positive, so a regression
-            # is ok.
-            reg_ok = calculate_weights(x, weights, resid_weights, i, left_end,
-                                       right_end, radius, robiter > 0)
-
-            # If ok, run the regression
-            calculate_y_fit(x, y, i, y_fit, weights, left_end, right_end,
-                            reg_ok)
-
-            # If we skipped some points (because of how delta was set), go back
-            # and fit them by linear interpolation.
-            if last_fit_i < (i - 1):
-                interpolate_skipped_fits(x, y_fit, i, last_fit_i)
-
-            # Update the last fit counter to indicate we've now fit this point.
-            # Find the next i for which we'll run a regression.
-            i, last_fit_i = update_indices(x, y_fit, delta, i, n, last_fit_i)
-
-            if last_fit_i >= n-1:
-                break
+    for robiter in range(it):
+        # The regressions do not need the GIL, so several series can be
+        # smoothed concurrently in threads.
+        with nogil:
+            fit_pass(x, y, n, k, delta, y_fit, weights, resid_weights,
+                     robiter > 0)
 
         # Calculate residual weights, but don't bother on the last iteration.
         if robiter < it - 1:
-            resid_weights = calculate_residual_weights(y, y_fit)
+            resid_weights = calculate_residual_weights(np.asarray(y),
+                                                       np.asarray(y_fit))
+
+    if xvals is None:
+        return np.array([exog, np.asarray(y_fit)]).T
+
+    x_eval = np.ascontiguousarray(xvals)
+    y_eval = np.empty(x_eval.shape[0], dtype = DTYPE)
+    with nogil:
+        fit_xvals(x, y, n, k, x_eval, y_eval, weights, resid_weights,
+                  it > 1)
+    return np.asarray(y_eval)
+
+
+cdef void fit_pass(double[::1] x,
+                   double[::1] y,
+                   Py_ssize_t n,
+                   Py_ssize_t k,
+                   double delta,
+                   double[::1] y_fit,
+                   double[::1] weights,
+                   double[::1] resid_weights,
+                   bint use_resid_weights) nogil:
+    '''
+    One pass of local regressions over all points, as in Cleveland (1979).
+
+    Regressions are run at the points chosen by `update_indices` and the
+    points skipped in between (because of `delta`) are linearly
+    interpolated.  Changes `y_fit` and `weights` in-place.
+    '''
+    cdef:
+        Py_ssize_t i = 0, last_fit_i = -1, left_end = 0, right_end = k
+        double radius
+
+    y_fit[:] = 0
+
+    # 'do' Fit y[i]'s 'until' the end of the regression
+    while True:
+        # Describe the neighborhood around the current x[i].
+        radius = update_neighborhood(x, x[i], n, &left_end, &right_end)
+
+        # Calculate the weights for the regression in this neighborhood.
+        # If at least some weights are positive run the regression,
+        # otherwise keep y[i].
+        if calculate_weights(x, weights, resid_weights, x[i], left_end,
+                             right_end, radius, use_resid_weights):
+            y_fit[i] = calculate_y_fit(x, y, x[i], weights, left_end,
+                                       right_end)
+        else:
+            y_fit[i] = y[i]
+
+        # If we skipped some points (because of how delta was set), go back
+        # and fit them by linear interpolation.
+        if last_fit_i < (i - 1):
+            interpolate_skipped_fits(x, y_fit, i, last_fit_i)
+
+        # Update the last fit counter to indicate we've now fit this point.
+        # Find the next i for which we'll run a regression.
+        last_fit_i = update_indices(x, y_fit, delta, &i, n)
+
+        if last_fit_i >= n-1:
+            break
+
+
+cdef void fit_xvals(double[::1] x,
+                    double[::1] y,
+                    Py_ssize_t n,
+                    Py_ssize_t k,
+                    double[::1] xvals,
+                    double[::1] y_eval,
+                    double[::1] weights,
+                    double[::1] resid_weights,
+                    bint use_resid_weights) nogil:
+    '''
+    Local regressions at the increasing points `xvals`.
 
-    return np.array([x, y_fit]).T
+    A value of `xvals` equal to an observed x gets the same estimate as the
+    final pass of `fit_pass` without `delta`.  If only one neighbor has
+    positive weight its y is used, if none has the estimate is nan.
+    '''
+    cdef:
+        Py_ssize_t i, j, left_end = 0, right_end = k
+        double radius
+
+    for i in range(xvals.shape[0]):
+        radius = update_neighborhood(x, xvals[i], n, &left_end, &right_end)
+        if calculate_weights(x, weights, resid_weights, xvals[i], left_end,
+                             right_end, radius, use_resid_weights):
+            y_eval[i] = calculate_y_fit(x, y, xvals[i], weights, left_end,
+                                        right_end)
+        else:
+            y_eval[i] = NAN
+            for j in range(left_end, right_end):
+                if weights[j] > 0:
+                    y_eval[i] = y[j]
 
 
-def update_neighborhood(np.ndarray[DTYPE_t, ndim = 1] x,
-                        Py_ssize_t i,
-                        Py_ssize_t n,
-                        Py_ssize_t left_end,
-                        Py_ssize_t right_end):
+cdef double update_neighborhood(double[::1] x,
+                                double xi,
+                                Py_ssize_t n,
+                                Py_ssize_t *left_end,
+                                Py_ssize_t *right_end) nogil:
     '''
     Find the indices bounding the k-nearest-neighbors of the current point.
 
     Parameters
     ----------
-    x: 1-D numpy array
+    x: 1-D array
         The input x-values
-    i: indexing integer
-        The index of the point currently being fit.
+    xi: float
+        The point currently being fit.
     n: indexing integer
         The length of the input vectors, x and y.
-    left_end: indexing integer
+    left_end: pointer to indexing integer
         The index of the left-most point in the neighborhood
-        of x[i-1] (the previously-fit point).
-    right_end: indexing integer
+        of the previously-fit point. Updated in-place to the
+        neighborhood of `xi`.
+    right_end: pointer to indexing integer
         The index of the right-most point in the neighborhood
-        of x[i-1]. Non-inclusive, s.t. the neighborhood is
-        x[left_end] <= x < x[right_end].
-    radius: float
-        The radius of the current neighborhood. The larger of
-        distances between x[i] and its left-most or right-most
-        neighbor.
+        of the previously-fit point. Non-inclusive, s.t. the neighborhood
+        is x[left_end] <= x < x[right_end]. Updated in-place.
 
     Returns
     -------
-    left_end: indexing integer
-        The index of the left-most point in the neighborhood
-              of x[i] (the current point).
-    right_end: indexing integer
-        The index of the right-most point in the neighborhood
-               of x[i]. Non-inclusive, s.t. the neighborhood is
-               x[left_end] <= x < x[right_end].
     radius: float
         The radius of the current neighborhood. The larger of
-        distances between x[i] and its left-most or right-most
+        distances between `xi` and its left-most or right-most
         neighbor.
     '''
 
-    cdef double radius
     # A subtle loop. Start from the current neighborhood range:
     # [left_end, right_end). Shift both ends rightwards by one
     # (so that the neighborhood still contains k points), until
     # the current point is in the center (or just to the left of
     # the center) of the neighborhood. This neighborhood will
-    # contain the k-nearest neighbors of x[i].
+    # contain the k-nearest neighbors of xi.
     #
     # Once the right end hits the end of the data, hold the
-    # neighborhood the same for the remaining x[i]s.
-    while True:
-        if right_end < n:
-
-            if (x[i] > (x[left_end] + x[right_end]) / 2.0):
-                left_end += 1
-                right_end += 1
-            else:
-                break
+    # neighborhood the same for the remaining points.
+    while right_end[0] < n:
+        if xi > (x[left_end[0]] + x[right_end[0]]) / 2.0:
+            left_end[0] += 1
+            right_end[0] += 1
         else:
             break
 
-    radius = fmax(x[i] - x[left_end], x[right_end-1] - x[i])
+    return fmax(xi - x[left_end[0]], x[right_end[0] - 1] - xi)
 
-    return left_end, right_end, radius
 
-cdef bool calculate_weights(np.ndarray[DTYPE_t, ndim = 1] x,
-                            np.ndarray[DTYPE_t, ndim = 1] weights,
-                            np.ndarray[DTYPE_t, ndim = 1] resid_weights,
-                            Py_ssize_t i,
+cdef bint calculate_weights(double[::1] x,
+                            double[::1] weights,
+                            double[::1] resid_weights,
+                            double xi,
                             Py_ssize_t left_end,
                             Py_ssize_t right_end,
                             double radius,
-                            bool use_resid_weights):
+                            bint use_resid_weights) nogil:
     '''
 
     Parameters
     ----------
     x: 1-D vector
         The input x-values.
-    weights: 1-D numpy array
+    weights: 1-D array
         The vector of regression weights.
-    resid_weights: 1-D numpy array
+    resid_weights: 1-D array
         The vector of residual weights from the last iteration.
-    i: indexing integer
-        The index of the point currently being fit.
+    xi: float
+        The point currently being fit.
     left_end: indexing integer
         The index of the left-most point in the neighborhood of
-        x[i].
+        xi.
     right_end: indexing integer
         The index of the right-most point in the neighborhood
-        of x[i]. Non-inclusive, s.t. the neighborhood is
+        of xi. Non-inclusive, s.t. the neighborhood is
         x[left_end] <= x < x[right_end].
     radius: float
         The radius of the current neighborhood. The larger of
-        distances between x[i] and its left-most or right-most
+        distances between xi and its left-most or right-most
         neighbor.
     use_resid_weights: boolean
         If True, multiply the x-distance weights by the residual
-        weights from the last iteration of regressions. Set to
-        False on the first iteration (since there are no residuals
-        yet) and True on the subsequent ``robustifying`` iterations.
-
+        weights from the last iteration. Set to False on the first
+        iteration (since there are no residuals yet) and True on the
+        subsequent ``robustifying`` iterations.
 
     Returns
     -------
     reg_ok: boolean
         If True, at least some points have positive weight, and the
-        regression will be run. If False, the regression is skipped
-        and y_fit[i] is set to equal y[i].
+        regression will be run. If False, the regression is skipped.
     Also, changes elements of weights in-place.
     '''
 
     cdef:
-        np.ndarray[DTYPE_t, ndim = 1] x_j = x[left_end:right_end]
-        np.ndarray[DTYPE_t, ndim = 1] dist_i_j = np.abs(x_j - x[i]) / radius
-        bool reg_ok = True
-        double sum_weights
-
-    # Assign the distance measure to the weights, then apply the tricube
-    # function to change in-place.
-    # use_resid_weights will be False on the first iteration, then True
-    # on the subsequent ones, after some residuals have been calculated.
-    weights[left_end:right_end] = dist_i_j
-    if use_resid_weights == False:
-        tricube(weights[left_end:right_end])
-    if use_resid_weights == True:
-        tricube(weights[left_end:right_end])
-        weights[left_end:right_end] = (weights[left_end:right_end] *
-                                          resid_weights[left_end:right_end])
-
-    sum_weights = np.sum(weights[left_end:right_end])
-
-    if sum_weights <= 0.0 or (np.sum(weights[left_end:right_end] != 0) == 1):
+        Py_ssize_t j, n_nonzero = 0
+        double dist_i_j, sum_weights = 0
+
+    # Apply the tricube function to the distances in units of the radius,
+    # times the residual weights after the first iteration.
+    for j in range(left_end, right_end):
+        dist_i_j = fabs(x[j] - xi) / radius
+        weights[j] = tricube(dist_i_j)
+        if use_resid_weights:
+            weights[j] = weights[j] * resid_weights[j]
+        sum_weights += weights[j]
+        n_nonzero += weights[j] != 0
+
+    if sum_weights <= 0.0 or n_nonzero == 1:
         # 2nd condition checks if only 1 local weight is non-zero, which
         # will give a divisor of zero in calculate_y_fit
         # see 1960
-        reg_ok = False
-    else:
-        weights[left_end:right_end] = weights[left_end:right_end] / sum_weights
+        return False
+
+    for j in range(left_end, right_end):
+        weights[j] = weights[j] / sum_weights
 
-    return reg_ok
+    return True
 
 
-cdef void calculate_y_fit(np.ndarray[DTYPE_t, ndim = 1] x,
-                          np.ndarray[DTYPE_t, ndim = 1] y,
-                          Py_ssize_t i,
-                          np.ndarray[DTYPE_t, ndim = 1] y_fit,
-                          np.ndarray[DTYPE_t, ndim = 1] weights,
-                          Py_ssize_t left_end,
-                          Py_ssize_t right_end,
-                          bool reg_ok):
+cdef double calculate_y_fit(double[::1] x,
+                            double[::1] y,
+                            double xi,
+                            double[::1] weights,
+                            Py_ssize_t left_end,
+                            Py_ssize_t right_end) nogil:
     '''
     Calculate smoothed/fitted y-value by weighted regression.
 
     Parameters
     ----------
-    x: 1-D numpy array
+    x: 1-D array
         The vector of input x-values.
-    y: 1-D numpy array
+    y: 1-D array
         The vector of input y-values.
-    i: indexing integer
-        The index of the point currently being fit.
-    y_fit: 1-D numpy array
-        The vector of fitted y-values.
-    weights: 1-D numpy array
-        The vector of regression weights.
+    xi: float
+        The point currently being fit.
+    weights: 1-D array
+        The vector of normalized regression weights.
     left_end: indexing integer
         The index of the left-most point in the neighborhood of
-        x[i].
+        xi.
     right_end: indexing integers
         The index of the right-most point in the neighborhood
-        of x[i]. Non-inclusive, s.t. the neighborhood is
+        of xi. Non-inclusive, s.t. the neighborhood is
         x[left_end] <= x < x[right_end].
-    reg_ok: boolean
-        If True, at least some points have positive weight, and the
-        regression will be run. If False, the regression is skipped
-        and y_fit[i] is set to equal y[i].
 
     Returns
     -------
-    Nothing. Changes y_fit[i] in-place.
+    The fitted value at xi.
 
     Notes
     -----
@@ -396,24 +427,24 @@ cdef void calculate_y_fit(np.ndarray[DTYPE_t, ndim = 1] x,
     '''
 
     cdef:
-       double sum_weighted_x = 0, weighted_sqdev_x = 0, p_i_j
-
-    if reg_ok == False:
-        y_fit[i] = y[i]
-    else:
-        for j in xrange(left_end, right_end):
-            sum_weighted_x += weights[j] * x[j]
-        for j in xrange(left_end, right_end):
-            weighted_sqdev_x += weights[j] * (x[j] - sum_weighted_x) ** 2
-        for j in xrange(left_end, right_end):
-            p_i_j = weights[j] * (1.0 + (x[i] - sum_weighted_x) *
-                             (x[j] - sum_weighted_x) / weighted_sqdev_x)
-            y_fit[i] += p_i_j * y[j]
-
-cdef void interpolate_skipped_fits(np.ndarray[DTYPE_t, ndim = 1] x,
-                                   np.ndarray[DTYPE_t, ndim = 1] y_fit,
+        Py_ssize_t j
+        double sum_weighted_x = 0, weighted_sqdev_x = 0, p_i_j, y_fit = 0
+
+    for j in range(left_end, right_end):
+        sum_weighted_x += weights[j] * x[j]
+    for j in range(left_end, right_end):
+        weighted_sqdev_x += weights[j] * (x[j] - sum_weighted_x) ** 2
+    for j in range(left_end, right_end):
+        p_i_j = weights[j] * (1.0 + (xi - sum_weighted_x) *
+                         (x[j] - sum_weighted_x) / weighted_sqdev_x)
+        y_fit += p_i_j * y[j]
+    return y_fit
+
+
+cdef void interpolate_skipped_fits(double[::1] x,
+                                   double[::1] y_fit,
                                    Py_ssize_t i,
-                                   Py_ssize_t last_fit_i):
+                                   Py_ssize_t last_fit_i) nogil:
     '''
     Calculate smoothed/fitted y by linear interpolation between the current
     and previous y fitted by weighted regression.
@@ -421,9 +452,9 @@ cdef void interpolate_skipped_fits(np.ndarray[DTYPE_t, ndim = 1] x,
 
     Parameters
     ----------
-    x: 1-D numpy array
+    x: 1-D array
         The vector of input x-values.
-    y_fit: 1-D numpy array
+    y_fit: 1-D array
         The vector of fitted y-values
     i: indexing integer
         The index of the point currently being fit by weighted
@@ -436,43 +467,41 @@ cdef void interpolate_skipped_fits(np.ndarray[DTYPE_t, ndim = 1] x,
     Nothing: changes elements of y_fit in-place.
     '''
 
-    cdef np.ndarray[DTYPE_t, ndim = 1] a
+    cdef:
+        Py_ssize_t j
+        double a
 
-    a = x[(last_fit_i + 1): i] - x[last_fit_i]
-    a =  a / (x[i] - x[last_fit_i])
-    y_fit[(last_fit_i + 1): i] = a * y_fit[i] + (1.0 - a) * y_fit[last_fit_i]
+    for j in range(last_fit_i + 1, i):
+        a = (x[j] - x[last_fit_i]) / (x[i] - x[last_fit_i])
+        y_fit[j] = a * y_fit[i] + (1.0 - a) * y_fit[last_fit_i]
 
 
-def update_indices(np.ndarray[DTYPE_t, ndim = 1] x,
-                   np.ndarray[DTYPE_t, ndim = 1] y_fit,
-                   double delta,
-                   Py_ssize_t i,
-                   Py_ssize_t n,
-                   Py_ssize_t last_fit_i):
+cdef Py_ssize_t update_indices(double[::1] x,
+                               double[::1] y_fit,
+                               double delta,
+                               Py_ssize_t *i,
+                               Py_ssize_t n) nogil:
     '''
     Update the counters of the local regression.
 
     Parameters
     ----------
-    x: 1-D numpy array
+    x: 1-D array
         The vector of input x-values.
-    y_fit: 1-D numpy array
+    y_fit: 1-D array
         The vector of fitted y-values
     delta: float
         Indicates the range of x values within which linear
         interpolation should be used to estimate y_fit instead
         of weighted regression.
-    i: indexing integer
-        The index of the current point being fit.
+    i: pointer to indexing integer
+        The index of the current point being fit. Updated in-place
+        to the next point at which to run a weighted regression.
     n: indexing integer
         The length of the input vectors, x and y.
-    last_fit_i: indexing integer
-        The last point at which y_fit was calculated.
 
     Returns
     -------
-    i: indexing integer
-        The next point at which to run a weighted regression.
     last_fit_i: indexing integer
         The updated last point at which y_fit was calculated
 
@@ -483,10 +512,10 @@ def update_indices(np.ndarray[DTYPE_t, ndim = 1] x,
 
     '''
     cdef:
-        Py_ssize_t k
+        Py_ssize_t k, last_fit_i
         double cutpoint
 
-    last_fit_i = i
+    last_fit_i = i[0]
     k = last_fit_i
     # For most points within delta of the current point, we skip the
     # weighted linear regression (which save much computation of
@@ -510,9 +539,9 @@ def update_indices(np.ndarray[DTYPE_t, ndim = 1] x,
     # either one prior to k (since k should be the first point outside
     # of delta) or is just incremented + 1 if k = i+1. This insures we
     # always step forward.
-    i = max(k-1, last_fit_i + 1)
+    i[0] = max(k-1, last_fit_i + 1)
 
-    return i, last_fit_i
+    return last_fit_i
 
 
 def calculate_residual_weights(np.ndarray[DTYPE_t, ndim = 1] y,
@@ -552,46 +581,14 @@ def calculate_residual_weights(np.ndarray[DTYPE_t, ndim = 1] y,
     return resid_weights
 
 
-cdef void tricube(np.ndarray[DTYPE_t, ndim = 1] x):
+cdef inline double tricube(double x) nogil:
     '''
     The tri-cubic function (1 - x**3)**3. Used to weight neighboring
-    points along the x-axis based on their distance to the current point.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-        A vector of neighbors` distances from the current point,
-        in units of the neighborhood radius.
-
-    Returns
-    -------
-    Nothing. Changes array elements in-place
+    points along the x-axis based on their distance to the current point,
+    in units of the neighborhood radius.
     '''
-
-    # fast_array_cube is an elementwise, in-place cubed-power
-    # operator.
-    fast_array_cube(x)
-    x[:] = np.negative(x)
-    x += 1
-    fast_array_cube(x)
-
-
-cdef void fast_array_cube(np.ndarray[DTYPE_t, ndim = 1] x):
-    '''
-    A fast, elementwise, in-place cube operator. Called by the
-    tricube function.
-
-    Parameters
-    ----------
-    x: 1-D numpy array
-
-    Returns
-    -------
-    Nothing. Changes array elements in-place.
-    '''
-
-    x2 = x*x
-    x *= x2
+    cdef double t = 1 - x * (x * x)
+    return t * (t * t)
 
 
 def bisquare(np.ndarray[DTYPE_t, ndim = 1] x):
@@ -1,5 +1,5 @@
-from .kde import KDEUnivariate
-from .smoothers_lowess import lowess
+from .kde import KDEUnivariate, KDEUnivariateSketch
+from .smoothers_lowess import lowess, lowess_batch
 from . import bandwidths
 
 from .kernel_density import \
@@ -22,7 +22,9 @@ from statsmodels.sandbox.nonparametric import kernels
 from statsmodels.tools.decorators import (cache_readonly,
                                                     resettable_cache)
 from . import bandwidths
-from .kdetools import (forrt, revrt, silverman_transform, counts)
+from ._kernel_base import _TreeKernelSum
+from .kdetools import (forrt, revrt, silverman_transform, counts,
+                       kernel_grid, fft_convolve)
 from .linbin import fast_linbin
 
 #### Kernels Switch for estimators ####
@@ -39,6 +41,30 @@ def _checkisfit(self):
         raise ValueError("Call fit to fit the density first")
 
 
+def _tree_kernel_sums(X, points, kern, bw, weights=None, rtol=1e-6):
+    """
+    Sums of ``kern((X - point) / bw)`` (times `weights`) for all `points`,
+    using `_TreeKernelSum`.
+
+    Compact kernels are summed exactly, the Gaussian kernel to the relative
+    tolerance `rtol`.  Returns None for other kernels.
+    """
+    X = np.asarray(X, dtype=np.float64).reshape(-1, 1) / bw
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 1) / bw
+    if isinstance(kern, kernels.Gaussian):
+        tree = _TreeKernelSum(X, rtol)
+        norm = 1. / np.sqrt(2 * np.pi)
+    elif kern.domain is not None:
+        # negative kernel values are set to zero, as in `kdensity`
+        shape = lambda u: np.clip(kern(u), 0, np.inf)
+        tree = _TreeKernelSum(X, kernel=shape,
+                              support=np.max(np.abs(kern.domain)))
+        norm = 1.
+    else:
+        return None
+    return tree.sums(points, weights) * norm
+
+
 #### Kernel Density Estimator Class ###
 
 
@@ -84,7 +110,8 @@ class KDEUnivariate(object):
         self.endog = np.asarray(endog)
 
     def fit(self, kernel="gau", bw="normal_reference", fft=True, weights=None,
-            gridsize=None, adjust=1, cut=3, clip=(-np.inf, np.inf)):
+            gridsize=None, adjust=1, cut=3, clip=(-np.inf, np.inf),
+            rtol=None):
         """
         Attach the density estimate to the KDEUnivariate class.
 
@@ -115,9 +142,12 @@ class KDEUnivariate(object):
 
         fft : bool
             Whether or not to use FFT. FFT implementation is more
-            computationally efficient. However, only the Gaussian kernel
-            is implemented. If FFT is False, then a 'nobs' x 'gridsize'
-            intermediate array is created.
+            computationally efficient, the data are linearly binned and
+            convolved with the kernel. If FFT is False, then a 'nobs' x
+            'gridsize' intermediate array is created.
+        weights : array or None
+            Optional weights. If the X value is clipped, then this weight
+            is also dropped.
         gridsize : int
             If gridsize is None, max(len(X), 50) is used.
         cut : float
@@ -126,6 +156,12 @@ class KDEUnivariate(object):
             -/+ cut*bw*{min(X) or max(X)}
         adjust : float
             An adjustment factor for the bw. Bandwidth becomes bw * adjust.
+        rtol : float, optional
+            If given, the kernel sums of the estimator without FFT and of
+            `evaluate` are computed with a k-d tree of the data, which
+            avoids evaluating the kernels for distant pairs of points.
+            The sums of compact kernels are exact, the relative error of
+            the Gaussian kernel sums is at most `rtol`.
         """
         try:
             bw = float(bw)
@@ -135,22 +171,17 @@ class KDEUnivariate(object):
         endog = self.endog
 
         if fft:
-            if kernel != "gau":
-                msg = "Only gaussian kernel is available for fft"
-                raise NotImplementedError(msg)
-            if weights is not None:
-                msg = "Weights are not implemented for fft"
-                raise NotImplementedError(msg)
             density, grid, bw = kdensityfft(endog, kernel=kernel, bw=bw,
                     adjust=adjust, weights=weights, gridsize=gridsize,
                     clip=clip, cut=cut)
         else:
             density, grid, bw = kdensity(endog, kernel=kernel, bw=bw,
                     adjust=adjust, weights=weights, gridsize=gridsize,
-                    clip=clip, cut=cut)
+                    clip=clip, cut=cut, rtol=rtol)
         self.density = density
         self.support = grid
         self.bw = bw
+        self.rtol = rtol
         self.kernel = kernel_switch[kernel](h=bw) # we instantiate twice,
                                                 # should this passed to funcs?
         # put here to ensure empty cache after re-fit with new options
@@ -262,13 +293,377 @@ class KDEUnivariate(object):
             Point at which to evaluate the density.
         """
         _checkisfit(self)
+        if self.rtol is not None and np.ndim(point) > 0:
+            kern = self.kernel
+            if kern.weights is None:
+                sums = _tree_kernel_sums(self.endog, point, kern, self.bw,
+                                         rtol=self.rtol)
+                norm = self.bw * len(self.endog)
+            else:
+                sums = _tree_kernel_sums(self.endog, point, kern, self.bw,
+                                         kern.weights, self.rtol)
+                norm = self.bw
+            if sums is not None:
+                return sums / norm
         return self.kernel.density(self.endog, point)
 
 
+# Constants of the rule of thumb bandwidths, see bandwidths.py
+_bw_constants = dict(scott=lambda kern: 1.059,
+                     silverman=lambda kern: .9,
+                     normal_reference=lambda kern:
+                         kern.normal_reference_constant)
+
+
+class KDEUnivariateSketch(object):
+    """
+    Mergeable binned sketch of univariate data for kernel density estimation.
+
+    The data are linearly binned on a grid when they arrive, so that the
+    density can be estimated from data that do not fit in memory, and
+    sketches computed on separate chunks or workers can be merged.
+
+    Parameters
+    ----------
+    gridsize : int
+        The number of grid points.
+    a, b : float, optional
+        The end points of a fixed grid.  Observations outside of ``[a, b]``
+        are dropped.  If not given, the grid adapts to the data, see Notes.
+
+    Attributes
+    ----------
+    counts : ndarray
+        The (weighted) linearly binned counts at the grid points.
+    grid : ndarray
+        The grid points.
+    nobs : int
+        The number of binned observations.
+
+    Notes
+    -----
+    The adaptive grid has a spacing that is a power of two, and grid points
+    at multiples of the spacing.  If new data fall outside of the grid, the
+    spacing is doubled as often as needed and the counts are rebinned.
+    Because the coarser grid points are a subset of the finer ones,
+    rebinning linearly binned counts gives exactly the linear binning of the
+    data on the coarser grid.  The grid is the coarsest one needed by any
+    of the merged sketches, so that the result usually does not depend on
+    the order of the updates and merges.
+
+    The rule of thumb bandwidths use the (weighted) standard deviation,
+    which is accumulated exactly, and the interquartile range of the binned
+    counts, which is accurate to about the grid spacing.
+
+    Examples
+    --------
+    >>> sketch = KDEUnivariateSketch(gridsize=2**12)
+    >>> for chunk in chunks:
+    ...     sketch.update(chunk)
+    >>> sketch.fit(kernel="gau", bw="scott")
+    >>> sketch.density, sketch.support
+    """
+
+    def __init__(self, gridsize=2**12, a=None, b=None):
+        self.gridsize = gridsize = int(gridsize)
+        if (a is None) != (b is None):
+            raise ValueError("Both a and b are required for a fixed grid")
+        self.fixed = a is not None
+        self.a = a
+        self.delta = None if a is None else (b - a) / (gridsize - 1.)
+        self.counts = np.zeros(gridsize)
+        self.nobs = 0
+        # range of the binned data
+        self._range = (np.inf, -np.inf)
+        # total weight, weighted mean and sum of squared deviations
+        self._moments = np.zeros(3)
+
+    @property
+    def grid(self):
+        if self.delta is None:
+            return None
+        return self.a + self.delta * np.arange(self.gridsize)
+
+    def _rebin(self, a, delta):
+        # Linearly bin the current counts on the grid given by a and delta
+        counts = self.counts
+        self.counts = np.zeros(self.gridsize)
+        if self.delta is not None:
+            grid = self.grid
+            mask = counts != 0
+            self.counts = fast_linbin(grid[mask], a,
+                                      a + delta * (self.gridsize - 1),
+                                      self.gridsize, weights=counts[mask])
+        self.a = a
+        self.delta = delta
+
+    def _cover(self, lo, hi, delta=None):
+        # Adapt the grid so that it contains [lo, hi], with spacing at
+        # least delta
+        if self.delta is not None:
+            if (lo >= self.a and hi <= self.grid[-1] and
+                    (delta is None or delta <= self.delta)):
+                return
+            lo = min(lo, self._range[0])
+            hi = max(hi, self._range[1])
+            delta = self.delta if delta is None else max(delta, self.delta)
+        elif delta is None:
+            span = max(hi - lo, np.abs(lo) * 1e-8, 1e-300)
+            delta = 2.**np.floor(np.log2(span / (self.gridsize - 1)))
+        while np.ceil(hi / delta) - np.floor(lo / delta) > self.gridsize - 1:
+            delta *= 2
+        self._rebin(np.floor(lo / delta) * delta, delta)
+
+    @staticmethod
+    def _combine(mom1, mom2):
+        # Merge total weight, mean and sum of squared deviations
+        w1, mean1, m2_1 = mom1
+        w2, mean2, m2_2 = mom2
+        w = w1 + w2
+        if w == 0:
+            return np.zeros(3)
+        d = mean2 - mean1
+        return np.array([w, mean1 + d * w2 / w,
+                         m2_1 + m2_2 + d**2 * w1 * w2 / w])
+
+    def update(self, x, weights=None):
+        """
+        Add a chunk of observations to the sketch.
+
+        Parameters
+        ----------
+        x : array-like
+            The observations.  NaNs are dropped.
+        weights : array-like, optional
+            The weights of the observations.
+
+        Returns
+        -------
+        self
+        """
+        x = np.asarray(x, dtype=np.float64).ravel()
+        if weights is not None:
+            weights = np.asarray(weights, dtype=np.float64).ravel()
+            if len(weights) != len(x):
+                msg = "The length of the weights must be the same as the given X."
+                raise ValueError(msg)
+        if self.fixed:
+            keep = (x >= self.a) & (x <= self.grid[-1])
+        else:
+            keep = np.isfinite(x)
+        if not keep.all():
+            x = x[keep]
+            if weights is not None:
+                weights = weights[keep]
+        if len(x) == 0:
+            return self
+        lo, hi = x.min(), x.max()
+        if not self.fixed:
+            self._cover(lo, hi)
+        self._range = (min(lo, self._range[0]), max(hi, self._range[1]))
+
+        self.counts += fast_linbin(x, self.a, self.grid[-1], self.gridsize,
+                                   weights=weights)
+        self.nobs += len(x)
+        if weights is None:
+            mom = [len(x), x.mean(), ((x - x.mean())**2).sum()]
+        else:
+            wsum = weights.sum()
+            mean = np.dot(weights, x) / wsum
+            mom = [wsum, mean, np.dot(weights, (x - mean)**2)]
+        self._moments = self._combine(self._moments, mom)
+        return self
+
+    def merge(self, other):
+        """
+        Add the observations of another sketch.
+
+        Parameters
+        ----------
+        other : KDEUnivariateSketch
+            A sketch with the same gridsize, and the same grid if the grid
+            is fixed.
+
+        Returns
+        -------
+        self
+        """
+        if other.gridsize != self.gridsize or other.fixed != self.fixed:
+            raise ValueError("The sketches have different grids")
+        if other.nobs == 0:
+            return self
+        if self.fixed:
+            if other.a != self.a or other.delta != self.delta:
+                raise ValueError("The sketches have different grids")
+            self.counts = self.counts + other.counts
+        else:
+            other_grid = other.grid
+            self._cover(other._range[0], other._range[1], other.delta)
+            mask = other.counts != 0
+            self.counts += fast_linbin(other_grid[mask], self.a,
+                                       self.grid[-1], self.gridsize,
+                                       weights=other.counts[mask])
+        self.nobs += other.nobs
+        self._range = (min(self._range[0], other._range[0]),
+                       max(self._range[1], other._range[1]))
+        self._moments = self._combine(self._moments, other._moments)
+        return self
+
+    def _quantiles(self, probs):
+        # Quantiles of the binned counts
+        cumcounts = np.cumsum(self.counts)
+        return np.interp(np.asarray(probs) * cumcounts[-1], cumcounts,
+                         self.grid)
+
+    def select_bandwidth(self, bw="normal_reference", kernel="gau"):
+        """
+        Rule of thumb bandwidth from the sketch.
+
+        Parameters
+        ----------
+        bw : str
+            "scott", "silverman" or "normal_reference", see `bandwidths`.
+        kernel : str
+            The kernel, used by "normal_reference".
+
+        Returns
+        -------
+        bw : float
+        """
+        # the weights need not be frequencies, the degrees of freedom
+        # correction uses the number of observations
+        wsum, mean, m2 = self._moments
+        std = np.sqrt(m2 / wsum * self.nobs / (self.nobs - 1.))
+        q25, q75 = self._quantiles([0.25, 0.75])
+        A = min(std, (q75 - q25) / 1.349)
+        C = _bw_constants[bw](kernel_switch[kernel]())
+        return C * A * self.nobs ** (-0.2)
+
+    def fit(self, kernel="gau", bw="normal_reference", adjust=1, cut=3):
+        """
+        Attach the density estimate of the binned data to the sketch.
+
+        Parameters
+        ----------
+        kernel : str
+            The Kernel to be used, see `KDEUnivariate.fit`.
+        bw : str, float
+            The bandwidth or the rule to select it, see `select_bandwidth`.
+        adjust : float
+            An adjustment factor for the bw. Bandwidth becomes bw * adjust.
+        cut : float
+            The grid is extended by cut*bw beyond the binned range.
+
+        Returns
+        -------
+        self
+        """
+        if self.nobs == 0:
+            raise ValueError("The sketch holds no observations")
+        try:
+            bw = float(bw)
+            self.bw_method = "user-given"
+        except (TypeError, ValueError):
+            self.bw_method = bw
+            bw = self.select_bandwidth(bw, kernel)
+        bw *= adjust
+
+        kern = kernel_switch[kernel](h=bw)
+        pad = int(np.ceil(cut * bw / self.delta))
+        probs = np.r_[np.zeros(pad), self.counts / self.counts.sum(),
+                      np.zeros(pad)]
+        gridsize = len(probs)
+        density = fft_convolve(probs, kernel_grid(kern, bw, self.delta,
+                                                  gridsize))
+        self.density = np.clip(density, 0, np.inf)
+        self.support = self.a + self.delta * (np.arange(gridsize) - pad)
+        self.bw = bw
+        self.kernel = kern
+        self._cache = resettable_cache()
+        return self
+
+    @cache_readonly
+    def cdf(self):
+        """
+        Returns the cumulative distribution function evaluated at the support.
+
+        Notes
+        -----
+        Will not work if fit has not been called. Uses the trapezoidal rule.
+        """
+        _checkisfit(self)
+        increments = (self.density[1:] + self.density[:-1]) * self.delta / 2
+        return np.r_[0, np.cumsum(increments)]
+
+    @cache_readonly
+    def cumhazard(self):
+        """
+        Returns the hazard function evaluated at the support.
+
+        Notes
+        -----
+        Will not work if fit has not been called.
+        """
+        _checkisfit(self)
+        return -np.log(self.sf)
+
+    @cache_readonly
+    def sf(self):
+        """
+        Returns the survival function evaluated at the support.
+
+        Notes
+        -----
+        Will not work if fit has not been called.
+        """
+        _checkisfit(self)
+        return 1 - self.cdf
+
+    @cache_readonly
+    def entropy(self):
+        """
+        Returns the differential entropy of the density estimate.
+
+        Notes
+        -----
+        Will not work if fit has not been called. 1e-12 is added to each
+        probability to ensure that log(0) is not called.
+        """
+        _checkisfit(self)
+        pdf = self.density
+        return -np.trapz(pdf * np.log(pdf + 1e-12), dx=self.delta)
+
+    @cache_readonly
+    def icdf(self):
+        """
+        Inverse Cumulative Distribution (Quantile) Function
+
+        Notes
+        -----
+        Will not work if fit has not been called. Interpolates the cdf at
+        `gridsize` equally spaced probabilities from 0 to 1.
+        """
+        _checkisfit(self)
+        cdf = self.cdf / self.cdf[-1]
+        return np.interp(np.linspace(0, 1, self.gridsize), cdf, self.support)
+
+    def evaluate(self, point):
+        """
+        Evaluate density at points by linear interpolation on the support.
+
+        Parameters
+        ----------
+        point : float or array-like
+            Points at which to evaluate the density.
+        """
+        _checkisfit(self)
+        return np.interp(point, self.support, self.density, left=0, right=0)
+
+
 #### Kernel Density Estimator Functions ####
 
 def kdensity(X, kernel="gau", bw="normal_reference", weights=None, gridsize=None,
-             adjust=1, clip=(-np.inf,np.inf), cut=3, retgrid=True):
+             adjust=1, clip=(-np.inf,np.inf), cut=3, retgrid=True, rtol=None):
     """
     Rosenblatt-Parzen univariate kernel density estimator.
 
@@ -305,6 +700,10 @@ def kdensity(X, kernel="gau", bw="normal_reference", weights=None, gridsize=None
         -/+ cut*bw*{min(X) or max(X)}
     retgrid : bool
         Whether or not to return the grid over which the density is estimated.
+    rtol : float, optional
+        If given, the kernel sums are computed with a k-d tree, exactly for
+        compact kernels and with relative error at most `rtol` for the
+        Gaussian kernel.
 
     Returns
     -------
@@ -315,8 +714,8 @@ def kdensity(X, kernel="gau", bw="normal_reference", weights=None, gridsize=None
 
     Notes
     -----
-    Creates an intermediate (`gridsize` x `nobs`) array. Use FFT for a more
-    computationally efficient version.
+    Creates an intermediate (`gridsize` x `nobs`) array, unless `rtol` is
+    given. Use FFT for a more computationally efficient version.
     """
     X = np.asarray(X)
     if X.ndim == 1:
@@ -356,11 +755,21 @@ def kdensity(X, kernel="gau", bw="normal_reference", weights=None, gridsize=None
     b = np.max(X,axis=0) + cut*bw
     grid = np.linspace(a, b, gridsize)
 
-    k = (X.T - grid[:,None])/bw  # uses broadcasting to make a gridsize x nobs
-
     # set kernel bandwidth
     kern.seth(bw)
 
+    dens = None
+    if rtol is not None:
+        dens = _tree_kernel_sums(X, grid, kern, bw, weights, rtol)
+    if dens is not None:
+        dens /= q * bw
+        if retgrid:
+            return dens, grid, bw
+        else:
+            return dens, bw
+
+    k = (X.T - grid[:,None])/bw  # uses broadcasting to make a gridsize x nobs
+
     # truncate to domain
     if kern.domain is not None: # won't work for piecewise kernels like parzen
         z_lo, z_high = kern.domain
@@ -389,21 +798,19 @@ def kdensityfft(X, kernel="gau", bw="normal_reference", weights=None, gridsize=N
     X : array-like
         The variable for which the density estimate is desired.
     kernel : str
-        ONLY GAUSSIAN IS CURRENTLY IMPLEMENTED.
-        "bi" for biweight
-        "cos" for cosine
-        "epa" for Epanechnikov, default
-        "epa2" for alternative Epanechnikov
-        "gau" for Gaussian.
-        "par" for Parzen
-        "rect" for rectangular
-        "tri" for triangular
+        The Kernel to be used. Choices are
+        - "biw" for biweight
+        - "cos" for cosine
+        - "epa" for Epanechnikov
+        - "gau" for Gaussian.
+        - "tri" for triangular
+        - "triw" for triweight
+        - "uni" for uniform
     bw : str, float
         "scott" - 1.059 * A * nobs ** (-1/5.), where A is min(std(X),IQR/1.34)
         "silverman" - .9 * A * nobs ** (-1/5.), where A is min(std(X),IQR/1.34)
         If a float is given, it is the bandwidth.
     weights : array or None
-        WEIGHTS ARE NOT CURRENTLY IMPLEMENTED.
         Optional  weights. If the X value is clipped, then this weight is
         also dropped.
     gridsize : int
@@ -430,12 +837,15 @@ def kdensityfft(X, kernel="gau", bw="normal_reference", weights=None, gridsize=N
 
     Notes
     -----
-    Only the default kernel is implemented. Weights aren't implemented yet.
     This follows Silverman (1982) with changes suggested by Jones and Lotwick
     (1984). However, the discretization step is replaced by linear binning
-    of Fan and Marron (1994). This should be extended to accept the parts
-    that are dependent only on the data to speed things up for
-    cross-validation.
+    of Fan and Marron (1994). The Gaussian kernel uses the closed form
+    of its Fourier transform, other kernels are evaluated at the grid
+    offsets within their support and convolved with the (weighted) bin
+    counts by zero-padded FFT, see Wand (1994). Apart from the clipping,
+    memory use does not depend on the number of observations. This should
+    be extended to accept the parts that are dependent only on the data to
+    speed things up for cross-validation.
 
     References
     ---------- ::
@@ -449,10 +859,20 @@ def kdensityfft(X, kernel="gau", bw="normal_reference", weights=None, gridsize=N
     Silverman, B.W. (1982) `Algorithm AS 176. Kernel density estimation using
         the Fast Fourier Transform. Journal of the Royal Statistical Society.
         Series C. 31.2, 93-9.
+    Wand, M.P. (1994) `Fast Computation of Multivariate Kernel Estimators`.
+        Journal of Computational and Graphical Statistics. 3.4, 433-45.
     """
-    X = np.asarray(X)
-    X = X[np.logical_and(X>clip[0], X<clip[1])] # won't work for two columns.
-                                                # will affect underlying data?
+    X = np.asarray(X, dtype=np.float64).ravel()
+    if weights is not None:
+        weights = np.asarray(weights, dtype=np.float64).ravel()
+        if len(weights) != len(X):
+            msg = "The length of the weights must be the same as the given X."
+            raise ValueError(msg)
+    if np.isfinite(clip[0]) or np.isfinite(clip[1]):
+        clip_x = np.logical_and(X>clip[0], X<clip[1])
+        X = X[clip_x]
+        if weights is not None:
+            weights = weights[clip_x]
 
     # Get kernel object corresponding to selection
     kern = kernel_switch[kernel]()
@@ -464,11 +884,12 @@ def kdensityfft(X, kernel="gau", bw="normal_reference", weights=None, gridsize=N
     bw *= adjust
 
     nobs = len(X) # after trim
+    q = nobs if weights is None else weights.sum()
 
     # 1 Make grid and discretize the data
     if gridsize == None:
         gridsize = np.max((nobs,512.))
-    gridsize = 2**np.ceil(np.log2(gridsize)) # round to next power of 2
+    gridsize = int(2**np.ceil(np.log2(gridsize))) # round to next power of 2
 
     a = np.min(X)-cut*bw
     b = np.max(X)+cut*bw
@@ -491,7 +912,17 @@ def kdensityfft(X, kernel="gau", bw="normal_reference", weights=None, gridsize=N
 #    binned /= (nobs)*delta**2 # normalize binned to sum to 1/delta
 
 #NOTE: THE ABOVE IS WRONG, JUST TRY WITH LINEAR BINNING
-    binned = fast_linbin(X,a,b,gridsize)/(delta*nobs)
+    binned = fast_linbin(X,a,b,gridsize,weights=weights)/(delta*q)
+
+    if not isinstance(kern, kernels.Gaussian):
+        # Binned kernel estimator, density at the grid points is
+        # sum_j binned_j * delta * K((grid_i - grid_j)/bw)/bw
+        f = fft_convolve(binned * delta, kernel_grid(kern, bw, delta,
+                                                    gridsize))
+        if retgrid:
+            return f, grid, bw
+        else:
+            return f, bw
 
     # step 2 compute FFT of the weights, using Munro (1976) FFT convention
     y = forrt(binned)
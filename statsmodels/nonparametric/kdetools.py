@@ -38,6 +38,93 @@ def silverman_transform(bw, M, RANGE):
     kern_est = np.r_[FAC,FAC[1:-1]]
     return kern_est
 
+def kernel_grid(kern, bw, delta, M):
+    """
+    Values of the kernel with bandwidth `bw` at the offsets of a grid.
+
+    Parameters
+    ----------
+    kern : CustomKernel
+        The kernel, see `statsmodels.sandbox.nonparametric.kernels`.
+    bw : float
+        The bandwidth.
+    delta : float
+        The grid spacing.
+    M : int
+        The number of grid points.
+
+    Returns
+    -------
+    kern_grid : ndarray
+        ``K(j * delta / bw) / bw`` for ``j = -L, ..., L``, where ``L`` is
+        the number of grid steps covered by the support of the kernel, at
+        most ``M - 1``.  Values outside of the domain of the kernel and
+        negative values are set to zero.  If the grid covers the support of
+        the kernel, then the values are rescaled so that their sum times
+        `delta` is one.
+
+    Notes
+    -----
+    The sum of the kernel values at the grid points is not exactly one,
+    e.g. the uniform kernel has its full value at the edges of its domain.
+    Without the rescaling the density would not integrate to one.
+    """
+    L = M - 1
+    if kern.domain is not None:
+        # support of the kernel in grid steps, robust to round-off if the
+        # edge of the domain is on the grid
+        edge = np.max(np.abs(kern.domain)) * bw / delta
+        L_support = int(np.floor(edge * (1 + 1e-12)))
+        covered = L_support <= L
+        L = min(L, L_support)
+    u = np.arange(-L, L + 1) * delta / bw
+    if kern.domain is not None:
+        lower, upper = kern.domain
+        tol = 1e-12 * max(abs(lower), abs(upper))
+        outside = (u < lower - tol) | (u > upper + tol)
+        u = np.clip(u, lower, upper)
+    kern_est = np.asarray(kern(u), dtype=np.float64)
+    if kern.domain is not None:
+        kern_est[outside] = 0
+        if covered:
+            # share of the grid cells of the outermost points that lies
+            # inside the domain of the kernel
+            frac = np.clip(edge - L + 0.5, 0, 1)
+            kern_est[[0, -1]] *= frac
+    else:
+        covered = kern_est[0] <= 1e-8 * kern_est.max()
+    kern_est[kern_est < 0] = 0
+    kern_est /= bw
+    total = kern_est.sum() * delta
+    if covered and total > 0:
+        kern_est /= total
+    return kern_est
+
+def fft_convolve(binned, kern_grid):
+    """
+    Linear (not circular) convolution of binned data with a kernel on the
+    grid, using the FFT.
+
+    Parameters
+    ----------
+    binned : ndarray
+        The binned data on a grid with M points.
+    kern_grid : ndarray
+        The kernel at the offsets -L, ..., L of the grid, see `kernel_grid`.
+
+    Returns
+    -------
+    conv : ndarray
+        ``conv[i] = sum_j binned[j] * kern_grid[L + i - j]`` for the M grid
+        points.
+    """
+    M = len(binned)
+    L = len(kern_grid) // 2
+    P = int(2**np.ceil(np.log2(M + 2 * L)))
+    conv = np.fft.irfft(np.fft.rfft(binned, P) * np.fft.rfft(kern_grid, P),
+                        P)
+    return conv[L:L + M]
+
 def counts(x,v):
     """
     Counts the number of elements of x that fall within the grid points v
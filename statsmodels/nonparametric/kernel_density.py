@@ -30,12 +30,11 @@ References
 from __future__ import division
 # TODO: make default behavior efficient=True above a certain n_obs
 
-from statsmodels.compat.python import range, next
+from statsmodels.compat.python import range
 import numpy as np
 
-from . import kernels
 from ._kernel_base import GenericKDE, EstimatorSettings, gpke, \
-    LeaveOneOut, _adjust_shape
+    gpke_batch, _adjust_shape, _ProductKernel, _map_blocks
 
 
 __all__ = ['KDEMultivariate', 'KDEMultivariateConditional', 'EstimatorSettings']
@@ -152,13 +151,15 @@ class KDEMultivariate(GenericKDE):
 
         .. math:: K_{h}(X_{i},X_{j}) =
             \prod_{s=1}^{q}h_{s}^{-1}k\left(\frac{X_{is}-X_{js}}{h_{s}}\right)
+
+        All :math:`f_{-i}` are computed in a single pass over the pairs of
+        observations, leaving out the diagonal terms.
         """
-        LOO = LeaveOneOut(self.data)
-        L = 0
-        for i, X_not_i in enumerate(LOO):
-            f_i = gpke(bw, data=-X_not_i, data_predict=-self.data[i, :],
-                       var_type=self.var_type)
-            L += func(f_i)
+        f = gpke_batch(bw, data=self.data, data_predict=self.data,
+                       var_type=self.var_type, leave_one_out=True,
+                       block_size=self.block_size, n_threads=self.n_threads,
+                       rtol=self.rtol)
+        L = np.sum(func(f))
 
         return -L
 
@@ -189,11 +190,12 @@ class KDEMultivariate(GenericKDE):
         else:
             data_predict = _adjust_shape(data_predict, self.k_vars)
 
-        pdf_est = []
-        for i in range(np.shape(data_predict)[0]):
-            pdf_est.append(gpke(self.bw, data=self.data,
-                                data_predict=data_predict[i, :],
-                                var_type=self.var_type) / self.nobs)
+        pdf_est = gpke_batch(self.bw, data=self.data,
+                             data_predict=data_predict,
+                             var_type=self.var_type,
+                             block_size=self.block_size,
+                             n_threads=self.n_threads,
+                             rtol=self.rtol) / self.nobs
 
         pdf_est = np.squeeze(pdf_est)
         return pdf_est
@@ -234,14 +236,14 @@ class KDEMultivariate(GenericKDE):
         else:
             data_predict = _adjust_shape(data_predict, self.k_vars)
 
-        cdf_est = []
-        for i in range(np.shape(data_predict)[0]):
-            cdf_est.append(gpke(self.bw, data=self.data,
-                                data_predict=data_predict[i, :],
-                                var_type=self.var_type,
-                                ckertype="gaussian_cdf",
-                                ukertype="aitchisonaitken_cdf",
-                                okertype='wangryzin_cdf') / self.nobs)
+        cdf_est = gpke_batch(self.bw, data=self.data,
+                             data_predict=data_predict,
+                             var_type=self.var_type,
+                             ckertype="gaussian_cdf",
+                             ukertype="aitchisonaitken_cdf",
+                             okertype='wangryzin_cdf',
+                             block_size=self.block_size,
+                             n_threads=self.n_threads) / self.nobs
 
         cdf_est = np.squeeze(cdf_est)
         return cdf_est
@@ -281,55 +283,20 @@ class KDEMultivariate(GenericKDE):
         .. [2] Racine, J., Li, Q. "Nonparametric Estimation of Distributions
                 with Categorical and Continuous Data." Working Paper. (2000)
         """
-        #F = 0
-        #for i in range(self.nobs):
-        #    k_bar_sum = gpke(bw, data=-self.data,
-        #                     data_predict=-self.data[i, :],
-        #                     var_type=self.var_type,
-        #                     ckertype='gauss_convolution',
-        #                     okertype='wangryzin_convolution',
-        #                     ukertype='aitchisonaitken_convolution')
-        #    F += k_bar_sum
-        ## there is a + because loo_likelihood returns the negative
-        #return (F / self.nobs**2 + self.loo_likelihood(bw) * \
-        #        2 / ((self.nobs) * (self.nobs - 1)))
-
-        # The code below is equivalent to the commented-out code above.  It's
-        # about 20% faster due to some code being moved outside the for-loops
-        # and shared by gpke() and loo_likelihood().
-        F = 0
-        kertypes = dict(c=kernels.gaussian_convolution,
-                        o=kernels.wang_ryzin_convolution,
-                        u=kernels.aitchison_aitken_convolution)
+        # Both double sums run over all pairs of observations at once, the
+        # second one without the diagonal terms.
         nobs = self.nobs
-        data = -self.data
-        var_type = self.var_type
-        ix_cont = np.array([c == 'c' for c in var_type])
-        _bw_cont_product = bw[ix_cont].prod()
-        Kval = np.empty(data.shape)
-        for i in range(nobs):
-            for ii, vtype in enumerate(var_type):
-                Kval[:, ii] = kertypes[vtype](bw[ii],
-                                              data[:, ii],
-                                              data[i, ii])
-
-            dens = Kval.prod(axis=1) / _bw_cont_product
-            k_bar_sum = dens.sum(axis=0)
-            F += k_bar_sum  # sum of prod kernel over nobs
-
-        kertypes = dict(c=kernels.gaussian,
-                        o=kernels.wang_ryzin,
-                        u=kernels.aitchison_aitken)
-        LOO = LeaveOneOut(self.data)
-        L = 0   # leave-one-out likelihood
-        Kval = np.empty((data.shape[0]-1, data.shape[1]))
-        for i, X_not_i in enumerate(LOO):
-            for ii, vtype in enumerate(var_type):
-                Kval[:, ii] = kertypes[vtype](bw[ii],
-                                              -X_not_i[:, ii],
-                                              data[i, ii])
-            dens = Kval.prod(axis=1) / _bw_cont_product
-            L += dens.sum(axis=0)
+        F = gpke_batch(bw, data=self.data, data_predict=self.data,
+                       var_type=self.var_type,
+                       ckertype='gauss_convolution',
+                       okertype='wangryzin_convolution',
+                       ukertype='aitchisonaitken_convolution',
+                       block_size=self.block_size,
+                       n_threads=self.n_threads, rtol=self.rtol).sum()
+        L = gpke_batch(bw, data=self.data, data_predict=self.data,
+                       var_type=self.var_type, leave_one_out=True,
+                       block_size=self.block_size,
+                       n_threads=self.n_threads, rtol=self.rtol).sum()
 
         # CV objective function, eq. (2.4) of Ref. [3]
         return (F / nobs**2 - 2 * L / (nobs * (nobs - 1)))
@@ -438,6 +405,57 @@ class KDEMultivariateConditional(GenericKDE):
         rpr += "BW selection method: " + self._bw_method + "\n"
         return rpr
 
+    def _product_kernel(self, bw, which, **kertypes):
+        """
+        The `_ProductKernel` of the endog (``which='y'``) or exog
+        (``which='x'``) part of `bw`, cached for the last bandwidth.
+        """
+        key = tuple(np.asarray(bw, dtype=float))
+        cache = self.__dict__.setdefault('_kernel_cache', {})
+        if cache.get('bw') != key:
+            cache.clear()
+            cache['bw'] = key
+        kern_key = (which,) + tuple(sorted(kertypes.items()))
+        if kern_key not in cache:
+            if which == 'x':
+                kern = _ProductKernel(bw[self.k_dep:], self.exog,
+                                      self.indep_type, **kertypes)
+            else:
+                kern = _ProductKernel(bw[:self.k_dep], self.endog,
+                                      self.dep_type, **kertypes)
+            cache[kern_key] = kern
+        return cache[kern_key]
+
+    def _cond_sums(self, bw, endog_predict, exog_predict, ykertypes={},
+                   leave_one_out=False, weights=None):
+        """
+        Kernel sums over the training data for blocks of evaluation points.
+
+        Returns an array with columns ``sum_i K(y, Y_i) K(x, X_i)`` and
+        ``sum_i K(x, X_i)``, followed by ``sum_i K(x, X_i) weights[i]`` if
+        `weights` (shape (nobs, p)) is given.  The exog kernel matrix of a
+        block is shared by all columns.  With `leave_one_out`, the
+        evaluation points are the training data and observation ``i`` is
+        left out of the sums of row ``i``.
+        """
+        kern_x = self._product_kernel(bw, 'x')
+        kern_y = self._product_kernel(bw, 'y', **ykertypes)
+
+        def _block(start, stop):
+            loo_rows = np.arange(start, stop) if leave_one_out else None
+            kx = kern_x.matrix(exog_predict[start:stop], loo_rows)
+            kx = kx[:, kern_x.position]
+            ky = kern_y.matrix(endog_predict[start:stop])[:, kern_y.position]
+            res = [(ky * kx).sum(axis=1), kx.sum(axis=1)]
+            if weights is not None:
+                res.append(np.dot(kx, weights))
+            return np.column_stack(res)
+
+        n_predict = exog_predict.shape[0]
+        block_size = kern_x.block_size(exog_predict, self.block_size)
+        res = _map_blocks(_block, n_predict, block_size, self.n_threads)
+        return res.reshape(n_predict, -1)
+
     def loo_likelihood(self, bw, func=lambda x: x):
         """
         Returns the leave-one-out conditional likelihood of the data.
@@ -461,20 +479,12 @@ class KDEMultivariateConditional(GenericKDE):
         Notes
         -----
         Similar to ``KDE.loo_likelihood`, but substitute ``f(y|x)=f(x,y)/f(y)``
-        for ``f(x)``.
+        for ``f(x)``.  The joint and marginal leave-one-out sums are computed
+        together in one pass over the pairs of observations.
         """
-        yLOO = LeaveOneOut(self.data)
-        xLOO = LeaveOneOut(self.exog).__iter__()
-        L = 0
-        for i, Y_j in enumerate(yLOO):
-            X_not_i = next(xLOO)
-            f_yx = gpke(bw, data=-Y_j, data_predict=-self.data[i, :],
-                        var_type=(self.dep_type + self.indep_type))
-            f_x = gpke(bw[self.k_dep:], data=-X_not_i,
-                       data_predict=-self.exog[i, :],
-                       var_type=self.indep_type)
-            f_i = f_yx / f_x
-            L += func(f_i)
+        bw = np.asarray(bw, dtype=float)
+        sums = self._cond_sums(bw, self.endog, self.exog, leave_one_out=True)
+        L = np.sum(func(sums[:, 0] / sums[:, 1]))
 
         return -L
 
@@ -517,16 +527,8 @@ class KDEMultivariateConditional(GenericKDE):
         else:
             exog_predict = _adjust_shape(exog_predict, self.k_indep)
 
-        pdf_est = []
-        data_predict = np.column_stack((endog_predict, exog_predict))
-        for i in range(np.shape(data_predict)[0]):
-            f_yx = gpke(self.bw, data=self.data,
-                        data_predict=data_predict[i, :],
-                        var_type=(self.dep_type + self.indep_type))
-            f_x = gpke(self.bw[self.k_dep:], data=self.exog,
-                       data_predict=exog_predict[i, :],
-                       var_type=self.indep_type)
-            pdf_est.append(f_yx / f_x)
+        sums = self._cond_sums(self.bw, endog_predict, exog_predict)
+        pdf_est = sums[:, 0] / sums[:, 1]
 
         return np.squeeze(pdf_est)
 
@@ -579,25 +581,12 @@ class KDEMultivariateConditional(GenericKDE):
         else:
             exog_predict = _adjust_shape(exog_predict, self.k_indep)
 
-        N_data_predict = np.shape(exog_predict)[0]
-        cdf_est = np.empty(N_data_predict)
-        for i in range(N_data_predict):
-            mu_x = gpke(self.bw[self.k_dep:], data=self.exog,
-                        data_predict=exog_predict[i, :],
-                        var_type=self.indep_type) / self.nobs
-            mu_x = np.squeeze(mu_x)
-            cdf_endog = gpke(self.bw[0:self.k_dep], data=self.endog,
-                             data_predict=endog_predict[i, :],
-                             var_type=self.dep_type,
-                             ckertype="gaussian_cdf",
-                             ukertype="aitchisonaitken_cdf",
-                             okertype='wangryzin_cdf', tosum=False)
-
-            cdf_exog = gpke(self.bw[self.k_dep:], data=self.exog,
-                            data_predict=exog_predict[i, :],
-                            var_type=self.indep_type, tosum=False)
-            S = (cdf_endog * cdf_exog).sum(axis=0)
-            cdf_est[i] = S / (self.nobs * mu_x)
+        # ``n * mu(x)`` is the sum of the exog kernels
+        sums = self._cond_sums(self.bw, endog_predict, exog_predict,
+                               ykertypes=dict(ckertype="gaussian_cdf",
+                                              ukertype="aitchisonaitken_cdf",
+                                              okertype='wangryzin_cdf'))
+        cdf_est = sums[:, 0] / sums[:, 1]
 
         return cdf_est
 
@@ -648,38 +637,26 @@ class KDEMultivariateConditional(GenericKDE):
         .. [2] Racine, J., Li, Q. "Nonparametric Estimation of Distributions
                 with Categorical and Continuous Data." Working Paper. (2000)
         """
-        zLOO = LeaveOneOut(self.data)
-        CV = 0
-        nobs = float(self.nobs)
-        expander = np.ones((self.nobs - 1, 1))
-        for ii, Z in enumerate(zLOO):
-            X = Z[:, self.k_dep:]
-            Y = Z[:, :self.k_dep]
-            Ye_L = np.kron(Y, expander)
-            Ye_R = np.kron(expander, Y)
-            Xe_L = np.kron(X, expander)
-            Xe_R = np.kron(expander, X)
-            K_Xi_Xl = gpke(bw[self.k_dep:], data=Xe_L,
-                           data_predict=self.exog[ii, :],
-                           var_type=self.indep_type, tosum=False)
-            K_Xj_Xl = gpke(bw[self.k_dep:], data=Xe_R,
-                           data_predict=self.exog[ii, :],
-                           var_type=self.indep_type, tosum=False)
-            K2_Yi_Yj = gpke(bw[0:self.k_dep], data=Ye_L,
-                            data_predict=Ye_R, var_type=self.dep_type,
-                            ckertype='gauss_convolution',
-                            okertype='wangryzin_convolution',
-                            ukertype='aitchisonaitken_convolution',
-                            tosum=False)
-            G = (K_Xi_Xl * K_Xj_Xl * K2_Yi_Yj).sum() / nobs**2
-            f_X_Y = gpke(bw, data=-Z, data_predict=-self.data[ii, :],
-                         var_type=(self.dep_type + self.indep_type)) / nobs
-            m_x = gpke(bw[self.k_dep:], data=-X,
-                       data_predict=-self.exog[ii, :],
-                       var_type=self.indep_type) / nobs
-            CV += (G / m_x ** 2) - 2 * (f_X_Y / m_x)
-
-        return CV / nobs
+        bw = np.asarray(bw, dtype=float)
+        # The convolution kernel of the dependent variables is evaluated
+        # between Y_i and the first observation that is not left out, as in
+        # the original loop over the leave-one-out samples.  Then
+        # G_l = m_l * sum_{i != l} K(X_i, X_l) K2(Y_i, Y_first) / n**2, with
+        # n * m_l the leave-one-out sum of the exog kernels.
+        K2 = np.column_stack([
+            gpke(bw[0:self.k_dep], data=self.endog,
+                 data_predict=self.endog[first, :], var_type=self.dep_type,
+                 ckertype='gauss_convolution',
+                 okertype='wangryzin_convolution',
+                 ukertype='aitchisonaitken_convolution', tosum=False)
+            for first in (0, 1)])
+        sums = self._cond_sums(bw, self.endog, self.exog, leave_one_out=True,
+                               weights=K2)
+        f_X_Y, m_x, G = sums[:, 0], sums[:, 1], sums[:, 2]
+        G[0] = sums[0, 3]
+        CV = (G / m_x - 2 * f_X_Y / m_x).sum()
+
+        return CV / self.nobs
 
     def _get_class_vars_type(self):
         """Helper method to be able to pass needed vars to _compute_subset."""
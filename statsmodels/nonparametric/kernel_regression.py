@@ -33,19 +33,144 @@ from __future__ import division
 
 from statsmodels.compat.python import range, string_types, next
 import copy
+import time
 
 import numpy as np
 from scipy import optimize
 from scipy.stats.mstats import mquantiles
 
 from ._kernel_base import GenericKDE, EstimatorSettings, gpke, \
-    LeaveOneOut, _get_type_pos, _adjust_shape, _compute_min_std_IQR
+    LeaveOneOut, _get_type_pos, _adjust_shape, _compute_min_std_IQR, \
+    _ProductKernel, _map_blocks
+from statsmodels.tools.parallel import parallel_func
 
 
 
 __all__ = ['KernelReg', 'KernelCensoredReg']
 
 
+def _pinv_solve(M, V, rcond=1e-15):
+    """
+    Solve the stacked systems ``M[i] b[i] = V[i]`` using the
+    pseudo-inverse of each ``M[i]``, as `np.linalg.pinv` does.
+    """
+    u, s, vt = np.linalg.svd(M)
+    cutoff = rcond * s.max(axis=-1)[:, None]
+    sinv = np.zeros(s.shape)
+    mask = s > cutoff
+    sinv[mask] = 1. / s[mask]
+    uv = np.einsum('mji,mj->mi', u, V) * sinv
+    return np.einsum('mji,mj->mi', vt, uv)
+
+
+def _local_mean_batch(kern, endog, exog, data_predict, reg_type,
+                      weights=None, leave_one_out=False, block_size=None,
+                      n_threads=1, mfx_kern=None):
+    """
+    Local constant or local linear estimates of the conditional mean at
+    several points.
+
+    Parameters
+    ----------
+    kern : _ProductKernel
+        The product kernel for the training data `exog`.
+    endog : 1-D ndarray
+        The dependent variable.
+    exog : 2-D ndarray
+        The independent variables.
+    data_predict : 2-D ndarray
+        The points at which the mean is estimated.
+    reg_type : {'lc', 'll'}
+        Local constant or local linear estimator.
+    weights : 1-D ndarray, optional
+        Weights multiplying the kernel of each training observation.
+    leave_one_out : bool
+        If True, `data_predict` is `exog` and the i-th observation is left
+        out of the estimate at the i-th point.
+    mfx_kern : _ProductKernel, optional
+        If given, the marginal effects are returned as well.  For 'lc' this
+        is the product kernel with the derivative of the Gaussian kernel
+        for the continuous variables, it is not used for 'll'.
+
+    Returns
+    -------
+    mean : 1-D ndarray
+        The estimated conditional mean at each point of `data_predict`.
+    mfx : 2-D ndarray
+        The marginal effects, only returned if `mfx_kern` is given.
+
+    Notes
+    -----
+    The kernel weights of a block of points are computed at once and the
+    local weighted least squares problems of the block are solved jointly.
+    Equivalent to `_est_loc_constant` and `_est_loc_linear`.  All terms are
+    kernel weighted sums over the training data, which are approximated if
+    `kern` was created with a tolerance `rtol`.
+    """
+    order = kern.order
+    ys = endog[order]
+    ws = np.ones(len(ys)) if weights is None else weights[order]
+    # Columns of the kernel weighted sums: weights, endog and, for 'll',
+    # the moments of the centred exog
+    cols = [ws, ws * ys]
+    if reg_type == 'll':
+        center = exog.mean(0)
+        xs = exog[order] - center
+        xxs = (xs[:, :, None] * xs[:, None, :]).reshape(len(xs), -1)
+        cols += [xs * ws[:, None], xxs * ws[:, None],
+                 xs * (ws * ys)[:, None]]
+    wmat = np.column_stack(cols)
+    return_mfx = mfx_kern is not None
+    nobs, k_vars = exog.shape
+
+    def _block(start, stop):
+        x = data_predict[start:stop]
+        loo_rows = np.arange(start, stop) if leave_one_out else None
+        sums = kern.weighted_sums(x, wmat, loo_rows)
+        s0 = sums[:, 0]
+        v0 = sums[:, 1]
+        if reg_type == 'lc':
+            mean = v0 / s0
+            if not return_mfx:
+                return mean
+            # Derivatives of the numerator and denominator, the same
+            # effect is reported for all variables as in _est_loc_constant
+            dsums = mfx_kern.weighted_sums(x, wmat[:, :2], loo_rows)
+            d_fx = -dsums[:, 0] / nobs
+            d_mx = -dsums[:, 1] / nobs
+            mfx = (v0 * d_fx - s0 * d_mx) / s0**2
+            return np.column_stack([mean] + [mfx] * k_vars)
+
+        # Moments of the local design around each point, see p.38 in [2]
+        m = len(x)
+        xc = x - center
+        b = sums[:, 2:2 + k_vars]
+        a = sums[:, 2 + k_vars:2 + k_vars + k_vars**2].reshape(m, k_vars,
+                                                                  k_vars)
+        xy = sums[:, 2 + k_vars + k_vars**2:]
+        m12 = b - s0[:, None] * xc
+        m22 = (a - xc[:, :, None] * b[:, None, :] -
+               b[:, :, None] * xc[:, None, :] +
+               s0[:, None, None] * xc[:, :, None] * xc[:, None, :])
+        M = np.empty((m, k_vars + 1, k_vars + 1))
+        M[:, 0, 0] = s0
+        M[:, 0, 1:] = m12
+        M[:, 1:, 0] = m12
+        M[:, 1:, 1:] = m22
+        V = np.empty((m, k_vars + 1))
+        V[:, 0] = v0
+        V[:, 1:] = xy - xc * v0[:, None]
+        mean_mfx = _pinv_solve(M, V)
+        return mean_mfx if return_mfx else mean_mfx[:, 0]
+
+    block_size = kern.block_size(data_predict, block_size)
+    res = _map_blocks(_block, len(data_predict), block_size, n_threads)
+    if return_mfx:
+        res = res.reshape(len(data_predict), k_vars + 1)
+        return res[:, 0], res[:, 1:]
+    return res
+
+
 class KernelReg(GenericKDE):
     """
     Nonparametric kernel regression class.
@@ -235,6 +360,20 @@ class KernelReg(GenericKDE):
         #B_x = (f_x * d_mx - m_x * d_fx) / (f_x ** 2)
         return G, B_x
 
+    # Kernels and observation weights used by `_est_loc_linear`
+    _ll_kertypes = {}
+
+    def _kernel_weights(self):
+        return None
+
+    def _reg_type_of(self, func):
+        # The regression type corresponding to an estimator method
+        if func == self._est_loc_constant:
+            return 'lc'
+        elif func == self._est_loc_linear:
+            return 'll'
+        return None
+
     def aic_hurvich(self, bw, func=None):
         """
         Computes the AIC Hurvich criteria for the estimation of the bandwidth.
@@ -256,21 +395,26 @@ class KernelReg(GenericKDE):
         See ch.2 in [1] and p.35 in [2].
 
         """
-        H = np.empty((self.nobs, self.nobs))
-        for j in range(self.nobs):
-            H[:, j] = gpke(bw, data=self.exog, data_predict=self.exog[j,:],
-                           var_type=self.var_type, tosum=False)
-
-        denom = H.sum(axis=1)
-        H = H / denom
-        gx = KernelReg(endog=self.endog, exog=self.exog, var_type=self.var_type,
-                       reg_type=self.reg_type, bw=bw,
-                       defaults=EstimatorSettings(efficient=False)).fit()[0]
+        # The hat matrix H of the local constant estimator only enters
+        # through its trace, sum_i K(X_i, X_i) / sum_j K(X_i, X_j).
+        bw = np.asarray(bw, dtype=np.float64)
+        kern = _ProductKernel(bw, self.exog, self.var_type, rtol=self.rtol)
+        block_size = kern.block_size(self.exog, self.block_size)
+        denom = _map_blocks(lambda start, stop: kern.sums(
+            self.exog[start:stop]), self.nobs, block_size, self.n_threads)
+        kdiag = np.prod([1. / np.sqrt(2 * np.pi) / bw[ii] if vtype == 'c'
+                         else 1 - bw[ii]
+                         for ii, vtype in enumerate(self.var_type)])
+        trace_H = (kdiag / denom).sum()
+
+        gx = _local_mean_batch(kern, self.endog[:, 0], self.exog, self.exog,
+                               self.reg_type, block_size=self.block_size,
+                               n_threads=self.n_threads)
         gx = np.reshape(gx, (self.nobs, 1))
         sigma = ((self.endog - gx)**2).sum(axis=0) / float(self.nobs)
 
-        frac = (1 + np.trace(H) / float(self.nobs)) / \
-               (1 - (np.trace(H) + 2) / float(self.nobs))
+        frac = (1 + trace_H / float(self.nobs)) / \
+               (1 - (trace_H + 2) / float(self.nobs))
         #siga = np.dot(self.endog.T, (I - H).T)
         #sigb = np.dot((I - H), self.endog)
         #sigma = np.dot(siga, sigb) / float(self.nobs)
@@ -306,7 +450,28 @@ class KernelReg(GenericKDE):
         where :math:`g_{-i}(X_{i})` is the leave-one-out estimator of g(X)
         and :math:`h` is the vector of bandwidths
 
+        The leave-one-out estimates for the built-in estimators are
+        computed jointly from the kernel weights of all pairs of
+        observations, with the weight of each observation on itself set
+        to zero.
         """
+        reg_type = self._reg_type_of(func)
+        if reg_type is None:
+            return self._cv_loo_iter(bw, func)
+
+        kertypes = self._ll_kertypes if reg_type == 'll' else {}
+        kern = _ProductKernel(bw, self.exog, self.var_type, rtol=self.rtol,
+                              **kertypes)
+        G = _local_mean_batch(kern, self.endog[:, 0], self.exog, self.exog,
+                              reg_type, weights=self._kernel_weights(),
+                              leave_one_out=True,
+                              block_size=self.block_size,
+                              n_threads=self.n_threads)
+        L = ((self.endog - G[:, None]) ** 2).sum(axis=0)
+        return L / self.nobs
+
+    def _cv_loo_iter(self, bw, func):
+        # cv_loo for general estimator functions
         LOO_X = LeaveOneOut(self.exog)
         LOO_Y = LeaveOneOut(self.endog).__iter__()
         L = 0
@@ -316,7 +481,6 @@ class KernelReg(GenericKDE):
                      data_predict=-self.exog[ii, :])[0]
             L += (self.endog[ii] - G) ** 2
 
-        # Note: There might be a way to vectorize this. See p.72 in [1]
         return L / self.nobs
 
     def r_squared(self):
@@ -362,25 +526,31 @@ class KernelReg(GenericKDE):
             The marginal effects, i.e. the partial derivatives of the mean.
 
         """
-        func = self.est[self.reg_type]
         if data_predict is None:
             data_predict = self.exog
         else:
             data_predict = _adjust_shape(data_predict, self.k_vars)
 
-        N_data_predict = np.shape(data_predict)[0]
-        mean = np.empty((N_data_predict,))
-        mfx = np.empty((N_data_predict, self.k_vars))
-        for i in range(N_data_predict):
-            mean_mfx = func(self.bw, self.endog, self.exog,
-                            data_predict=data_predict[i, :])
-            mean[i] = mean_mfx[0]
-            mfx_c = np.squeeze(mean_mfx[1])
-            mfx[i, :] = mfx_c
-
-        return mean, mfx
-
-    def sig_test(self, var_pos, nboot=50, nested_res=25, pivot=False):
+        return self._fit_batch(data_predict)
+
+    def _fit_batch(self, data_predict):
+        # Mean and marginal effects for blocks of points at once
+        kertypes = self._ll_kertypes if self.reg_type == 'll' else {}
+        kern = _ProductKernel(self.bw, self.exog, self.var_type,
+                              rtol=self.rtol, **kertypes)
+        mfx_kern = kern
+        if self.reg_type == 'lc':
+            mfx_kern = _ProductKernel(self.bw, self.exog, self.var_type,
+                                      ckertype='d_gaussian')
+        return _local_mean_batch(kern, self.endog[:, 0], self.exog,
+                                 data_predict, self.reg_type,
+                                 weights=self._kernel_weights(),
+                                 block_size=self.block_size,
+                                 n_threads=self.n_threads,
+                                 mfx_kern=mfx_kern)
+
+    def sig_test(self, var_pos, nboot=50, nested_res=25, pivot=False,
+                 n_jobs=1, seed=None, callback=None):
         """
         Significance test for the variables in the regression.
 
@@ -388,6 +558,8 @@ class KernelReg(GenericKDE):
         ----------
         var_pos: sequence
             The position of the variable in exog to be tested.
+        nboot, nested_res, pivot, n_jobs, seed, callback :
+            Passed to `TestRegCoefC` or `TestRegCoefD`.
 
         Returns
         -------
@@ -406,9 +578,11 @@ class KernelReg(GenericKDE):
             if np.any(ix_ord[var_pos]) or np.any(ix_unord[var_pos]):
                 raise ValueError("Discrete variable in hypothesis. Must be continuous")
 
-            Sig = TestRegCoefC(self, var_pos, nboot, nested_res, pivot)
+            Sig = TestRegCoefC(self, var_pos, nboot, nested_res, pivot,
+                               n_jobs=n_jobs, seed=seed, callback=callback)
         else:
-            Sig = TestRegCoefD(self, var_pos, nboot)
+            Sig = TestRegCoefD(self, var_pos, nboot, n_jobs=n_jobs, seed=seed,
+                               callback=callback)
 
         return Sig.sig
 
@@ -523,14 +697,14 @@ class KernelCensoredReg(KernelReg):
         self.sortix_rev[ix] = np.arange(len(ix))
         self.endog = np.squeeze(self.endog[ix])
         self.endog = _adjust_shape(self.endog, 1)
-        self.exog = np.squeeze(self.exog[ix])
+        self.exog = self.exog[ix]
         self.d = np.squeeze(self.d[ix])
-        self.W_in = np.empty((self.nobs, 1))
-        for i in range(1, self.nobs + 1):
-            P=1
-            for j in range(1, i):
-                P *= ((self.nobs - j)/(float(self.nobs)-j+1))**self.d[j-1]
-            self.W_in[i-1,0] = P * self.d[i-1] / (float(self.nobs) - i + 1 )
+        # W_i = d_i / (n - i + 1) * prod_{j < i} ((n - j) / (n - j + 1))**d_j
+        nobs = float(self.nobs)
+        j = np.arange(1, self.nobs + 1)
+        factors = ((nobs - j) / (nobs - j + 1))**self.d
+        P = np.r_[1, np.cumprod(factors[:-1])]
+        self.W_in = (P * self.d / (nobs - j + 1))[:, None]
 
     def __repr__(self):
         """Provide something sane to print."""
@@ -542,6 +716,12 @@ class KernelCensoredReg(KernelReg):
         rpr += "Estimator type: " + self.reg_type + "\n"
         return rpr
 
+    _ll_kertypes = dict(ukertype='aitchison_aitken_reg',
+                        okertype='wangryzin_reg')
+
+    def _kernel_weights(self):
+        return self.W_in[:, 0]
+
     def _est_loc_linear(self, bw, endog, exog, data_predict, W):
         """
         Local linear estimator of g(x) in the regression ``y = g(x) + e``.
@@ -633,6 +813,9 @@ class KernelCensoredReg(KernelReg):
         and :math:`h` is the vector of bandwidths
 
         """
+        if self._reg_type_of(func) == 'll':
+            return super(KernelCensoredReg, self).cv_loo(bw, func)
+
         LOO_X = LeaveOneOut(self.exog)
         LOO_Y = LeaveOneOut(self.endog).__iter__()
         LOO_W = LeaveOneOut(self.W_in).__iter__()
@@ -657,6 +840,9 @@ class KernelCensoredReg(KernelReg):
         else:
             data_predict = _adjust_shape(data_predict, self.k_vars)
 
+        if self.reg_type == 'll':
+            return self._fit_batch(data_predict)
+
         N_data_predict = np.shape(data_predict)[0]
         mean = np.empty((N_data_predict,))
         mfx = np.empty((N_data_predict, self.k_vars))
@@ -671,6 +857,11 @@ class KernelCensoredReg(KernelReg):
         return mean, mfx
 
 
+def _sig_test_boot(test, seeds):
+    """Bootstrap replicates of `test`, one random stream per seed."""
+    return [test._boot_stat(np.random.RandomState(seed)) for seed in seeds]
+
+
 class TestRegCoefC(object):
     """
     Significance test for continuous variables in a nonparametric regression.
@@ -698,6 +889,17 @@ class TestRegCoefC(object):
         Significantly increases computational time. But pivot statistics
         have more desirable properties
         (See references)
+    n_jobs: int
+        Number of processes used to run the bootstrap replicates. Default
+        is 1, -1 uses all CPUs.  Requires joblib.
+    seed: int or None
+        Seed for the bootstrap.  Every replicate draws from its own
+        ``RandomState``, seeded from `seed`, so the result does not depend
+        on `n_jobs`.  If None, the seeds are drawn from ``np.random``.
+    callback: callable or None
+        Progress hook, called as ``callback(n_done, nboot, elapsed)``
+        after each chunk of replicates, where `elapsed` is the wall time in
+        seconds since the bootstrap started.
 
     Attributes
     ----------
@@ -708,6 +910,8 @@ class TestRegCoefC(object):
         "*": Significant at the 90% confidence level
         "**": Significant at the 95% confidence level
         "***": Significant at the 99% confidence level
+    t_dist: ndarray
+        The bootstrap distribution of the test statistic.
 
     Notes
     -----
@@ -725,7 +929,7 @@ class TestRegCoefC(object):
     # Racine: Consistent Significance Testing for Nonparametric Regression
     # Journal of Business & Economics Statistics
     def __init__(self, model, test_vars, nboot=400, nested_res=400,
-                 pivot=False):
+                 pivot=False, n_jobs=1, seed=None, callback=None):
         self.nboot = nboot
         self.nres = nested_res
         self.test_vars = test_vars
@@ -738,20 +942,61 @@ class TestRegCoefC(object):
         self.gx = model.est[model.reg_type]
         self.test_vars = test_vars
         self.pivot = pivot
+        self.n_jobs = n_jobs
+        self.seed = seed
+        self.callback = callback
         self.run()
 
+    def __getstate__(self):
+        # the progress hook stays in the calling process
+        state = self.__dict__.copy()
+        state['callback'] = None
+        return state
+
     def run(self):
-        self.test_stat = self._compute_test_stat(self.endog, self.exog)
-        self.sig = self._compute_sig()
+        rs = np.random if self.seed is None else \
+            np.random.RandomState(self.seed)
+        seeds = rs.randint(0, 2**31 - 1, size=self.nboot + 1)
+        self.test_stat = self._compute_test_stat(
+            self.endog, self.exog, np.random.RandomState(seeds[0]))
+        self.sig = self._compute_sig(seeds[1:])
+
+    def _bootstrap(self, seeds):
+        """
+        Runs one bootstrap replicate per seed, over `n_jobs` processes.
 
-    def _compute_test_stat(self, Y, X):
+        The replicates are split in chunks, and `callback` is called after
+        each round of chunks.
+        """
+        nboot = len(seeds)
+        if self.n_jobs == 1:
+            parallel, p_func, n_jobs = list, _sig_test_boot, 1
+        else:
+            parallel, p_func, n_jobs = parallel_func(_sig_test_boot,
+                                                     self.n_jobs, verbose=0)
+
+        n_chunks = max(min(nboot, 4 * n_jobs), 1)
+        chunks = np.array_split(seeds, n_chunks)
+        dist = []
+        t0 = time.time()
+        for i in range(0, n_chunks, n_jobs):
+            res = parallel(p_func(self, chunk)
+                           for chunk in chunks[i:i + n_jobs])
+            for stats in res:
+                dist.extend(stats)
+            if self.callback is not None:
+                self.callback(len(dist), nboot, time.time() - t0)
+
+        return np.array(dist, dtype=float).reshape(-1)
+
+    def _compute_test_stat(self, Y, X, rs=None):
         """
         Computes the test statistic.  See p.371 in [8].
         """
         lam = self._compute_lambda(Y, X)
         t = lam
         if self.pivot:
-            se_lam = self._compute_se_lambda(Y, X)
+            se_lam = self._compute_se_lambda(Y, X, rs)
             t = lam / float(se_lam)
 
         return t
@@ -771,17 +1016,19 @@ class TestRegCoefC(object):
         lam = ((b / fct) ** 2).sum() / float(n)
         return lam
 
-    def _compute_se_lambda(self, Y, X):
+    def _compute_se_lambda(self, Y, X, rs=None):
         """
         Calculates the SE of lambda by nested resampling
         Used to pivot the statistic.
         Bootstrapping works better with estimating pivotal statistics
         but slows down computation significantly.
         """
+        if rs is None:
+            rs = np.random
         n = np.shape(Y)[0]
         lam = np.empty(shape=(self.nres, ))
         for i in range(self.nres):
-            ind = np.random.random_integers(0, n-1, size=(n,1))
+            ind = rs.randint(0, n, size=(n,1))
             Y1 = Y[ind, 0]
             X1 = X[ind, :]
             lam[i] = self._compute_lambda(Y1, X1)
@@ -789,7 +1036,7 @@ class TestRegCoefC(object):
         se_lambda = np.std(lam)
         return se_lambda
 
-    def _compute_sig(self):
+    def _compute_sig(self, seeds):
         """
         Computes the significance value for the variable(s) tested.
 
@@ -797,7 +1044,6 @@ class TestRegCoefC(object):
         bootstrapping the sample.  The null hypothesis is rejected if the test
         statistic is larger than the 90, 95, 99 percentiles.
         """
-        t_dist = np.empty(shape=(self.nboot, ))
         Y = self.endog
         X = copy.deepcopy(self.exog)
         n = np.shape(Y)[0]
@@ -809,11 +1055,8 @@ class TestRegCoefC(object):
         M = np.reshape(M, (n, 1))
         e = Y - M
         e = e - np.mean(e)  # recenter residuals
-        for i in range(self.nboot):
-            ind = np.random.random_integers(0, n-1, size=(n,1))
-            e_boot = e[ind, 0]
-            Y_boot = M + e_boot
-            t_dist[i] = self._compute_test_stat(Y_boot, self.exog)
+        self._M, self._e = M, e
+        t_dist = self._bootstrap(seeds)
 
         self.t_dist = t_dist
         sig = "Not Significant"
@@ -826,6 +1069,13 @@ class TestRegCoefC(object):
 
         return sig
 
+    def _boot_stat(self, rs):
+        """Test statistic for one residual bootstrap sample."""
+        n = np.shape(self.endog)[0]
+        ind = rs.randint(0, n, size=(n,1))
+        Y_boot = self._M + self._e[ind, 0]
+        return self._compute_test_stat(Y_boot, self.exog, rs)
+
 
 class TestRegCoefD(TestRegCoefC):
     """
@@ -844,6 +1094,8 @@ class TestRegCoefD(TestRegCoefC):
     nboot: int
         Number of bootstrap samples used to determine the distribution
         of the test statistic in a finite sample. Default is 400
+    n_jobs, seed, callback:
+        Parallel bootstrap options, see `TestRegCoefC`.
 
     Attributes
     ----------
@@ -865,7 +1117,7 @@ class TestRegCoefD(TestRegCoefC):
     See [9] and chapter 12 in [1].
     """
 
-    def _compute_test_stat(self, Y, X):
+    def _compute_test_stat(self, Y, X, rs=None):
         """Computes the test statistic"""
 
         dom_x = np.sort(np.unique(self.exog[:, self.test_vars]))
@@ -888,7 +1140,7 @@ class TestRegCoefD(TestRegCoefC):
         I = I.sum(axis=0) / float(n)
         return I
 
-    def _compute_sig(self):
+    def _compute_sig(self, seeds):
         """Calculates the significance level of the variable tested"""
 
         m = self._est_cond_mean()
@@ -902,16 +1154,10 @@ class TestRegCoefD(TestRegCoefC):
         u1 = fct1 * u
         u2 = fct2 * u
         r = fct2 / (5 ** 0.5)
-        I_dist = np.empty((self.nboot,1))
-        for j in range(self.nboot):
-            u_boot = copy.deepcopy(u2)
-
-            prob = np.random.uniform(0,1, size = (n,1))
-            ind = prob < r
-            u_boot[ind] = u1[ind]
-            Y_boot = m + u_boot
-            I_dist[j] = self._compute_test_stat(Y_boot, X)
+        self._m, self._u1, self._u2, self._r = m, u1, u2, r
+        I_dist = self._bootstrap(seeds)
 
+        self.t_dist = I_dist
         sig = "Not Significant"
         if self.test_stat > mquantiles(I_dist, 0.9):
             sig = "*"
@@ -922,6 +1168,16 @@ class TestRegCoefD(TestRegCoefC):
 
         return sig
 
+    def _boot_stat(self, rs):
+        """Test statistic for one wild bootstrap sample."""
+        n = np.shape(self.exog)[0]
+        u_boot = copy.deepcopy(self._u2)
+        prob = rs.uniform(0,1, size = (n,1))
+        ind = prob < self._r
+        u_boot[ind] = self._u1[ind]
+        Y_boot = self._m + u_boot
+        return self._compute_test_stat(Y_boot, self.exog)
+
     def _est_cond_mean(self):
         """
         Calculates the expected conditional mean
@@ -14,25 +14,44 @@ ctypedef np.int_t INT
 @cython.boundscheck(False)
 @cython.wraparound(False)
 @cython.cdivision(True)
-def fast_linbin(np.ndarray[DOUBLE] X, double a, double b, int M, int trunc=1):
+def fast_linbin(np.ndarray[DOUBLE] X, double a, double b, int M, int trunc=1,
+                np.ndarray[DOUBLE] weights=None):
     """
     Linear Binning as described in Fan and Marron (1994)
+
+    Each observation (times its weight, if `weights` is given) is split
+    between the two closest of the `M` equally spaced grid points from `a`
+    to `b`.  If `trunc` is 1, observations outside of ``[a, b]`` are
+    dropped, otherwise they are added to the end points.  NaNs are
+    dropped.  No temporary arrays of the size of `X` are created.
     """
     cdef:
         Py_ssize_t i, li_i
         int nobs = X.shape[0]
+        int has_weights = weights is not None
         double delta = (b - a)/(M - 1)
+        double lxi, rem, w = 1.
         np.ndarray[DOUBLE] gcnts = np.zeros(M, np.float)
-        np.ndarray[DOUBLE] lxi = (X - a)/delta
-        np.ndarray[INT] li = lxi.astype(int)
-        np.ndarray[DOUBLE] rem = lxi - li
 
+    if has_weights and weights.shape[0] != nobs:
+        raise ValueError("The length of the weights must be the same as "
+                         "the given X.")
 
     for i in range(nobs):
-        li_i = li[i]
-        if li_i > 1 and li_i < M:
-            gcnts[li_i] = gcnts[li_i] + 1 - rem[i]
-            gcnts[li_i+1] = gcnts[li_i+1] + rem[i]
-        if li_i > M and trunc == 0:
-            gcnts[M] = gcnts[M] + 1
+        if has_weights:
+            w = weights[i]
+        lxi = (X[i] - a)/delta
+        if lxi >= 0 and lxi <= M - 1:
+            li_i = <Py_ssize_t>lxi
+            if li_i >= M - 1:
+                gcnts[M - 1] += w
+            else:
+                rem = lxi - li_i
+                gcnts[li_i] += (1 - rem) * w
+                gcnts[li_i + 1] += rem * w
+        elif trunc == 0:
+            if lxi < 0:
+                gcnts[0] += w
+            elif lxi > M - 1:
+                gcnts[M - 1] += w
     return gcnts
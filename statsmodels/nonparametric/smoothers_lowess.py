@@ -9,9 +9,10 @@ Author : Josef Perktold
 
 import numpy as np
 from ._smoothers_lowess import lowess as _lowess
+from ._kernel_base import _map_blocks
 
 def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
-           missing='drop', return_sorted=True):
+           missing='drop', return_sorted=True, xvals=None, skeleton=None):
     '''LOWESS (Locally Weighted Scatterplot Smoothing)
 
     A lowess function that outs smoothed estimates of endog
@@ -45,6 +46,16 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
         missing (nan or infinite) observations removed.
         If False, then the returned array is in the same length and the same
         sequence of observations as the input array.
+    xvals : 1-D array_like, optional
+        Values of exog at which to evaluate the fit, in any order. Each value
+        gets a local regression on its nearest neighbors, with the
+        robustness weights of the last iteration. `return_sorted` is ignored.
+    skeleton : int, optional
+        If given and smaller than the number of observations, the sorted
+        observations are split into `skeleton` groups of nearly equal size,
+        lowess is fit to the group means, and the fit is linearly
+        interpolated at exog.  This reduces the cost for very large data
+        to a sort and a lowess of size `skeleton`.
 
     Returns
     -------
@@ -56,6 +67,7 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
         the associated estimated y (endog) values.
         If return_sorted is False, then only the fitted values are returned,
         and the observations will be in the same order as the input arrays.
+        If `xvals` is given, then the 1-D array of estimates at `xvals`.
 
     Notes
     -----
@@ -92,6 +104,11 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
     Some experimentation is likely required to find a good
     choice of `frac` and `iter` for a particular dataset.
 
+    `skeleton` is an approximation.  Since the groups have equal size, the
+    neighborhoods in the skeleton contain about the same fraction of the
+    data as in the full fit, but the robustness weights are computed from
+    the residuals of the group means.
+
     References
     ----------
     Cleveland, W.S. (1979) "Robust Locally Weighted Regression
@@ -162,11 +179,18 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
         x = np.array(x[sort_index])
         y = np.array(y[sort_index])
 
-    res = _lowess(y, x, frac=frac, it=it, delta=delta)
-    _, yfitted = res.T
+    if xvals is not None:
+        xvals = np.asarray(xvals, float)
+        order = np.argsort(xvals)
+        yvals = np.empty(xvals.shape)
+        yvals[order] = _lowess_sorted(y, x, frac, it, delta,
+                                      xvals=xvals[order], skeleton=skeleton)
+        return yvals
+
+    yfitted = _lowess_sorted(y, x, frac, it, delta, skeleton=skeleton)
 
     if return_sorted:
-        return res
+        return np.array([x, yfitted]).T
     else:
         # rebuild yfitted with original indices
         # a bit messy: y might have been selected twice
@@ -186,3 +210,92 @@ def lowess(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
 
         # we don't need to return exog anymore
         return yfitted
+
+
+def _lowess_sorted(y, x, frac, it, delta, xvals=None, skeleton=None):
+    """
+    Fitted values at the sorted x, or at the sorted xvals if given.
+    """
+    if skeleton is None or skeleton >= len(x):
+        if xvals is None:
+            return _lowess(y, x, frac=frac, it=it, delta=delta)[:, 1]
+        return _lowess(y, x, frac=frac, it=it, delta=delta, xvals=xvals)
+
+    # group means of consecutive sorted observations
+    starts = np.linspace(0, len(x), skeleton + 1)[:-1].astype(int)
+    counts = np.diff(np.r_[starts, len(x)])
+    x_sk = np.add.reduceat(x, starts) / counts
+    y_sk = np.add.reduceat(y, starts) / counts
+    if xvals is not None:
+        return _lowess(y_sk, x_sk, frac=frac, it=it, delta=delta, xvals=xvals)
+
+    # interpolate, including the fit at the end points of the data
+    knots = np.r_[x[0], x_sk, x[-1]]
+    y_knots = _lowess(y_sk, x_sk, frac=frac, it=it, delta=delta, xvals=knots)
+    return np.interp(x, knots, y_knots)
+
+
+def lowess_batch(endog, exog, frac=2.0/3.0, it=3, delta=0.0, is_sorted=False,
+                 missing='drop', xvals=None, skeleton=None, n_threads=1):
+    '''LOWESS of several series
+
+    Smooths each column of `endog` with `lowess`.  The local regressions
+    release the GIL, so the series can be smoothed in parallel threads.
+
+    Parameters
+    ----------
+    endog: 2-D array_like
+        The y-values of the observed points, one series per column.
+    exog: 1-D or 2-D array_like
+        The x-values of the observed points, either one vector shared by
+        all series or one column per series.
+    frac, it, delta, is_sorted, missing, xvals, skeleton :
+        See `lowess`.
+    n_threads: int
+        The number of threads.  Default is 1.
+
+    Returns
+    -------
+    out: ndarray, float
+        2-D array with one column per series.  The fitted values are in the
+        same order as the input, with nan for dropped observations, or the
+        estimates at `xvals` if given.
+
+    See Also
+    --------
+    lowess
+    '''
+    endog = np.asarray(endog, float)
+    exog = np.asarray(exog, float)
+    if endog.ndim != 2:
+        raise ValueError('endog must be a 2-D array')
+    if exog.ndim == 2 and exog.shape != endog.shape:
+        raise ValueError('exog must be a vector or have the shape of endog')
+    elif exog.ndim == 1 and exog.shape[0] != endog.shape[0]:
+        raise ValueError('exog and endog must have same length')
+    elif exog.ndim > 2:
+        raise ValueError('exog must be a vector or have the shape of endog')
+
+    sort_index = None
+    if exog.ndim == 1 and not is_sorted:
+        # sort the shared exog only once, nans go to the end
+        sort_index = np.argsort(exog)
+        exog = exog[sort_index]
+        endog = endog[sort_index]
+        is_sorted = True
+
+    def _fit(start, stop):
+        return np.array([lowess(endog[:, i],
+                                exog if exog.ndim == 1 else exog[:, i],
+                                frac=frac, it=it, delta=delta,
+                                is_sorted=is_sorted, missing=missing,
+                                return_sorted=False, xvals=xvals,
+                                skeleton=skeleton)
+                         for i in range(start, stop)])
+
+    res = _map_blocks(_fit, endog.shape[1], 1, n_threads).T
+    if sort_index is not None and xvals is None:
+        res_ = np.empty_like(res)
+        res_[sort_index] = res
+        res = res_
+    return res
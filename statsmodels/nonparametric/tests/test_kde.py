@@ -5,6 +5,9 @@ from nose.tools import raises
 import numpy as np
 from statsmodels.distributions.mixture_rvs import mixture_rvs
 from statsmodels.nonparametric.kde import KDEUnivariate as KDE
+from statsmodels.nonparametric.kde import KDEUnivariateSketch
+from statsmodels.nonparametric import bandwidths
+from statsmodels.nonparametric.linbin import fast_linbin
 import statsmodels.sandbox.nonparametric.kernels as kernels
 from scipy import stats
 
@@ -43,19 +46,14 @@ class TestKDEExceptions(object):
     def test_check_is_fit_exception(self):
         self.kde.evaluate(0)
 
-    @raises(NotImplementedError)
-    def test_non_weighted_fft_exception(self):
-        self.kde.fit(kernel="gau", gridsize=50, weights=self.weights_200, fft=True,
-                    bw="silverman")
-
     @raises(ValueError)
     def test_wrong_weight_length_exception(self):
         self.kde.fit(kernel="gau", gridsize=50, weights=self.weights_100, fft=False,
                     bw="silverman")
 
-    @raises(NotImplementedError)
-    def test_non_gaussian_fft_exception(self):
-        self.kde.fit(kernel="epa", gridsize=50, fft=True,
+    @raises(ValueError)
+    def test_wrong_weight_length_fft_exception(self):
+        self.kde.fit(kernel="gau", gridsize=50, weights=self.weights_100, fft=True,
                     bw="silverman")
 
 class CheckKDE(object):
@@ -239,6 +237,27 @@ class CheckKDEWeights(object):
         hw = ci[:, 1] - kde_vals
         npt.assert_allclose(hw, crit * np.sqrt(v), rtol=1e-10)
 
+    def test_fft(self):
+        # binned FFT estimator agrees with the direct one on the same grid
+        res2 = KDE(self.x)
+        res2.fit(kernel=self.kernel_name, weights=KDEWResults['weights'],
+                 fft=True, bw="scott", gridsize=512)
+        res3 = KDE(self.x)
+        res3.fit(kernel=self.kernel_name, weights=KDEWResults['weights'],
+                 fft=False, bw="scott", gridsize=512)
+        npt.assert_allclose(res2.support, res3.support, rtol=1e-12)
+        npt.assert_allclose(res2.density, res3.density,
+                            atol=2.5e-3 * res3.density.max())
+
+    def test_tree(self):
+        # kernel sums from the k-d tree agree with the dense estimator
+        res2 = KDE(self.x)
+        res2.fit(kernel=self.kernel_name, weights=KDEWResults['weights'],
+                 fft=False, bw="scott", rtol=1e-8)
+        npt.assert_allclose(res2.density, self.res1.density, rtol=1e-8)
+        kde_vals = np.squeeze([self.res1.evaluate(xi) for xi in self.x])
+        npt.assert_allclose(res2.evaluate(self.x), kde_vals, rtol=1e-8)
+
     def test_kernel_constants(self):
         kern = self.res1.kernel
 
@@ -332,6 +351,98 @@ class TestNormConstant():
         npt.assert_almost_equal(gauss_true_const, custom_gauss.norm_const)
 
 
+def test_kernel_grid():
+    from statsmodels.nonparametric.kde import kernel_switch
+    from statsmodels.nonparametric.kdetools import kernel_grid
+    # the discretized kernels integrate to one, also if the edges of the
+    # domain are on the grid
+    for name in kernel_switch:
+        for delta in [0.3 * 6 / 511., 0.3 / 7, 0.3 / 7.5, 0.1]:
+            kern = kernel_switch[name](h=0.3)
+            kern_grid = kernel_grid(kern, 0.3, delta, 512)
+            npt.assert_allclose(kern_grid.sum() * delta, 1, rtol=1e-8)
+    # for the uniform kernel the grid points on the edges get half weight
+    kern = kernel_switch["uni"](h=0.3)
+    npt.assert_allclose(kernel_grid(kern, 0.3, 0.1, 512) * 0.6,
+                        [0.5, 1, 1, 1, 1, 1, 0.5], rtol=1e-12)
+
+    np.random.seed(12345)
+    x = np.random.randn(500)
+    res = KDE(x)
+    res.fit(kernel="uni", fft=True, bw=0.5)
+    npt.assert_allclose(np.trapz(res.density, res.support), 1, rtol=1e-6)
+
+
+class TestKDEUnivariateSketch(object):
+
+    @classmethod
+    def setupClass(cls):
+        np.random.seed(12345)
+        cls.x = np.r_[np.random.randn(2000), np.random.randn(500) * .5 + 5]
+        cls.w = np.random.uniform(size=2500)
+
+    def test_merge(self):
+        # chunks merged in any order give the sketch of all data
+        x, w = self.x, self.w
+        full = KDEUnivariateSketch(gridsize=257).update(x, w)
+        parts = [KDEUnivariateSketch(gridsize=257).update(xi, wi)
+                 for xi, wi in zip(np.array_split(x, 5), np.array_split(w, 5))]
+        merged = parts[3]
+        for part in parts[:3] + parts[4:]:
+            merged.merge(part)
+        sequential = KDEUnivariateSketch(gridsize=257)
+        idx = np.argsort(x)
+        for xi, wi in zip(np.array_split(x[idx], 5),
+                          np.array_split(w[idx], 5)):
+            sequential.update(xi, wi)
+        for sketch in [merged, sequential]:
+            npt.assert_equal(sketch.grid, full.grid)
+            npt.assert_allclose(sketch.counts, full.counts, atol=1e-10)
+            npt.assert_equal(sketch.nobs, full.nobs)
+            npt.assert_allclose(sketch._moments, full._moments, rtol=1e-12)
+
+    def test_fixed_grid(self):
+        sketch = KDEUnivariateSketch(gridsize=129, a=-3, b=3)
+        sketch.update(self.x[:100]).update(self.x[100:])
+        mask = np.abs(self.x) <= 3
+        npt.assert_allclose(sketch.counts,
+                            fast_linbin(self.x[mask], -3., 3., 129),
+                            rtol=1e-12)
+        npt.assert_equal(sketch.nobs, mask.sum())
+        other = KDEUnivariateSketch(gridsize=129, a=-3, b=4).update(self.x)
+        npt.assert_raises(ValueError, sketch.merge, other)
+
+    def test_density(self):
+        sketch = KDEUnivariateSketch(gridsize=1025).update(self.x, self.w)
+        npt.assert_allclose(sketch.select_bandwidth("scott"),
+                            bandwidths.bw_scott(self.x), rtol=0.05)
+        for kernel in ["gau", "epa", "biw"]:
+            sketch.fit(kernel=kernel, bw=0.3)
+            res = KDE(self.x)
+            res.fit(kernel=kernel, bw=0.3, weights=self.w, fft=False)
+            npt.assert_allclose(sketch.evaluate(res.support), res.density,
+                                atol=1e-3 * res.density.max())
+            npt.assert_allclose(sketch.cdf[-1], 1, rtol=1e-3)
+            npt.assert_allclose(sketch.sf, 1 - sketch.cdf)
+            npt.assert_allclose(np.interp(sketch.icdf[512], sketch.support,
+                                          sketch.cdf), 0.5, rtol=1e-3)
+
+    def test_normalized_weights(self):
+        # the bandwidth does not depend on the scale of the weights, for
+        # uniform data the standard deviation is smaller than the IQR
+        x_unif = np.random.RandomState(0).uniform(size=1000)
+        for x in [self.x, x_unif]:
+            n = len(x)
+            res = KDE(x)
+            res.fit(weights=np.ones(n) / n, fft=False)
+            for scale in [1. / n, 0.5 / n, 1, 3]:
+                sketch = KDEUnivariateSketch(gridsize=1025)
+                sketch.update(x, np.ones(n) * scale).fit()
+                npt.assert_allclose(sketch.bw, res.bw, rtol=5e-3)
+                npt.assert_allclose(sketch.evaluate(res.support), res.density,
+                                    atol=2e-3 * res.density.max())
+
+
 if __name__ == "__main__":
     import nose
     nose.runmodule(argv=[__file__,'-vvs','-x','--pdb'],
@@ -249,6 +249,27 @@ class TestKDEMultivariate(KDETestBase):
         dens = nparam.KDEMultivariate(data=[Y, C1], var_type='cc', bw='cv_ml')
         npt.assert_allclose(dens.bw, dens_efficient.bw, atol=0.1, rtol = 0.2)
 
+    def test_efficient_n_jobs(self):
+        # The subsets do not depend on how they are split between jobs
+        nobs = 400
+        np.random.seed(12345)
+        data = np.random.normal(size=(nobs, 2))
+        data_copy = data.copy()
+        bws = []
+        for n_jobs, blocks_per_task in [(1, None), (2, None), (2, 3)]:
+            np.random.seed(0)
+            settings = nparam.EstimatorSettings(
+                efficient=True, randomize=True, n_res=5, n_sub=40,
+                n_jobs=n_jobs, blocks_per_task=blocks_per_task,
+                max_nbytes=1000)
+            dens = nparam.KDEMultivariate(data=data, var_type='cc',
+                                          bw='cv_ml', defaults=settings)
+            bws.append(dens.bw)
+
+        npt.assert_allclose(bws[1], bws[0], rtol=1e-12)
+        npt.assert_allclose(bws[2], bws[0], rtol=1e-12)
+        npt.assert_equal(data, data_copy)
+
     def test_efficient_user_specified_bw(self):
         nobs = 400
         np.random.seed(12345)
@@ -262,6 +283,82 @@ class TestKDEMultivariate(KDETestBase):
                                                           n_sub=100))
         npt.assert_equal(dens.bw, bw_user)
 
+    def test_pdf_cdf_blocked(self):
+        # Blocked evaluation agrees with evaluating gpke point by point
+        from statsmodels.nonparametric._kernel_base import gpke
+        data = np.column_stack([self.c1, self.c2, self.o, self.o2])
+        bw = np.array([0.5, 0.7, 0.3, 0.4])
+        settings = nparam.EstimatorSettings(block_size=7, n_threads=2)
+        dens = nparam.KDEMultivariate(data=data, var_type='ccou', bw=bw,
+                                      defaults=settings)
+        pdf = [gpke(bw, data, x, 'ccou') / dens.nobs for x in data]
+        cdf = [gpke(bw, data, x, 'ccou', ckertype='gaussian_cdf',
+                    okertype='wangryzin_cdf',
+                    ukertype='aitchisonaitken_cdf') / dens.nobs
+               for x in data]
+        npt.assert_allclose(dens.pdf(), pdf, rtol=1e-12)
+        npt.assert_allclose(dens.cdf(), cdf, rtol=1e-12)
+        npt.assert_allclose(dens.pdf(data[3]), pdf[3], rtol=1e-12)
+
+    def test_loo_likelihood_imse(self):
+        # Single pass leave-one-out criteria agree with the explicit loops
+        from statsmodels.nonparametric._kernel_base import (gpke,
+                                                            LeaveOneOut)
+        data = np.column_stack([self.c1, self.c2, self.o, self.o2])
+        bw = np.array([0.5, 0.7, 0.3, 0.4])
+        var_type = 'ccou'
+        dens = nparam.KDEMultivariate(data=data, var_type=var_type, bw=bw)
+        n = dens.nobs
+
+        L = 0
+        F = 0
+        for i, X_not_i in enumerate(LeaveOneOut(data)):
+            L += gpke(bw, X_not_i, data[i], var_type)
+            F += gpke(bw, data, data[i], var_type,
+                      ckertype='gauss_convolution',
+                      okertype='wangryzin_convolution',
+                      ukertype='aitchisonaitken_convolution')
+        npt.assert_allclose(dens.loo_likelihood(bw), -L, rtol=1e-12)
+        npt.assert_allclose(dens.imse(bw),
+                            F / n**2 - 2 * L / (n * (n - 1)), rtol=1e-12)
+
+    def test_pdf_rtol(self):
+        # Kernel sums from the k-d tree are within the tolerance
+        data = np.column_stack([self.c1, self.c2, self.o, self.o2])
+        bw = np.array([0.5, 0.7, 0.3, 0.4])
+        dens = nparam.KDEMultivariate(data=data, var_type='ccou', bw=bw)
+        settings = nparam.EstimatorSettings(rtol=1e-6)
+        dens_tree = nparam.KDEMultivariate(data=data, var_type='ccou', bw=bw,
+                                           defaults=settings)
+        data_predict = data * 1.5
+        npt.assert_allclose(dens_tree.pdf(data_predict),
+                            dens.pdf(data_predict), rtol=1e-6)
+        npt.assert_allclose(dens_tree.loo_likelihood(bw),
+                            dens.loo_likelihood(bw), rtol=1e-6)
+        npt.assert_allclose(dens_tree.imse(bw), dens.imse(bw), rtol=1e-5)
+
+    def test_tree_signed_weights(self):
+        # The error of each column is bounded by the kernel sums of the
+        # absolute weights, also for signed weights with large magnitudes
+        from statsmodels.nonparametric._kernel_base import _TreeKernelSum
+        np.random.seed(12345)
+        n = 400
+        data = np.r_[np.random.randn(n // 2) * 0.1,
+                     6 + np.random.randn(n // 2) * 0.1]
+        sign = np.sign(np.random.randn(n))
+        w = np.column_stack([np.ones(n),
+                             np.where(data > 3, 1e4, 1.) * sign, data])
+        x = np.linspace(-0.5, 0.5, 20)
+        rtol = 1e-6
+        tree = _TreeKernelSum(data[:, None], rtol, leaf_size=16)
+        res = tree.sums(x[:, None], w)
+        kmat = np.exp(-0.5 * (x[:, None] - data)**2)
+        err = np.abs(res - kmat.dot(w)) / kmat.dot(np.abs(w))
+        npt.assert_(np.all(err <= rtol))
+
+        for rtol in [0, 1, 2, None]:
+            npt.assert_raises(ValueError, _TreeKernelSum, data[:, None], rtol)
+
 
 class TestKDEMultivariateConditional(KDETestBase):
     @dec.slow
@@ -389,6 +486,62 @@ class TestKDEMultivariateConditional(KDETestBase):
                                                           n_sub=100))
         npt.assert_equal(dens.bw, bw_user)
 
+    def test_vectorized(self):
+        # Batched pdf, cdf, loo_likelihood and imse against loops over the
+        # observations with `gpke`
+        from statsmodels.nonparametric._kernel_base import gpke
+        nobs = 30
+        endog = np.column_stack([self.c1, self.o])[:nobs]
+        exog = np.column_stack([self.c2, self.o2])[:nobs]
+        for dep_type, k_dep in [('c', 1), ('co', 2)]:
+            bw = np.array([0.5, 0.3, 0.8, 0.4])[-(k_dep + 2):]
+            dens = nparam.KDEMultivariateConditional(
+                endog=endog[:, :k_dep], exog=exog, dep_type=dep_type,
+                indep_type='co', bw=bw)
+            data = np.column_stack([endog[:, :k_dep], exog])
+            var_type = dep_type + 'co'
+            pdf, cdf, loo = [], [], 0
+            for i in range(nobs):
+                f_x = gpke(bw[k_dep:], exog, exog[i], 'co')
+                pdf.append(gpke(bw, data, data[i], var_type) / f_x)
+                ky = gpke(bw[:k_dep], endog[:, :k_dep], endog[i, :k_dep],
+                          dep_type, ckertype='gaussian_cdf',
+                          okertype='wangryzin_cdf', tosum=False)
+                kx = gpke(bw[k_dep:], exog, exog[i], 'co', tosum=False)
+                cdf.append((ky * kx).sum() / f_x)
+                mask = np.arange(nobs) != i
+                loo += np.log(gpke(bw, data[mask], data[i], var_type) /
+                              gpke(bw[k_dep:], exog[mask], exog[i], 'co'))
+            npt.assert_allclose(dens.pdf(), pdf, rtol=1e-10)
+            npt.assert_allclose(dens.cdf(), cdf, rtol=1e-10)
+            npt.assert_allclose(dens.loo_likelihood(bw, np.log), -loo,
+                                rtol=1e-10)
+
+        # imse of the previous implementation, one dependent variable
+        CV = 0
+        bw = np.array([0.5, 0.8, 0.4])
+        dens = nparam.KDEMultivariateConditional(
+            endog=endog[:, :1], exog=exog, dep_type='c', indep_type='co',
+            bw=bw)
+        expander = np.ones((nobs - 1, 1))
+        for ii in range(nobs):
+            mask = np.arange(nobs) != ii
+            X, Y = exog[mask], endog[mask, :1]
+            Ye_L = np.kron(Y, expander)
+            Ye_R = np.kron(expander, Y)
+            Xe_L = np.kron(X, expander)
+            Xe_R = np.kron(expander, X)
+            K_Xi_Xl = gpke(bw[1:], Xe_L, exog[ii], 'co', tosum=False)
+            K_Xj_Xl = gpke(bw[1:], Xe_R, exog[ii], 'co', tosum=False)
+            K2_Yi_Yj = gpke(bw[:1], Ye_L, Ye_R, 'c',
+                            ckertype='gauss_convolution', tosum=False)
+            G = (K_Xi_Xl * K_Xj_Xl * K2_Yi_Yj).sum() / nobs**2
+            Z = np.column_stack([Y, X])
+            f_X_Y = gpke(bw, Z, np.r_[endog[ii, :1], exog[ii]], 'cco') / nobs
+            m_x = gpke(bw[1:], X, exog[ii], 'co') / nobs
+            CV += (G / m_x ** 2) - 2 * (f_X_Y / m_x)
+        npt.assert_allclose(dens.imse(bw), CV / nobs, rtol=1e-10)
+
 if __name__ == "__main__":
     import nose
     nose.runmodule(argv=[__file__,'-vvs','-x','--pdb'],
@@ -5,6 +5,8 @@ import numpy.testing as npt
 import numpy.testing.decorators as dec
 
 import statsmodels.api as sm
+from statsmodels.nonparametric._kernel_base import gpke
+import statsmodels.nonparametric.kernel_regression as smkr
 nparam = sm.nonparametric
 
 
@@ -304,6 +306,24 @@ class TestKernelReg(KernelRegressionTestBase):
         sig_var2 = model.sig_test([1], nboot=nboot)  # H0: b2 = 0
         npt.assert_equal(sig_var2 == 'Not Significant', True)
 
+    def test_significance_seed_n_jobs(self):
+        # The bootstrap draws do not depend on the number of processes
+        model = nparam.KernelReg(endog=[self.y], exog=[self.c1, self.o],
+                                 reg_type='ll', var_type='co',
+                                 bw=[0.5, 0.3])
+        progress = []
+        res1 = smkr.TestRegCoefC(model, [0], nboot=8, seed=1234,
+                                 callback=lambda *args: progress.append(args))
+        res2 = smkr.TestRegCoefC(model, [0], nboot=8, seed=1234, n_jobs=2)
+        npt.assert_allclose(res1.t_dist, res2.t_dist, rtol=1e-12)
+        npt.assert_equal(res1.sig, res2.sig)
+        npt.assert_equal([p[:2] for p in progress],
+                         [(2, 8), (4, 8), (6, 8), (8, 8)])
+
+        res1 = smkr.TestRegCoefD(model, [1], nboot=6, seed=1234)
+        res2 = smkr.TestRegCoefD(model, [1], nboot=6, seed=1234, n_jobs=2)
+        npt.assert_allclose(res1.t_dist, res2.t_dist, rtol=1e-12)
+
     def test_efficient_user_specificed_bw(self):
 
         bw_user=[0.23, 434697.22]
@@ -330,6 +350,84 @@ class TestKernelReg(KernelRegressionTestBase):
         # Bandwidth
         npt.assert_equal(model.bw, bw_user)
 
+    def test_cv_loo_vectorized(self):
+        # The pairwise leave-one-out criteria agree with refitting the
+        # estimators without each observation.
+        exog = np.column_stack([self.c1, self.o, self.o2])
+        bw = np.array([0.5, 0.3, 0.2])
+        for reg_type in 'lc', 'll':
+            model = nparam.KernelReg(endog=[self.y2], exog=exog,
+                                     reg_type=reg_type, var_type='cou',
+                                     bw=bw)
+            func = model.est[reg_type]
+            npt.assert_allclose(model.cv_loo(bw, func),
+                                model._cv_loo_iter(bw, func), rtol=1e-10)
+
+            # AIC against the explicit hat matrix
+            H = np.array([gpke(bw, model.exog, x, 'cou', tosum=False)
+                          for x in model.exog]).T
+            trace_H = np.trace(H / H.sum(axis=1))
+            sigma = ((model.endog[:, 0] - model.fit()[0])**2).mean()
+            aic = np.log(sigma) + (1 + trace_H / 60.) / \
+                (1 - (trace_H + 2) / 60.)
+            npt.assert_allclose(model.aic_hurvich(bw), aic, rtol=1e-10)
+
+    def test_cv_loo_rtol(self):
+        # Kernel sums from the k-d tree
+        exog = np.column_stack([self.c1, self.o, self.o2])
+        bw = np.array([0.5, 0.3, 0.2])
+        settings = nparam.EstimatorSettings(rtol=1e-8)
+        for reg_type in 'lc', 'll':
+            model = nparam.KernelReg(endog=[self.y2], exog=exog,
+                                     reg_type=reg_type, var_type='cou',
+                                     bw=bw)
+            model_tree = nparam.KernelReg(endog=[self.y2], exog=exog,
+                                          reg_type=reg_type, var_type='cou',
+                                          bw=bw, defaults=settings)
+            cv_tree = model_tree.cv_loo(bw, model_tree.est[reg_type])
+            npt.assert_allclose(cv_tree, model.cv_loo(bw, model.est[reg_type]),
+                                rtol=1e-6)
+            npt.assert_allclose(model_tree.aic_hurvich(bw),
+                                model.aic_hurvich(bw), rtol=1e-6)
+
+    def test_fit_vectorized(self):
+        # Batched fit against the per-point estimators
+        exog = np.column_stack([self.c1, self.o])
+        bw = np.array([0.5, 0.3])
+        for reg_type in 'lc', 'll':
+            model = nparam.KernelReg(endog=[self.y2], exog=exog,
+                                     reg_type=reg_type, var_type='co', bw=bw)
+            mean, mfx = model.fit()
+            func = model.est[reg_type]
+            res = [func(bw, model.endog, model.exog, data_predict=x)
+                   for x in model.exog]
+            npt.assert_allclose(mean, [np.squeeze(r[0]) for r in res], rtol=1e-8)
+            npt.assert_allclose(mfx, [np.squeeze(r[1]) * np.ones(2) for r in res],
+                                rtol=1e-8, atol=1e-12)
+
+    def test_censored_fit_vectorized(self):
+        exog = np.column_stack([self.c1, self.o])
+        endog = np.minimum(self.y2, np.percentile(self.y2, 80))
+        model = nparam.KernelCensoredReg(endog=[endog], exog=exog,
+                                         reg_type='ll', var_type='co',
+                                         bw=[0.5, 0.3],
+                                         censor_val=endog.max())
+        n = model.nobs
+        d = model.d
+        W = np.empty((n, 1))
+        for i in range(1, n + 1):
+            P = 1
+            for j in range(1, i):
+                P *= ((n - j) / (float(n) - j + 1))**d[j - 1]
+            W[i - 1, 0] = P * d[i - 1] / (float(n) - i + 1)
+        npt.assert_allclose(model.W_in, W, rtol=1e-12)
+
+        mean, mfx = model.fit()
+        res = [model._est_loc_linear(model.bw, model.endog, model.exog,
+                                     data_predict=x, W=model.W_in)
+               for x in model.exog]
+        npt.assert_allclose(mean, [np.squeeze(r[0]) for r in res], rtol=1e-8)
+
 
 if __name__ == "__main__":
     import nose
@@ -14,7 +14,7 @@ import numpy as np
 from numpy.testing import (assert_almost_equal, assert_, assert_raises,
                            assert_equal)
 #import statsmodels.api as sm
-from statsmodels.nonparametric.smoothers_lowess import lowess
+from statsmodels.nonparametric.smoothers_lowess import lowess, lowess_batch
 
 # Number of decimals to test equality with.
 # The default is 7.
@@ -137,6 +137,60 @@ class TestLowess(object):
         yhat = yhat[np.isfinite(yhat)]
         assert_almost_equal(yhat, actual_lowess2[:,1], decimal=13)
 
+    def test_xvals(self):
+        rfile = os.path.join(rpath, 'test_lowess_simple.csv')
+        test_data = np.genfromtxt(open(rfile, 'rb'),
+                                  delimiter = ',', names = True)
+        y, x = test_data['y'], test_data['x']
+        for it in [0, 3]:
+            fitted = lowess(y, x, it=it, return_sorted=False)
+            # observed points get the same estimates in any order
+            perm_idx = np.random.permutation(len(x))
+            actual = lowess(y, x, it=it, xvals=x[perm_idx])
+            assert_almost_equal(actual, fitted[perm_idx], decimal=13)
+
+        # linear data is reproduced, also outside of the data range
+        xvals = np.array([x.max() + 1, x.mean(), x.min() - 1])
+        actual = lowess(2 + 3 * x, x, frac=0.4, xvals=xvals)
+        assert_almost_equal(actual, 2 + 3 * xvals, decimal=10)
+
+    def test_skeleton(self):
+        np.random.seed(12345)
+        x = np.random.uniform(0, 10, size=5000)
+        y = np.sin(x) + 0.3 * np.random.normal(size=5000)
+        fitted = lowess(y, x, frac=0.2, return_sorted=False)
+        actual = lowess(y, x, frac=0.2, return_sorted=False, skeleton=250)
+        assert_(np.max(np.abs(actual - fitted)) < 0.05)
+
+        # skeleton larger than the data is the full fit
+        actual = lowess(y[:100], x[:100], frac=0.2, skeleton=250)
+        assert_almost_equal(actual, lowess(y[:100], x[:100], frac=0.2),
+                            decimal=13)
+
+    def test_batch(self):
+        np.random.seed(12345)
+        x = np.random.uniform(0, 10, size=(100, 3))
+        y = np.sin(x) + 0.3 * np.random.normal(size=(100, 3))
+        y[5, 1] = np.nan
+        xvals = np.linspace(1, 9, 7)
+        for exog in [x, x[:, 0]]:
+            expected = [lowess(y[:, i], exog if exog.ndim == 1 else exog[:, i],
+                               frac=0.3, return_sorted=False)
+                        for i in range(3)]
+            for n_threads in [1, 2]:
+                actual = lowess_batch(y, exog, frac=0.3, n_threads=n_threads)
+                assert_almost_equal(actual, np.column_stack(expected),
+                                    decimal=13)
+            actual = lowess_batch(y, exog, frac=0.3, xvals=xvals)
+            assert_equal(actual.shape, (7, 3))
+            assert_almost_equal(actual[:, 2],
+                                lowess(y[:, 2], exog if exog.ndim == 1
+                                       else exog[:, 2], frac=0.3,
+                                       xvals=xvals), decimal=13)
+
+        assert_raises(ValueError, lowess_batch, y[:, 0], x[:, 0])
+        assert_raises(ValueError, lowess_batch, y, x[:50])
+
 
 def test_returns_inputs():
     # see 1960
@@ -33,7 +33,7 @@ W. Green.  "Econometric Analysis," 5th ed., Pearson, 2003.
 
 from __future__ import print_function
 
-from statsmodels.compat.python import lrange, lzip, range
+from statsmodels.compat.python import lrange, lzip, range, string_types
 __docformat__ = 'restructuredtext en'
 
 __all__ = ['GLS', 'WLS', 'OLS', 'GLSAR']
@@ -1889,15 +1889,21 @@ class RegressionResults(base.LikelihoodModelResults):
             heteroscedasticity robust covariance
         - 'HAC' and keywords
 
-            - `maxlag` integer (required) : number of lags to use
-            - `kernel` string (optional) : kernel, default is Bartlett
+            - `maxlag` integer or 'auto' (required) : number of lags to use,
+                  'auto' selects the bandwidth as in Newey and West (1994)
+            - `kernel` callable or string (optional) : kernel, one of
+                  'bartlett', 'uniform', 'parzen' and 'qs'. Default is
+                  Bartlett
             - `use_correction` bool (optional) : If true, use small sample
                   correction
 
         - 'cluster' and required keyword `groups`, integer group indicator
 
             - `groups` array_like, integer (required) :
-                  index of clusters or groups
+                  index of clusters or groups. If groups is 2-D, then each
+                  column defines a clustering dimension and the multiway
+                  cluster robust covariance of Cameron, Gelbach and Miller
+                  is used.
             - `use_correction` bool (optional) :
                   If True the sandwich covariance is calculated with a small
                   sample correction.
@@ -2022,15 +2028,19 @@ class RegressionResults(base.LikelihoodModelResults):
             res.cov_kwds['weights_func'] = weights_func
             use_correction = kwds.get('use_correction', False)
             res.cov_kwds['use_correction'] = use_correction
+            if isinstance(maxlags, string_types):
+                lags_descr = 'automatic bandwidth selection'
+            else:
+                lags_descr = '%d lags' % maxlags
             res.cov_kwds['description'] = ('Standard Errors are heteroscedasticity ' +
-                 'and autocorrelation robust (HAC) using %d lags and %s small ' +
-                 'sample correction') % (maxlags, ['without', 'with'][use_correction])
+                 'and autocorrelation robust (HAC) using %s and %s small ' +
+                 'sample correction') % (lags_descr, ['without', 'with'][use_correction])
 
             res.cov_params_default = sw.cov_hac_simple(self, nlags=maxlags,
                                                  weights_func=weights_func,
                                                  use_correction=use_correction)
         elif cov_type.lower() == 'cluster':
-            #cluster robust standard errors, one- or two-way
+            #cluster robust standard errors, one- or multi-way
             groups = kwds['groups']
             if not hasattr(groups, 'shape'):
                 groups = np.asarray(groups).T
@@ -2041,31 +2051,26 @@ class RegressionResults(base.LikelihoodModelResults):
             res.cov_kwds['groups'] = groups
             use_correction = kwds.get('use_correction', True)
             res.cov_kwds['use_correction'] = use_correction
-            if groups.ndim == 1:
-                if adjust_df:
-                    # need to find number of groups
-                    # duplicate work
-                    self.n_groups = n_groups = len(np.unique(groups))
-                res.cov_params_default = sw.cov_cluster(self, groups,
-                                                 use_correction=use_correction)
+            if hasattr(groups, 'values'):
+                groups = groups.values
+            if groups.ndim > 2:
+                raise ValueError('groups needs to be 1-D or 2-D')
+
+            # factorized groups are cached on the model and reused in
+            # cov_cluster_nway and in later calls
+            cache = sw._get_group_cache(self)
+            groups_2d = groups[:, None] if groups.ndim == 1 else groups
+            n_groups_all = [sw._factorize_group(groups_2d[:, i], cache=cache)[1]
+                            for i in range(groups_2d.shape[1])]
+            if adjust_df:
+                if groups.ndim == 1:
+                    self.n_groups = n_groups = n_groups_all[0]
+                else:
+                    self.n_groups = tuple(n_groups_all)
+                    n_groups = min(n_groups_all) # use for adjust_df
 
-            elif groups.ndim == 2:
-                if hasattr(groups, 'values'):
-                    groups = groups.values
-
-                if adjust_df:
-                    # need to find number of groups
-                    # duplicate work
-                    n_groups0 = len(np.unique(groups[:,0]))
-                    n_groups1 = len(np.unique(groups[:, 1]))
-                    self.n_groups = (n_groups0, n_groups1)
-                    n_groups = min(n_groups0, n_groups1) # use for adjust_df
-
-                # Note: sw.cov_cluster_2groups has 3 returns
-                res.cov_params_default = sw.cov_cluster_2groups(self, groups,
-                                             use_correction=use_correction)[0]
-            else:
-                raise ValueError('only two groups are supported')
+            res.cov_params_default = sw.cov_cluster_nway(self, groups,
+                                                use_correction=use_correction)
             res.cov_kwds['description'] = ('Standard Errors are robust to' +
                                 'cluster correlation ' + '(' + cov_type + ')')
 
@@ -408,9 +408,19 @@ class TestOLSRobustCluster2Input(CheckOLSRobustCluster, CheckOLSRobustNewMixin):
         self.rtol = 1e-6
         self.rtolh = 1e-10
 
-    def test_too_many_groups(self):
+    def test_3way_same_groups(self):
+        # inclusion-exclusion with identical dimensions is one-way cluster
         long_groups = self.groups.reshape(-1, 1)
         groups3 = np.hstack((long_groups, long_groups, long_groups))
+        res3 = self.res1.get_robustcov_results('cluster', groups=groups3,
+                                               use_correction=True,
+                                               use_t=True)
+        assert_allclose(res3.cov_params(), self.cov_robust2, rtol=1e-10)
+
+    def test_too_many_groups(self):
+        long_groups = self.groups.reshape(-1, 1, 1)
+        groups3 = np.concatenate((long_groups, long_groups + 1), axis=2)
+        groups3 = np.concatenate((groups3, groups3), axis=1)
         assert_raises(ValueError, self.res1.get_robustcov_results,'cluster',
                       groups=groups3, use_correction=True, use_t=True)
 
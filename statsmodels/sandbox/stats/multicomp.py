@@ -93,6 +93,7 @@ from numpy.testing import assert_almost_equal, assert_equal
 #temporary circular import
 from statsmodels.stats.multitest import multipletests, _ecdf as ecdf, fdrcorrection as fdrcorrection0, fdrcorrection_twostage
 from statsmodels.graphics import utils
+from statsmodels.stats.libqsturng import qsturng, psturng
 from statsmodels.tools.sm_exceptions import ValueWarning
 
 qcrit = '''
@@ -172,7 +173,6 @@ def get_tukeyQcrit2(k, df, alpha=0.05):
 
     not enough error checking for limitations
     '''
-    from statsmodels.stats.libqsturng import qsturng
     return qsturng(1-alpha, k, df)
 
 
@@ -599,6 +599,8 @@ class TukeyHSDResults(object):
     std_pairs : standard deviation of pairwise mean differences
     q_crit : critical value of studentized range statistic at given alpha
     halfwidths : half widths of simultaneous confidence interval
+    pvalues : adjusted p-values of the studentized range statistic, bounded
+        by .001 and .9
 
     Notes
     -----
@@ -610,7 +612,7 @@ class TukeyHSDResults(object):
     """
     def __init__(self, mc_object, results_table, q_crit, reject=None,
                  meandiffs=None, std_pairs=None, confint=None, df_total=None,
-                 reject2=None, variance=None):
+                 reject2=None, variance=None, pvalues=None):
 
         self._multicomp = mc_object
         self._results_table = results_table
@@ -622,6 +624,7 @@ class TukeyHSDResults(object):
         self.df_total = df_total
         self.reject2 = reject2
         self.variance = variance
+        self.pvalues = pvalues
         # Taken out of _multicomp for ease of access for unknowledgeable users
         self.data = self._multicomp.data
         self.groups =self._multicomp.groups
@@ -969,17 +972,19 @@ class MultiComparison(object):
         gnobs = self.groupstats.groupnobs        #var_ = self.groupstats.groupvarwithin() #possibly an error in varcorrection in this case
         var_ = np.var(self.groupstats.groupdemean(), ddof=len(gmeans))
         #res contains: 0:(idx1, idx2), 1:reject, 2:meandiffs, 3: std_pairs, 4:confint, 5:q_crit,
-        #6:df_total, 7:reject2
+        #6:df_total, 7:reject2, 8:pvalues
         res = tukeyhsd(gmeans, gnobs, var_, df=None, alpha=alpha, q_crit=None)
 
         resarr = np.array(lzip(self.groupsunique[res[0][0]], self.groupsunique[res[0][1]],
                                   np.round(res[2],4),
+                                  np.round(res[8],4),
                                   np.round(res[4][:, 0],4),
                                   np.round(res[4][:, 1],4),
                                   res[1]),
                        dtype=[('group1', object),
                               ('group2', object),
                               ('meandiff',float),
+                              ('p-adj',float),
                               ('lower',float),
                               ('upper',float),
                               ('reject', np.bool8)])
@@ -988,7 +993,7 @@ class MultiComparison(object):
                               'FWER=%4.2f' % alpha
 
         return TukeyHSDResults(self, results_table, res[5], res[1], res[2],
-                               res[3], res[4], res[6], res[7], var_)
+                               res[3], res[4], res[6], res[7], var_, res[8])
 
 
 
@@ -1230,6 +1235,10 @@ def tukeyhsd(mean_all, nobs_all, var_all, df=None, alpha=0.05, q_crit=None):
 
     q_crit added for testing
 
+    The returned tuple contains the pair indices, reject, meandiffs,
+    std_pairs, confint, q_crit, df_total, reject2 and the p-values of the
+    studentized range statistic for all pairs.
+
     TODO: error in variance calculation when nobs_all is scalar, missing 1/n
 
     '''
@@ -1247,30 +1256,29 @@ def tukeyhsd(mean_all, nobs_all, var_all, df=None, alpha=0.05, q_crit=None):
     else:
         df_total = np.sum(df)
 
+    #select all pairs from upper triangle of matrix, pair statistics are
+    #computed only for these pairs and not for the full square matrix
+    idx1, idx2 = np.triu_indices(n_means, 1)
+
     if (np.size(nobs_all) == 1) and (np.size(var_all) == 1):
         #balanced sample sizes and homogenous variance
-        var_pairs = 1. * var_all / nobs_all * np.ones((n_means, n_means))
+        var_pairs = 1. * var_all / nobs_all * np.ones(len(idx1))
 
     elif np.size(var_all) == 1:
         #unequal sample sizes and homogenous variance
-        var_pairs = var_all * varcorrection_pairs_unbalanced(nobs_all,
-                                                             srange=True)
+        nobs_all = np.asarray(nobs_all, dtype=float)
+        var_pairs = var_all * (1. / nobs_all[idx1] + 1. / nobs_all[idx2]) / 2.
+
     elif np.size(var_all) > 1:
         var_pairs, df_sum = varcorrection_pairs_unequal(nobs_all, var_all, df)
-        var_pairs /= 2.
+        var_pairs = var_pairs[idx1, idx2] / 2.
         #check division by two for studentized range
 
     else:
         raise ValueError('not supposed to be here')
 
-    #meandiffs_ = mean_all[:,None] - mean_all
-    meandiffs_ = mean_all - mean_all[:,None]  #reverse sign, check with R example
-    std_pairs_ = np.sqrt(var_pairs)
-
-    #select all pairs from upper triangle of matrix
-    idx1, idx2 = np.triu_indices(n_means, 1)
-    meandiffs = meandiffs_[idx1, idx2]
-    std_pairs = std_pairs_[idx1, idx2]
+    meandiffs = mean_all[idx2] - mean_all[idx1]  #check sign with R example
+    std_pairs = np.sqrt(var_pairs)
 
     st_range = np.abs(meandiffs) / std_pairs #studentized range statistic
 
@@ -1284,8 +1292,12 @@ def tukeyhsd(mean_all, nobs_all, var_all, df=None, alpha=0.05, q_crit=None):
 
     confint = np.column_stack((meandiffs - crit_int, meandiffs + crit_int))
 
+    # psturng evaluates all pairs at once, the p-values are bounded below
+    # by .001 and above by .9
+    pvalues = psturng(st_range, n_means, df_total)
+
     return (idx1, idx2), reject, meandiffs, std_pairs, confint, q_crit, \
-           df_total, reject2
+           df_total, reject2, pvalues
 
 def simultaneous_ci(q_crit, var, groupnobs, pairindices=None):
     """Compute simultaneous confidence intervals for comparison of means.
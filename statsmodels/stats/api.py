@@ -14,7 +14,8 @@ from .diagnostic import (
             )
 
 from . import multicomp
-from .multitest import (multipletests, fdrcorrection, fdrcorrection_twostage)
+from .multitest import (multipletests, fdrcorrection, fdrcorrection_twostage,
+                        multipletests_batch, StreamingFDR)
 from .multicomp import tukeyhsd
 from . import gof
 from .gof import (powerdiscrepancy, gof_chisquare_discrete,
@@ -30,8 +31,9 @@ from .sandwich_covariance import (
             se_cov
             )
 
-from .weightstats import (DescrStatsW, CompareMeans, ttest_ind, ttost_ind,
-                         ttost_paired, ztest, ztost, zconfint)
+from .weightstats import (DescrStatsW, DescrStatsWAccumulator, CompareMeans,
+                          ttest_ind, ttost_ind, ttost_paired, ztest, ztost,
+                          zconfint)
 
 from .proportion import (binom_test_reject_interval, binom_test,
             binom_tost, binom_tost_reject_interval,
@@ -50,7 +52,8 @@ from .descriptivestats import Describe
 from .anova import anova_lm
 
 from . import moment_helpers
-from .correlation_tools import corr_nearest, corr_clipped, cov_nearest
+from .correlation_tools import (corr_nearest, corr_clipped, cov_nearest,
+                                corr_nearest_newton)
 
 from statsmodels.sandbox.stats.runs import (Runs, runstest_1samp, runstest_2samp)
 
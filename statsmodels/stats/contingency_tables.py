@@ -26,12 +26,15 @@ identically distributed.
 """
 
 from __future__ import division
+from functools import partial
 from statsmodels.tools.decorators import cache_readonly, resettable_cache
 import numpy as np
 from scipy import stats
 import pandas as pd
 from statsmodels import iolib
 from statsmodels.tools.sm_exceptions import SingularMatrixWarning
+from statsmodels.stats.permutation import (mc_pvalue, random_tables,
+                                           _hypergeometric)
 
 
 
@@ -63,6 +66,121 @@ class _Bunch(object):
         return "<bunch object containing statsmodels results>"
 
 
+# The statistics below are evaluated on tables stacked along the first
+# axis, and the samplers draw batches of tables under the null
+# hypothesis for the permutation p-values. They are module level
+# functions so that they can be pickled for a process pool.
+
+def _integer_counts(table):
+    counts = np.asarray(table, dtype=np.float64)
+    if np.any(counts < 0) or np.any(counts != np.round(counts)):
+        raise ValueError("permutation p-values require a table of counts")
+    return counts.astype(np.int64)
+
+
+def _permutation_pvalue(b, statistic, sampler, observed, perm_kwds):
+    # replace the p-value in the bunch by the permutation p-value
+    if perm_kwds is None:
+        perm_kwds = {}
+    res = mc_pvalue(statistic, sampler, observed, **perm_kwds)
+    b.pvalue = res.pvalue
+    b.pvalue_bounds = res.pvalue_bounds
+    b.n_rep = res.n_rep
+    return b
+
+
+def _chi2_stat(expected, tables):
+    return ((tables - expected)**2 / expected).sum(-1).sum(-1)
+
+
+def _linear_stat(row_scores, col_scores, center, tables):
+    return np.abs(np.dot(np.dot(tables, col_scores), row_scores) - center)
+
+
+def _bowker_stat(tables):
+    k = tables.shape[-1]
+    upp_idx = np.triu_indices(k, 1)
+    tril = tables[..., upp_idx[1], upp_idx[0]]  # lower triangle in column order
+    triu = tables[..., upp_idx[0], upp_idx[1]]  # upper triangle in row order
+    return ((tril - triu)**2 / (tril + triu + 1e-20)).sum(-1)
+
+
+def _stuart_maxwell_stat(vmat_inv, method, tables):
+    # under random swaps of the cells (i, j) and (j, i) the covariance
+    # matrix of the margin differences does not change, for Bhapkar's
+    # statistic d' (V - d d')^{-1} d = q / (1 - q) with q = d' V^{-1} d
+    n_obs = tables.sum(-1).sum(-1)
+    pr = tables / np.expand_dims(np.expand_dims(n_obs, -1), -1)
+    d = (pr.sum(-2) - pr.sum(-1))[..., :-1]
+    q = (np.dot(d, vmat_inv) * d).sum(-1)
+    if method == "bhapkar":
+        q = q / (1 - q)
+    return n_obs * q
+
+
+def _random_swaps(table, n, random_state):
+    # each pair of cells (i, j) and (j, i) is split binomially, i.e.
+    # the row and column classification of each unit is swapped with
+    # probability 1/2
+    k = table.shape[0]
+    i, j = np.triu_indices(k, 1)
+    pairs = table[i, j] + table[j, i]
+    upper = random_state.binomial(pairs, 0.5, size=(n, len(pairs)))
+    tables = np.tile(np.diag(np.diag(table)), (n, 1, 1))
+    tables[:, i, j] = upper
+    tables[:, j, i] = pairs - upper
+    return tables
+
+
+def _random_strata(apb, apc, n_strata, n, random_state):
+    # the upper left cells of tables with fixed margins in each stratum
+    shape = (n, len(apb))
+    return _hypergeometric(random_state, np.broadcast_to(apc, shape),
+                           n_strata - apc, apb)
+
+
+def _mantel_haenszel_stat(apb, apc, bpd, cpd, n, correction, a):
+    statistic = np.abs(np.sum(a - apb * apc / n, -1))
+    if correction:
+        statistic -= 0.5
+    statistic = statistic**2
+    denom = apb * apc * bpd * cpd / (n**2 * (n - 1))
+    return statistic / np.sum(denom)
+
+
+def _breslow_day_stat(apb, apc, bpd, adjust, n, a):
+    b = apb - a
+    c = apc - a
+    d = bpd - b
+    dma = d - a
+
+    r = np.sum(a * d / n, -1) / np.sum(b * c / n, -1)
+    r = np.expand_dims(r, -1)
+    qa = 1 - r
+    qb = r * (apb + apc) + dma
+    qc = -r * apb * apc
+
+    # Expected value of first cell, root of qa e^2 + qb e + qc, the second
+    # form avoids the division by zero for an odds ratio of one
+    with np.errstate(divide='ignore', invalid='ignore'):
+        sq = np.sqrt(qb**2 - 4*qa*qc)
+        e11 = np.where(qb < 0, (-qb + sq) / (2*qa), -2 * qc / (qb + sq))
+
+        # Variance of the first cell
+        v11 = 1 / e11 + 1 / (apc - e11) + 1 / (apb - e11) + 1 / (dma + e11)
+        v11 = 1 / v11
+
+        statistic = np.sum((a - e11)**2 / v11, -1)
+
+        if adjust:
+            adj = np.sum(a, -1) - np.sum(e11, -1)
+            adj = adj**2
+            adj /= np.sum(v11, -1)
+            statistic -= adj
+
+    return statistic
+
+
 class Table(object):
     """
     Analyses that can be performed on a two-way contingency table.
@@ -166,7 +284,8 @@ class Table(object):
         return cls(table, shift_zeros)
 
 
-    def test_nominal_association(self):
+    def test_nominal_association(self, pvalue_method="asymptotic",
+                                 perm_kwds=None):
         """
         Assess independence for nominal factors.
 
@@ -174,6 +293,17 @@ class Table(object):
         chi^2 testing.  The rows and columns are treated as nominal
         (unordered) categorical variables.
 
+        Parameters
+        ----------
+        pvalue_method : string
+            If "asymptotic", then the p-value is based on the chi^2
+            distribution. If "permutation", then it is based on
+            random tables with the observed margins, see Notes.
+        perm_kwds : dict
+            Options for the permutation p-value that are passed to
+            `statsmodels.stats.permutation.mc_pvalue`, for example
+            n_rep, alpha, n_jobs and random_state.
+
         Returns
         -------
         A bunch containing the following attributes:
@@ -184,19 +314,51 @@ class Table(object):
             The degrees of freedom of the reference distribution
         pvalue : float
             The p-value for the test.
+        pvalue_bounds : tuple
+            Only for the permutation p-value, the confidence interval
+            of the p-value given the Monte Carlo error.
+        n_rep : int
+            Only for the permutation p-value, the number of random
+            tables.
+
+        Notes
+        -----
+        The permutation p-value conditions on the row and column
+        margins, the random tables have the distribution of the table
+        after randomly permuting the column labels of the observations.
+        It requires a table of counts, the statistic is computed
+        without the shift of zero cells.
         """
 
-        statistic = np.asarray(self.chi2_contribs).sum()
         df = np.prod(np.asarray(self.table.shape) - 1)
-        pvalue = 1 - stats.chi2.cdf(statistic, df)
         b = _Bunch()
-        b.statistic = statistic
         b.df = df
+
+        if pvalue_method == "permutation":
+            counts = _integer_counts(self.table_orig)
+            rtot, ctot = counts.sum(1), counts.sum(0)
+            # rows and columns without observations do not contribute
+            counts = counts[rtot > 0][:, ctot > 0]
+            rtot, ctot = rtot[rtot > 0], ctot[ctot > 0]
+            expected = np.outer(rtot, ctot) / counts.sum()
+            statistic = _chi2_stat(expected, counts)
+            b.statistic = statistic
+            return _permutation_pvalue(
+                b, partial(_chi2_stat, expected),
+                partial(random_tables, rtot, ctot), statistic, perm_kwds)
+        elif pvalue_method != "asymptotic":
+            raise ValueError("pvalue_method must be 'asymptotic' or "
+                             "'permutation'")
+
+        statistic = np.asarray(self.chi2_contribs).sum()
+        pvalue = 1 - stats.chi2.cdf(statistic, df)
+        b.statistic = statistic
         b.pvalue = pvalue
         return b
 
 
-    def test_ordinal_association(self, row_scores=None, col_scores=None):
+    def test_ordinal_association(self, row_scores=None, col_scores=None,
+                                 pvalue_method="asymptotic", perm_kwds=None):
         """
         Assess independence between two ordinal variables.
 
@@ -210,6 +372,13 @@ class Table(object):
             An array of numeric row scores
         col_scores : array-like
             An array of numeric column scores
+        pvalue_method : string
+            If "asymptotic", then the two-sided p-value is based on the
+            normal distribution. If "permutation", then it is based on
+            random tables with the observed margins.
+        perm_kwds : dict
+            Options for the permutation p-value that are passed to
+            `statsmodels.stats.permutation.mc_pvalue`.
 
         Returns
         -------
@@ -227,6 +396,9 @@ class Table(object):
             The Z-score for the test statistic.
         pvalue : float
             The p-value for the test.
+        pvalue_bounds, n_rep :
+            Only for the permutation p-value, see
+            `test_nominal_association`.
 
         Notes
         -----
@@ -234,6 +406,12 @@ class Table(object):
 
         Using the default row and column scores gives the
         Cochran-Armitage trend test.
+
+        The permutation p-value is the probability of an absolute
+        deviation of the statistic from its null mean that is at least
+        as large as the observed one, conditional on the margins.  The
+        statistic is computed from the table of counts without the shift
+        of zero cells.
         """
 
         if row_scores is None:
@@ -274,6 +452,23 @@ class Table(object):
         b.null_sd = sd_stat
         b.zscore = zscore
         b.pvalue = pvalue
+
+        if pvalue_method == "permutation":
+            counts = _integer_counts(self.table_orig)
+            row_scores = np.asarray(row_scores, dtype=np.float64)
+            col_scores = np.asarray(col_scores, dtype=np.float64)
+            rtot, ctot = counts.sum(1), counts.sum(0)
+            center = np.dot(row_scores, rtot) * np.dot(col_scores, ctot)
+            center /= counts.sum()
+            stat_func = partial(_linear_stat, row_scores, col_scores, center)
+            observed = stat_func(counts[None, ...])[0]
+            return _permutation_pvalue(b, stat_func,
+                                       partial(random_tables, rtot, ctot),
+                                       observed, perm_kwds)
+        elif pvalue_method != "asymptotic":
+            raise ValueError("pvalue_method must be 'asymptotic' or "
+                             "'permutation'")
+
         return b
 
 
@@ -429,7 +624,8 @@ class SquareTable(Table):
         super(SquareTable, self).__init__(table, shift_zeros)
 
 
-    def symmetry(self, method="bowker"):
+    def symmetry(self, method="bowker", pvalue_method="asymptotic",
+                 perm_kwds=None):
         """
         Test for symmetry of a joint distribution.
 
@@ -440,6 +636,19 @@ class SquareTable(Table):
 
         p_{i, j} = p_{j, i}  for all i, j
 
+        Parameters
+        ----------
+        method : string
+            Only "bowker" is available.
+        pvalue_method : string
+            If "asymptotic", then the p-value is based on the chi^2
+            distribution. If "permutation", then the counts in each pair
+            of cells (i, j) and (j, i) are split randomly, which is the
+            exact distribution under symmetry given the pair totals.
+        perm_kwds : dict
+            Options for the permutation p-value that are passed to
+            `statsmodels.stats.permutation.mc_pvalue`.
+
         Returns
         -------
         A bunch with attributes:
@@ -450,6 +659,9 @@ class SquareTable(Table):
             p-value of the test statistic based on chisquare distribution
         df : int
             degrees of freedom of the chisquare distribution
+        pvalue_bounds, n_rep :
+            Only for the permutation p-value, see
+            `Table.test_nominal_association`.
 
         Notes
         -----
@@ -473,24 +685,32 @@ class SquareTable(Table):
             raise ValueError("method for symmetry testing must be 'bowker'")
 
         k = self.table.shape[0]
-        upp_idx = np.triu_indices(k, 1)
-
-        tril = self.table.T[upp_idx]   # lower triangle in column order
-        triu = self.table[upp_idx]     # upper triangle in row order
-
-        statistic = ((tril - triu)**2 / (tril + triu + 1e-20)).sum()
         df = k * (k-1) / 2.
+        b = _Bunch()
+        b.df = df
+
+        if pvalue_method == "permutation":
+            counts = _integer_counts(self.table_orig)
+            statistic = _bowker_stat(counts)
+            b.statistic = statistic
+            return _permutation_pvalue(b, _bowker_stat,
+                                       partial(_random_swaps, counts),
+                                       statistic, perm_kwds)
+        elif pvalue_method != "asymptotic":
+            raise ValueError("pvalue_method must be 'asymptotic' or "
+                             "'permutation'")
+
+        statistic = _bowker_stat(self.table)
         pvalue = stats.chi2.sf(statistic, df)
 
-        b = _Bunch()
         b.statistic = statistic
         b.pvalue = pvalue
-        b.df = df
 
         return b
 
 
-    def homogeneity(self, method="stuart_maxwell"):
+    def homogeneity(self, method="stuart_maxwell", pvalue_method="asymptotic",
+                    perm_kwds=None):
         """
         Compare row and column marginal distributions.
 
@@ -500,6 +720,14 @@ class SquareTable(Table):
             Either 'stuart_maxwell' or 'bhapkar', leading to two different
             estimates of the covariance matrix for the estimated
             difference between the row margins and the column margins.
+        pvalue_method : string
+            If "asymptotic", then the p-value is based on the chi^2
+            distribution. If "permutation", then the row and column
+            classifications of each unit are swapped at random, see
+            `symmetry`.
+        perm_kwds : dict
+            Options for the permutation p-value that are passed to
+            `statsmodels.stats.permutation.mc_pvalue`.
 
         Returns a bunch with attributes:
 
@@ -509,6 +737,9 @@ class SquareTable(Table):
             The p-value of the test statistic
         df : integer
             The degrees of freedom of the reference distribution
+        pvalue_bounds, n_rep :
+            Only for the permutation p-value, see
+            `Table.test_nominal_association`.
 
         Notes
         -----
@@ -532,9 +763,17 @@ class SquareTable(Table):
         method = method.lower()
         if method not in ["bhapkar", "stuart_maxwell"]:
             raise ValueError("method '%s' for homogeneity not known" % method)
+        if pvalue_method not in ["asymptotic", "permutation"]:
+            raise ValueError("pvalue_method must be 'asymptotic' or "
+                             "'permutation'")
 
-        n_obs = self.table.sum()
-        pr = self.table.astype(np.float64) / n_obs
+        if pvalue_method == "permutation":
+            table = _integer_counts(self.table_orig)
+        else:
+            table = self.table
+
+        n_obs = table.sum()
+        pr = table.astype(np.float64) / n_obs
 
         # Compute margins, eliminate last row/column so there is no
         # degeneracy
@@ -576,6 +815,16 @@ class SquareTable(Table):
         b.pvalue = pvalue
         b.df = df
 
+        if pvalue_method == "permutation":
+            # the Stuart-Maxwell covariance matrix is fixed under swaps
+            vmat = -(pr + pr.T)
+            np.fill_diagonal(vmat, row + col - 2*np.diag(pr))
+            stat_func = partial(_stuart_maxwell_stat, np.linalg.inv(vmat),
+                                method)
+            return _permutation_pvalue(b, stat_func,
+                                       partial(_random_swaps, table),
+                                       statistic, perm_kwds)
+
         return b
 
 
@@ -953,6 +1202,9 @@ class StratifiedTable(object):
             # Create a data cube
             table = np.dstack(tables).astype(np.float64)
 
+        # unshifted counts for permutation p-values
+        self._table_counts = table
+
         if shift_zeros:
             zx = (table == 0).sum(0).sum(0)
             ix = np.flatnonzero(zx > 0)
@@ -1022,7 +1274,8 @@ class StratifiedTable(object):
         return cls(tables)
 
 
-    def test_null_odds(self, correction=False):
+    def test_null_odds(self, correction=False, pvalue_method="asymptotic",
+                       perm_kwds=None):
         """
         Test that all tables have odds ratio equal to 1.
 
@@ -1033,21 +1286,42 @@ class StratifiedTable(object):
         correction : boolean
             If True, use the continuity correction when calculating the
             test statistic.
+        pvalue_method : string
+            If "asymptotic", then the p-value is based on the chi^2
+            distribution. If "permutation", then it is based on random
+            tables with the observed margins in each stratum.
+        perm_kwds : dict
+            Options for the permutation p-value that are passed to
+            `statsmodels.stats.permutation.mc_pvalue`.
 
         Returns
         -------
-        A bunch containing the chi^2 test statistic and p-value.
+        A bunch containing the chi^2 test statistic and p-value.  The
+        permutation p-value additionally has attributes pvalue_bounds
+        and n_rep.
+
+        Notes
+        -----
+        The permutation p-value requires tables of counts, the
+        statistic is computed without the shift of zero cells.
         """
 
-        statistic = np.sum(self.table[0, 0, :] - self._apb * self._apc / self._n)
-        statistic = np.abs(statistic)
-        if correction:
-            statistic -= 0.5
-        statistic = statistic**2
-        denom = self._apb * self._apc * self._bpd * self._cpd
-        denom /= (self._n**2 * (self._n - 1))
-        denom = np.sum(denom)
-        statistic /= denom
+        if pvalue_method == "permutation":
+            table = _integer_counts(self._table_counts)
+        elif pvalue_method == "asymptotic":
+            table = self.table
+        else:
+            raise ValueError("pvalue_method must be 'asymptotic' or "
+                             "'permutation'")
+
+        apb = table[0, 0, :] + table[0, 1, :]
+        apc = table[0, 0, :] + table[1, 0, :]
+        bpd = table[0, 1, :] + table[1, 1, :]
+        cpd = table[1, 0, :] + table[1, 1, :]
+        n = table.sum(0).sum(0).astype(np.float64)
+        stat_func = partial(_mantel_haenszel_stat, apb, apc, bpd, cpd, n,
+                            correction)
+        statistic = stat_func(table[0, 0, :])
 
         # df is always 1
         pvalue = 1 - stats.chi2.cdf(statistic, 1)
@@ -1056,6 +1330,11 @@ class StratifiedTable(object):
         b.statistic = statistic
         b.pvalue = pvalue
 
+        if pvalue_method == "permutation":
+            sampler = partial(_random_strata, apb, apc, n.astype(np.int64))
+            return _permutation_pvalue(b, stat_func, sampler, statistic,
+                                       perm_kwds)
+
         return b
 
 
@@ -1162,7 +1441,8 @@ class StratifiedTable(object):
         return lcb, ucb
 
 
-    def test_equal_odds(self, adjust=False):
+    def test_equal_odds(self, adjust=False, pvalue_method="asymptotic",
+                        perm_kwds=None):
         """
         Test that all odds ratios are identical.
 
@@ -1173,6 +1453,15 @@ class StratifiedTable(object):
         adjust : boolean
             Use the 'Tarone' adjustment to achieve the chi^2
             asymptotic distribution.
+        pvalue_method : string
+            If "asymptotic", then the p-value is based on the chi^2
+            distribution. If "permutation", then it is based on random
+            tables with the observed margins in each stratum, which is
+            the distribution under independence in all strata, see
+            Notes.
+        perm_kwds : dict
+            Options for the permutation p-value that are passed to
+            `statsmodels.stats.permutation.mc_pvalue`.
 
         Returns
         -------
@@ -1182,29 +1471,31 @@ class StratifiedTable(object):
             The chi^2 test statistic.
         p-value : float
             The p-value for the test.
-        """
-
-        table = self.table
-
-        r = self.oddsratio_pooled
-        a = 1 - r
-        b = r * (self._apb + self._apc) + self._dma
-        c = -r * self._apb * self._apc
-
-        # Expected value of first cell
-        e11 = (-b + np.sqrt(b**2 - 4*a*c)) / (2*a)
+        pvalue_bounds, n_rep :
+            Only for the permutation p-value, see `test_null_odds`.
 
-        # Variance of the first cell
-        v11 = 1 / e11 + 1 / (self._apc - e11) + 1 / (self._apb - e11) + 1 / (self._dma + e11)
-        v11 = 1 / v11
+        Notes
+        -----
+        The null hypothesis of equal odds ratios does not determine the
+        common odds ratio.  The random tables for the permutation
+        p-value have odds ratios equal to one, the p-value is exact only
+        if the common odds ratio is one.
+        """
 
-        statistic = np.sum((table[0, 0, :] - e11)**2 / v11)
+        if pvalue_method == "permutation":
+            table = _integer_counts(self._table_counts)
+        elif pvalue_method == "asymptotic":
+            table = self.table
+        else:
+            raise ValueError("pvalue_method must be 'asymptotic' or "
+                             "'permutation'")
 
-        if adjust:
-            adj = table[0, 0, :].sum() - e11.sum()
-            adj = adj**2
-            adj /= np.sum(v11)
-            statistic -= adj
+        apb = table[0, 0, :] + table[0, 1, :]
+        apc = table[0, 0, :] + table[1, 0, :]
+        bpd = table[0, 1, :] + table[1, 1, :]
+        n = table.sum(0).sum(0).astype(np.float64)
+        stat_func = partial(_breslow_day_stat, apb, apc, bpd, adjust, n)
+        statistic = stat_func(table[0, 0, :])
 
         pvalue = 1 - stats.chi2.cdf(statistic, table.shape[2] - 1)
 
@@ -1212,6 +1503,11 @@ class StratifiedTable(object):
         b.statistic = statistic
         b.pvalue = pvalue
 
+        if pvalue_method == "permutation":
+            sampler = partial(_random_strata, apb, apc, n.astype(np.int64))
+            return _permutation_pvalue(b, stat_func, sampler, statistic,
+                                       perm_kwds)
+
         return b
 
 
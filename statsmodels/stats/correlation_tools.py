@@ -10,18 +10,45 @@ License: BSD-3
 from statsmodels.tools.sm_exceptions import (IterationLimitWarning,
     iteration_limit_doc)
 import numpy as np
+import scipy.linalg
 import scipy.sparse as sparse
 from scipy.sparse.linalg import svds
 from scipy.optimize import fminbound
 
-def clip_evals(x, value=0): #threshold=0, value=0):
+def _eigh_smallest(x, n_evals):
+    """smallest `n_evals` eigenvalues and eigenvectors of symmetric x"""
+    try:
+        return scipy.linalg.eigh(x, subset_by_index=(0, n_evals - 1))
+    except TypeError:
+        # older scipy
+        return scipy.linalg.eigh(x, eigvals=(0, n_evals - 1))
+
+def _clip_evals(x, value=0, n_evals=None):
+    """clip_evals that returns the number of negative eigenvalues
+
+    If n_evals is not None, then only the n_evals smallest eigenvalues are
+    computed and the clipped eigenvalues are corrected by a low rank update
+    of x. If all of them are below value, then the full eigendecomposition
+    is used.
+    """
+    if n_evals is not None and n_evals < x.shape[0]:
+        evals, evecs = _eigh_smallest(x, n_evals)
+        if evals[-1] >= value:
+            mask = evals < value
+            evecs = evecs[:, mask]
+            x_new = x + np.dot(evecs * (value - evals[mask]), evecs.T)
+            return x_new, (evals < 0).sum()
+
     evals, evecs = np.linalg.eigh(x)
-    clipped = np.any(evals < 0)
     x_new = np.dot(evecs * np.maximum(evals, value), evecs.T)
-    return x_new, clipped
+    return x_new, (evals < 0).sum()
 
+def clip_evals(x, value=0, n_evals=None): #threshold=0, value=0):
+    x_new, n_clipped = _clip_evals(x, value=value, n_evals=n_evals)
+    return x_new, n_clipped > 0
 
-def corr_nearest(corr, threshold=1e-15, n_fact=100):
+
+def corr_nearest(corr, threshold=1e-15, n_fact=100, partial=True):
     '''
     Find the nearest correlation matrix that is positive semi-definite.
 
@@ -38,6 +65,10 @@ def corr_nearest(corr, threshold=1e-15, n_fact=100):
         factor to determine the maximum number of iterations. The maximum
         number of iterations is the integer part of the number of columns in
         the correlation matrix times n_fact.
+    partial : bool
+        If True and only a few eigenvalues are clipped, then the iterations
+        after the first only compute the smallest eigenvalues and
+        eigenvectors, see Notes.
 
     Returns
     -------
@@ -59,9 +90,16 @@ def corr_nearest(corr, threshold=1e-15, n_fact=100):
     threshold. In this case, the returned array is not the original, but
     is equal to it within numerical precision.
 
+    If the number of negative eigenvalues in an iteration is less than
+    a quarter of the number of columns and there are more than 100 columns,
+    then the later iterations use a partial eigendecomposition and a low rank
+    correction. The alternating projections converge only linearly,
+    ``corr_nearest_newton`` is faster for large matrices.
+
     See Also
     --------
     corr_clipped
+    corr_nearest_newton
     cov_nearest
 
     '''
@@ -72,23 +110,29 @@ def corr_nearest(corr, threshold=1e-15, n_fact=100):
     diff = np.zeros(corr.shape)
     x_new = corr.copy()
     diag_idx = np.arange(k_vars)
+    n_evals = None
 
     for ii in range(int(len(corr) * n_fact)):
         x_adj = x_new - diff
-        x_psd, clipped = clip_evals(x_adj, value=threshold)
-        if not clipped:
+        x_psd, n_clipped = _clip_evals(x_adj, value=threshold,
+                                       n_evals=n_evals)
+        if not n_clipped:
             x_new = x_psd
             break
         diff = x_psd - x_adj
         x_new = x_psd.copy()
         x_new[diag_idx, diag_idx] = 1
+        if partial and k_vars > 100 and 4 * n_clipped < k_vars:
+            # only a few eigenvalues are negative, the next iterations only
+            # compute the smallest eigenvalues
+            n_evals = 2 * n_clipped + 10
     else:
         import warnings
         warnings.warn(iteration_limit_doc, IterationLimitWarning)
 
     return x_new
 
-def corr_clipped(corr, threshold=1e-15):
+def corr_clipped(corr, threshold=1e-15, n_evals=None):
     '''
     Find a near correlation matrix that is positive semi-definite
 
@@ -105,6 +149,11 @@ def corr_clipped(corr, threshold=1e-15):
         initial correlation matrix
     threshold : float
         clipping threshold for smallest eigenvalue, see Notes
+    n_evals : int or None
+        If not None, then only the `n_evals` smallest eigenvalues are
+        computed. This is faster if only a few eigenvalues are below the
+        threshold. If all of them are below the threshold, then the full
+        eigendecomposition is computed.
 
     Returns
     -------
@@ -138,7 +187,7 @@ def corr_clipped(corr, threshold=1e-15):
     cov_nearest
 
     '''
-    x_new, clipped = clip_evals(corr, value=threshold)
+    x_new, clipped = clip_evals(corr, value=threshold, n_evals=n_evals)
     if not clipped:
         return corr
 
@@ -148,6 +197,200 @@ def corr_clipped(corr, threshold=1e-15):
     return x_new
 
 
+def _psd_jacobian(evals, evecs):
+    """
+    Generalized Jacobian of the diagonal of the projection on the psd cone
+
+    Returns the function that computes diag(P (Omega * (P' diag(h) P)) P')
+    for the eigenvectors P and the matrix Omega of divided differences of
+    max(evals, 0), and the diagonal of this linear operator.
+    Omega is one for pairs of positive eigenvalues and zero for pairs of
+    nonpositive eigenvalues, the products only use the blocks of the
+    smaller set of eigenvalues so that the cost is small if only a few
+    eigenvalues are positive or only a few are negative.
+    """
+    pos = evals > 0
+    k_pos = pos.sum()
+    p1, p2 = evecs[:, pos], evecs[:, ~pos]
+    e1, e2 = evals[pos], evals[~pos]
+    tau = e1[:, None] / (e1[:, None] - e2)
+
+    q1, q2 = p1**2, p2**2
+    precond = q1.sum(1)**2 + 2 * (np.dot(q1, tau) * q2).sum(1)
+
+    if 2 * k_pos <= len(evals):
+        def jac(h):
+            hp1 = h[:, None] * p1
+            m12 = np.dot(hp1.T, p2)
+            out = (np.dot(p1, np.dot(p1.T, hp1)) * p1).sum(1)
+            out += 2 * (np.dot(p1, tau * m12) * p2).sum(1)
+            return out
+    else:
+        def jac(h):
+            hp2 = h[:, None] * p2
+            m12 = np.dot(p1.T, hp2)
+            out = h - (np.dot(p2, np.dot(p2.T, hp2)) * p2).sum(1)
+            out -= 2 * (np.dot(p1, (1 - tau) * m12) * p2).sum(1)
+            return out
+
+    return jac, np.maximum(precond, 1e-8)
+
+def _pcg(matvec, rhs, precond, tol, maxiter):
+    """preconditioned conjugate gradient for a psd linear operator"""
+    x = np.zeros(len(rhs))
+    r = rhs.copy()
+    z = r / precond
+    d = z.copy()
+    rz = np.dot(r, z)
+    tol = tol * np.sqrt(np.dot(rhs, rhs))
+    for itr in range(maxiter):
+        if np.sqrt(np.dot(r, r)) <= tol:
+            break
+        w = matvec(d)
+        dw = np.dot(d, w)
+        if dw <= 0:
+            # the Jacobian is only positive semidefinite
+            if itr == 0:
+                x = d
+            break
+        alpha = rz / dw
+        x += alpha * d
+        r -= alpha * w
+        z = r / precond
+        rz, rz_old = np.dot(r, z), rz
+        d = z + (rz / rz_old) * d
+    return x
+
+def corr_nearest_newton(corr, threshold=1e-15, start=None, tol=1e-8,
+                        maxiter=100):
+    """
+    Find the nearest correlation matrix using a semismooth Newton method
+
+    The nearest correlation matrix in the Frobenius norm is computed by
+    the quadratically convergent Newton method of Qi and Sun (2006)
+    applied to the dual problem.
+
+    Parameters
+    ----------
+    corr : ndarray, (k, k)
+        initial correlation matrix
+    threshold : float
+        lower bound for the smallest eigenvalue of the corrected
+        correlation matrix
+    start : None or ndarray, (k,)
+        starting values for the dual variables, for example the `dual`
+        attribute of the results for a similar matrix. The default starts
+        at the matrix with unit diagonal.
+    tol : float
+        convergence tolerance for the norm of the deviation of the diagonal
+        from one
+    maxiter : int
+        maximum number of Newton iterations
+
+    Returns
+    -------
+    rslt : Bunch
+        rslt.corr is the corrected correlation matrix, rslt.dual are the
+        dual variables that can be used as `start` for a similar
+        matrix, other fields describe the convergence status.
+
+    Notes
+    -----
+    The dual variables y are the adjustments to the diagonal of `corr`,
+    the solution is the projection of corr + diag(y) on the cone of
+    positive semidefinite matrices. Each iteration requires one
+    eigendecomposition, the Newton equations are solved by preconditioned
+    conjugate gradients. The cost of these is small when only a few
+    eigenvalues are positive or only a few are negative. For large
+    matrices this is much faster than the alternating projections in
+    ``corr_nearest``.
+
+    A lower bound on the eigenvalues is imposed by solving the problem for
+    corr - threshold * I with diagonal equal to 1 - threshold. The
+    diagonal of the solution is rescaled to be exactly one.
+
+    Assumes input correlation matrix is symmetric.
+
+    References
+    ----------
+    H. Qi and D. Sun (2006). A quadratically convergent Newton method for
+    computing the nearest correlation matrix. SIAM J Matrix Anal Appl,
+    28:2, 360-385.
+
+    See Also
+    --------
+    corr_nearest
+    corr_clipped
+    """
+    k_vars = corr.shape[0]
+    if k_vars != corr.shape[1]:
+        raise ValueError("matrix is not square")
+
+    diag_idx = np.arange(k_vars)
+    g = np.array(corr, dtype=np.float64)
+    g[diag_idx, diag_idx] -= threshold
+    b = np.ones(k_vars) * (1. - threshold)
+    if start is None:
+        y = b - np.diag(g)
+    else:
+        y = np.array(start, dtype=np.float64)
+
+    def eig_dual(y):
+        x = g.copy()
+        x[diag_idx, diag_idx] += y
+        evals, evecs = np.linalg.eigh(x)
+        evals_pos = np.maximum(evals, 0)
+        obj = 0.5 * np.dot(evals_pos, evals_pos) - np.dot(b, y)
+        return evals, evecs, obj
+
+    evals, evecs, obj = eig_dual(y)
+    converged = False
+    for n_iter in range(maxiter + 1):
+        pos = evals > 0
+        p1 = evecs[:, pos]
+        grad = (p1**2 * evals[pos]).sum(1) - b
+        grad_norm = np.sqrt(np.dot(grad, grad))
+        if grad_norm < tol:
+            converged = True
+            break
+        if n_iter == maxiter:
+            break
+
+        jac, precond = _psd_jacobian(evals, evecs)
+        d = _pcg(jac, -grad, precond, tol=min(1e-2, 0.1 * grad_norm),
+                 maxiter=200)
+
+        # Armijo line search
+        slope = np.dot(grad, d)
+        step = 1.
+        for _ in range(30):
+            evals1, evecs1, obj1 = eig_dual(y + step * d)
+            if obj1 <= obj + 1e-4 * step * slope:
+                break
+            step /= 2.
+        y += step * d
+        evals, evecs, obj = evals1, evecs1, obj1
+
+    if converged:
+        msg = "Converged successfully"
+    else:
+        import warnings
+        warnings.warn(iteration_limit_doc, IterationLimitWarning)
+        msg = "corr_nearest_newton did not converge"
+
+    pos = evals > 0
+    p1 = evecs[:, pos]
+    x_new = np.dot(p1 * evals[pos], p1.T)
+    x_new[diag_idx, diag_idx] += threshold
+    x_std = np.sqrt(np.diag(x_new))
+    x_new /= x_std
+    x_new /= x_std[:, None]
+    x_new[diag_idx, diag_idx] = 1
+
+    return Bunch(corr=x_new, dual=y, n_iter=n_iter, grad_norm=grad_norm,
+                 Converged=converged, Message=msg)
+
+
 def cov_nearest(cov, method='clipped', threshold=1e-15, n_fact=100,
                 return_all=False):
 
@@ -163,6 +406,8 @@ def cov_nearest(cov, method='clipped', threshold=1e-15, n_fact=100,
     method : string
         if "clipped", then the faster but less accurate ``corr_clipped`` is used.
         if "nearest", then ``corr_nearest`` is used
+        if "newton", then ``corr_nearest_newton`` is used, this is faster
+        than "nearest" for large matrices
     threshold : float
         clipping threshold for smallest eigen value, see Notes
     nfact : int or float
@@ -201,6 +446,7 @@ def cov_nearest(cov, method='clipped', threshold=1e-15, n_fact=100,
     --------
     corr_nearest
     corr_clipped
+    corr_nearest_newton
 
     '''
 
@@ -210,6 +456,8 @@ def cov_nearest(cov, method='clipped', threshold=1e-15, n_fact=100,
         corr_ = corr_clipped(cov_, threshold=threshold)
     elif method == 'nearest':
         corr_ = corr_nearest(cov_, threshold=threshold, n_fact=n_fact)
+    elif method == 'newton':
+        corr_ = corr_nearest_newton(cov_, threshold=threshold).corr
 
     cov_ = corr2cov(corr_, std_)
 
@@ -770,7 +1018,7 @@ def cov_nearest_factor_homog(cov, rank):
     diag = k_opt * np.ones(m, dtype=np.float64) #- (fac_opt**2).sum(1)
     return FactoredPSDMatrix(diag, fac_opt)
 
-def corr_thresholded(data, minabs=None, max_elt=1e7):
+def corr_thresholded(data, minabs=None, max_elt=1e7, n_jobs=1):
     """
     Construct a sparse matrix containing the thresholded row-wise
     correlation matrix from a data array.
@@ -784,6 +1032,13 @@ def corr_thresholded(data, minabs=None, max_elt=1e7):
         The threshold value; correlation coefficients smaller in
         magnitude than minabs are set to zero.  If None, defaults
         to 1 / sqrt(n), see Notes for more information.
+    max_elt : int
+        Maximum number of elements of the intermediate blocks of the
+        correlation matrix.
+    n_jobs : int
+        Number of threads that compute blocks of the correlation matrix
+        concurrently. The matrix products release the GIL, so the
+        computation is parallel without copying the data.
 
     Returns
     -------
@@ -803,8 +1058,11 @@ def corr_thresholded(data, minabs=None, max_elt=1e7):
     coefficients for which the population value is zero.
 
     No intermediate matrix with more than `max_elt` values will be
-    constructed.  However memory use could still be high if a large
-    number of correlation values exceed `minabs` in magnitude.
+    constructed, with `n_jobs` threads there are up to `n_jobs` of these
+    at the same time.  However memory use could still be high if a large
+    number of correlation values exceed `minabs` in magnitude.  Only the
+    blocks on and above the diagonal are computed, the values below the
+    diagonal are filled in by symmetry.
 
     The thresholded matrix is returned in COO format, which can easily
     be converted to other sparse formats.
@@ -838,24 +1096,35 @@ def corr_thresholded(data, minabs=None, max_elt=1e7):
     data[ii, :] = 0
 
     # Number of rows to process in one pass
-    bs = int(np.floor(max_elt / nrow))
-
-    ipos_all, jpos_all, cor_values = [], [], []
+    bs = max(int(np.floor(max_elt / nrow)), 1)
 
-    ir = 0
-    while ir < nrow:
-        ir2 = min(data.shape[0], ir + bs)
-        cm = np.dot(data[ir:ir2,:], data.T) / (ncol - 1)
+    def thresholded_block(ir):
+        # correlations of rows ir:ir2 with rows ir:, upper triangle only
+        ir2 = min(nrow, ir + bs)
+        cm = np.dot(data[ir:ir2, :], data[ir:, :].T) / (ncol - 1)
         cma = np.abs(cm)
+        cma[np.tril_indices(ir2 - ir, -1)] = 0
         ipos, jpos = np.nonzero(cma >= minabs)
-        ipos_all.append(ipos + ir)
-        jpos_all.append(jpos)
-        cor_values.append(cm[ipos, jpos])
-        ir += bs
-
-    ipos = np.concatenate(ipos_all)
-    jpos = np.concatenate(jpos_all)
-    cor_values = np.concatenate(cor_values)
+        return ipos + ir, jpos + ir, cm[ipos, jpos]
+
+    blocks = range(0, nrow, bs)
+    if n_jobs > 1:
+        from multiprocessing.pool import ThreadPool
+        pool = ThreadPool(n_jobs)
+        try:
+            results = pool.map(thresholded_block, blocks)
+        finally:
+            pool.close()
+    else:
+        results = [thresholded_block(ir) for ir in blocks]
+
+    ipos, jpos, cor_values = [np.concatenate(x) for x in zip(*results)]
+
+    # mirror the values above the diagonal
+    upper = ipos != jpos
+    ipos, jpos = (np.concatenate((ipos, jpos[upper])),
+                  np.concatenate((jpos, ipos[upper])))
+    cor_values = np.concatenate((cor_values, cor_values[upper]))
 
     cmat = sparse.coo_matrix((cor_values, (ipos, jpos)), (nrow, nrow))
 
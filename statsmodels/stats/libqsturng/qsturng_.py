@@ -32,7 +32,7 @@ from scipy.optimize import fminbound
 
 inf = np.inf
 
-__version__ = '0.2.3'
+__version__ = '0.2.4'
 
 # changelog
 # 0.1   - initial release
@@ -44,6 +44,8 @@ __version__ = '0.2.3'
 #         select_vs
 #       - pysturng tester added.
 # 0.2.3 - uses np.inf and np.isinf
+# 0.2.4 - array versions of qsturng and psturng that interpolate all
+#         elements at once, scalar quantiles are cached
 
 # Gleason's table was derived using least square estimation on the tabled
 # r values for combinations of p and v. In total there are 206
@@ -525,6 +527,9 @@ def _interpolate_p(p, r, v):
 
     # find the 3 closest v values
     p0, p1, p2 = _select_ps(p)
+    if v == 1 and p0 < .9:
+        # only p >= .9 have table values for 1 degree of freedom
+        p0, p1, p2 = .900, .950, .975
     try:
         y0 = _func(A[(p0, v)], p0, r, v) + 1.
     except:
@@ -758,6 +763,216 @@ def _qsturng(p, r, v):
 _vqsturng = np.vectorize(_qsturng)
 _vqsturng.__doc__ = """vector version of qsturng"""
 
+# Array versions of the interpolation. The A table is stored as a 3d array
+# indexed by (p, v, coefficient), with nan for the combinations that are not
+# in the table, so that the points used for interpolation can be selected
+# for all elements at once instead of looping over scalars in python.
+
+_p_arr = np.array(p_keys)
+_v_arr = np.array([1.] + v_keys)
+_A_arr = np.empty((len(_p_arr), len(_v_arr), 4))
+_A_arr.fill(np.nan)
+for (_p, _v), _a in A.items():
+    _A_arr[p_keys.index(_p), np.searchsorted(_v_arr, _v)] = _a
+
+# lower bounds of the p intervals in `_select_ps`
+_p_breaks = np.array([.5, .675, .7625, .825, .875, .9125, .95, .975, .99])
+
+def _phi_vec(p):
+    """array version of `_phi`, p is assumed to be in (0, 1)"""
+    a = (-3.969683028665376e+01,  2.209460984245205e+02,
+         -2.759285104469687e+02,  1.383577518672690e+02,
+         -3.066479806614716e+01,  2.506628277459239e+00)
+    b = (-5.447609879822406e+01,  1.615858368580409e+02,
+         -1.556989798598866e+02,  6.680131188771972e+01,
+         -1.328068155288572e+01 )
+    c = (-7.784894002430293e-03, -3.223964580411365e-01,
+         -2.400758277161838e+00, -2.549732539343734e+00,
+          4.374664141464968e+00,  2.938163982698783e+00)
+    d = ( 7.784695709041462e-03,  3.224671290700398e-01,
+          2.445134137142996e+00,  3.754408661907416e+00)
+
+    plow  = 0.02425
+    phigh = 1 - plow
+
+    p = np.asarray(p, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # tails, the sign is negative in the lower tail
+        q = np.sqrt(-2*np.log(np.where(p < .5, p, 1 - p)))
+        tail = (((((c[0]*q+c[1])*q+c[2])*q+c[3])*q+c[4])*q+c[5]) / \
+               ((((d[0]*q+d[1])*q+d[2])*q+d[3])*q+1)
+        tail = np.where(p < .5, -tail, tail)
+        q = p - 0.5
+        r = q*q
+        central = -(((((a[0]*r+a[1])*r+a[2])*r+a[3])*r+a[4])*r+a[5])*q / \
+                  (((((b[0]*r+b[1])*r+b[2])*r+b[3])*r+b[4])*r+1)
+    return np.where((p < plow) | (phigh < p), tail, central)
+
+def _ptransform_vec(p):
+    """array version of `_ptransform`"""
+    return -1. / (1. + 1.5 * _phi_vec((1. + p)/2.))
+
+def _func_vec(pi, vi, r):
+    """
+    array version of `_func` for the table entries with p index pi and
+    v index vi
+    """
+    a = _A_arr[pi, vi]
+    p = _p_arr[pi]
+    v = _v_arr[vi]
+    lr = np.log(r - 1.)
+    f = a[..., 0]*lr + a[..., 1]*lr**2 + a[..., 2]*lr**3 + a[..., 3]*lr**4
+
+    # eq. 2.7 and 2.8 corrections
+    is3 = (r == 3)
+    if is3.any():
+        v_ = np.where(np.isinf(v), 1e38, v)
+        corr = -0.002 / (1. + 12. * _phi_vec(p)**2)
+        corr += np.where(v <= 4.364, 1./517. - 1./(312.*v_), 1./(191.*v_))
+        f = np.where(is3, f + corr, f)
+
+    return -f
+
+def _select_ps_vec(p, vi):
+    """returns the indices of the points used for interpolating p"""
+    pi0 = np.searchsorted(_p_breaks, p, side='right')
+    # only p >= .9 have table values for 1 degree of freedom
+    pi0 = np.where(vi == 0, np.maximum(pi0, 6), pi0)
+    return pi0, pi0 + 1, pi0 + 2
+
+def _select_vs_vec(v, p):
+    """returns the indices of the points used for interpolating v"""
+    # index of the middle point, the table is 1, ..., 20 for small v
+    vi1 = np.round(v).astype(int) - 1
+    vi1 = np.where((p >= .9) & (v < 2.5), 1, vi1)
+    vi1 = np.where((p < .9) & (v < 3.5), 2, vi1)
+    for i, v_low in enumerate([19.5, 24., 30., 40., 60., 120.]):
+        vi1 = np.where(v >= v_low, 19 + i, vi1)
+    return vi1 - 1, vi1, vi1 + 1
+
+def _quad_interp(x, x0, x1, x2, y0, y1, y2):
+    """quadratic interpolation through three points, as in `_qsturng`"""
+    d2 = 2.*((y2-y1)/(x2-x1) - (y0-y1)/(x0-x1)) / (x2-x0)
+    d1 = np.where((x2 + x0) >= (x1 + x1),
+                  (y2-y1)/(x2-x1) - 0.5*d2*(x2-x1),
+                  (y1-y0)/(x1-x0) + 0.5*d2*(x1-x0))
+    return (d2/2.)*(x-x1)**2. + d1*(x-x1) + y1
+
+def _interpolate_p_vec(p, r, vi):
+    """array version of `_interpolate_p`, v is given by its table index"""
+    v = _v_arr[vi]
+    v_ = np.where(v > 1e38, 1e38, v)
+    pi = _select_ps_vec(p, vi)
+    p0, p1, p2 = [_p_arr[i] for i in pi]
+    y0, y1, y2 = [_func_vec(i, vi, r) + 1. for i in pi]
+
+    y = np.empty(p.shape)
+
+    # quadratic interpolation in log(y + r/v), for p > .85 also in the
+    # transformed p
+    mask = p > .5
+    if mask.any():
+        m = mask
+        rv = r[m] / v[m]
+        y_logs = [np.log(yi[m] + rv) for yi in (y0, y1, y2)]
+        pt = p[m] > .85
+        x, x0, x1, x2 = [np.where(pt, _ptransform_vec(pj[m]), pj[m])
+                         for pj in (p, p0, p1, p2)]
+        y[m] = np.exp(_quad_interp(x, x0, x1, x2, *y_logs)) - rv
+
+    # linear interpolation in q and p
+    mask = ~mask
+    if mask.any():
+        m = mask
+        t = scipy.stats.t
+        q0 = math.sqrt(2) * -y0[m] * t.isf((1.+p0[m])/2., v_[m])
+        q1 = math.sqrt(2) * -y1[m] * t.isf((1.+p1[m])/2., v_[m])
+        q = (q1-q0)/(p1[m]-p0[m]) * (p[m]-p0[m]) + q0
+        y[m] = -q / (math.sqrt(2) * t.isf((1.+p[m])/2., v_[m]))
+
+    return y
+
+def _interpolate_v_vec(p, r, v, pi=None):
+    """
+    array version of `_interpolate_v`, if pi is None, then p is also
+    interpolated
+    """
+    vis = _select_vs_vec(v, p)
+    if pi is None:
+        y_sq = [_interpolate_p_vec(p, r, vi)**2 for vi in vis]
+    else:
+        y_sq = [(_func_vec(pi, vi, r) + 1.)**2 for vi in vis]
+
+    v_ = [1. / np.minimum(_v_arr[vi], 1e38) for vi in vis]
+    return np.sqrt(_quad_interp(1. / v, *(v_ + y_sq)))
+
+def _qsturng_vec(p, r, v):
+    """array version of qsturng"""
+    p, r, v = np.broadcast_arrays(*[np.asarray(x, dtype=float)
+                                    for x in (p, r, v)])
+    shape = p.shape
+    p, r, v = p.ravel(), r.ravel(), v.ravel()
+
+    if ((p < .1) | (p > .999)).any():
+        raise ValueError('p must be between .1 and .999')
+    if ((p < .9) & (v < 2)).any():
+        raise ValueError('v must be > 2 when p < .9')
+    if ((p >= .9) & (v < 1)).any():
+        raise ValueError('v must be > 1 when p >= .9')
+    if (r < 2).any():
+        raise ValueError('r must be >= 2')
+
+    pi = np.searchsorted(_p_arr, p)
+    vi = np.searchsorted(_v_arr, v)
+    in_p = _p_arr[np.minimum(pi, len(_p_arr) - 1)] == p
+    in_v = _v_arr[np.minimum(vi, len(_v_arr) - 1)] == v
+
+    y = np.empty(p.shape)
+    # tabled values, interpolation in p, in v, and in both
+    for mask, func, args in [
+            (in_p & in_v, _func_vec, (pi, vi, r)),
+            (~in_p & in_v, _interpolate_p_vec, (p, r, vi)),
+            (in_p & ~in_v, _interpolate_v_vec, (p, r, v, pi)),
+            (~in_p & ~in_v, _interpolate_v_vec, (p, r, v))]:
+        if mask.any():
+            y[mask] = func(*[x[mask] for x in args])
+    y[in_p & in_v] += 1.
+
+    v_ = np.where(v > 1e38, 1e38, v)
+    q = math.sqrt(2) * -y * scipy.stats.t.isf((1.+p)/2., v_)
+    return q.reshape(shape)
+
+def _psturng_vec(q, r, v, n_iter=40):
+    """array version of psturng, inverts `_qsturng_vec` by bisection"""
+    q, r, v = np.broadcast_arrays(*[np.asarray(x, dtype=float)
+                                    for x in (q, r, v)])
+    if (q < 0.).any():
+        raise ValueError('q should be >= 0')
+
+    # the same bounds as in `_psturng`
+    p_low = np.where(v == 1, .9, .1)
+    p_upp = np.ones(q.shape) * .999
+    q_low = _qsturng_vec(p_low, r, v)
+    q_upp = _qsturng_vec(p_upp, r, v)
+
+    # quantiles are increasing in p, shrink the bracket of 1 - p.
+    # Only elements that are not at the bounds need to be evaluated.
+    inside = (q >= q_low) & (q <= q_upp)
+    lower, upper = p_low[inside], p_upp[inside]
+    q_, r_, v_ = q[inside], r[inside], v[inside]
+    for _ in range(n_iter):
+        mid = (lower + upper) / 2.
+        below = _qsturng_vec(mid, r_, v_) < q_
+        lower = np.where(below, mid, lower)
+        upper = np.where(below, upper, mid)
+
+    p = np.where(q < q_low, 1. - p_low, .001)
+    p[inside] = 1. - (lower + upper) / 2.
+    return p
+
+# cache of scalar quantiles, keyed by (p, r, v)
+_qsturng_cache = {}
+
 def qsturng(p, r, v):
     """Approximates the quantile p for a studentized range
        distribution having v degrees of freedom and r samples
@@ -788,8 +1003,13 @@ def qsturng(p, r, v):
     """
 
     if all(map(_isfloat, [p, r, v])):
-        return _qsturng(p, r, v)
-    return _vqsturng(p, r, v)
+        key = (float(p), float(r), float(v))
+        if key not in _qsturng_cache:
+            if len(_qsturng_cache) > 10000:
+                _qsturng_cache.clear()
+            _qsturng_cache[key] = _qsturng(p, r, v)
+        return _qsturng_cache[key]
+    return _qsturng_vec(p, r, v)
 
 ##def _qsturng0(p, r, v):
 ####    print 'q0',p
@@ -870,7 +1090,7 @@ def psturng(q, r, v):
     """
     if all(map(_isfloat, [q, r, v])):
         return _psturng(q, r, v)
-    return _vpsturng(q, r, v)
+    return _psturng_vec(q, r, v)
 
 ##p, r, v = .9, 10, 20
 ##print
@@ -9,11 +9,13 @@ from statsmodels.compat.python import iterkeys, lzip, lmap
 
 from numpy.testing import TestCase, rand, assert_, assert_equal, \
     assert_almost_equal, assert_array_almost_equal, assert_array_equal, \
-    assert_approx_equal, assert_raises, run_module_suite, dec
+    assert_approx_equal, assert_raises, assert_allclose, \
+    run_module_suite, dec
 
 import numpy as np
 
 from statsmodels.stats.libqsturng import qsturng, psturng,p_keys,v_keys
+from statsmodels.stats.libqsturng.qsturng_ import _qsturng, _psturng
 
 def read_ch(fname):
     with open(fname) as f:
@@ -128,6 +130,35 @@ class test_qsturng(TestCase):
         errors = np.abs(qs-qsturng(ps,rs,vs))/qs
         assert_equal(np.array([]), np.where(errors > .03)[0])
 
+    def test_vector_equals_scalar(self):
+        # the array version interpolates all elements at once
+        np.random.seed(5678)
+        n = 500
+        ps = np.random.random(n)*(.999 - .1) + .1
+        ps[:100] = np.random.permutation(p_keys * 9)[:100]
+        rs = np.random.random_integers(2, 100, n)
+        rs[100:200] = 3
+        vs = np.random.random(n)*998. + 2.
+        vs[200:350] = np.random.random_integers(2, 130, 150)
+        vs[350:380] = np.inf
+        vs[380:400] = 1
+        ps[380:400] = np.random.random(20)*(.999 - .9) + .9
+        qs = qsturng(ps, rs, vs)
+        assert_equal(qs.shape, (n,))
+        qs_scalar = [_qsturng(p, r, v) for p, r, v in zip(ps, rs, vs)]
+        assert_allclose(qs, qs_scalar, rtol=1e-12)
+
+        # broadcasting
+        q = qsturng(.95, np.array([2, 5, 10])[:, None], [10, 20])
+        assert_equal(q.shape, (3, 2))
+        assert_allclose(q[1, 1], qsturng(.95, 5, 20), rtol=1e-13)
+
+    def test_vector_invalid_parameters(self):
+        assert_raises(ValueError, qsturng, [.9, .9991], 5, 6)
+        assert_raises(ValueError, qsturng, [.9, .89], 5, [6, 1])
+        assert_raises(ValueError, qsturng, [.9, .9], 5, [6, 0])
+        assert_raises(ValueError, qsturng, [.9, .9], [5, 1], 2)
+
 class test_psturng(TestCase):
     def test_scalar(self):
         "scalar input -> scalar output"
@@ -145,6 +176,22 @@ class test_psturng(TestCase):
                                           [6, 6, 6]),
                                   5)
 
+    def test_vector_equals_scalar(self):
+        np.random.seed(3456)
+        n = 50
+        rs = np.random.random_integers(2, 100, n)
+        vs = np.random.random(n)*998. + 2.
+        vs[:5] = 1
+        qs = qsturng(np.random.random(n)*(.999 - .9) + .9, rs, vs)
+        qs[5:10] = 1e-3
+        qs[10:15] = 1e4
+        ps = psturng(qs, rs, vs)
+        ps_scalar = [_psturng(q, r, v) for q, r, v in zip(qs, rs, vs)]
+        # fminbound in the scalar version has a tolerance of 1e-5
+        assert_allclose(ps, ps_scalar, atol=1e-5)
+        assert_equal(ps[5:10], .9)
+        assert_equal(ps[10:15], .001)
+
     def test_v_equal_one(self):
         assert_almost_equal(.1, psturng(.2,5,1), 5)
 
@@ -446,6 +446,367 @@ def fdrcorrection_twostage(pvals, alpha=0.05, method='bky', iter=False,
         return rej, pvalscorr, ntests - ri, alpha_stages
 
 
+class _Families(object):
+    '''index information for p-values that are sorted within families
+
+    Families are stored consecutively in a flat array. If all families have
+    the same size, then `shape` is (n_families, ntests) and cumulative
+    operations are done along the rows.
+    '''
+
+    def __init__(self, codes, ntests_family, shape=None):
+        self.codes = codes
+        self.ntests_family = ntests_family
+        self.n_families = len(ntests_family)
+        self.shape = shape
+        starts = np.cumsum(ntests_family) - ntests_family
+        self.ntests = ntests_family[codes]
+        self.rank = np.arange(1, len(codes) + 1) - starts[codes]
+        max_ntests = ntests_family.max() if self.n_families else 0
+        # use a padded 2-D array if it is not much larger than the data
+        self.pad = (shape is None and
+                    self.n_families * max_ntests <= 4 * len(codes))
+        self.shape_pad = (self.n_families, max_ntests)
+
+    def accumulate(self, ufunc, x, reverse=False):
+        '''cumulative ufunc within families, from the end if reverse is True
+        '''
+        if self.shape is not None:
+            x = x.reshape(self.shape)
+            if reverse:
+                return ufunc.accumulate(x[:, ::-1], axis=1)[:, ::-1].ravel()
+            return ufunc.accumulate(x, axis=1).ravel()
+
+        if self.pad:
+            # fill value that does not change the result of ufunc
+            fill = {np.minimum: np.inf, np.maximum: -np.inf,
+                    np.logical_or: False}[ufunc]
+            x_pad = np.empty(self.shape_pad, dtype=x.dtype)
+            x_pad.fill(fill)
+            x_pad[self.codes, self.rank - 1] = x
+            if reverse:
+                x_pad = ufunc.accumulate(x_pad[:, ::-1], axis=1)[:, ::-1]
+            else:
+                x_pad = ufunc.accumulate(x_pad, axis=1)
+            return x_pad[self.codes, self.rank - 1]
+
+        # Hillis-Steele scan, log2(max ntests) vectorized passes
+        x = x.copy()
+        if reverse:
+            pos = self.ntests - self.rank
+        else:
+            pos = self.rank - 1
+        d = 1
+        maxpos = pos.max() if len(pos) else 0
+        while d <= maxpos:
+            idx = np.nonzero(pos >= d)[0]
+            src = idx + d if reverse else idx - d
+            x[idx] = ufunc(x[idx], x[src])
+            d *= 2
+        return x
+
+
+def _multipletests_families(pvals, alpha, method, fam):
+    '''p-value corrections for p-values sorted within families
+
+    This is the vectorized version of the computation in `multipletests`
+    with is_sorted=True.
+    '''
+    method = multitest_alias.get(method.lower(), None)
+    if method is None:
+        raise ValueError('method not recognized')
+    ntests_fam = fam.ntests_family.astype(float)
+    alphacSidak = 1 - np.power((1. - alpha), 1. / ntests_fam)
+    alphacBonf = alpha / ntests_fam
+    ntests = fam.ntests.astype(float)
+    rank = fam.rank
+    # number of remaining tests, ntests, ntests - 1, ..., 1
+    n_rev = ntests - rank + 1
+
+    if method == 'b':
+        reject = pvals <= alphacBonf[fam.codes]
+        pvals_corrected = pvals * ntests
+
+    elif method == 's':
+        reject = pvals <= alphacSidak[fam.codes]
+        pvals_corrected = 1 - np.power((1. - pvals), ntests)
+
+    elif method == 'hs':
+        notreject = pvals > 1 - np.power((1. - alpha), 1. / n_rev)
+        reject = ~fam.accumulate(np.logical_or, notreject)
+        pvals_corrected = fam.accumulate(np.maximum,
+                                         1 - np.power((1. - pvals), n_rev))
+
+    elif method == 'h':
+        notreject = pvals > alpha / n_rev
+        reject = ~fam.accumulate(np.logical_or, notreject)
+        pvals_corrected = fam.accumulate(np.maximum, pvals * n_rev)
+
+    elif method == 'sh':
+        reject = fam.accumulate(np.logical_or, pvals <= alpha / n_rev,
+                                reverse=True)
+        pvals_corrected = fam.accumulate(np.minimum, n_rev * pvals,
+                                         reverse=True)
+
+    elif method in ['fdr_bh', 'fdr_by', 'fdr_tsbh', 'fdr_tsbky']:
+        ecdffactor = rank / ntests
+        if method == 'fdr_by':
+            harmonic = np.cumsum(1. / np.arange(1, fam.ntests_family.max() + 1))
+            ecdffactor /= harmonic[fam.ntests - 1]
+
+        def step_up(alpha_):
+            return fam.accumulate(np.logical_or, pvals <= ecdffactor * alpha_,
+                                  reverse=True)
+
+        pvals_corrected = fam.accumulate(np.minimum, pvals / ecdffactor,
+                                         reverse=True)
+        if method in ['fdr_bh', 'fdr_by']:
+            reject = step_up(alpha)
+        else:
+            # two stage, see fdrcorrection_twostage with iter=False
+            fact = (1. + alpha) if method == 'fdr_tsbky' else 1.
+            alpha_prime = alpha / fact
+            reject = step_up(alpha_prime)
+            r1 = np.bincount(fam.codes, weights=reject,
+                             minlength=fam.n_families)
+            second = (r1 > 0) & (r1 < ntests_fam)
+            ntests0 = ntests_fam - r1
+            alpha_star = np.where(second, alpha_prime * ntests_fam /
+                                  np.maximum(ntests0, 1), alpha_prime)
+            reject2 = step_up(alpha_star[fam.codes])
+            second_ = second[fam.codes]
+            reject[second_] = reject2[second_]
+            factor = np.where(second, ntests0 / ntests_fam, 1.) * fact
+            pvals_corrected = (np.minimum(pvals_corrected, 1) *
+                               factor[fam.codes])
+
+    elif method == 'fdr_gbs':
+        q = (ntests + 1. - rank) / rank * pvals / (1. - pvals)
+        pvals_corrected = fam.accumulate(np.minimum,
+                                         fam.accumulate(np.maximum, q),
+                                         reverse=True)
+        reject = pvals_corrected <= alpha
+
+    else:
+        raise ValueError('method %s is not available for batches' % method)
+
+    pvals_corrected[pvals_corrected > 1] = 1
+    return reject, pvals_corrected, alphacSidak, alphacBonf
+
+
+def multipletests_batch(pvals, alpha=0.05, method='hs', axis=-1,
+                        groups=None):
+    '''test results and p-value correction for many families of tests
+
+    This applies the same correction as `multipletests` separately to each
+    family of p-values in one vectorized computation.
+
+    Parameters
+    ----------
+    pvals : array_like
+        uncorrected p-values. If groups is None, then each 1-D slice along
+        `axis` is a family. If groups is given, then pvals needs to be 1-D.
+    alpha : float
+        FWER, family-wise error rate, or FDR, e.g. 0.1
+    method : string
+        Method used for testing and adjustment of pvalues, see
+        `multipletests`. All methods except for 'hommel' are available.
+    axis : int
+        axis along which the families are defined if groups is None.
+    groups : None or array_like, 1-D
+        labels defining families, p-values with the same label form a
+        family. Families can have different sizes.
+
+    Returns
+    -------
+    reject : ndarray, boolean
+        true for hypothesis that can be rejected for given alpha, same shape
+        as pvals
+    pvals_corrected : ndarray
+        p-values corrected for multiple tests within each family, same shape
+        as pvals
+    alphacSidak : ndarray
+        corrected alpha for Sidak method for each family
+    alphacBonf : ndarray
+        corrected alpha for Bonferroni method for each family
+
+    Notes
+    -----
+    The p-values are sorted with a single call to argsort along the axis,
+    or by p-value and then by group. The step-down and step-up
+    adjustments are cumulative maxima and minima within families. If groups
+    are given, families are in the order of ``np.unique(groups)``, and the
+    cumulative operations within families of different sizes are computed
+    with a number of vectorized passes that is logarithmic in the size of
+    the largest family.
+
+    Except for possible differences in floating point rounding, the results
+    are the same as calling `multipletests` on each family.
+
+    See Also
+    --------
+    multipletests
+    StreamingFDR : approximate fdr_bh for p-values that do not fit in memory
+
+    '''
+    pvals = np.asarray(pvals, dtype=float)
+
+    if groups is None:
+        pvals_ = np.rollaxis(np.atleast_1d(pvals), axis, pvals.ndim)
+        shape_ = pvals_.shape
+        ntests = shape_[-1]
+        pvals_ = pvals_.reshape(-1, ntests)
+        n_families = pvals_.shape[0]
+        sortind = np.argsort(pvals_, axis=1)
+        rows = np.arange(n_families)[:, None]
+        pvals_sorted = pvals_[rows, sortind].ravel()
+        fam = _Families(np.repeat(np.arange(n_families), ntests),
+                        np.repeat(ntests, n_families),
+                        shape=(n_families, ntests))
+
+        reject_s, pvals_corr_s, alphacSidak, alphacBonf = \
+            _multipletests_families(pvals_sorted, alpha, method, fam)
+
+        reject = np.empty((n_families, ntests), dtype=bool)
+        reject[rows, sortind] = reject_s.reshape(n_families, ntests)
+        pvals_corrected = np.empty((n_families, ntests))
+        pvals_corrected[rows, sortind] = pvals_corr_s.reshape(n_families,
+                                                              ntests)
+        reject = np.rollaxis(reject.reshape(shape_), -1, axis % pvals.ndim)
+        pvals_corrected = np.rollaxis(pvals_corrected.reshape(shape_), -1,
+                                      axis % pvals.ndim)
+        shape_fam = shape_[:-1]
+        return (reject, pvals_corrected, alphacSidak.reshape(shape_fam),
+                alphacBonf.reshape(shape_fam))
+
+    if pvals.ndim != 1:
+        raise ValueError('pvals needs to be 1-D if groups are given')
+    codes = np.unique(groups, return_inverse=True)[1]
+    if len(codes) != len(pvals):
+        raise ValueError('pvals and groups need to have the same length')
+    # sort by p-value, then stable sort by family, faster than lexsort
+    sortind = np.argsort(pvals)
+    sortind = sortind[np.argsort(codes[sortind], kind='mergesort')]
+    pvals_sorted = pvals[sortind]
+    codes_sorted = codes[sortind]
+    fam = _Families(codes_sorted, np.bincount(codes))
+
+    reject_s, pvals_corr_s, alphacSidak, alphacBonf = \
+        _multipletests_families(pvals_sorted, alpha, method, fam)
+
+    reject = np.empty(len(pvals), dtype=bool)
+    reject[sortind] = reject_s
+    pvals_corrected = np.empty(len(pvals))
+    pvals_corrected[sortind] = pvals_corr_s
+    return reject, pvals_corrected, alphacSidak, alphacBonf
+
+
+class StreamingFDR(object):
+    '''approximate Benjamini-Hochberg fdr correction for streams of p-values
+
+    The p-values are counted on a fine geometric grid, so that the memory
+    does not depend on the number of p-values. The p-values can be added in
+    chunks with `update`. The rejection decision and corrected p-values are
+    then available for any p-value, e.g. in a second pass over the data.
+
+    Parameters
+    ----------
+    alpha : float
+        error rate
+    method : {'indep', 'negcorr'}
+        'indep' for Benjamini-Hochberg, 'negcorr' for Benjamini-Yekutieli,
+        see `fdrcorrection`
+    pval_min : float
+        smallest grid point, all p-values below it are counted at this point
+    bins_per_decade : int
+        number of grid points per factor of 10, which determines the
+        relative resolution of the approximation
+
+    Attributes
+    ----------
+    nobs : int
+        number of p-values added so far
+    grid : ndarray
+        grid points, upper edges of the histogram bins
+    counts : ndarray
+        number of p-values in each histogram bin
+
+    Notes
+    -----
+    The approximation is conservative: p-values rejected by the streaming
+    version are also rejected by `fdrcorrection` on the full set of p-values
+    and the approximate corrected p-values are not smaller than the exact
+    ones. The p-values that are not rejected but would be rejected by the
+    exact procedure are within a relative distance of the grid resolution,
+    ``10**(1 / bins_per_decade) - 1``, of the exact threshold. The same
+    relative precision holds for the corrected p-values, except for p-values
+    below `pval_min` which are all assigned the corrected p-value of the
+    smallest grid point.
+
+    '''
+
+    def __init__(self, alpha=0.05, method='indep', pval_min=1e-30,
+                 bins_per_decade=1000):
+        if method not in ['i', 'indep', 'p', 'poscorr', 'n', 'negcorr']:
+            raise ValueError('only indep and negcorr implemented')
+        self.alpha = alpha
+        self.method = method
+        n_decades = -np.log10(pval_min)
+        n_grid = int(np.ceil(n_decades * bins_per_decade)) + 1
+        self.grid = np.logspace(np.log10(pval_min), 0, n_grid)
+        self.grid[-1] = 1.
+        self.counts = np.zeros(n_grid, dtype=np.int64)
+        self.nobs = 0
+
+    def update(self, pvals):
+        '''add a chunk of p-values
+        '''
+        pvals = np.asarray(pvals, dtype=float).ravel()
+        idx = np.searchsorted(self.grid, pvals, side='left')
+        self.counts += np.bincount(idx, minlength=len(self.grid))[:len(self.grid)]
+        self.nobs += len(pvals)
+        return self
+
+    def _ecdf_scale(self):
+        # number of tests times Benjamini-Yekutieli factor
+        scale = float(self.nobs)
+        if self.method in ['n', 'negcorr']:
+            scale *= np.sum(1. / np.arange(1, self.nobs + 1))
+        return scale
+
+    @property
+    def threshold(self):
+        '''largest p-value that is rejected
+
+        This is the largest grid point t with ``t <= alpha * F(t) / m`` where
+        F(t) is the number of p-values less or equal to t and m is the
+        number of tests, adjusted for 'negcorr'. It is zero if there is no
+        such grid point.
+        '''
+        cum_counts = np.cumsum(self.counts)
+        ok = self.grid * self._ecdf_scale() <= self.alpha * cum_counts
+        ok &= cum_counts > 0
+        if not ok.any():
+            return 0.
+        return self.grid[np.nonzero(ok)[0][-1]]
+
+    def reject(self, pvals):
+        '''rejection decision for p-values
+        '''
+        return np.asarray(pvals) <= self.threshold
+
+    def pvals_corrected(self, pvals):
+        '''approximate fdr corrected p-values, upper bound of exact values
+        '''
+        cum_counts = np.cumsum(self.counts)
+        with np.errstate(divide='ignore'):
+            q = self.grid * self._ecdf_scale() / cum_counts
+        q = np.minimum.accumulate(q[::-1])[::-1]
+        q = np.minimum(q, 1)
+        pvals = np.asarray(pvals, dtype=float)
+        return q[np.searchsorted(self.grid, pvals, side='left')]
+
+
 def local_fdr(zscores, null_proportion=1.0, null_pdf=None, deg=7,
               nbins=30):
     """
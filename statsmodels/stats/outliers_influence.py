@@ -180,15 +180,17 @@ class OLSInfluence(object):
     -----
     One part of the results can be calculated without any auxiliary regression
     (some of which have the `_internal` postfix in the name. Other statistics
-    require leave-one-observation-out (LOOO) auxiliary regression, and will be
-    slower (mainly results with `_external` postfix in the name).
-    The auxiliary LOOO regression only the required results are stored.
+    are based on leave-one-observation-out (LOOO) estimates, mainly results
+    with `_external` postfix in the name.
 
-    Using the LOO measures is currently only recommended if the data set
-    is not too large. One possible approach for LOOO measures would be to
-    identify possible problem observations with the _internal measures, and
-    then run the leave-one-observation-out only with observations that are
-    possible outliers. (However, this is not yet available in an automized way.)
+    The LOOO estimates are not obtained by refitting the model `nobs` times.
+    Dropping an observation is a rank one downdate of the moment matrix, so
+    parameters, error variance and the determinant of the parameter covariance
+    of all LOOO regressions follow in closed form from the residuals and the
+    diagonal of the hat matrix. The cost is the same as a single regression.
+
+    `summary_frame_chunks` yields the summary frame in blocks of observations,
+    so that the `nobs x k_vars` dfbetas array never has to be held in memory.
 
     This should be extended to general least squares.
 
@@ -218,7 +220,8 @@ class OLSInfluence(object):
         -----
         temporarily calculated here, this should go to model class
         '''
-        return (self.exog * self.results.model.pinv_wexog.T).sum(1)
+        xcx = np.dot(self.exog, self.results.normalized_cov_params)
+        return (self.exog * xcx).sum(1)
 
     @cache_readonly
     def resid_press(self):
@@ -269,8 +272,6 @@ class OLSInfluence(object):
         '''(cached attribute) studentized residuals using LOOO variance
 
         this uses sigma from leave-one-out estimates
-
-        requires leave one out loop for observations
         '''
         sigma_looo = np.sqrt(self.sigma2_not_obsi)
         return self.get_resid_studentized_external(sigma=sigma_looo)
@@ -329,7 +330,7 @@ class OLSInfluence(object):
         '''(cached attribute) dffits measure for influence of an observation
 
         based on resid_studentized_external,
-        uses results from leave-one-observation-out loop
+        uses results from leave-one-observation-out estimates
 
         It is recommended that observations with dffits large than a
         threshold of 2 sqrt{k / n} where k is the number of parameters, should
@@ -357,11 +358,27 @@ class OLSInfluence(object):
     def dfbetas(self):
         '''(cached attribute) dfbetas
 
-        uses results from leave-one-observation-out loop
+        uses results from leave-one-observation-out estimates
+        '''
+        return self._get_dfbetas(0, self.nobs)
+
+    def _get_dparams(self, start, stop):
+        '''change in parameters from dropping observations start to stop - 1
+
+        params - params_not_obsi for a block of observations, computed from
+        the rank one downdate ``(X'X)^{-1} x_i resid_i / (1 - h_i)``
         '''
-        dfbetas = self.results.params - self.params_not_obsi#[None,:]
-        dfbetas /= np.sqrt(self.sigma2_not_obsi[:,None])
-        dfbetas /=  np.sqrt(np.diag(self.results.normalized_cov_params))
+        hii = self.hat_matrix_diag[start:stop]
+        resid = self.results.resid[start:stop]
+        xcx = np.dot(self.exog[start:stop], self.results.normalized_cov_params)
+        return xcx * (resid / (1 - hii))[:, None]
+
+    def _get_dfbetas(self, start, stop):
+        '''dfbetas for a block of observations start to stop - 1
+        '''
+        dfbetas = self._get_dparams(start, stop)
+        dfbetas /= np.sqrt(self.sigma2_not_obsi[start:stop, None])
+        dfbetas /= np.sqrt(np.diag(self.results.normalized_cov_params))
         return dfbetas
 
     @cache_readonly
@@ -370,25 +387,25 @@ class OLSInfluence(object):
 
         This is 'mse_resid' from each auxiliary regression.
 
-        uses results from leave-one-observation-out loop
+        uses results from leave-one-observation-out estimates
         '''
-        return np.asarray(self._res_looo['mse_resid'])
+        return self._res_looo_var['mse_resid']
 
     @cache_readonly
     def params_not_obsi(self):
         '''(cached attribute) parameter estimates for all LOOO regressions
 
-        uses results from leave-one-observation-out loop
+        uses results from leave-one-observation-out estimates
         '''
-        return np.asarray(self._res_looo['params'])
+        return self.results.params - self._get_dparams(0, self.nobs)
 
     @cache_readonly
     def det_cov_params_not_obsi(self):
         '''(cached attribute) determinant of cov_params of all LOOO regressions
 
-        uses results from leave-one-observation-out loop
+        uses results from leave-one-observation-out estimates
         '''
-        return np.asarray(self._res_looo['det_cov_params'])
+        return self._res_looo_var['det_cov_params']
 
     @cache_readonly
     def cooks_distance(self):
@@ -415,7 +432,6 @@ class OLSInfluence(object):
 
         This uses determinant of the estimate of the parameter covariance
         from leave-one-out estimates.
-        requires leave one out loop for observations
 
         '''
         #don't use inplace division / because then we change original
@@ -530,34 +546,44 @@ class OLSInfluence(object):
 
     @cache_readonly
     def _res_looo(self):
-        '''collect required results from the LOOO loop
+        '''collect required results from the LOOO regressions
 
-        all results will be attached.
         currently only 'params', 'mse_resid', 'det_cov_params' are stored
 
-        regresses endog on exog dropping one observation at a time
+        Dropping observation i from the regression changes the moment matrix
+        by a rank one update, ``X'X - x_i x_i'``. With the diagonal of the
+        hat matrix, h_i, and the residuals, e_i, of the full regression this
+        gives without a nobs loop ::
 
-        this uses a nobs loop, only attributes of the OLS instance are stored.
+            params_i = params - (X'X)^{-1} x_i e_i / (1 - h_i)
+            ssr_i = ssr - e_i**2 / (1 - h_i)
+            det((X'X - x_i x_i')^{-1}) = det((X'X)^{-1}) / (1 - h_i)
+
+        The `nobs x k_vars` params are only built here and in
+        `params_not_obsi`, the other influence measures use `_res_looo_var`.
         '''
-        from statsmodels.sandbox.tools.cross_val import LeaveOneOut
-        get_det_cov_params = lambda res: np.linalg.det(res.cov_params())
+        res = dict(self._res_looo_var)
+        res['params'] = self.params_not_obsi
+        return res
 
-        endog = self.endog
-        exog = self.exog
+    @cache_readonly
+    def _res_looo_var(self):
+        '''error variance and cov_params determinant of the LOOO regressions
 
-        params = np.zeros(exog.shape, dtype=np.float)
-        mse_resid = np.zeros(endog.shape, dtype=np.float)
-        det_cov_params = np.zeros(endog.shape, dtype=np.float)
+        These are arrays of length nobs that only require the diagonal of
+        the hat matrix and the residuals, see `_res_looo`.
+        '''
+        results = self.results
+        hii = self.hat_matrix_diag
+        resid = results.resid
+        k_vars = results.normalized_cov_params.shape[0]
 
-        cv_iter = LeaveOneOut(self.nobs)
-        for inidx, outidx in cv_iter:
-            res_i = self.model_class(endog[inidx], exog[inidx]).fit()
-            params[outidx] = res_i.params
-            mse_resid[outidx] = res_i.mse_resid
-            det_cov_params[outidx] = get_det_cov_params(res_i)
+        mse_resid = ((results.ssr - resid**2 / (1 - hii)) /
+                     (results.df_resid - 1))
+        det_cov_params = (mse_resid**k_vars / (1 - hii) *
+                          np.linalg.det(results.normalized_cov_params))
 
-        return dict(params=params, mse_resid=mse_resid,
-                       det_cov_params=det_cov_params)
+        return dict(mse_resid=mse_resid, det_cov_params=det_cov_params)
 
     def summary_frame(self):
         """
@@ -585,25 +611,62 @@ class OLSInfluence(object):
         * student_resid : Externally Studentized residuals defined in
           `Influence.resid_studentized_external`
         """
+        return self._summary_frame(0, self.nobs, self.dfbetas)
+
+    def summary_frame_chunks(self, chunksize=10000):
+        """
+        Iterate over the summary frame in blocks of observations.
+
+        Parameters
+        ----------
+        chunksize : int
+            Maximum number of observations, rows, in each block.
+
+        Yields
+        ------
+        frame : DataFrame
+            The rows of `summary_frame` for consecutive blocks of
+            observations. The index has the row labels of the data, or the
+            observation number if there are no labels.
+
+        Notes
+        -----
+        The dfbetas are computed block by block and are not cached. Only
+        arrays of length nobs are computed and cached for the full sample,
+        `params_not_obsi` is not used, which makes this usable for large
+        regressions where a `nobs x k_vars` array does not fit into memory.
+        """
+        for start in range(0, self.nobs, chunksize):
+            stop = min(start + chunksize, self.nobs)
+            frame = self._summary_frame(start, stop,
+                                        self._get_dfbetas(start, stop))
+            if self.results.model.data.row_labels is None:
+                frame.index = np.arange(start, stop)
+            yield frame
+
+    def _summary_frame(self, start, stop, dfbetas):
         from pandas import DataFrame
 
         # row and column labels
         data = self.results.model.data
         row_labels = data.row_labels
+        if row_labels is not None:
+            row_labels = row_labels[start:stop]
         beta_labels = ['dfb_' + i for i in data.xnames]
+        idx = slice(start, stop)
 
         # grab the results
         summary_data = DataFrame(dict(
-                            cooks_d = self.cooks_distance[0],
-                            standard_resid = self.resid_studentized_internal,
-                            hat_diag = self.hat_matrix_diag,
-                            dffits_internal = self.dffits_internal[0],
-                            student_resid = self.resid_studentized_external,
-                            dffits = self.dffits[0],
+                            cooks_d = self.cooks_distance[0][idx],
+                            standard_resid = self.resid_studentized_internal[idx],
+                            hat_diag = self.hat_matrix_diag[idx],
+                            dffits_internal = self.dffits_internal[0][idx],
+                            student_resid = self.resid_studentized_external[idx],
+                            dffits = self.dffits[0][idx],
                                         ),
                             index = row_labels)
         #NOTE: if we don't give columns, order of above will be arbitrary
-        dfbeta = DataFrame(self.dfbetas, columns=beta_labels,
+        dfbeta = DataFrame(dfbetas, columns=beta_labels,
                             index=row_labels)
 
         return dfbeta.join(summary_data)
@@ -664,6 +727,210 @@ class OLSInfluence(object):
                            html_fmt=fmt_html)
 
 
+class GLMInfluence(object):
+    '''class to calculate outlier and influence measures for GLM results
+
+    Parameters
+    ----------
+    results : GLMResults instance
+        results of a GLM that has been estimated by IRLS
+
+    Notes
+    -----
+    The measures are based on the weighted least squares problem of the
+    last step of the iteratively reweighted least squares estimation. With
+    the weights ``w`` of the converged fit, the diagonal of the hat matrix is
+    ``w_i x_i' (X' W X)^{-1} x_i`` and the leave-one-observation-out
+    parameters are the one-step approximations of Pregibon (1981) ::
+
+        params_i = params - (X' W X)^{-1} x_i w_i r_i / (1 - h_i)
+
+    where r_i are the working residuals. These are exact for the gaussian
+    family with identity link and are computed without refitting the model.
+    Standardized residuals are Pearson residuals divided by
+    ``sqrt(scale * (1 - h_i))``.
+
+    The dfbetas use the standard errors of the full sample, the scale is not
+    re-estimated for each left out observation.
+
+    References
+    ----------
+    Pregibon, D. (1981). Logistic Regression Diagnostics. The Annals of
+    Statistics, 9(4), 705-724.
+
+    Williams, D. A. (1987). Generalized Linear Model Diagnostics Using the
+    Deviance and Single Case Deletions. Applied Statistics, 36(2), 181-191.
+    '''
+
+    def __init__(self, results):
+        self.results = maybe_unwrap_results(results)
+        self.nobs, self.k_vars = self.results.model.exog.shape
+        self.endog = self.results.model.endog
+        self.exog = self.results.model.exog
+        self.scale = self.results.scale
+
+    @cache_readonly
+    def weights(self):
+        '''(cached attribute) IRLS weights at the estimated mean
+        '''
+        model = self.results.model
+        return (model.freq_weights * model.n_trials *
+                model.family.weights(self.results.mu))
+
+    @cache_readonly
+    def resid_working(self):
+        '''(cached attribute) residuals of the working dependent variable
+        '''
+        mu = self.results.mu
+        return self.results.model.family.link.deriv(mu) * (self.endog - mu)
+
+    @cache_readonly
+    def hat_matrix_diag(self):
+        '''(cached attribute) diagonal of the weighted hat matrix
+        '''
+        exog = self.exog
+        xcx = np.dot(exog, self.results.normalized_cov_params)
+        return self.weights * (xcx * exog).sum(1)
+
+    @cache_readonly
+    def resid_studentized(self):
+        '''(cached attribute) standardized Pearson residuals
+
+        Pearson residuals divided by ``sqrt(scale * (1 - hii))``
+        '''
+        hii = self.hat_matrix_diag
+        resid_pearson = np.sqrt(self.weights) * self.resid_working
+        return resid_pearson / np.sqrt(self.scale * (1 - hii))
+
+    @cache_readonly
+    def cooks_distance(self):
+        '''(cached attribute) Cooks distance and p-values
+
+        based on standardized Pearson residuals and the one-step
+        approximation, no nobs loop
+        '''
+        hii = self.hat_matrix_diag
+        cooks_d2 = self.resid_studentized**2 / self.k_vars
+        cooks_d2 *= hii / (1 - hii)
+
+        from scipy import stats
+        pvals = stats.f.sf(cooks_d2, self.k_vars, self.results.df_resid)
+
+        return cooks_d2, pvals
+
+    @cache_readonly
+    def dffits_internal(self):
+        '''(cached attribute) dffits measure for influence of an observation
+
+        based on resid_studentized
+        '''
+        hii = self.hat_matrix_diag
+        dffits_ = self.resid_studentized * np.sqrt(hii / (1 - hii))
+        dffits_threshold = 2 * np.sqrt(self.k_vars * 1. / self.nobs)
+        return dffits_, dffits_threshold
+
+    @cache_readonly
+    def params_not_obsi(self):
+        '''(cached attribute) one-step parameter estimates for LOOO
+        '''
+        return self.results.params - self._get_dparams(0, self.nobs)
+
+    @cache_readonly
+    def dfbetas(self):
+        '''(cached attribute) dfbetas based on the one-step LOOO estimates
+        '''
+        return self._get_dfbetas(0, self.nobs)
+
+    def _get_dparams(self, start, stop):
+        '''change in parameters from dropping observations start to stop - 1
+        '''
+        hii = self.hat_matrix_diag[start:stop]
+        wresid = (self.weights[start:stop] * self.resid_working[start:stop] /
+                  (1 - hii))
+        xcx = np.dot(self.exog[start:stop], self.results.normalized_cov_params)
+        return xcx * wresid[:, None]
+
+    def _get_dfbetas(self, start, stop):
+        '''dfbetas for a block of observations start to stop - 1
+        '''
+        dfbetas = self._get_dparams(start, stop)
+        dfbetas /= np.sqrt(np.diag(self.results.cov_params()))
+        return dfbetas
+
+    def summary_frame(self):
+        """
+        Creates a DataFrame with all available influence results.
+
+        Returns
+        -------
+        frame : DataFrame
+            A DataFrame with all results.
+
+        Notes
+        -----
+        The resultant DataFrame contains four variables in addition to the
+        DFBETAS. These are:
+
+        * cooks_d : Cook's Distance defined in `cooks_distance`
+        * standard_resid : Standardized Pearson residuals defined in
+          `resid_studentized`
+        * hat_diag : The diagonal of the weighted hat matrix defined in
+          `hat_matrix_diag`
+        * dffits_internal : DFFITS statistics using standardized Pearson
+          residuals defined in `dffits_internal`
+        """
+        return self._summary_frame(0, self.nobs, self.dfbetas)
+
+    def summary_frame_chunks(self, chunksize=10000):
+        """
+        Iterate over the summary frame in blocks of observations.
+
+        Parameters
+        ----------
+        chunksize : int
+            Maximum number of observations, rows, in each block.
+
+        Yields
+        ------
+        frame : DataFrame
+            The rows of `summary_frame` for consecutive blocks of
+            observations.
+
+        See Also
+        --------
+        OLSInfluence.summary_frame_chunks
+        """
+        for start in range(0, self.nobs, chunksize):
+            stop = min(start + chunksize, self.nobs)
+            frame = self._summary_frame(start, stop,
+                                        self._get_dfbetas(start, stop))
+            if self.results.model.data.row_labels is None:
+                frame.index = np.arange(start, stop)
+            yield frame
+
+    def _summary_frame(self, start, stop, dfbetas):
+        from pandas import DataFrame
+
+        data = self.results.model.data
+        row_labels = data.row_labels
+        if row_labels is not None:
+            row_labels = row_labels[start:stop]
+        beta_labels = ['dfb_' + i for i in data.xnames]
+        idx = slice(start, stop)
+
+        summary_data = DataFrame(dict(
+                            cooks_d = self.cooks_distance[0][idx],
+                            standard_resid = self.resid_studentized[idx],
+                            hat_diag = self.hat_matrix_diag[idx],
+                            dffits_internal = self.dffits_internal[0][idx],
+                                        ),
+                            index = row_labels)
+        dfbeta = DataFrame(dfbetas, columns=beta_labels,
+                            index=row_labels)
+
+        return dfbeta.join(summary_data)
+
+
 def summary_table(res, alpha=0.05):
     '''generate summary table of outlier and influence similar to SAS
 
@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+"""Monte Carlo and permutation p-values with batched resampling
+
+The null distribution of a test statistic is simulated in batches. A
+sampler returns a batch of resampled data sets stacked along the first
+axis and the statistic is evaluated on the entire batch at once, so that
+there is no python loop over replications.
+
+Batches can be run on a process pool, and the simulation can stop early
+once the confidence interval for the p-value excludes the significance
+level.
+
+"""
+from __future__ import division
+from statsmodels.compat.python import range
+import numpy as np
+from scipy import stats
+
+
+class MCTestResults(object):
+    """Results of a Monte Carlo or permutation test
+
+    Attributes
+    ----------
+    statistic : float
+        observed value of the test statistic
+    pvalue : float
+        Monte Carlo p-value (n_extreme + 1) / (n_rep + 1)
+    pvalue_bounds : tuple
+        Clopper-Pearson confidence interval for the p-value that would be
+        obtained with an infinite number of replications
+    n_extreme : int
+        number of replications with a statistic at least as extreme as
+        the observed statistic
+    n_rep : int
+        number of replications that have been drawn
+    stopped_early : bool
+        True if the replications stopped before `n_rep` because the
+        confidence interval of the p-value excludes `alpha`
+    """
+
+    def __init__(self, **kwds):
+        self.__dict__.update(kwds)
+
+    def __repr__(self):
+        return "<MCTestResults statistic=%r, pvalue=%r, n_rep=%d>" % (
+            self.statistic, self.pvalue, self.n_rep)
+
+
+def _hypergeometric(random_state, ngood, nbad, nsample):
+    """vectorized hypergeometric draws that allow nsample equal to zero"""
+    ngood, nbad, nsample = np.broadcast_arrays(ngood, nbad, nsample)
+    empty = nsample == 0
+    # older numpy requires nsample >= 1
+    draws = random_state.hypergeometric(np.where(empty, 1, ngood),
+                                        np.where(empty, 0, nbad),
+                                        np.where(empty, 1, nsample))
+    draws[empty] = 0
+    return draws
+
+
+def random_tables(row_totals, col_totals, n, random_state=None):
+    """
+    Random contingency tables with given margins
+
+    The tables have the distribution of the cross tabulation of the row
+    and column labels after a random permutation of the column labels,
+    which is the null distribution of row and column independence
+    conditional on the margins.
+
+    Parameters
+    ----------
+    row_totals, col_totals : array_like
+        integer row and column totals, with equal sums
+    n : int
+        number of tables
+    random_state : None, int or RandomState
+        random number generator or seed
+
+    Returns
+    -------
+    tables : ndarray, (n, n_rows, n_cols)
+        integer tables
+
+    Notes
+    -----
+    The cells are drawn sequentially from hypergeometric distributions,
+    row by row, for all tables at once. The cost depends on the number of
+    cells and not on the number of observations.
+    """
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+    row_totals = np.asarray(row_totals, dtype=np.int64)
+    col_totals = np.asarray(col_totals, dtype=np.int64)
+    if row_totals.sum() != col_totals.sum():
+        raise ValueError("row and column totals must have the same sum")
+
+    k_rows, k_cols = len(row_totals), len(col_totals)
+    tables = np.zeros((n, k_rows, k_cols), dtype=np.int64)
+    col_left = np.tile(col_totals, (n, 1))
+    for i in range(k_rows - 1):
+        row_left = np.ones(n, dtype=np.int64) * row_totals[i]
+        pool = col_left.sum(1)
+        for j in range(k_cols - 1):
+            pool = pool - col_left[:, j]
+            draws = _hypergeometric(random_state, col_left[:, j], pool,
+                                    row_left)
+            tables[:, i, j] = draws
+            row_left -= draws
+        tables[:, i, -1] = row_left
+        col_left -= tables[:, i, :]
+    tables[:, -1, :] = col_left
+    return tables
+
+
+def _is_extreme(stat, observed, alternative):
+    # tolerance for statistics that are equal to the observed statistic
+    # up to floating point noise, e.g. for discrete distributions
+    tol = 1e-10 * max(abs(observed), 1)
+    if alternative == 'larger':
+        return stat >= observed - tol
+    else:
+        return stat <= observed + tol
+
+
+def _count_extreme(statistic, sampler, observed, n_rep, seed, alternative):
+    """number of extreme statistics in one batch of replications"""
+    random_state = np.random.RandomState(seed)
+    stat = np.asarray(statistic(sampler(n_rep, random_state)))
+    return _is_extreme(stat, observed, alternative).sum()
+
+
+def _binom_confint(count, nobs, alpha):
+    """Clopper-Pearson interval"""
+    lower = stats.beta.ppf(alpha / 2, count, nobs - count + 1) if count else 0.
+    if count < nobs:
+        upper = stats.beta.isf(alpha / 2, count + 1, nobs - count)
+    else:
+        upper = 1.
+    return lower, upper
+
+
+def mc_pvalue(statistic, sampler, observed, n_rep=9999, batch_size=1000,
+              alternative='larger', alpha=None, stop_conf=0.999, n_jobs=1,
+              random_state=None):
+    """
+    Monte Carlo or permutation p-value of a test statistic
+
+    Parameters
+    ----------
+    statistic : callable
+        ``statistic(samples)`` returns the 1-d array of statistics for a
+        batch of samples as returned by `sampler`
+    sampler : callable
+        ``sampler(n, random_state)`` returns a batch of `n` samples drawn
+        under the null hypothesis, stacked along the first axis
+    observed : float
+        observed value of the test statistic
+    n_rep : int
+        maximum number of replications
+    batch_size : int
+        number of replications that are drawn and evaluated at once
+    alternative : {'larger', 'smaller'}
+        the null hypothesis is rejected for large or small values of the
+        statistic
+    alpha : None or float
+        If not None, then the replications stop as soon as the confidence
+        interval for the p-value does not contain alpha.
+    stop_conf : float
+        confidence level of the interval used for early stopping
+    n_jobs : int
+        If larger than one, then batches are run on a pool of processes
+        using joblib. `statistic` and `sampler` need to be picklable, for
+        example module level functions or ``functools.partial`` of them.
+    random_state : None, int or RandomState
+        random number generator or seed. Each batch uses its own seed
+        drawn from it, so the results do not depend on `n_jobs`.
+
+    Returns
+    -------
+    res : MCTestResults
+
+    Notes
+    -----
+    The p-value includes the observed sample, (n_extreme + 1) /
+    (n_rep + 1), so that it is never zero and the test has the nominal
+    size. Statistics that are equal to the observed statistic within a
+    relative tolerance of 1e-10 count as extreme.
+
+    If early stopping is used, then the decision whether the p-value is
+    below alpha is the same as with an infinite number of replications
+    with probability of at least `stop_conf`.
+    """
+    if alternative not in ['larger', 'smaller']:
+        raise ValueError("alternative should be 'larger' or 'smaller'")
+    if not isinstance(random_state, np.random.RandomState):
+        random_state = np.random.RandomState(random_state)
+
+    n_batches = int(np.ceil(n_rep / batch_size))
+    sizes = [batch_size] * n_batches
+    sizes[-1] = n_rep - batch_size * (n_batches - 1)
+    seeds = random_state.randint(2**31 - 1, size=n_batches)
+
+    if n_jobs != 1:
+        from statsmodels.tools.parallel import parallel_func
+        parallel, p_func, n_jobs = parallel_func(_count_extreme, n_jobs,
+                                                 verbose=0)
+    # batches per round, early stopping is checked after each round
+    n_round = max(n_jobs, 1)
+
+    n_extreme, n_done = 0, 0
+    stopped_early = False
+    for start in range(0, n_batches, n_round):
+        args = [(statistic, sampler, observed, sizes[i], seeds[i],
+                 alternative) for i in range(start,
+                                             min(start + n_round, n_batches))]
+        if n_round > 1:
+            counts = parallel(p_func(*arg) for arg in args)
+        else:
+            counts = [_count_extreme(*arg) for arg in args]
+        n_extreme += sum(counts)
+        n_done += sum(arg[3] for arg in args)
+
+        if alpha is not None and n_done < n_rep:
+            lower, upper = _binom_confint(n_extreme, n_done, 1 - stop_conf)
+            if upper < alpha or lower > alpha:
+                stopped_early = True
+                break
+
+    pvalue = (n_extreme + 1.) / (n_done + 1.)
+    bounds = _binom_confint(n_extreme, n_done, 1 - stop_conf)
+    return MCTestResults(statistic=observed, pvalue=pvalue,
+                         pvalue_bounds=bounds, n_extreme=n_extreme,
+                         n_rep=n_done, stopped_early=stopped_early)
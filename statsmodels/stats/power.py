@@ -31,10 +31,11 @@ refactoring
 
 """
 from __future__ import print_function
-from statsmodels.compat.python import iteritems
+from statsmodels.compat.python import iteritems, string_types
 import numpy as np
 from scipy import stats, optimize
-from statsmodels.tools.rootfinding import brentq_expanding
+from statsmodels.tools.rootfinding import (brentq_expanding,
+                                           regula_falsi_expanding)
 
 def ttest_power(effect_size, nobs, alpha, df=None, alternative='two-sided'):
     '''Calculate power of a ttest
@@ -52,24 +53,33 @@ def ttest_power(effect_size, nobs, alpha, df=None, alternative='two-sided'):
                          "or 'smaller'")
 
     pow_ = 0
+    nc = d * np.sqrt(nobs)
     if alternative in ['two-sided', '2s', 'larger']:
         crit_upp = stats.t.isf(alpha_, df)
         #print crit_upp, df, d*np.sqrt(nobs)
         # use private methods, generic methods return nan with negative d
-        if np.any(np.isnan(crit_upp)):
-            # avoid endless loop, https://github.com/scipy/scipy/issues/2667
-            pow_ = np.nan
-        else:
-            pow_ = stats.nct._sf(crit_upp, df, d*np.sqrt(nobs))
+        pow_ = _nct_nan(stats.nct._sf, crit_upp, df, nc)
     if alternative in ['two-sided', '2s', 'smaller']:
         crit_low = stats.t.ppf(alpha_, df)
         #print crit_low, df, d*np.sqrt(nobs)
-        if np.any(np.isnan(crit_low)):
-            pow_ = np.nan
-        else:
-            pow_ += stats.nct._cdf(crit_low, df, d*np.sqrt(nobs))
+        pow_ += _nct_nan(stats.nct._cdf, crit_low, df, nc)
     return pow_
 
+def _nct_nan(method, crit, df, nc):
+    '''call a private method of nct, with nan where crit is nan
+
+    avoid endless loop, https://github.com/scipy/scipy/issues/2667
+    '''
+    is_nan = np.isnan(crit)
+    if not np.any(is_nan):
+        return method(crit, df, nc)
+    elif np.all(is_nan):
+        return np.nan
+    crit, df, nc = np.broadcast_arrays(crit, df, nc)
+    res = method(np.where(is_nan, 0, crit), np.where(is_nan, 1, df),
+                 np.where(is_nan, 0, nc))
+    return np.where(is_nan, np.nan, res)
+
 def normal_power(effect_size, nobs, alpha, alternative='two-sided', sigma=1.):
     '''Calculate power of a normal distributed test statistic
 
@@ -183,6 +193,11 @@ class Power(object):
     def power(self, *args, **kwds):
         raise NotImplementedError
 
+    # Upper limit for the expanding bracket of the vectorized root finder.
+    # The distributions are very slow or do not return for extremely large
+    # degrees of freedom or noncentrality, e.g. ncf.sf for df ~ 1e12.
+    max_upp_vectorized = 1e10
+
     def _power_identity(self, *args, **kwds):
         power_ = kwds.pop('power')
         return self.power(*args, **kwds) - power_
@@ -195,6 +210,12 @@ class Power(object):
 
         exactly one needs to be ``None``, all others need numeric values
 
+        The numeric values can be arrays. In this case they are broadcast
+        against each other and the equation is solved for all elements
+        together with a vectorized root finder,
+        `statsmodels.tools.rootfinding.regula_falsi_expanding`. The result
+        has the broadcast shape and is nan for elements that did not converge.
+
         *attaches*
 
         cache_fit_res : list
@@ -202,7 +223,9 @@ class Power(object):
             call to ``solve_power``, mainly for debugging purposes.
             The first element is the success indicator, one if successful.
             The remaining elements contain the return information of the up to
-            three solvers that have been tried.
+            three solvers that have been tried. For array arguments, the second
+            element is a dictionary with the convergence indicator of each
+            element and the number of iterations.
 
 
         '''
@@ -219,6 +242,9 @@ class Power(object):
             del kwds['power']
             return self.power(**kwds)
 
+        if any(np.ndim(v) > 0 for v in kwds.values()):
+            return self._solve_power_vectorized(key, kwds)
+
         self._counter = 0
         def func(x):
             kwds[key] = x
@@ -284,6 +310,102 @@ class Power(object):
         self.cache_fit_res = fit_res
         return val
 
+    def _solve_power_vectorized(self, key, kwds, bounds=None):
+        '''solve for `key` for all elements of broadcast array arguments
+
+        The bounds, a dict with ``low`` and ``upp`` or ``start_upp`` that
+        can be arrays, default to those in ``start_bqexp``. Without an upper
+        bound, it is found by expanding from ``start_upp`` up to
+        ``max_upp_vectorized``, elements without a root below it are nan.
+        For ``alternative='smaller'`` the effect size is negative and the
+        bracket is mirrored to negative values.
+        '''
+        if bounds is None:
+            bounds = dict(low=1e-8, start_upp=1.)
+            bounds.update(self.start_bqexp[key])
+        # solve for -effect_size, the bracket only expands upwards
+        sign = 1.
+        if key == 'effect_size' and kwds.get('alternative') == 'smaller':
+            sign = -1.
+
+        names = [k for k, v in iteritems(kwds)
+                 if v is not None and not isinstance(v, string_types)]
+        fixed = dict((k, v) for k, v in iteritems(kwds)
+                     if k != key and k not in names)
+
+        def func(x, *args):
+            kwds_ = dict(zip(names, args))
+            kwds_.update(fixed)
+            kwds_[key] = sign * x
+            return self._power_identity(**kwds_)
+
+        args = [np.asarray(kwds[k], dtype=np.float64) for k in names]
+        val, converged, n_iter = regula_falsi_expanding(
+                            func, bounds['low'], upp=bounds.get('upp'),
+                            start_upp=bounds.get('start_upp'), args=args,
+                            max_upp=self.max_upp_vectorized)
+
+        success = int(converged.all())
+        if not success:
+            import warnings
+            from statsmodels.tools.sm_exceptions import (ConvergenceWarning,
+                convergence_doc)
+            warnings.warn(convergence_doc, ConvergenceWarning)
+        val[~converged] = np.nan
+        val *= sign
+
+        self.cache_fit_res = [success, dict(converged=converged,
+                                            iterations=n_iter)]
+        return val
+
+    def solve_power_interpolator(self, grid_var, grid, **kwds):
+        '''precompute solve_power on a grid for fast repeated solving
+
+        Parameters
+        ----------
+        grid_var : string
+            name of the argument of ``solve_power`` that varies in later
+            calls, for example ``'effect_size'``.
+        grid : array_like
+            values of ``grid_var`` at which the equation is solved. Values
+            outside of the range of the grid are not extrapolated.
+        kwds : keywords
+            the remaining keywords of ``solve_power``, exactly one needs to
+            be ``None``. They need to be scalars.
+
+        Returns
+        -------
+        solve : callable
+            ``solve(x)`` returns the interpolated solution at the values
+            ``x`` of ``grid_var``, nan outside of the grid.
+
+        Notes
+        -----
+        The equation is solved once for all grid points with the vectorized
+        root finder, later calls only interpolate. The interpolation is
+        linear in the logarithms if the grid and all solutions are positive,
+        which is close to exact for sample sizes as a function of the effect
+        size, otherwise it is linear.
+        '''
+        grid = np.sort(np.asarray(grid, dtype=np.float64))
+        kwds[grid_var] = grid
+        values = np.asarray(self.solve_power(**kwds))
+        mask = np.isfinite(values)
+        grid, values = grid[mask], values[mask]
+        use_log = (grid > 0).all() and (values > 0).all()
+        if use_log:
+            grid, values = np.log(grid), np.log(values)
+
+        def solve(x):
+            x = np.asarray(x, dtype=np.float64)
+            if use_log:
+                with np.errstate(invalid='ignore', divide='ignore'):
+                    return np.exp(np.interp(np.log(x), grid, values,
+                                            left=np.nan, right=np.nan))
+            return np.interp(x, grid, values, left=np.nan, right=np.nan)
+
+        return solve
+
     def plot_power(self, dep_var='nobs', nobs=None, effect_size=None,
                    alpha=0.05, ax=None, title=None, plt_kwds=None, **kwds):
         '''plot power with number of observations or effect size on x-axis
@@ -471,6 +593,9 @@ class TTestPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         # for debugging
         #print 'calling ttest solve with', (effect_size, nobs, alpha, power, alternative)
@@ -587,6 +712,9 @@ class TTestIndPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         return super(TTestIndPower, self).solve_power(effect_size=effect_size,
                                                       nobs1=nobs1,
@@ -646,7 +774,12 @@ class NormalIndPower(Power):
         ddof = self.ddof  # for correlation, ddof=3
 
         # get effective nobs, factor for std of test statistic
-        if ratio > 0:
+        if np.ndim(ratio) > 0:
+            nobs2 = nobs1*ratio
+            with np.errstate(divide='ignore'):
+                nobs = 1./ (1. / (nobs1 - ddof) + 1. / (nobs2 - ddof))
+            nobs = np.where(ratio > 0, nobs, nobs1 - ddof)
+        elif ratio > 0:
             nobs2 = nobs1*ratio
             #equivalent to nobs = n1*n2/(n1+n2)=n1*ratio/(1+ratio)
             nobs = 1./ (1. / (nobs1 - ddof) + 1. / (nobs2 - ddof))
@@ -710,6 +843,9 @@ class NormalIndPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         return super(NormalIndPower, self).solve_power(effect_size=effect_size,
                                                       nobs1=nobs1,
@@ -812,6 +948,9 @@ class FTestPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         return super(FTestPower, self).solve_power(effect_size=effect_size,
                                                       df_num=df_num,
@@ -893,13 +1032,29 @@ class FTestAnovaPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         # update start values for root finding
-        if not k_groups is None:
-            self.start_ttp['nobs'] = k_groups * 10
-            self.start_bqexp['nobs'] = dict(low=k_groups * 2,
-                                            start_upp=k_groups * 10)
+        if k_groups is not None:
+            k_groups = np.asarray(k_groups)
+            bounds_nobs = dict(low=k_groups * 2, start_upp=k_groups * 10)
+            if k_groups.ndim == 0:
+                self.start_ttp['nobs'] = k_groups * 10
+                self.start_bqexp['nobs'] = bounds_nobs
         # first attempt at special casing
+        kwds = dict(effect_size=effect_size, nobs=nobs, alpha=alpha,
+                    k_groups=k_groups, power=power)
+        if any(np.ndim(v) > 0 for v in kwds.values()):
+            # array brackets are used locally and not stored in start_bqexp
+            if effect_size is None:
+                return self._solve_power_vectorized(
+                            'effect_size', kwds,
+                            bounds=dict(low=1e-8, upp=1 - 1e-8))
+            if nobs is None and k_groups is not None:
+                return self._solve_power_vectorized('nobs', kwds,
+                                                    bounds=bounds_nobs)
         if effect_size is None:
             return self._solve_effect_size(effect_size=effect_size,
                                            nobs=nobs,
@@ -1012,6 +1167,9 @@ class GofChisquarePower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         return super(GofChisquarePower, self).solve_power(effect_size=effect_size,
                                                       nobs=nobs,
@@ -1122,6 +1280,9 @@ class _GofChisquareIndPower(Power):
         ``brentq`` with fixed bounds is used. However, there can still be cases
         where this fails.
 
+        Array arguments are broadcast and solved together, see
+        `Power.solve_power`.
+
         '''
         return super(_GofChisquareIndPower, self).solve_power(effect_size=effect_size,
                                                       nobs1=nobs1,
@@ -101,7 +101,7 @@ for inference with clustered errors,” The Review of Economics and
 Statistics 90, no. 3 (2008): 414–427.
 
 """
-from statsmodels.compat.python import range
+from statsmodels.compat.python import range, string_types
 import pandas as pd
 import numpy as np
 
@@ -111,7 +111,9 @@ from statsmodels.stats.moment_helpers import se_cov
 __all__ = ['cov_cluster', 'cov_cluster_2groups', 'cov_hac', 'cov_nw_panel',
            'cov_white_simple',
            'cov_hc0', 'cov_hc1', 'cov_hc2', 'cov_hc3',
-           'se_cov', 'weights_bartlett', 'weights_uniform']
+           'se_cov', 'weights_bartlett', 'weights_uniform',
+           'weights_parzen', 'weights_quadratic_spectral',
+           'bandwidth_newey_west', 'cov_cluster_nway']
 
 
 
@@ -315,8 +317,8 @@ def _HCCM2(hessian_inv, scale):
     H = np.dot(np.dot(xxi, scale), xxi.T)
     return H
 
-#TODO: other kernels, move ?
-def weights_bartlett(nlags):
+#TODO: move kernels ?
+def weights_bartlett(nlags, bandwidth=None):
     '''Bartlett weights for HAC
 
     this will be moved to another module
@@ -325,6 +327,9 @@ def weights_bartlett(nlags):
     ----------
     nlags : int
        highest lag in the kernel window, this does not include the zero lag
+    bandwidth : float or None
+       bandwidth of the kernel, the weight of lag j is ``1 - j / bandwidth``.
+       If None, then ``bandwidth = nlags + 1``.
 
     Returns
     -------
@@ -334,7 +339,9 @@ def weights_bartlett(nlags):
     '''
 
     #with lag zero
-    return 1 - np.arange(nlags+1)/(nlags+1.)
+    if bandwidth is None:
+        bandwidth = nlags + 1.
+    return np.maximum(1 - np.arange(nlags+1) / float(bandwidth), 0)
 
 def weights_uniform(nlags):
     '''uniform weights for HAC
@@ -356,6 +363,221 @@ def weights_uniform(nlags):
     #with lag zero
     return np.ones(nlags+1)
 
+def weights_parzen(nlags, bandwidth=None):
+    '''Parzen weights for HAC
+
+    Parameters
+    ----------
+    nlags : int
+       highest lag in the kernel window, this does not include the zero lag
+    bandwidth : float or None
+       bandwidth of the kernel, lags at or beyond the bandwidth have zero
+       weight. If None, then ``bandwidth = nlags + 1``.
+
+    Returns
+    -------
+    kernel : ndarray, (nlags+1,)
+        weights for Parzen kernel
+
+    '''
+    if bandwidth is None:
+        bandwidth = nlags + 1.
+    z = np.arange(nlags+1) / float(bandwidth)
+    return np.where(z <= 0.5, 1 - 6 * z**2 + 6 * z**3,
+                    2 * np.maximum(1 - z, 0)**3)
+
+def weights_quadratic_spectral(nlags, bandwidth=None):
+    '''Quadratic spectral weights for HAC
+
+    Parameters
+    ----------
+    nlags : int
+       highest lag in the kernel window, this does not include the zero lag
+    bandwidth : float or None
+       bandwidth of the kernel. If None, then ``bandwidth = nlags + 1``.
+
+    Returns
+    -------
+    kernel : ndarray, (nlags+1,)
+        weights for quadratic spectral kernel
+
+    Notes
+    -----
+    The quadratic spectral kernel does not have a bounded support, all lags
+    up to `nlags` receive non-zero weight. The estimator of Andrews (1991)
+    uses all available lags, ``nlags = nobs - 1``, which is cheap with the
+    FFT based computation of the lagged sums. This is what is used with
+    automatic bandwidth selection, ``nlags='auto'``.
+
+    References
+    ----------
+    Andrews, Donald W. K. 1991. "Heteroskedasticity and Autocorrelation
+    Consistent Covariance Matrix Estimation." Econometrica 59 (3): 817-58.
+
+    '''
+    if bandwidth is None:
+        bandwidth = nlags + 1.
+    z = 6 * np.pi / 5 * np.arange(1, nlags+1) / float(bandwidth)
+    w = 3 / z**2 * (np.sin(z) / z - np.cos(z))
+    return np.concatenate(([1.], w))
+
+kernel_dict = {'bartlett': weights_bartlett,
+               'uniform': weights_uniform,
+               'parzen': weights_parzen,
+               'qs': weights_quadratic_spectral,
+               'quadratic_spectral': weights_quadratic_spectral}
+
+# characteristic exponent q and constant c_gamma of Newey, West (1994)
+# and the exponent of the rule for the lag truncation of the pilot estimate
+_bandwidth_constants = {weights_bartlett: (1, 1.1447, 2. / 9),
+                        weights_parzen: (2, 2.6614, 4. / 25),
+                        weights_quadratic_spectral: (2, 1.3221, 2. / 25)}
+
+
+def bandwidth_newey_west(x, kernel=weights_bartlett, weights=None):
+    '''automatic bandwidth selection of Newey and West (1994)
+
+    Parameters
+    ----------
+    x : ndarray (nobs,) or (nobs, k_var)
+        data, for HAC this is array of x_i * u_i
+    kernel : callable or str
+        kernel weights function, one of `weights_bartlett`, `weights_parzen`
+        and `weights_quadratic_spectral`, or the corresponding key in
+        `kernel_dict`.
+    weights : None or ndarray (k_var,)
+        weights to combine the columns of `x` into a single series that
+        is used to estimate the optimal bandwidth. Default is equal weights.
+        The weight of a column corresponding to a constant can be set to zero
+        as suggested by Newey and West.
+
+    Returns
+    -------
+    bandwidth : float
+        estimated optimal bandwidth, the kernel weight of lag j is
+        ``k(j / bandwidth)``
+
+    References
+    ----------
+    Newey, Whitney K., and Kenneth D. West. 1994. "Automatic Lag Selection in
+    Covariance Matrix Estimation." The Review of Economic Studies 61 (4):
+    631-53.
+
+    '''
+    if isinstance(kernel, string_types):
+        kernel = kernel_dict[kernel.lower()]
+    if kernel not in _bandwidth_constants:
+        raise ValueError('automatic bandwidth is only available for the '
+                         'Bartlett, Parzen and quadratic spectral kernels')
+    q, c_gamma, expon = _bandwidth_constants[kernel]
+
+    x = np.asarray(x)
+    if x.ndim == 1:
+        x = x[:, None]
+    nobs = x.shape[0]
+    if weights is None:
+        weights = np.ones(x.shape[1])
+    h = np.dot(x, weights)
+    # pilot estimate with truncated lags
+    n_pilot = min(int(np.floor(4 * (nobs / 100.)**expon)), nobs - 1)
+    sigma = np.array([np.dot(h[j:], h[:nobs-j]) for j in range(n_pilot+1)])
+    sigma /= nobs
+    lags = np.arange(1, n_pilot+1)
+    s0 = sigma[0] + 2 * sigma[1:].sum()
+    sq = 2 * (lags**q * sigma[1:]).sum()
+    gamma = c_gamma * ((sq / s0)**2)**(1. / (2 * q + 1))
+    return gamma * nobs**(1. / (2 * q + 1))
+
+
+def _auto_weights(x, weights_func):
+    '''kernel weights with Newey-West automatic bandwidth
+    '''
+    if isinstance(weights_func, string_types):
+        weights_func = kernel_dict[weights_func.lower()]
+    nobs = x.shape[0]
+    bw = bandwidth_newey_west(x, kernel=weights_func)
+    if weights_func is weights_quadratic_spectral:
+        nlags = nobs - 1
+    else:
+        # lags at or beyond the bandwidth have zero weight
+        nlags = max(min(int(np.ceil(bw)) - 1, nobs - 1), 0)
+    return weights_func(nlags, bandwidth=bw)
+
+
+def _next_fast_len(n):
+    '''smallest 5-smooth number that is larger or equal to n
+    '''
+    try:
+        from scipy.fftpack import next_fast_len
+        return next_fast_len(n)
+    except ImportError:
+        return 2**int(np.ceil(np.log2(n)))
+
+
+def _lagged_sums_fft(x, weights, groupidx=None, blocksize=None):
+    '''kernel weighted sum of lagged cross products using FFT convolution
+
+    This computes ``x' W x`` where W is the banded Toeplitz matrix with
+    ``W[t, s] = weights[|t - s|]``, which is the same as
+    ``sum_j weights[j] * (x[j:]' x[:-j] + x[:-j]' x[j:])`` for lags 1 to
+    nlags plus the zero lag term. The convolution ``W x`` is computed with
+    FFT column block by column block, so that the computational cost does
+    not depend on the number of lags.
+
+    If groupidx is not None, then the groups are placed into a zero padded
+    series with gaps of nlags, so that no cross products across groups
+    are included.
+    '''
+    nobs, k_vars = x.shape
+    nlags = len(weights) - 1
+    if groupidx is None:
+        n_series = nobs
+        idx = None
+    else:
+        # position of observations in the zero padded series
+        idx = np.empty(nobs, dtype=np.intp)
+        offset = 0
+        for l, u in groupidx:
+            idx[l:u] = np.arange(l, u) + offset
+            offset += nlags
+        n_series = nobs + offset
+
+    kern = np.concatenate((weights[:0:-1], weights))
+    nfft = _next_fast_len(n_series + 2 * nlags)
+    kern_fft = np.fft.rfft(kern, nfft)[:, None]
+    if blocksize is None:
+        # limit the size of the temporary arrays to about 64MB
+        blocksize = max(1, int(2**22 // nfft))
+
+    S = np.empty((k_vars, k_vars))
+    for start in range(0, k_vars, blocksize):
+        xb = x[:, start:start+blocksize]
+        if idx is not None:
+            xb_ = np.zeros((n_series, xb.shape[1]))
+            xb_[idx] = xb
+        else:
+            xb_ = xb
+        conv = np.fft.irfft(np.fft.rfft(xb_, nfft, axis=0) * kern_fft, nfft,
+                            axis=0)
+        conv = conv[nlags:nlags + n_series]
+        if idx is not None:
+            conv = conv[idx]
+        S[:, start:start+blocksize] = np.dot(x.T, conv)
+
+    return (S + S.T) / 2.
+
+
+def _use_fft(nobs, k_vars, nlags):
+    '''heuristic whether FFT is cheaper than the loop over lags
+
+    The loop costs about nlags * k_vars**2 operations per observation, the
+    FFT approach about k_vars**2 + 20 * k_vars * log2(nobs)
+    '''
+    if nlags < 2:
+        return False
+    return nlags - 1 > 20 * np.log2(nobs + 2 * nlags) / k_vars
+
+
 def S_hac_simple(x, nlags=None, weights_func=weights_bartlett):
     '''inner covariance matrix for HAC (Newey, West) sandwich
 
@@ -367,12 +589,14 @@ def S_hac_simple(x, nlags=None, weights_func=weights_bartlett):
     ----------
     x : ndarray (nobs,) or (nobs, k_var)
         data, for HAC this is array of x_i * u_i
-    nlags : int or None
+    nlags : int, 'auto' or None
         highest lag to include in kernel window. If None, then
-        nlags = floor(4(T/100)^(2/9)) is used.
-    weights_func : callable
+        nlags = floor(4(T/100)^(2/9)) is used. If nlags is 'auto', then the
+        bandwidth is selected with `bandwidth_newey_west`.
+    weights_func : callable or str
         weights_func is called with nlags as argument to get the kernel
-        weights. default are Bartlett weights
+        weights. default are Bartlett weights. Strings are looked up in
+        `kernel_dict`.
 
     Returns
     -------
@@ -383,17 +607,30 @@ def S_hac_simple(x, nlags=None, weights_func=weights_bartlett):
     -----
     used by cov_hac_simple
 
-    options might change when other kernels besides Bartlett are available.
+    If the number of lags is large relative to the number of columns of x,
+    then the kernel weighted sum over all lags is computed by FFT
+    convolution, which has a cost that does not increase with nlags.
 
     '''
 
     if x.ndim == 1:
         x = x[:,None]
+    if isinstance(weights_func, string_types):
+        weights_func = kernel_dict[weights_func.lower()]
     n_periods = x.shape[0]
     if nlags is None:
         nlags = int(np.floor(4 * (n_periods / 100.)**(2./9.)))
 
-    weights = weights_func(nlags)
+    if isinstance(nlags, string_types) and nlags == 'auto':
+        weights = _auto_weights(x, weights_func)
+    else:
+        weights = weights_func(nlags)
+    # lags beyond the length of the series do not contribute
+    weights = weights[:n_periods]
+    nlags = len(weights) - 1
+
+    if _use_fft(n_periods, x.shape[1], nlags):
+        return _lagged_sums_fft(x, weights)
 
     S = weights[0] * np.dot(x.T, x)  #weights[0] just for completeness, is 1
 
@@ -620,6 +857,177 @@ def cov_cluster_2groups(results, group, group2=None, use_correction=True):
     return cov_both, cov0, cov1
 
 
+def _get_group_cache(results):
+    '''dictionary attached to the model for caching factorized groups
+    '''
+    model = getattr(results, 'model', None)
+    if model is None:
+        return None
+    cache = getattr(model, '_group_codes_cache', None)
+    if cache is None:
+        cache = {}
+        try:
+            model._group_codes_cache = cache
+        except AttributeError:
+            return None
+    return cache
+
+
+def _factorize_group(group, cache=None):
+    '''integer codes for group labels
+
+    Parameters
+    ----------
+    group : array_like, 1-D
+        group labels, any type that pandas can factorize
+    cache : None or dict
+        If a dict is given, then the codes are stored in and retrieved from
+        it, keyed by the content of `group`.
+
+    Returns
+    -------
+    codes : ndarray of int
+        codes in range(n_groups), in order of first appearance of labels
+    n_groups : int
+        number of distinct groups
+    key : hashable or None
+        key of `group` in the cache, None if it is not cached. Object
+        arrays are not cached.
+
+    '''
+    group = np.asarray(group)
+    if group.ndim != 1:
+        raise ValueError('group needs to be 1-D')
+    key = None
+    if cache is not None and group.dtype != np.object_:
+        group = np.ascontiguousarray(group)
+        key = ('group', group.dtype.str, group.shape[0],
+               hash(group.tobytes()))
+        if key in cache:
+            group_, codes, n_groups = cache[key]
+            # guard against hash collisions
+            if np.array_equal(group_, group):
+                return codes, n_groups, key
+    codes, uniques = pd.factorize(group)
+    if len(codes) and codes.min() < 0:
+        raise ValueError('groups contain missing values')
+    n_groups = len(uniques)
+    if key is not None:
+        cache[key] = (group.copy(), codes, n_groups)
+    return codes, n_groups, key
+
+
+def _intersect_codes(codes0, n_groups0, codes1, n_groups1):
+    '''codes of the intersection of two factorized groups
+    '''
+    codes = codes0.astype(np.int64) * n_groups1 + codes1
+    codes, uniques = pd.factorize(codes)
+    return codes, len(uniques)
+
+
+def _S_cluster_codes(x, codes, n_groups):
+    '''inner covariance matrix for cluster sums using bincount on codes
+    '''
+    x_group_sums = np.column_stack([np.bincount(codes, weights=x[:, col],
+                                                minlength=n_groups)
+                                    for col in range(x.shape[1])])
+    return np.dot(x_group_sums.T, x_group_sums)
+
+
+def cov_cluster_nway(results, groups, use_correction=True):
+    '''multiway cluster robust covariance matrix
+
+    Parameters
+    ----------
+    results : result instance
+       result of a regression, uses results.model.exog and results.resid
+       TODO: this should use wexog instead
+    groups : array_like, (nobs,) or (nobs, n_dims), or list of arrays
+       group labels for each clustering dimension. Labels can be of any
+       type that can be factorized by pandas.
+    use_correction : bool
+       If true (default), then the small sample correction factor is used
+       for each term, using the number of clusters of that term.
+
+    Returns
+    -------
+    cov : ndarray, (k_vars, k_vars)
+        cluster robust covariance matrix for parameter estimates
+
+    Notes
+    -----
+    This uses the inclusion-exclusion formula of Cameron, Gelbach and Miller
+    (2011). The covariance is the sum over all non-empty subsets of the
+    clustering dimensions of the one-way cluster covariance with clusters
+    defined by the intersection of the dimensions in the subset, with
+    positive sign for odd and negative sign for even subset sizes. For
+    one dimension this is the same as `cov_cluster`, for two dimensions the
+    same as the first return of `cov_cluster_2groups`.
+
+    Group sums are computed with `np.bincount` on integer codes, which
+    requires memory of order n_groups * k_vars. The integer codes of each
+    clustering dimension and of their intersections are cached on the
+    model, so that repeated calls with the same or overlapping cluster
+    variables do not factorize the groups again.
+
+    The multiway cluster covariance is not guaranteed to be positive
+    semi-definite.
+
+    '''
+    from itertools import combinations
+
+    xu, hessian_inv = _get_sandwich_arrays(results, cov_type='clu')
+    nobs, k_params = xu.shape
+
+    if isinstance(groups, (list, tuple)):
+        groups = [np.asarray(g) for g in groups]
+    else:
+        groups = np.asarray(groups)
+        if groups.ndim == 1:
+            groups = [groups]
+        else:
+            groups = [groups[:, i] for i in range(groups.shape[1])]
+    n_dims = len(groups)
+
+    cache = _get_group_cache(results)
+    factors = {}
+    for i, g in enumerate(groups):
+        codes, n_groups, key = _factorize_group(g, cache=cache)
+        factors[(i,)] = (codes, n_groups, key)
+
+    cov = np.zeros((k_params, k_params))
+    for r in range(1, n_dims + 1):
+        for subset in combinations(range(n_dims), r):
+            if subset not in factors:
+                codes0, n_groups0, key0 = factors[subset[:-1]]
+                codes1, n_groups1, key1 = factors[subset[-1:]]
+                if key0 is not None and key1 is not None:
+                    key = ('intersection', key0, key1)
+                else:
+                    key = None
+                if cache is not None and key in cache:
+                    codes, n_groups = cache[key]
+                else:
+                    codes, n_groups = _intersect_codes(codes0, n_groups0,
+                                                       codes1, n_groups1)
+                    if key is not None:
+                        cache[key] = (codes, n_groups)
+                factors[subset] = (codes, n_groups, key)
+            codes, n_groups = factors[subset][:2]
+
+            scale = _S_cluster_codes(xu, codes, n_groups)
+            cov_r = _HCCM2(hessian_inv, scale)
+            if use_correction:
+                cov_r *= (n_groups / (n_groups - 1.) *
+                          ((nobs-1.) / float(nobs - k_params)))
+            if r % 2 == 1:
+                cov += cov_r
+            else:
+                cov -= cov_r
+
+    return cov
+
+
 def cov_white_simple(results, use_correction=True):
     '''
     heteroscedasticity robust covariance matrix (White)
@@ -674,12 +1082,15 @@ def cov_hac_simple(results, nlags=None, weights_func=weights_bartlett,
     results : result instance
        result of a regression, uses results.model.exog and results.resid
        TODO: this should use wexog instead
-    nlags : int or None
+    nlags : int, 'auto' or None
         highest lag to include in kernel window. If None, then
-        nlags = floor[4(T/100)^(2/9)] is used.
-    weights_func : callable
+        nlags = floor[4(T/100)^(2/9)] is used. If 'auto', then the bandwidth
+        is chosen by the method of Newey and West (1994), see
+        `bandwidth_newey_west`.
+    weights_func : callable or str
         weights_func is called with nlags as argument to get the kernel
-        weights. default are Bartlett weights
+        weights. default are Bartlett weights. Available kernels are in
+        `kernel_dict`.
 
     Returns
     -------
@@ -691,8 +1102,6 @@ def cov_hac_simple(results, nlags=None, weights_func=weights_bartlett,
     verified only for nlags=0, which is just White
     just guessing on correction factor, need reference
 
-    options might change when other kernels besides Bartlett are available.
-
     '''
     xu, hessian_inv = _get_sandwich_arrays(results)
     sigma = S_hac_simple(xu, nlags=nlags, weights_func=weights_func)
@@ -739,8 +1148,21 @@ def S_nw_panel(xw, weights, groupidx):
     no denominator nobs used
 
     no reference for this, just accounting for time indices
+
+    If the number of lags is large relative to the number of columns, then
+    the lagged sums are computed by FFT convolution, where groups are
+    separated by zero padding.
     '''
     nlags = len(weights)-1
+    weights = np.asarray(weights, dtype=float)
+    if xw.ndim == 1:
+        xw = xw[:, None]
+    nobs = xw.shape[0]
+    if nlags > 0 and _use_fft(nobs, xw.shape[1], nlags):
+        maxlen = max(u - l for l, u in groupidx)
+        if maxlen <= nlags:
+            raise ValueError('all groups are empty taking lags')
+        return _lagged_sums_fft(xw, weights, groupidx=groupidx)
 
     S = weights[0] * np.dot(xw.T, xw)  #weights just for completeness
     for lag in range(1, nlags+1):
@@ -799,6 +1221,8 @@ def cov_nw_panel(results, nlags, groupidx, weights_func=weights_bartlett,
     available.
 
     '''
+    if isinstance(weights_func, string_types):
+        weights_func = kernel_dict[weights_func.lower()]
     if nlags == 0: #so we can reproduce HC0 White
         weights = [1, 0]  #to avoid the scalar check in hac_nw
     else:
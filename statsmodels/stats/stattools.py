@@ -419,6 +419,259 @@ def _medcouple_1d(y):
     return np.median(spread / standardization)
 
 
+def _searchsorted_rows(a, v):
+    """
+    np.searchsorted(a[i], v[i]) for all rows i, with rows of `a` sorted
+
+    Complex numbers are ordered lexicographically. With the row number as
+    real and the value as imaginary part the flattened keys of `a` are
+    sorted, so a single searchsorted call handles all rows.
+    """
+    if a.shape[0] == 1:
+        return np.searchsorted(a[0], v[0])[None, :]
+
+    def row_keys(x):
+        keys = np.empty(x.shape, np.complex128)
+        keys.real = np.arange(x.shape[0])[:, None]
+        keys.imag = x
+        return keys.ravel()
+
+    idx = np.searchsorted(row_keys(a), row_keys(v))
+    return idx.reshape(v.shape) - a.shape[1] * np.arange(a.shape[0])[:, None]
+
+
+def _ratio_threshold(s, z, strict=False):
+    """
+    Smallest x with x / z >= s, or x / z > s if strict, in floating point
+
+    Counting ``u / z < s`` by comparing ``u`` with ``s * z`` is not exact
+    because of rounding. Division is monotonic in the numerator, so moving
+    ``s * z`` by a few ulps gives a threshold that is consistent with the
+    ratios that are computed directly. If ``s * z`` is not finite, then the
+    threshold is inf.
+    """
+    compare = np.greater if strict else np.greater_equal
+    with np.errstate(over='ignore'):
+        t = s * z
+    is_finite = np.isfinite(t)
+    # non-finite thresholds are inf, the loops leave them unchanged
+    t = np.where(is_finite, t, np.inf)
+    z = np.where(is_finite, z, 1.)
+    while True:
+        t_down = np.where(is_finite, np.nextafter(t, 0), 0)
+        down = is_finite & (t > 0) & compare(t_down / z, s)
+        if not down.any():
+            break
+        t = np.where(down, t_down, t)
+    while True:
+        up = is_finite & ~compare(t / z, s)
+        if not up.any():
+            break
+        t = np.where(up, np.nextafter(t, np.inf), t)
+    return t
+
+
+def _count_ratios(u, z, s, strict=False):
+    """
+    Number of ratios u[j] / z[i] that are less than, or not larger than if
+    strict, `s` in each row i of `z`. Rows with z == 0 are padding.
+    """
+    is_pos = z > 0
+    z = np.where(is_pos, z, 1.)
+    t = _ratio_threshold(s[:, None], z, strict=strict)
+    t = np.where(is_pos, t, 0)
+    return _searchsorted_rows(u, t)
+
+
+def _select_ratio(u, z, k):
+    """
+    Indices (i, j) of the k-th smallest ratio u[j] / z[i] in each row
+
+    Parameters
+    ----------
+    u : ndarray, 2-d
+        Positive values sorted in each row, padded with inf at the end.
+    z : ndarray, 2-d
+        Positive values, padded with zeros.
+    k : ndarray, 1-d
+        Rank, starting at 0, of the ratio in each row. If it is out of range,
+        then the returned indices for that row are 0.
+
+    Notes
+    -----
+    The ratios form a matrix, implicit in each row, that is sorted along
+    both of its dimensions. This is the selection algorithm of Johnson and
+    Mizoguchi as used for the medcouple by Brys et al. The candidates of
+    each row of the matrix are given by a range of columns. In each
+    iteration the candidates are split at the weighted median of the
+    middle candidates of all rows, which removes at least a quarter of
+    them. Once the number of candidates is not larger than the number of
+    observations they are selected from directly.
+    """
+    m, p = z.shape
+    n_max = max(u.shape[1] + p, 1)
+    rows = np.arange(m)
+    is_pos = z > 0
+    n_u = np.isfinite(u).sum(1)
+    lo = np.zeros((m, p), np.int64)
+    hi = np.where(is_pos, n_u[:, None], 0)
+    done = (k < 0) | (k >= hi.sum(1))
+    idx_i = np.zeros(m, np.int64)
+    idx_j = np.zeros(m, np.int64)
+    z_safe = np.where(is_pos, z, 1.)
+
+    while True:
+        active = ~done & ((hi - lo).sum(1) > n_max)
+        if not active.any():
+            break
+
+        # only rows of the implicit matrices that still have candidates
+        w = np.where(active[:, None], hi - lo, 0)
+        cols = np.flatnonzero((w > 0).any(0))
+        w = w[:, cols]
+        lo_c, hi_c = lo[:, cols], hi[:, cols]
+        z_c = z[:, cols]
+
+        mid = np.minimum((lo_c + hi_c) // 2, u.shape[1] - 1)
+        mid_val = u[rows[:, None], mid] / z_safe[:, cols]
+        mid_val[w == 0] = np.inf
+        order = np.argsort(mid_val, axis=1)
+        cw = np.cumsum(w[rows[:, None], order], axis=1)
+        piv = order[rows, np.argmax(2 * cw >= cw[:, -1:], axis=1)]
+        piv_i = cols[piv]
+        piv_j = mid[rows, piv]
+        s = np.where(active, mid_val[rows, piv], 1.)
+
+        # rows without candidates have lo == hi elements below the pivot
+        c_lt = _count_ratios(u, z_c, s)
+        c_le = _count_ratios(u, z_c, s, strict=True)
+        n_lt = lo.sum(1) + (c_lt - lo_c).sum(1)
+        n_le = lo.sum(1) + (c_le - lo_c).sum(1)
+        found = active & (n_lt <= k) & (k < n_le)
+        idx_i[found] = piv_i[found]
+        idx_j[found] = piv_j[found]
+        done |= found
+
+        left = (active & (k < n_lt))[:, None]
+        right = (active & (k >= n_le))[:, None]
+        hi[:, cols] = np.where(left, np.minimum(hi_c, c_lt), hi_c)
+        lo[:, cols] = np.where(right, np.maximum(lo_c, c_le), lo_c)
+
+    # select directly from the remaining candidates
+    w = np.where(done[:, None], 0, hi - lo).ravel()
+    if w.sum() > 0:
+        flat = np.repeat(np.arange(m * p), w)
+        within = np.arange(flat.size) - np.repeat(np.cumsum(w) - w, w)
+        cand_row, cand_i = flat // p, flat % p
+        cand_j = lo.ravel()[flat] + within
+        ratio = u[cand_row, cand_j] / z[cand_row, cand_i]
+        order = np.lexsort((ratio, cand_row))
+        n_cand = w.reshape(m, p).sum(1)
+        pos = np.cumsum(n_cand) - n_cand + k - lo.sum(1)
+        sel = order[pos[~done]]
+        idx_i[~done] = cand_i[sel]
+        idx_j[~done] = cand_j[sel]
+
+    return idx_i, idx_j
+
+
+def _prev_ratio(u, z, k, idx_i, idx_j):
+    """
+    Indices of the (k-1)-th smallest ratio given the k-th at (idx_i, idx_j)
+
+    The (k-1)-th ratio is either tied with the k-th or it is the largest
+    ratio below it, which is a single pass over the rows.
+    """
+    rows = np.arange(z.shape[0])
+    is_pos = z > 0
+    z_safe = np.where(is_pos, z, 1.)
+    s = u[rows, idx_j] / z_safe[rows, idx_i]
+    c_lt = _count_ratios(u, z, s)
+    j = np.maximum(c_lt - 1, 0)
+    ratio = u[rows[:, None], j] / z_safe
+    ratio[(c_lt == 0) | ~is_pos] = -np.inf
+    i = np.argmax(ratio, axis=1)
+    is_tied = c_lt.sum(1) < k
+    return (np.where(is_tied, idx_i, i),
+            np.where(is_tied, idx_j, j[rows, i]))
+
+
+def _medcouple_rows(y):
+    """
+    Medcouple of each row of a 2-d array with O(n) memory
+
+    See the notes of `medcouple`.
+    """
+    y = np.sort(y, axis=1)
+    m, n = y.shape
+    if n % 2 == 0:
+        mf = (y[:, n // 2 - 1] + y[:, n // 2]) / 2
+    else:
+        mf = y[:, (n - 1) // 2]
+
+    z = y - mf[:, None]
+    n_neg = (z < 0).sum(1)
+    # If no value is below the median, then at least half of the values are
+    # tied at the median and the medcouple is 0. These rows are dropped,
+    # they have no core ratios.
+    has_neg = n_neg > 0
+    if not has_neg.all():
+        mc = np.zeros(m)
+        if has_neg.any():
+            mc[has_neg] = _medcouple_rows(y[has_neg])
+        return mc
+
+    n_pos = (z > 0).sum(1)
+    n_zero = n - n_neg - n_pos
+    # lower half as positive values in increasing order, padded with inf
+    u = np.sort(np.where(z < 0, -z, np.inf), axis=1)[:, :max(n_neg.max(), 1)]
+    # strictly positive upper half in increasing order, padded with zeros
+    z = np.where(z > 0, z, 0)[:, n - max(n_pos.max(), 1):]
+
+    # The kernel h(z_i, -u_j) = (z_i - u_j) / (z_i + u_j) is -1 for z_i = 0
+    # and 1 for u_j = 0, except for ties at the median where it is 0. The
+    # remaining core values are ordered by the reverse of u_j / z_i.
+    n_low = n_zero * n_neg
+    n_tie = n_zero * n_zero
+    n_core = n_pos * n_neg
+    n_core_neg = n_neg[:, None] - _count_ratios(u, z, np.ones(m), strict=True)
+    n_core_neg = np.where(z > 0, n_core_neg, 0).sum(1)
+
+    n_kernel = (n_pos + n_zero) * (n_neg + n_zero)
+    ranks = []
+    for k in ((n_kernel - 1) // 2, n_kernel // 2):
+        k = k - n_low
+        is_core_neg = (k >= 0) & (k < n_core_neg)
+        is_tie = (k >= n_core_neg) & (k < n_core_neg + n_tie)
+        is_core_pos = (k >= n_core_neg + n_tie) & (k < n_core + n_tie)
+        is_core = is_core_neg | is_core_pos
+        k_core = np.where(is_core_pos, k - n_tie, k)
+        ranks.append((k, is_tie, np.where(is_core, n_core - 1 - k_core, -1)))
+
+    # the upper median is usually the next smaller core ratio
+    i_lo, j_lo = _select_ratio(u, z, ranks[0][2])
+    i_prev, j_prev = _prev_ratio(u, z, ranks[0][2], i_lo, j_lo)
+    is_prev = (ranks[1][2] >= 0) & (ranks[1][2] == ranks[0][2] - 1)
+    is_same = ranks[1][2] == ranks[0][2]
+    i_hi, j_hi = _select_ratio(u, z, np.where(is_prev | is_same, -1,
+                                              ranks[1][2]))
+    i_hi = np.where(is_prev, i_prev, np.where(is_same, i_lo, i_hi))
+    j_hi = np.where(is_prev, j_prev, np.where(is_same, j_lo, j_hi))
+
+    rows = np.arange(m)
+    mc = []
+    for (k, is_tie, k_ratio), i, j in zip(ranks, (i_lo, i_hi), (j_lo, j_hi)):
+        is_core = k_ratio >= 0
+        z_i = np.where(is_core, z[rows, i], 1.)
+        u_j = np.where(is_core, u[rows, j], 1.)
+        h = np.where(is_core, (z_i - u_j) / (z_i + u_j), 1.)
+        h[k < 0] = -1.
+        h[is_tie] = 0.
+        mc.append(h)
+
+    return (mc[0] + mc[1]) / 2
+
+
 def medcouple(y, axis=0):
     """
     Calculates the medcouple robust measure of skew.
@@ -438,14 +691,25 @@ def medcouple(y, axis=0):
 
     Notes
     -----
-    The current algorithm requires a O(N**2) memory allocations, and so may
-    not work for very large arrays (N>10000).
+    The medcouple is the median of the kernel ``h(z_i, z_j)`` over all pairs
+    of observations above and below the median, of which there are about
+    N**2 / 4. The kernel matrix is not created. It is sorted along both
+    dimensions, so that its median can be selected with the algorithm of
+    Johnson and Mizoguchi as proposed by Brys et al. [2]_. This requires
+    O(N) memory and O(N log(N)**2) time. All series along `axis` are
+    handled together, without a loop over them.
 
     .. [1] M. Huberta and E. Vandervierenb, "An adjusted boxplot for skewed
        distributions" Computational Statistics & Data Analysis, vol. 52, pp.
        5186-5201, August 2008.
+    .. [2] G. Brys, M. Hubert and A. Struyf, "A Robust Measure of Skewness,"
+       Journal of Computational and Graphical Statistics, vol. 13, pp.
+       996-1017, 2004.
     """
+    y = np.asarray(y, dtype=np.double)
     if axis is None:
-        return _medcouple_1d(y.ravel())
+        return _medcouple_rows(y.reshape(1, -1))[0]
 
-    return np.apply_along_axis(_medcouple_1d, axis, y)
+    y = np.rollaxis(y, axis, y.ndim)
+    mc = _medcouple_rows(y.reshape(-1, y.shape[-1]))
+    return mc.reshape(y.shape[:-1])
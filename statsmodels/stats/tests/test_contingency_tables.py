@@ -5,7 +5,10 @@ Tests for contingency table analyses.
 import numpy as np
 import statsmodels.stats.contingency_tables as ctab
 import pandas as pd
-from numpy.testing import assert_allclose, assert_equal
+from numpy.testing import (assert_allclose, assert_equal, assert_raises,
+                           assert_)
+from scipy import stats
+from statsmodels.stats.permutation import random_tables, mc_pvalue
 import os
 import statsmodels.api as sm
 
@@ -435,6 +438,111 @@ class TestStratified3(CheckStratifiedMixin):
         self.or_homog_p = 0.002064786
 
 
+def test_random_tables():
+
+    tables = random_tables([3, 5, 7, 0], [4, 4, 7], 1000, random_state=0)
+    assert_equal(tables.shape, (1000, 4, 3))
+    assert_(np.all(tables.sum(2) == [3, 5, 7, 0]))
+    assert_(np.all(tables.sum(1) == [4, 4, 7]))
+
+    # the upper left cell of 2x2 tables is hypergeometric
+    n_rep = 100000
+    tables = random_tables([6, 9], [5, 10], n_rep, random_state=1)
+    freq = np.bincount(tables[:, 0, 0], minlength=6) / float(n_rep)
+    assert_allclose(freq, stats.hypergeom.pmf(np.arange(6), 15, 5, 6),
+                    atol=0.005)
+
+    assert_raises(ValueError, random_tables, [3, 4], [3, 3], 10)
+
+
+def test_permutation_pvalues():
+
+    # tables with large counts, the permutation p-values are close to the
+    # asymptotic p-values
+    table = np.asarray([[20, 10, 5], [8, 15, 9], [3, 7, 22]]) * 3
+    tab = ctab.Table(table)
+    perm_kwds = {"n_rep": 4000, "random_state": 0}
+    for rslt in [tab.test_nominal_association(),
+                 tab.test_ordinal_association()]:
+        assert_(rslt.pvalue < 1e-5)
+    rslt = tab.test_nominal_association(pvalue_method="permutation",
+                                        perm_kwds=perm_kwds)
+    assert_allclose(rslt.statistic,
+                    tab.test_nominal_association().statistic, rtol=0.02)
+    assert_allclose(rslt.pvalue, 1. / 4001)
+    assert_equal(rslt.n_rep, 4000)
+
+    table = np.asarray([[20, 10, 5], [8, 15, 9], [3, 7, 22]])
+    sqtab = ctab.SquareTable(table)
+    rslt0 = sqtab.symmetry()
+    rslt1 = sqtab.symmetry(pvalue_method="permutation", perm_kwds=perm_kwds)
+    assert_allclose(rslt1.statistic, rslt0.statistic, rtol=1e-10)
+    assert_allclose(rslt1.pvalue, rslt0.pvalue, atol=0.05)
+    for method in ["stuart_maxwell", "bhapkar"]:
+        rslt0 = sqtab.homogeneity(method)
+        rslt1 = sqtab.homogeneity(method, pvalue_method="permutation",
+                                  perm_kwds=perm_kwds)
+        assert_allclose(rslt1.statistic, rslt0.statistic, rtol=1e-10)
+        assert_allclose(rslt1.pvalue, rslt0.pvalue, atol=0.05)
+
+    # for 2x2 tables the permutation distribution of Bowker's statistic is
+    # the exact McNemar distribution
+    table = np.asarray([[10, 3], [11, 12]])
+    rslt = ctab.SquareTable(table).symmetry(
+        pvalue_method="permutation", perm_kwds={"n_rep": 20000,
+                                                "random_state": 0})
+    pvalue = ctab.mcnemar(table, exact=True).pvalue
+    assert_allclose(rslt.pvalue, pvalue, atol=0.005)
+    assert_(rslt.pvalue_bounds[0] < pvalue < rslt.pvalue_bounds[1])
+
+    # the conditional distribution in each stratum is hypergeometric
+    rs = np.random.RandomState(0)
+    st = ctab.StratifiedTable([rs.randint(2, 20, size=(2, 2))
+                               for _ in range(6)])
+    for func in [st.test_null_odds, st.test_equal_odds]:
+        rslt0 = func()
+        rslt1 = func(pvalue_method="permutation", perm_kwds=perm_kwds)
+        assert_allclose(rslt1.statistic, rslt0.statistic, rtol=1e-10)
+        assert_allclose(rslt1.pvalue, rslt0.pvalue, atol=0.005)
+
+    assert_raises(ValueError, ctab.Table(table + 0.5).test_nominal_association,
+                  pvalue_method="permutation")
+    assert_raises(ValueError, tab.test_nominal_association,
+                  pvalue_method="exact")
+
+
+def test_mc_pvalue():
+
+    table = np.asarray([[20, 10, 5], [8, 15, 9], [3, 7, 22]])
+    tab = ctab.Table(table)
+
+    # early stopping once the p-value is clearly below alpha
+    rslt = tab.test_nominal_association(
+        pvalue_method="permutation",
+        perm_kwds={"n_rep": 99999, "alpha": 0.05, "random_state": 0})
+    assert_equal(rslt.n_rep, 1000)
+    assert_(rslt.pvalue_bounds[1] < 0.05)
+
+    # the batches have their own seeds, the results do not depend on the
+    # number of jobs
+    sqtab = ctab.SquareTable(table)
+    perm_kwds = {"n_rep": 2500, "batch_size": 500, "random_state": 3}
+    rslt1 = sqtab.symmetry(pvalue_method="permutation", perm_kwds=perm_kwds)
+    perm_kwds["n_jobs"] = 2
+    rslt2 = sqtab.symmetry(pvalue_method="permutation", perm_kwds=perm_kwds)
+    assert_equal(rslt2.pvalue, rslt1.pvalue)
+    assert_equal(rslt2.n_rep, 2500)
+
+    # smaller alternative
+    sampler = lambda n, random_state: random_state.rand(n)
+    rslt = mc_pvalue(lambda x: x, sampler, 0.1, n_rep=10000,
+                     alternative="smaller", random_state=0)
+    assert_allclose(rslt.pvalue, 0.1, atol=0.01)
+    assert_(not rslt.stopped_early)
+    assert_raises(ValueError, mc_pvalue, lambda x: x, sampler, 0.1,
+                  alternative="two-sided")
+
+
 class Check2x2Mixin(object):
 
     def initialize(self):
@@ -9,11 +9,12 @@ Author: Josef Perktold
 import numpy as np
 import scipy.sparse as sparse
 from numpy.testing import (assert_almost_equal, assert_allclose,
-                           assert_equal)
+                           assert_equal, assert_)
 from statsmodels.stats.correlation_tools import (
     corr_nearest, corr_clipped, cov_nearest,
     _project_correlation_factors, corr_nearest_factor, _spg_optim,
-    corr_thresholded, cov_nearest_factor_homog, FactoredPSDMatrix)
+    corr_thresholded, cov_nearest_factor_homog, FactoredPSDMatrix,
+    corr_nearest_newton, clip_evals)
 
 import warnings
 
@@ -118,6 +119,30 @@ class CheckCorrPSDMixin(object):
         #print evals[0] / 1e-7 - 1
         assert_allclose(evals[0], 1e-7, rtol=1e-6)
 
+    def test_newton(self):
+        x = self.x
+        res_r = self.res
+        rslt = corr_nearest_newton(x, threshold=1e-7)
+        assert_(rslt.Converged)
+        y = rslt.corr
+        assert_almost_equal(y, res_r.mat, decimal=3)
+        d = norm_f(x, y)
+        assert_allclose(d, res_r.normF, rtol=0.0015)
+        evals = np.linalg.eigvalsh(y)
+        assert_allclose(evals[0], 1e-7, rtol=1e-6)
+        assert_equal(np.diag(y), np.ones(len(y)))
+
+        # the alternating projections converge to the same solution
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            y2 = corr_nearest(x, threshold=1e-7, n_fact=100)
+        assert_allclose(y, y2, rtol=1e-6, atol=1e-6)
+
+        # warm start at the solution
+        rslt2 = corr_nearest_newton(x, threshold=1e-7, start=rslt.dual)
+        assert_equal(rslt2.n_iter, 0)
+        assert_allclose(rslt2.corr, y, rtol=1e-12)
+
 
     def test_clipped(self):
         x = self.x
@@ -143,6 +168,9 @@ class CheckCorrPSDMixin(object):
         d = norm_f(x, y)
         assert_allclose(d, res_r.normF, rtol=0.0015)
 
+        y2 = cov_nearest(x, method='newton', threshold=1e-7)
+        assert_allclose(y2, y, rtol=1e-5, atol=1e-6)
+
 
 class TestCovPSD(object):
 
@@ -202,6 +230,10 @@ def test_corrpsd_threshold():
         #print 'evals', evals, threshold
         assert_allclose(evals[0], threshold, rtol=0.25, atol=1e-15)
 
+        y = corr_nearest_newton(x, threshold=threshold).corr
+        evals = np.linalg.eigvalsh(y)
+        assert_allclose(evals[0], threshold, rtol=1e-6, atol=1e-15)
+
         y = cov_nearest(x, method='nearest', n_fact=100, threshold=threshold)
         evals = np.linalg.eigvalsh(y)
         #print 'evals', evals, threshold
@@ -214,6 +246,49 @@ def test_corrpsd_threshold():
         #print evals[0] / threshold - 1
         assert_allclose(evals[0], threshold, rtol=0.25, atol=1e-15)
 
+def test_corr_nearest_large():
+    # few negative eigenvalues, partial eigendecomposition
+    np.random.seed(9876)
+    k = 150
+    x = np.corrcoef(np.random.randn(k, 2 * k))
+    x[0, 1] = x[1, 0] = 0.95
+    x[2, 3] = x[3, 2] = -0.95
+    evals = np.linalg.eigvalsh(x)
+    assert_((evals < 0).sum() < 10)
+
+    y1, clipped1 = clip_evals(x, value=1e-6)
+    y2, clipped2 = clip_evals(x, value=1e-6, n_evals=10)
+    assert_(clipped1 and clipped2)
+    assert_allclose(y2, y1, rtol=1e-10, atol=1e-13)
+    # all n_evals are clipped, falls back to the full eigendecomposition
+    y3, clipped3 = clip_evals(x, value=0.5, n_evals=3)
+    assert_allclose(y3, clip_evals(x, value=0.5)[0], rtol=1e-13)
+    assert_allclose(corr_clipped(x, 1e-6, n_evals=10), corr_clipped(x, 1e-6),
+                    rtol=1e-10, atol=1e-13)
+
+    rslt = corr_nearest_newton(x, threshold=1e-6)
+    assert_(rslt.Converged)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        y_full = corr_nearest(x, threshold=1e-6, n_fact=2, partial=False)
+        y_part = corr_nearest(x, threshold=1e-6, n_fact=2)
+    assert_allclose(y_part, y_full, rtol=1e-10, atol=1e-10)
+    assert_allclose(rslt.corr, y_full, rtol=1e-7, atol=1e-7)
+
+    # many negative eigenvalues
+    x = np.corrcoef(np.random.randn(k, 20))
+    x += 0.3 * (np.random.rand(k, k) - 0.5) * (np.random.rand(k, k) < 0.05)
+    x = (x + x.T) / 2
+    np.fill_diagonal(x, 1)
+    rslt = corr_nearest_newton(x)
+    assert_(rslt.Converged)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore")
+        y = corr_nearest(x, threshold=0, n_fact=5)
+    assert_allclose(rslt.corr, y, rtol=1e-7, atol=1e-7)
+    assert_(np.linalg.eigvalsh(rslt.corr)[0] > -1e-12)
+
+
 class Test_Factor(object):
 
 
@@ -477,3 +552,8 @@ class Test_Factor(object):
 
         assert_allclose(tcor.todense(), fcor, rtol=0.25, atol=1e-3)
 
+        # blocks computed in threads
+        tcor2 = corr_thresholded(X, 0.2, max_elt=1e5, n_jobs=3)
+        assert_allclose(tcor2.todense(), fcor, rtol=1e-12, atol=1e-14)
+        assert_equal(tcor2.nnz, (fcor != 0).sum())
+
@@ -786,6 +786,107 @@ def test_influence_dtype():
     assert_almost_equal(cr1, cr3, decimal=8)
 
 
+def test_influence_closed_form():
+    # compare closed form LOOO results with explicit refits
+    np.random.seed(987125)
+    nobs = 40
+    x = add_constant(np.random.randn(nobs, 2))
+    y = x.sum(1) + np.random.randn(nobs)
+    res = OLS(y, x).fit()
+
+    # chunks do not build the nobs x k_vars leave-one-out params
+    infl = res.get_influence()
+    chunks = list(infl.summary_frame_chunks(chunksize=15))
+    assert_('_res_looo' not in infl._cache)
+    assert_('params_not_obsi' not in infl._cache)
+    assert_('dfbetas' not in infl._cache)
+
+    infl = res.get_influence()
+
+    params = np.zeros((nobs, 3))
+    mse_resid = np.zeros(nobs)
+    det_cov = np.zeros(nobs)
+    for i in range(nobs):
+        mask = np.arange(nobs) != i
+        res_i = OLS(y[mask], x[mask]).fit()
+        params[i] = res_i.params
+        mse_resid[i] = res_i.mse_resid
+        det_cov[i] = np.linalg.det(res_i.cov_params())
+
+    assert_allclose(infl.params_not_obsi, params, rtol=1e-12)
+    assert_allclose(infl.sigma2_not_obsi, mse_resid, rtol=1e-12)
+    assert_allclose(infl.det_cov_params_not_obsi, det_cov, rtol=1e-10)
+
+    assert_allclose(infl._res_looo['params'], params, rtol=1e-12)
+    assert_allclose(infl._res_looo['mse_resid'], mse_resid, rtol=1e-12)
+
+    frame = infl.summary_frame()
+    assert_equal([len(c) for c in chunks], [15, 15, 10])
+    import pandas
+    frame2 = pandas.concat(chunks)
+    assert_equal(list(frame2.columns), list(frame.columns))
+    assert_equal(frame2.index.values, np.arange(nobs))
+    assert_allclose(frame2.values, frame.values, rtol=1e-13)
+
+    # qr fit does not attach pinv_wexog to the model
+    infl_qr = OLS(y, x).fit(method='qr').get_influence()
+    assert_allclose(infl_qr.hat_matrix_diag, infl.hat_matrix_diag,
+                    rtol=1e-12)
+    assert_allclose(infl_qr.dfbetas, infl.dfbetas, rtol=1e-10)
+    assert_allclose(infl_qr.cov_ratio, infl.cov_ratio, rtol=1e-10)
+    assert_allclose(infl_qr.dffits[0], infl.dffits[0], rtol=1e-10)
+    assert_allclose(infl_qr.params_not_obsi, params, rtol=1e-12)
+    assert_allclose(infl_qr.summary_frame().values, frame.values,
+                    rtol=1e-10)
+
+
+def test_influence_glm():
+    from statsmodels.genmod.generalized_linear_model import GLM
+    from statsmodels.genmod import families
+    from statsmodels.regression.linear_model import WLS
+
+    np.random.seed(987125)
+    nobs = 50
+    x = add_constant(np.random.randn(nobs, 2))
+    y = x.sum(1) + np.random.randn(nobs)
+
+    # gaussian identity matches OLS
+    res_ols = OLS(y, x).fit()
+    infl_ols = res_ols.get_influence()
+    infl = GLM(y, x).fit().get_influence()
+    assert_allclose(infl.hat_matrix_diag, infl_ols.hat_matrix_diag,
+                    rtol=1e-12)
+    assert_allclose(infl.resid_studentized,
+                    infl_ols.resid_studentized_internal, rtol=1e-10)
+    assert_allclose(infl.cooks_distance[0], infl_ols.cooks_distance[0],
+                    rtol=1e-10)
+    assert_allclose(infl.params_not_obsi, infl_ols.params_not_obsi,
+                    rtol=1e-10)
+
+    # Poisson: one-step is a WLS without observation i at the working values
+    y = np.random.poisson(np.exp(0.2 * x.sum(1)))
+    res = GLM(y, x, family=families.Poisson()).fit(tol=1e-12)
+    infl = res.get_influence()
+    mu = res.mu
+    w = mu
+    z = np.log(mu) + (y - mu) / mu
+    params = np.zeros((nobs, 3))
+    for i in range(nobs):
+        mask = np.arange(nobs) != i
+        params[i] = WLS(z[mask], x[mask], weights=w[mask]).fit().params
+    assert_allclose(infl.params_not_obsi, params, rtol=1e-8)
+    dfbetas = (res.params - params) / res.bse
+    assert_allclose(infl.dfbetas, dfbetas, rtol=1e-7, atol=1e-10)
+    assert_allclose(infl.resid_studentized,
+                    res.resid_pearson / np.sqrt(1 - infl.hat_matrix_diag),
+                    rtol=1e-12)
+
+    frame = infl.summary_frame()
+    import pandas
+    frame2 = pandas.concat(list(infl.summary_frame_chunks(chunksize=20)))
+    assert_allclose(frame2.values, frame.values, rtol=1e-13)
+
+
 def test_outlier_test():
     # results from R with NA -> 1. Just testing interface here because
     # outlier_test is just a wrapper
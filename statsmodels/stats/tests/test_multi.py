@@ -20,7 +20,8 @@ from numpy.testing import (assert_almost_equal, assert_equal, assert_,
 from statsmodels.stats.multitest import (multipletests, fdrcorrection,
                                          fdrcorrection_twostage,
                                          NullDistribution,
-                                         local_fdr)
+                                         local_fdr, multipletests_batch,
+                                         StreamingFDR)
 from statsmodels.stats.multicomp import tukeyhsd
 from scipy.stats.distributions import norm
 
@@ -316,6 +317,63 @@ def test_issorted():
         assert_allclose(res2[0][sortrevind], res1[0], rtol=1e-10)
 
 
+def test_multipletests_batch():
+    from statsmodels.stats.multitest import multitest_methods_names
+    np.random.seed(987126)
+    pvals = np.random.beta(0.2, 0.5, size=(40, 15))
+    pvals[0] = np.random.uniform(0.5, 1, size=15)   # no rejection
+    pvals[1] = 1e-6   # all rejected
+    # unequal family sizes, the first family is large enough to use the
+    # log-depth scan instead of the padded array
+    groups = np.concatenate((np.zeros(300, int),
+                             np.random.randint(1, 30, size=300)))
+    pvals_g = pvals.ravel()
+    methods = [m for m in multitest_methods_names if m != 'ho']
+
+    for method in methods:
+        res = multipletests_batch(pvals, alpha=0.1, method=method)
+        res_t = multipletests_batch(pvals.T, alpha=0.1, method=method,
+                                    axis=0)
+        res_g = multipletests_batch(pvals_g, alpha=0.1, method=method,
+                                    groups=groups)
+        for i, p in enumerate(pvals):
+            res1 = multipletests(p, alpha=0.1, method=method)
+            assert_equal(res[0][i], res1[0])
+            assert_allclose(res[1][i], res1[1], rtol=1e-13)
+            assert_allclose(res[2][i], res1[2], rtol=1e-13)
+            assert_allclose(res[3][i], res1[3], rtol=1e-13)
+            assert_equal(res_t[0][:, i], res1[0])
+            assert_allclose(res_t[1][:, i], res1[1], rtol=1e-13)
+        for i in range(30):
+            mask = groups == i
+            res1 = multipletests(pvals_g[mask], alpha=0.1, method=method)
+            assert_equal(res_g[0][mask], res1[0])
+            assert_allclose(res_g[1][mask], res1[1], rtol=1e-13)
+            assert_allclose(res_g[3][i], res1[3], rtol=1e-13)
+
+
+def test_streaming_fdr():
+    np.random.seed(987126)
+    pvals = np.concatenate((np.random.uniform(size=20000),
+                            np.random.beta(0.05, 1, size=2000)))
+    for method in ['indep', 'negcorr']:
+        stream = StreamingFDR(alpha=0.05, method=method)
+        for chunk in np.array_split(pvals, 7):
+            stream.update(chunk)
+        assert_equal(stream.nobs, len(pvals))
+        reject, pvals_corr = fdrcorrection(pvals, alpha=0.05, method=method)
+        reject_s = stream.reject(pvals)
+        pvals_corr_s = stream.pvals_corrected(pvals)
+        # conservative approximation
+        assert_(not (reject_s & ~reject).any())
+        assert_((pvals_corr_s >= pvals_corr * (1 - 1e-13)).all())
+        # close to exact within grid resolution
+        assert_(reject.sum() - reject_s.sum() <= 0.01 * reject.sum())
+        # p-values below the grid only have an upper bound
+        mask = (pvals_corr < 0.5) & (pvals > 1e-30)
+        assert_allclose(pvals_corr_s[mask], pvals_corr[mask], rtol=0.005)
+
+
 def test_tukeyhsd():
     #example multicomp in R p 83
 
@@ -169,6 +169,10 @@ class CheckTuckeyHSDMixin(object):
         assert_almost_equal(self.res.meandiffs, self.meandiff2, decimal=14)
         assert_almost_equal(self.res.confint, self.confint2, decimal=2)
         assert_equal(self.res.reject, self.reject2)
+        if hasattr(self, 'pvals'):
+            # psturng is an approximation, R uses ptukey
+            assert_allclose(self.res.pvalues, self.pvals, rtol=0.01,
+                            atol=2e-4)
 
     def test_group_tukey(self):
         res_t = get_thsd(self.mc, alpha=self.alpha)
@@ -197,7 +201,7 @@ class TestTuckeyHSD2(CheckTuckeyHSDMixin):
                                 ).reshape(3,4, order='F')
         self.meandiff2 = tukeyhsd2s[:, 0]
         self.confint2 = tukeyhsd2s[:, 1:3]
-        pvals = tukeyhsd2s[:, 3]
+        self.pvals = pvals = tukeyhsd2s[:, 3]
         self.reject2 = pvals < 0.05
 
     def test_table_names_default_group_order(self):
@@ -301,7 +305,7 @@ class TestTuckeyHSD2s(CheckTuckeyHSDMixin):
                 ).reshape(3,4, order='F')
         self.meandiff2 = tukeyhsd2s[:, 0]
         self.confint2 = tukeyhsd2s[:, 1:3]
-        pvals = tukeyhsd2s[:, 3]
+        self.pvals = pvals = tukeyhsd2s[:, 3]
         self.reject2 = pvals < 0.01
 
 
@@ -17,7 +17,7 @@ from distutils.version import LooseVersion
 
 import numpy as np
 from numpy.testing import (assert_almost_equal, assert_allclose, assert_raises,
-                           assert_equal, assert_warns, dec)
+                           assert_equal, assert_warns, assert_, dec)
 import scipy
 
 import statsmodels.stats.power as smp
@@ -716,6 +716,108 @@ def test_power_solver():
     assert_raises(ValueError, nip.solve_power, None, nobs1=1600, alpha=0.01,
                   power=0.005, ratio=1, alternative='larger')
 
+def test_power_solver_vectorized():
+    es = np.array([0.2, 0.5, 0.8])[:, None]
+    alpha = np.array([0.01, 0.05])
+    cases = [(smp.TTestIndPower(), 'nobs1', dict(ratio=2.)),
+             (smp.NormalIndPower(), 'nobs1', dict(ratio=1.)),
+             (smp.FTestAnovaPower(), 'nobs', dict(k_groups=3)),
+             (smp.GofChisquarePower(), 'nobs', dict(n_bins=4))]
+    for pw, key, kwds in cases:
+        kwds[key] = None
+        res = pw.solve_power(effect_size=es, alpha=alpha, power=0.8, **kwds)
+        assert_equal(res.shape, (3, 2))
+        assert_equal(pw.cache_fit_res[0], 1)
+        for i in range(3):
+            for j in range(2):
+                res1 = pw.solve_power(effect_size=es[i, 0], alpha=alpha[j],
+                                      power=0.8, **kwds)
+                assert_allclose(res[i, j], res1, rtol=1e-5)
+        kwds[key] = res
+        assert_allclose(pw.power(effect_size=es, alpha=alpha, **kwds), 0.8,
+                        rtol=1e-10)
+
+    # other unknowns, compare with the scalar solver
+    pw = smp.TTestIndPower()
+    nobs1 = np.array([20, 50, 100.])
+    for kwds in [dict(effect_size=None, alpha=0.05, power=0.8),
+                 dict(effect_size=0.5, alpha=None, power=0.8)]:
+        res = pw.solve_power(nobs1=nobs1, **kwds)
+        res1 = [pw.solve_power(nobs1=n, **kwds) for n in nobs1]
+        # xtol of the scalar solver is 1e-5
+        assert_allclose(res, res1, rtol=1e-5, atol=1e-5)
+
+    # negative effect sizes for alternative 'smaller'
+    nobs_ = np.array([10, 50, 200])
+    for pw_, key in [(smp.TTestIndPower(), 'nobs1'),
+                     (smp.NormalIndPower(), 'nobs1'),
+                     (smp.TTestPower(), 'nobs')]:
+        kwds = dict(effect_size=None, alpha=0.05, power=0.8,
+                    alternative='smaller')
+        kwds[key] = nobs_
+        res = pw_.solve_power(**kwds)
+        assert_equal(pw_.cache_fit_res[0], 1)
+        res1 = []
+        for n in nobs_:
+            kwds[key] = n
+            res1.append(pw_.solve_power(**kwds))
+        assert_(np.all(res < 0))
+        assert_allclose(res, res1, rtol=1e-5)
+
+    ratio = pw.solve_power(effect_size=0.5, nobs1=nobs1[1:], alpha=0.05,
+                           power=0.7, ratio=None)
+    assert_allclose(pw.power(0.5, nobs1[1:], 0.05, ratio=ratio), 0.7,
+                    rtol=1e-10)
+
+    pw = smp.FTestAnovaPower()
+    res = pw.solve_power(effect_size=None, nobs=nobs1, alpha=0.05, power=0.8,
+                         k_groups=3)
+    res1 = [pw.solve_power(effect_size=None, nobs=n, alpha=0.05, power=0.8,
+                           k_groups=3) for n in nobs1]
+    assert_allclose(res, res1, rtol=1e-5)
+
+    # array k_groups, the bracket is not stored on the instance
+    k_groups = [3, 5]
+    res = pw.solve_power(effect_size=0.3, alpha=0.05, power=0.8,
+                         k_groups=k_groups)
+    res1 = [pw.solve_power(effect_size=0.3, alpha=0.05, power=0.8,
+                           k_groups=k) for k in k_groups]
+    assert_allclose(res, res1, rtol=1e-5)
+    assert_equal(pw.start_bqexp['nobs'], dict(low=10, start_upp=50))
+
+    # the expanding bracket stops at max_upp_vectorized, ncf.sf does not
+    # return for extremely large degrees of freedom
+    from statsmodels.tools.sm_exceptions import ConvergenceWarning
+    pw = smp.FTestPower()
+    es = np.array([0.1, 0.3, 0.5])
+    with warnings.catch_warnings(record=True) as w:
+        warnings.simplefilter('always')
+        res = pw.solve_power(effect_size=es, df_num=2, df_denom=None,
+                             alpha=0.05, power=0.8)
+    assert_(any(issubclass(wi.category, ConvergenceWarning) for wi in w))
+    assert_(np.isnan(res[0]))
+    assert_equal(pw.cache_fit_res[1]['converged'], [False, True, True])
+    assert_allclose(pw.power(es[1:], 2, res[1:], 0.05), 0.8, rtol=1e-5)
+
+    pw = smp.NormalIndPower()
+    pow_ = pw.power(0.3, 50, 0.05, ratio=np.array([0, 1.]))
+    assert_allclose(pow_, [pw.power(0.3, 50, 0.05, ratio=0),
+                           pw.power(0.3, 50, 0.05, ratio=1)], rtol=1e-13)
+
+
+def test_power_solver_interpolator():
+    pw = smp.TTestIndPower()
+    solve = pw.solve_power_interpolator('effect_size',
+                                        np.linspace(0.1, 1.5, 100),
+                                        nobs1=None, alpha=0.05, power=0.8)
+    es = np.array([0.05, 0.15, 0.33, 0.9, 1.45, 2])
+    res = solve(es)
+    res1 = pw.solve_power(effect_size=es[1:-1], nobs1=None, alpha=0.05,
+                          power=0.8)
+    assert_allclose(res[1:-1], res1, rtol=1e-4)
+    assert_(np.isnan(res[[0, -1]]).all())
+
+
 @dec.skipif(SM_GT_10, 'Known failure on modern SciPy')
 def test_power_solver_warn():
     # messing up the solver to trigger warning
@@ -10,7 +10,8 @@ Created on Sat Dec 17 08:39:16 2011
 Author: Josef Perktold
 """
 import numpy as np
-from numpy.testing import assert_almost_equal
+from numpy.testing import (assert_almost_equal, assert_allclose, assert_equal,
+                           assert_raises, assert_)
 
 from statsmodels.regression.linear_model import OLS, GLSAR
 from statsmodels.tools.tools import add_constant
@@ -52,6 +53,55 @@ def test_cov_cluster_2groups():
     assert_almost_equal(bse_1, bse_pet1, decimal=4)
     assert_almost_equal(bse_01, bse_pet01, decimal=4)
 
+def test_cov_cluster_nway():
+    import os
+    cur_dir = os.path.abspath(os.path.dirname(__file__))
+    fpath = os.path.join(cur_dir,"test_data.txt")
+    pet = np.genfromtxt(fpath)
+    endog = pet[:,-1]
+    group = pet[:,0].astype(int)
+    time = pet[:,1].astype(int)
+    exog = add_constant(pet[:,2])
+    res = OLS(endog, exog).fit()
+
+    cov = sw.cov_cluster_nway(res, group)
+    assert_allclose(cov, sw.cov_cluster(res, group), rtol=1e-12)
+    cov = sw.cov_cluster_nway(res, np.column_stack((group, time)))
+    cov2 = sw.cov_cluster_2groups(res, group, group2=time)[0]
+    assert_allclose(cov, cov2, rtol=1e-12)
+    # labels do not need to be integers
+    cov = sw.cov_cluster_nway(res, [group.astype(str), time / 10.])
+    assert_allclose(cov, cov2, rtol=1e-12)
+
+    # three way, inclusion-exclusion with cov_cluster on intersections
+    group3 = np.arange(len(endog)) % 7
+    groups = [group, time, group3]
+    cov3 = 0
+    for subset, sign in [((0,), 1), ((1,), 1), ((2,), 1), ((0, 1), -1),
+                         ((0, 2), -1), ((1, 2), -1), ((0, 1, 2), 1)]:
+        labels = ['-'.join(str(groups[i][j]) for i in subset)
+                  for j in range(len(endog))]
+        cov3 += sign * sw.cov_cluster(res, np.array(labels))
+    cov = sw.cov_cluster_nway(res, groups)
+    assert_allclose(cov, cov3, rtol=1e-12)
+
+    # codes of groups and intersections are cached on the model
+    cache = res.model._group_codes_cache
+    n_cached = len(cache)
+    assert_(n_cached >= 7)
+    cov_ = sw.cov_cluster_nway(res, [group.copy(), time.copy(), group3])
+    assert_equal(len(cache), n_cached)
+    assert_allclose(cov_, cov, rtol=1e-13)
+
+    res_ = res.get_robustcov_results('cluster', groups=np.column_stack(groups))
+    assert_allclose(res_.cov_params(), cov, rtol=1e-13)
+    assert_equal(res.n_groups, (500, 10, 7))
+
+    group_nan = group.astype(float)
+    group_nan[5] = np.nan
+    assert_raises(ValueError, sw.cov_cluster_nway, res, group_nan)
+
+
 def test_hac_simple():
 
     from statsmodels.datasets import macrodata
@@ -89,6 +139,107 @@ def test_hac_simple():
     cov4 = sw.cov_hac_simple(res_olsg, nlags=4, use_correction=False)
     assert_almost_equal(cov3, cov4, decimal=14)
 
+
+def _S_hac_loop(x, weights, groupidx=None):
+    # reference implementation with explicit loop over lags
+    if groupidx is None:
+        groupidx = [(0, len(x))]
+    S = weights[0] * np.dot(x.T, x)
+    for lag in range(1, len(weights)):
+        for l, u in groupidx:
+            if l + lag < u:
+                s = np.dot(x[l+lag:u].T, x[l:u-lag])
+                S += weights[lag] * (s + s.T)
+    return S
+
+
+def test_hac_fft():
+    np.random.seed(987456)
+    x = np.random.randn(1000, 3)
+    x[1:] += 0.5 * x[:-1]
+
+    for nlags in [1, 4, 60, 999, 1500]:
+        for weights_func in [sw.weights_bartlett, sw.weights_parzen,
+                             sw.weights_quadratic_spectral]:
+            weights = weights_func(nlags)[:1000]
+            S_loop = _S_hac_loop(x, weights)
+            S = sw.S_hac_simple(x, nlags=nlags, weights_func=weights_func)
+            assert_allclose(S, S_loop, rtol=1e-10)
+            assert_allclose(sw._lagged_sums_fft(x, weights), S_loop,
+                            rtol=1e-10)
+
+    # panel, the zero padding separates the groups
+    groupidx = [(0, 300), (300, 310), (310, 750), (750, 1000)]
+    for nlags in [2, 50, 400]:
+        weights = sw.weights_bartlett(nlags)
+        S_loop = _S_hac_loop(x, weights, groupidx)
+        assert_allclose(sw.S_nw_panel(x, weights, groupidx), S_loop,
+                        rtol=1e-10)
+        assert_allclose(sw._lagged_sums_fft(x, weights, groupidx=groupidx),
+                        S_loop, rtol=1e-10)
+    assert_raises(ValueError, sw.S_nw_panel, x, sw.weights_bartlett(500),
+                  groupidx)
+
+
+def test_hac_kernels():
+    assert_allclose(sw.weights_bartlett(4), [1, 0.8, 0.6, 0.4, 0.2],
+                    rtol=1e-13)
+    assert_allclose(sw.weights_bartlett(4, bandwidth=2.5),
+                    [1, 0.6, 0.2, 0, 0], rtol=1e-13, atol=1e-15)
+    assert_allclose(sw.weights_parzen(4),
+                    [1, 0.808, 0.424, 0.128, 0.016], rtol=1e-13)
+    assert_allclose(sw.weights_parzen(4, bandwidth=2.),
+                    [1, 0.25, 0, 0, 0], rtol=1e-13, atol=1e-15)
+    # quadratic spectral kernel, Andrews (1991), eq. (2.7)
+    x = np.arange(1, 5) / 2.
+    z = 6 * np.pi * x / 5
+    k_qs = 25 / (12 * np.pi**2 * x**2) * (np.sin(z) / z - np.cos(z))
+    assert_allclose(sw.weights_quadratic_spectral(4, bandwidth=2.),
+                    np.r_[1, k_qs], rtol=1e-13)
+    assert_(sw.kernel_dict['qs'] is sw.weights_quadratic_spectral)
+
+
+def test_hac_auto():
+    from statsmodels.datasets import macrodata
+    d2 = macrodata.load().data
+    g_gdp = 400*np.diff(np.log(d2['realgdp']))
+    g_inv = 400*np.diff(np.log(d2['realinv']))
+    exogg = add_constant(np.c_[g_gdp, d2['realint'][:-1]])
+    res_olsg = OLS(g_inv, exogg).fit()
+    xu, hessian_inv = sw._get_sandwich_arrays(res_olsg)
+    nobs = xu.shape[0]
+
+    # Newey, West (1994) with pilot lags n = floor(4 (T/100)^(2/9))
+    h = xu.sum(1)
+    n = int(np.floor(4 * (nobs / 100.)**(2. / 9)))
+    sigma = [np.dot(h[j:], h[:nobs-j]) / nobs for j in range(n + 1)]
+    s0 = sigma[0] + 2 * np.sum(sigma[1:])
+    s1 = 2 * np.sum(np.arange(1, n + 1) * sigma[1:])
+    bw = 1.1447 * ((s1 / s0)**2 * nobs)**(1. / 3)
+    assert_allclose(sw.bandwidth_newey_west(xu), bw, rtol=1e-13)
+
+    for kernel in ['bartlett', 'parzen', 'qs']:
+        weights_func = sw.kernel_dict[kernel]
+        bw = sw.bandwidth_newey_west(xu, kernel=kernel)
+        if kernel == 'qs':
+            nlags = nobs - 1
+        else:
+            nlags = int(np.ceil(bw)) - 1
+        weights = weights_func(nlags, bandwidth=bw)
+        S = sw.S_hac_simple(xu, nlags='auto', weights_func=kernel)
+        assert_allclose(S, _S_hac_loop(xu, weights), rtol=1e-10)
+
+        res = res_olsg.get_robustcov_results('HAC', maxlags='auto',
+                                             kernel=kernel)
+        cov = sw.cov_hac_simple(res_olsg, nlags='auto',
+                                weights_func=weights_func,
+                                use_correction=False)
+        assert_allclose(res.cov_params(), cov, rtol=1e-13)
+
+    assert_raises(ValueError, sw.S_hac_simple, xu, 'auto',
+                  sw.weights_uniform)
+
+
 if __name__ == '__main__':
     import nose
     nose.runmodule(argv=[__file__, '-vvs', '-x'], exit=False)
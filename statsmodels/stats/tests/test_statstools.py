@@ -2,7 +2,8 @@
 # TODO: Test robust kurtosis
 import numpy as np
 import pandas as pd
-from numpy.testing import (assert_almost_equal, assert_raises, TestCase)
+from numpy.testing import (assert_almost_equal, assert_equal, assert_raises,
+                           TestCase)
 from statsmodels.stats.stattools import (omni_normtest, jarque_bera,
                                          durbin_watson, _medcouple_1d, medcouple,
                                          robust_kurtosis, robust_skewness)
@@ -204,6 +205,37 @@ class TestStattools(TestCase):
         mcn = medcouple(-x)
         assert_almost_equal(mcp + mcn, 0)
 
+    def test_medcouple_naive(self):
+        # compare with the O(N**2) implementation, including ties
+        rs = np.random.RandomState(1234)
+        for x in [rs.lognormal(size=1501), rs.standard_normal(1000),
+                  rs.randint(0, 8, size=999).astype(float),
+                  np.round(rs.exponential(size=800), 1), np.ones(10)]:
+            assert_almost_equal(medcouple(x), _medcouple_1d(x), decimal=14)
+
+    def test_medcouple_zero_inflated(self):
+        # no values below the median and upper deviations below 1
+        rs = np.random.RandomState(1234)
+        xs = [np.array([0., 0., 0., 0.2, 0.5]),
+              rs.poisson(0.3, size=1000) * 0.5,
+              np.r_[np.zeros(60), 0.1 * rs.exponential(size=40)]]
+        for x in xs:
+            assert_equal(medcouple(x), _medcouple_1d(x))
+            assert_equal(medcouple(x), 0)
+        # rows with and without values below the median
+        x = np.column_stack((xs[1][:100], xs[2], rs.lognormal(size=100),
+                             -xs[2]))
+        mc2 = np.apply_along_axis(_medcouple_1d, 0, x)
+        assert_almost_equal(medcouple(x), mc2, decimal=14)
+
+    def test_medcouple_axis(self):
+        rs = np.random.RandomState(1234)
+        x = rs.randint(0, 5, size=(40, 3, 7)).astype(float)
+        for axis in range(3):
+            mc = medcouple(x, axis=axis)
+            mc2 = np.apply_along_axis(_medcouple_1d, axis, x)
+            assert_almost_equal(mc, mc2, decimal=14)
+
 
     def test_durbin_watson(self):
         x = np.random.standard_normal(100)
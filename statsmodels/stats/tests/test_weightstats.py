@@ -19,10 +19,10 @@ import numpy as np
 from scipy import stats
 import pandas as pd
 from numpy.testing import (assert_, assert_almost_equal, assert_equal,
-                           assert_allclose)
+                           assert_allclose, assert_raises)
 
 from statsmodels.stats.weightstats import (DescrStatsW, CompareMeans,
-    ttest_ind, ztest, zconfint)
+    DescrStatsWAccumulator, ttest_ind, ztest, zconfint)
 #import statsmodels.stats.weightstats as smws
 
 class Holder(object):
@@ -172,6 +172,108 @@ class TestSim2(CheckExternalMixin):
         cls.get_descriptives()
 
 
+class CheckAccumulatorMixin(CheckExternalMixin):
+    # same results when the data is added in chunks
+
+    @classmethod
+    def get_descriptives(cls, ddof=0):
+        acc = DescrStatsWAccumulator(ddof)
+        for chunk in np.array_split(np.arange(len(cls.weights)), 3):
+            acc.update(cls.data[chunk], cls.weights[chunk])
+        cls.descriptive = acc
+
+
+class TestSim1Accumulator(CheckAccumulatorMixin, TestSim1):
+    pass
+
+
+class TestSim2Accumulator(CheckAccumulatorMixin, TestSim2):
+    pass
+
+
+def test_accumulator():
+    np.random.seed(9876)
+    x = 1e5 + np.random.randn(1000, 3)
+    w = np.random.randint(1, 4, 1000)
+    d = DescrStatsW(x, w, ddof=1)
+
+    acc1 = DescrStatsWAccumulator(ddof=1)
+    acc2 = DescrStatsWAccumulator(ddof=1)
+    for i, chunk in enumerate(np.array_split(np.arange(1000), 7)):
+        acc = acc1 if i % 2 else acc2
+        acc.update(x[chunk], w[chunk])
+        # cached values are reset by the next update
+        acc.mean, acc.std_mean
+    acc = DescrStatsWAccumulator(ddof=1).merge(acc1).merge(acc2)
+    assert_equal(acc.sum_weights, d.sum_weights)
+    for attr in ['mean', 'sum', 'var', 'std', 'std_mean']:
+        assert_allclose(getattr(acc, attr), getattr(d, attr), rtol=1e-10)
+    assert_allclose(acc.cov, d.cov, rtol=1e-7)
+    assert_allclose(acc.corrcoef, d.corrcoef, rtol=1e-7, atol=1e-9)
+    assert_allclose(acc.quantile([0, 0.2, 0.5, 1], return_pandas=False),
+                    d.quantile([0, 0.2, 0.5, 1], return_pandas=False),
+                    rtol=1e-13)
+    for res, res_ in zip(acc.ttest_mean(1e5), d.ttest_mean(1e5)):
+        assert_allclose(res, res_, rtol=1e-7)
+    assert_allclose(acc.zconfint_mean(), d.zconfint_mean(), rtol=1e-13)
+
+    x2 = 1e5 + 0.1 + np.random.randn(200, 3)
+    d2 = DescrStatsW(x2)
+    for usevar in ['pooled', 'unequal']:
+        for res, res_ in zip(acc.get_compare(d2).ttest_ind(usevar=usevar),
+                             d.get_compare(d2).ttest_ind(usevar=usevar)):
+            assert_allclose(res, res_, rtol=1e-7)
+        assert_allclose(CompareMeans(d2, acc).tconfint_diff(usevar=usevar),
+                        CompareMeans(d2, d).tconfint_diff(usevar=usevar),
+                        rtol=1e-7)
+
+    assert_raises(ValueError, acc.update, x[:, :2])
+
+    # the data is not stored
+    for attr in ['data', 'weights', 'demeaned', 'asrepeats']:
+        assert_(not hasattr(acc, attr))
+    acc = DescrStatsWAccumulator()
+    assert_equal(acc.sum_weights, 0)
+    for attr in ['mean', 'var', 'std_mean', 'cov']:
+        assert_raises(ValueError, getattr, acc, attr)
+    assert_raises(ValueError, acc.ttest_mean)
+    assert_raises(ValueError, acc.quantile, 0.5)
+
+
+def test_accumulator_sketch():
+    np.random.seed(9876)
+    x = np.random.randn(20000)
+    acc = DescrStatsWAccumulator(max_bins=200)
+    for chunk in np.array_split(x, 10):
+        acc.update(chunk)
+    assert_(len(acc._bins[0][0]) <= 400)
+    probs = np.array([0, 0.01, 0.25, 0.5, 0.9, 1])
+    qtl = acc.quantile(probs, return_pandas=False)
+    qtl_ = DescrStatsW(x).quantile(probs, return_pandas=False)
+    assert_allclose(qtl[[0, -1]], qtl_[[0, -1]], rtol=1e-13)
+    # error in terms of probability
+    assert_allclose(stats.norm.cdf(qtl[1:-1]), probs[1:-1], atol=0.01)
+
+    # the bins are smaller in the tails
+    x = np.random.exponential(size=200000)
+    acc = DescrStatsWAccumulator(max_bins=200)
+    for chunk in np.array_split(x, 50):
+        acc.update(chunk)
+    probs = np.array([0.001, 0.01, 0.5, 0.99, 0.999])
+    qtl = acc.quantile(probs, return_pandas=False)
+    err = np.abs(stats.expon.cdf(qtl) - probs)
+    assert_((err < 3 * np.sqrt(probs * (1 - probs)) / 200).all())
+    assert_(err[-1] < 0.0005)
+
+    # integer data with few distinct values is exact
+    xi = np.random.randint(0, 50, size=3000)
+    acc = DescrStatsWAccumulator(max_bins=25)
+    for chunk in np.array_split(xi, 5):
+        acc.update(chunk)
+    assert_equal(acc.quantile(probs).values,
+                 DescrStatsW(xi).quantile(probs).values)
+
+
 class TestWeightstats(object):
 
     def __init__(self):
@@ -273,15 +273,11 @@ class DescrStatsW(object):
         probs = np.asarray(probs)
         probs = np.atleast_1d(probs)
 
-        if self.data.ndim == 1:
-            rslt = self._quantile(self.data, probs)
+        rslt = self._quantiles(probs)
+        if rslt.ndim == 1:
             if return_pandas:
                 rslt = pd.Series(rslt, index=probs)
         else:
-            rslt = []
-            for vec in self.data.T:
-                rslt.append(self._quantile(vec, probs))
-            rslt = np.column_stack(rslt)
             if return_pandas:
                 columns = ["col%d" % (j+1) for j in range(rslt.shape[1])]
                 rslt = pd.DataFrame(data=rslt, columns=columns, index=probs)
@@ -292,9 +288,16 @@ class DescrStatsW(object):
         return rslt
 
 
+    def _quantiles(self, probs):
+        # quantiles of all columns, 2-D with columns for variables if data
+        # is 2-D
+        if self.data.ndim == 1:
+            return self._quantile(self.data, probs)
+        return np.column_stack([self._quantile(vec, probs)
+                                for vec in self.data.T])
+
     def _quantile(self, vec, probs):
         # Helper function to calculate weighted quantiles for one column.
-        # Follows definition from SAS documentation.
         # Returns ndarray
 
         import pandas as pd
@@ -307,19 +310,7 @@ class DescrStatsW(object):
         weights = dfg.values[:, 0]
         values = np.asarray(dfg.index)
 
-        cweights = np.cumsum(weights)
-        totwt = cweights[-1]
-        targets = probs * totwt
-        ii = np.searchsorted(cweights, targets)
-
-        rslt = values[ii]
-
-        # Exact hits
-        jj = np.flatnonzero(np.abs(targets - cweights[ii]) < 1e-10)
-        jj = jj[ii[jj] < len(cweights) - 1]
-        rslt[jj] = (values[ii[jj]] + values[ii[jj]+1]) / 2
-
-        return rslt
+        return _weighted_quantile(values, weights, probs)
 
 
     def tconfint_mean(self, alpha=0.05, alternative='two-sided'):
@@ -593,7 +584,7 @@ class DescrStatsW(object):
         CompareMeans
 
         '''
-        if not isinstance(other, self.__class__):
+        if not isinstance(other, DescrStatsW):
             d2 = DescrStatsW(other, weights)
         else:
             d2 = other
@@ -609,6 +600,267 @@ class DescrStatsW(object):
         return np.repeat(self.data, w_int, axis=0)
 
 
+def _weighted_quantile(values, weights, probs):
+    # quantiles of distinct sorted values with weights aggregated over ties
+    # Follows definition from SAS documentation.
+    cweights = np.cumsum(weights)
+    totwt = cweights[-1]
+    targets = probs * totwt
+    ii = np.searchsorted(cweights, targets)
+
+    rslt = values[ii]
+
+    # Exact hits
+    jj = np.flatnonzero(np.abs(targets - cweights[ii]) < 1e-10)
+    jj = jj[ii[jj] < len(cweights) - 1]
+    rslt[jj] = (values[ii[jj]] + values[ii[jj]+1]) / 2
+
+    return rslt
+
+
+def _merge_bins(values, weights, max_bins):
+    # aggregate weights over ties of the values, and if there are more than
+    # 2 * max_bins distinct values, compress them to max_bins bins. The bins
+    # are equally spaced in the arcsine scale of the cumulative probability,
+    # the scale function k_1 of the t-digest, so that the bins are smaller
+    # in the tails. The minimum and maximum stay in separate bins.
+    values, idx = np.unique(values, return_inverse=True)
+    weights = np.bincount(idx, weights=weights)
+    if len(values) <= 2 * max_bins:
+        return values, weights
+
+    inner_v, inner_w = values[1:-1], weights[1:-1]
+    cweights = np.cumsum(inner_w)
+    # a bin is assigned by the midpoint of the weight of each value
+    mid = (cweights - inner_w / 2.) / cweights[-1]
+    k = (np.arcsin(2 * mid - 1) / np.pi + 0.5) * (max_bins - 2)
+    bin_idx = np.minimum(k.astype(int), max_bins - 3)
+    bin_w = np.bincount(bin_idx, weights=inner_w)
+    bin_v = np.bincount(bin_idx, weights=inner_w * inner_v)
+    nonzero = bin_w > 0
+    bin_v = bin_v[nonzero] / bin_w[nonzero]
+    values = np.concatenate(([values[0]], bin_v, [values[-1]]))
+    weights = np.concatenate(([weights[0]], bin_w[nonzero], [weights[-1]]))
+    return values, weights
+
+
+class _NotStored(object):
+    # attribute of DescrStatsW that requires the data
+
+    def __init__(self, name):
+        self.name = name
+
+    def __get__(self, obj, type=None):
+        if obj is None:
+            return self
+        raise AttributeError("%s is not available, the accumulator does not "
+                             "store the data" % self.name)
+
+
+class DescrStatsWAccumulator(DescrStatsW):
+    '''weighted descriptive statistics and tests that are updated in chunks
+
+    The data is not stored. The weighted mean and the weighted cross
+    products of the deviations from the mean are accumulated with the
+    pairwise updating formulas of Chan, Golub and LeVeque, and the
+    quantiles are computed from a mergeable sketch of weighted values.
+    Accumulators of different chunks, for example computed in different
+    processes, can be combined with `merge`.
+
+    Descriptive statistics, the one sample tests and confidence intervals,
+    and the comparison of means with `get_compare` or `CompareMeans` are
+    the same as for `DescrStatsW` of the concatenated data.
+
+    Parameters
+    ----------
+    ddof : int
+        default ddof=0, degrees of freedom correction used for second moments,
+        var, std, cov, corrcoef.
+    max_bins : int
+        maximum number of bins of the quantile sketch for each variable.
+        The quantiles are exact as long as the number of distinct values
+        is at most ``2 * max_bins``.
+
+    Notes
+    -----
+    If the number of distinct values is larger than ``2 * max_bins``, then
+    the values are grouped into bins, each represented by the weighted mean
+    of its values. As in the t-digest of Dunning and Ertl, the bins are
+    equally spaced in ``arcsin(2 q - 1)`` where q is the cumulative
+    probability, so the bins are smaller in the tails. The error of the
+    quantile at probability q in terms of probability is of the order of
+    ``sqrt(q (1 - q)) / max_bins``, it can still be large relative to the
+    tail probability for extreme quantiles. The minimum and maximum are kept
+    exactly.
+
+    The data is not stored, `data`, `weights`, `demeaned` and `asrepeats`
+    of `DescrStatsW` are not available and raise an AttributeError.
+
+    Examples
+    --------
+    >>> np.random.seed(0)
+    >>> x = 1.0 + np.random.randn(1000, 3)
+    >>> w = np.random.randint(1, 4, 1000)
+    >>> acc = DescrStatsWAccumulator()
+    >>> for x_chunk, w_chunk in zip(np.array_split(x, 10),
+    ...                             np.array_split(w, 10)):
+    ...     acc.update(x_chunk, w_chunk)
+    >>> np.allclose(acc.mean, DescrStatsW(x, w).mean)
+    True
+    >>> tstat, pval, df = acc.ttest_mean(1)
+
+    References
+    ----------
+    Chan, T. F., G. H. Golub, and R. J. LeVeque. 1983. "Algorithms for
+    Computing the Sample Variance: Analysis and Recommendations." The
+    American Statistician 37 (3): 242-47.
+
+    Dunning, T., and O. Ertl. 2019. "Computing Extremely Accurate Quantiles
+    Using t-Digests." arXiv:1902.04023.
+    '''
+
+    # cached attributes that depend on the accumulated data
+    _cached = ['sum_weights', 'nobs', 'sum', 'mean', 'sumsquares', 'var',
+               '_var', 'std', 'cov', 'corrcoef', 'std_mean']
+
+    data = _NotStored('data')
+    weights = _NotStored('weights')
+    demeaned = _NotStored('demeaned')
+    asrepeats = _NotStored('asrepeats')
+
+    def __init__(self, ddof=0, max_bins=1000):
+        self.ddof = ddof
+        self.max_bins = max_bins
+        self._sum_weights = 0.
+        self._mean = None
+        self._m2 = None
+        self._bins = None
+
+    def update(self, data, weights=None):
+        '''add a chunk of observations
+
+        Parameters
+        ----------
+        data : array_like, 1-D or 2-D
+            observations in rows, the number of columns has to be the same
+            in all chunks
+        weights : None or 1-D ndarray
+            weights for each observation, with same length as zero axis of
+            data
+
+        Returns
+        -------
+        self : the instance is updated in place
+        '''
+        data = np.asarray(data, dtype=np.float64)
+        if weights is None:
+            weights = np.ones(data.shape[0])
+        else:
+            weights = np.atleast_1d(np.asarray(weights).squeeze()).astype(float)
+
+        sum_weights = weights.sum()
+        if sum_weights == 0:
+            return self
+        mean = np.dot(data.T, weights) / sum_weights
+        demeaned = data - mean
+        if data.ndim == 1:
+            m2 = np.dot(demeaned**2, weights)
+            bins = [(data, weights)]
+        else:
+            m2 = np.dot(weights * demeaned.T, demeaned)
+            bins = [(vec, weights) for vec in data.T]
+        return self._combine(sum_weights, mean, m2, bins)
+
+    def merge(self, other):
+        '''add the observations of another accumulator
+
+        Parameters
+        ----------
+        other : instance of DescrStatsWAccumulator
+
+        Returns
+        -------
+        self : the instance is updated in place, `other` is not changed
+        '''
+        if other._mean is None:
+            return self
+        return self._combine(other._sum_weights, other._mean, other._m2,
+                             other._bins)
+
+    def _combine(self, sum_weights, mean, m2, bins):
+        if self._mean is None:
+            self._sum_weights = sum_weights
+            self._mean = np.copy(mean)
+            self._m2 = np.copy(m2)
+            self._bins = [_merge_bins(v, w, self.max_bins) for v, w in bins]
+        else:
+            if np.shape(mean) != np.shape(self._mean):
+                raise ValueError("data needs to have the same number of "
+                                 "columns in all chunks")
+            total = self._sum_weights + sum_weights
+            delta = mean - self._mean
+            frac = sum_weights / total
+            self._mean = self._mean + delta * frac
+            if np.ndim(delta) == 0:
+                outer = delta**2
+            else:
+                outer = np.outer(delta, delta)
+            self._m2 = self._m2 + m2 + outer * self._sum_weights * frac
+            self._sum_weights = total
+            self._bins = [_merge_bins(np.concatenate((v1, v2)),
+                                      np.concatenate((w1, w2)), self.max_bins)
+                          for (v1, w1), (v2, w2) in zip(self._bins, bins)]
+
+        for name in self._cached:
+            self.__dict__.pop(name, None)
+        return self
+
+    def _check_nobs(self):
+        if self._mean is None:
+            raise ValueError("no observations added")
+
+    @OneTimeProperty
+    def sum_weights(self):
+        return self._sum_weights
+
+    @OneTimeProperty
+    def sum(self):
+        '''weighted sum of data'''
+        self._check_nobs()
+        return self._mean * self._sum_weights
+
+    @OneTimeProperty
+    def mean(self):
+        '''weighted mean of data'''
+        self._check_nobs()
+        return self._mean
+
+    @OneTimeProperty
+    def sumsquares(self):
+        '''weighted sum of squares of demeaned data'''
+        self._check_nobs()
+        if np.ndim(self._m2) == 2:
+            return np.diag(self._m2).copy()
+        return self._m2
+
+    @OneTimeProperty
+    def cov(self):
+        '''weighted covariance of data if data is 2 dimensional
+
+        assumes variables in columns and observations in rows
+        uses default ddof
+        '''
+        self._check_nobs()
+        return self._m2 / (self.sum_weights - self.ddof)
+
+    def _quantiles(self, probs):
+        self._check_nobs()
+        rslt = [_weighted_quantile(values, weights, probs)
+                for values, weights in self._bins]
+        if np.ndim(self._mean) == 0:
+            return rslt[0]
+        return np.column_stack(rslt)
+
 
 def _tstat_generic(value1, value2, std_diff, dof, alternative, diff=0):
     '''generic ttest to save typing'''
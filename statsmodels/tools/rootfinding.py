@@ -218,3 +218,127 @@ def brentq_expanding(func, low=None, upp=None, args=(), xtol=1e-5,
         return val, info
     else:
         return res
+
+
+def regula_falsi_expanding(func, low, upp=None, args=(), start_upp=None,
+                           xtol=1e-10, rtol=1e-12, max_it=100, maxiter=200,
+                           factor=10, max_upp=np.inf):
+    '''find the roots of many monotonic functions by expanding and regula falsi
+
+    This is a vectorized root finder. ``func`` is evaluated elementwise at
+    an array of points, each element has its own bracket and is solved
+    independently. Elements that have converged are not evaluated again.
+
+    Parameters
+    ----------
+    func : callable
+        ``func(x, *args)`` returns an array of the same shape as the 1-d
+        array ``x``, the arrays in args are subset to the same elements as
+        ``x``.
+    low : float or array_like
+        lower bound of the bracket.
+    upp : float, array_like or None
+        upper bound of the bracket. If None, then the upper bound is
+        searched for starting at ``start_upp`` and multiplying it by
+        ``factor`` until the sign of ``func`` differs from the one at ``low``.
+        The expansion assumes that the upper bound is positive.
+    args : tuple of array_like
+        additional arguments for ``func``, they are broadcast with ``low``,
+        ``upp`` and ``start_upp``.
+    start_upp : float, array_like or None
+        starting upper bound for the expansion. If None, then it is set to 1.
+    xtol, rtol : float
+        convergence tolerance, absolute and relative to the root, for the
+        width of the bracket.
+    max_it : int
+        maximum number of expansion steps.
+    maxiter : int
+        maximum number of regula falsi iterations.
+    factor : float
+        expansion factor for the upper bound, default is 10.
+    max_upp : float
+        the expanded upper bound is not larger than ``max_upp``. Elements
+        without a bracket at ``max_upp`` are not expanded further, for
+        functions that are expensive or do not return for large arguments.
+
+    Returns
+    -------
+    x : ndarray
+        roots, nan for elements for which no bracket was found or for which
+        the function returned nan.
+    converged : ndarray, bool
+        True for elements that have converged.
+    iterations : int
+        number of iterations of the regula falsi stage.
+
+    Notes
+    -----
+    This uses the Illinois modification of regula falsi, which halves the
+    function value at the end of the bracket that is retained twice in a row.
+    It converges superlinearly and always keeps a bracket of the root.
+    '''
+    expand = upp is None
+    if expand:
+        upp = 1. if start_upp is None else start_upp
+    arrays = np.broadcast_arrays(*((low, upp) + tuple(args)))
+    shape = arrays[0].shape
+    a, b = [np.array(x, dtype=np.float64).ravel() for x in arrays[:2]]
+    args = [np.asarray(x).ravel() for x in arrays[2:]]
+
+    def f(x, idx):
+        return np.asarray(func(x, *[arg[idx] for arg in args]),
+                          dtype=np.float64)
+
+    idx_all = np.arange(a.size)
+    fa = f(a, idx_all)
+    fb = f(b, idx_all)
+
+    if expand:
+        same = fa * fb > 0
+        n_it = 0
+        same &= b < max_upp
+        while same.any() and n_it < max_it:
+            idx = np.flatnonzero(same)
+            a[idx], fa[idx] = b[idx], fb[idx]
+            b[idx] = np.minimum(b[idx] * factor, max_upp)
+            fb[idx] = f(b[idx], idx)
+            same[idx] = (fa[idx] * fb[idx] > 0) & (b[idx] < max_upp)
+            n_it += 1
+
+    x = np.where(fa == 0, a, b)
+    done = (fa == 0) | (fb == 0)
+    failed = ~done & ~(fa * fb < 0)    # no bracket or nan
+    active = ~done & ~failed
+    side = np.zeros(a.size, np.int8)
+    iterations = 0
+    while active.any() and iterations < maxiter:
+        idx = np.flatnonzero(active)
+        a_, b_, fa_, fb_ = a[idx], b[idx], fa[idx], fb[idx]
+        c = b_ - fb_ * (b_ - a_) / (fb_ - fa_)
+        # guard against round-off, bisect if c is not inside the bracket
+        outside = ~((c > np.minimum(a_, b_)) & (c < np.maximum(a_, b_)))
+        c[outside] = 0.5 * (a_ + b_)[outside]
+        fc = f(c, idx)
+
+        left = fa_ * fc > 0    # root is between c and b
+        right = fb_ * fc > 0   # root is between a and c
+        # Illinois step, halve the function value at the retained end
+        fb_[left & (side[idx] == 1)] *= 0.5
+        fa_[right & (side[idx] == -1)] *= 0.5
+        a_ = np.where(left, c, a_)
+        fa_ = np.where(left, fc, fa_)
+        b_ = np.where(right, c, b_)
+        fb_ = np.where(right, fc, fb_)
+        side[idx] = np.where(left, 1, np.where(right, -1, 0))
+        a[idx], b[idx], fa[idx], fb[idx] = a_, b_, fa_, fb_
+        x[idx] = c
+
+        tol = xtol + rtol * np.abs(c)
+        conv = (fc == 0) | (np.abs(b_ - a_) <= tol)
+        failed[idx] = np.isnan(fc)
+        done[idx] = conv
+        active[idx] = ~conv & ~failed[idx]
+        iterations += 1
+
+    x[failed] = np.nan
+    return x.reshape(shape), done.reshape(shape), iterations
@@ -7,10 +7,11 @@ Author: Josef Perktold
 """
 
 import numpy as np
-from statsmodels.tools.rootfinding import brentq_expanding
+from statsmodels.tools.rootfinding import (brentq_expanding,
+                                           regula_falsi_expanding)
 
 from numpy.testing import (assert_allclose, assert_equal, assert_raises,
-                           assert_array_less)
+                           assert_array_less, assert_)
 
 def func(x, a):
     f = (x - a)**3
@@ -91,3 +92,36 @@ def test_brentq_expanding():
         assert_equal(info1[k], info.__dict__[k])
 
     assert_allclose(info.root, a, rtol=1e-5)
+
+
+def test_regula_falsi_expanding():
+    a = np.array([0.5, 3, 50, 500000, -5])
+    x, converged, n_iter = regula_falsi_expanding(func, 1e-8, args=(a,))
+    assert_allclose(x[:-1], a[:-1], rtol=1e-8)
+    assert_equal(converged, [True] * 4 + [False])
+    assert_(np.isnan(x[-1]))
+
+    # decreasing function, fixed bounds and broadcasting
+    a = np.array([[-0.5], [0.25]])
+    x, converged, _ = regula_falsi_expanding(funcn, -1, upp=[1, 2, 3],
+                                             args=(a,), xtol=1e-12)
+    assert_equal(x.shape, (2, 3))
+    assert_(converged.all())
+    assert_allclose(x, a * np.ones(3), rtol=1e-8)
+
+    # nan in function values
+    x, converged, _ = regula_falsi_expanding(func_nan, 2, args=(5, [0, 10]))
+    assert_allclose(x[0], 5, rtol=1e-8)
+    assert_equal(converged, [True, False])
+
+    # the expansion stops at max_upp, func is not evaluated beyond it
+    def func_max(x, a):
+        assert_((x <= 1000).all())
+        return func(x, a)
+
+    a = np.array([0.5, 1000, 5000])
+    x, converged, _ = regula_falsi_expanding(func_max, 1e-8, args=(a,),
+                                             max_upp=1000)
+    assert_allclose(x[:2], a[:2], rtol=1e-8)
+    assert_equal(converged, [True, True, False])
+    assert_(np.isnan(x[-1]))